@@ -6,6 +6,7 @@ import dash_bootstrap_components as dbc
 
 # Local imports
 from simulator.config import Config
+from simulator.result_cache import ResultCache
 from components.navbar import build_navbar
 from components.character_settings import build_character_settings
 from components.additional_damage import build_additional_damage_panel
@@ -18,6 +19,8 @@ import callbacks.ui_callbacks as cb_ui
 import callbacks.core_callbacks as cb_core
 import callbacks.plots_callbacks as cb_plots
 import callbacks.validation_callbacks as cb_validation
+import callbacks.preview_callbacks as cb_preview
+import callbacks.speculative_callbacks as cb_speculative
 
 
 # Create a Config instance
@@ -26,6 +29,7 @@ cfg = Config()
 # Diskcache manager to store job state
 cache = diskcache.Cache('./cache')
 background_callback_manager = DiskcacheManager(cache)
+result_cache = ResultCache(cache)   # Simulation results per (weapon, config), shared with the background jobs
 
 # Initialize the Dash app with Bootstrap theme
 dbc_css = "https://cdn.jsdelivr.net/gh/AnnMarieW/dash-bootstrap-templates/dbc.min.css"
@@ -64,7 +68,12 @@ app.index_string = """
 app.layout = dbc.Container([
     dcc.Store(id='config-store', storage_type='session'),
     dcc.Store(id='intermediate-value'),             # Store for calculation results
+    dcc.Store(id='results-id'),                     # Unique ID of the latest calculation results (figures memoization)
     dcc.Store(id='immunities-store', data=cfg.TARGET_IMMUNITIES, storage_type='session'),  # keeps user edits
+    dcc.Store(id='validation-ranges', data=cb_validation.build_validation_ranges(cfg)),   # Used by clientside callbacks
+    dcc.Store(id='preview-trigger'),                # Debounced trigger of the instant DPS preview
+    dcc.Store(id='speculative-status'),             # Weapons precomputed by the latest speculative job
+    dcc.Store(id='build-a-store', storage_type='session'),  # Saved config of build A (build comparison)
     dcc.Store(id='is-calculating', data=False),     # Store for tracking calculation state
     dcc.Store(id='calc-progress', data={'current': 0, 'total': 0, 'results': {}}),
     dcc.Interval(id='calc-interval', interval=200, disabled=True),  # ticks while calculating
@@ -150,9 +159,11 @@ app.layout = dbc.Container([
 
 # Register callbacks
 cb_ui.register_ui_callbacks(app, cfg)
-cb_core.register_core_callbacks(app, cfg)
-cb_plots.register_plots_callbacks(app)
+cb_core.register_core_callbacks(app, cfg, result_cache)
+cb_plots.register_plots_callbacks(app, result_cache)
 cb_validation.register_validation_callbacks(app, cfg)
+cb_preview.register_preview_callbacks(app, cfg)
+cb_speculative.register_speculative_callbacks(app, cfg, result_cache)
 
 if __name__ == '__main__':
     app.run(debug=True)
@@ -0,0 +1,100 @@
+// Clientside callbacks: pure presentation and input validation logic, executed in the browser (no server round trip).
+// Validation ranges and defaults are exported from the Python Config into the 'validation-ranges' store.
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+
+    ui: {
+        // Show widgets when the switch is ON, hide them otherwise
+        toggleDisplay: function (show) {
+            return show ? {'display': 'flex'} : {'display': 'none'};
+        },
+
+        // Toggle melee/ranged dependent params OFF and disabled
+        toggleMeleeParams: function (combatType, ranges) {
+            const noUpdate = window.dash_clientside.no_update;
+            const n = window.dash_clientside.callback_context.outputs_list[0].length;  // number of matching melee rows
+            const mightyDefaults = ranges['melee_params'];
+
+            if (combatType === 'ranged') {
+                return [
+                    Array(n).fill(false),               // Turn OFF all melee switches
+                    mightyDefaults['ranged']['mighty'], // Set mighty to ranged default
+                    Array(n).fill(true),                // Disable all melee switches
+                    false,                              // Enable mighty input
+                ];
+            } else if (combatType === 'melee') {
+                return [
+                    Array(n).fill(noUpdate),            // Don't update the melee switches
+                    mightyDefaults['melee']['mighty'],  // Set mighty to melee default
+                    Array(n).fill(false),               // Enable all melee switches
+                    true,                               // Disable mighty input
+                ];
+            }
+            return noUpdate;
+        },
+    },
+
+    validation: {
+        // Clamp a single value into its [min, max] range, fallback to default if empty or invalid
+        clamp: function (val, limits) {
+            if (val === null || val === undefined || val === '') {
+                return limits['default'];
+            }
+            const num = Number(val);
+            if (Number.isNaN(num)) {
+                return limits['default'];
+            }
+            return Math.max(limits['min'], Math.min(limits['max'], num));
+        },
+
+        // Validation for separate widget inputs, only the widget that changed is updated
+        validateInputs: function () {
+            const noUpdate = window.dash_clientside.no_update;
+            const args = Array.from(arguments);
+            const ranges = args.pop();          // Last argument is the 'validation-ranges' store
+            const context = window.dash_clientside.callback_context;
+            const inputsList = context.inputs_list;
+            const widgetId = context.triggered_id;
+
+            return inputsList.map(function (input, idx) {
+                if (input.id !== widgetId) {
+                    return noUpdate;
+                }
+                const validated = window.dash_clientside.validation.clamp(args[idx], ranges['inputs'][widgetId]);
+                return validated === args[idx] ? noUpdate : validated;
+            });
+        },
+
+        // Validation for additional damage inputs (dice, sides, flat) of a single damage source
+        validateAdditionalDamage: function (widgetId, dice, sides, flat, ranges) {
+            const limits = ranges['add_dmg'][widgetId['name']];
+            const clamp = window.dash_clientside.validation.clamp;
+            return [
+                clamp(dice, limits['dice']),
+                clamp(sides, limits['sides']),
+                clamp(flat, limits['flat']),
+            ];
+        },
+
+        // Validation for a single immunity input
+        validateImmunity: function (val, widgetId, ranges) {
+            const validated = window.dash_clientside.validation.clamp(val, ranges['immunities'][widgetId['name']]);
+            return validated === val ? window.dash_clientside.no_update : validated;
+        },
+    },
+
+    preview: {
+        DEBOUNCE_MS: 400,   // Quiet period after the last edit before the DPS preview is refreshed
+        lastEdit: 0,        // Token of the latest edit, older pending edits are dropped
+
+        // Debounce a burst of edits into a single update of the 'preview-trigger' store
+        debounceTrigger: function () {
+            const preview = window.dash_clientside.preview;
+            const token = ++preview.lastEdit;
+            return new Promise(function (resolve) {
+                setTimeout(function () {
+                    resolve(token === preview.lastEdit ? token : window.dash_clientside.no_update);
+                }, preview.DEBOUNCE_MS);
+            });
+        },
+    },
+});
@@ -1,20 +1,122 @@
 # Standard library imports
 import traceback
+import uuid
 from dataclasses import asdict
 from functools import wraps
 
 # Third-party imports
 import dash
 from dash import html, Input, Output, State, ALL, ctx
-import dash_bootstrap_components as dbc
-import pandas as pd
 
 # Local imports
 from simulator.damage_simulator import DamageSimulator
 from simulator.config import Config
+from simulator.weapon_race import WeaponRace
+from simulator.stat_weights import StatWeights
+from simulator.sample_planner import SamplePlanner
+from simulator.build_comparison import BuildComparison
+from simulator.time_to_kill import TimeToKill
+from components.results_tab import (build_comparative_table, build_detail_accordion_items, build_weapon_detail,
+                                    build_build_comparison_table)
 
 
-def register_core_callbacks(app, cfg):
+# Widgets that define the user config, in the order of build_user_config() arguments
+USER_CONFIG_WIDGETS = [
+    ('ab-input', 'value'),
+    ('ab-capped-input', 'value'),
+    ('ab-prog-dropdown', 'value'),
+    ('toon-size-dropdown', 'value'),
+    ('combat-type-dropdown', 'value'),
+    ('mighty-input', 'value'),
+    ('enhancement-set-bonus-dropdown', 'value'),
+    ('str-mod-input', 'value'),
+    ({'type': 'melee-switch', 'name': 'two-handed'}, 'value'),
+    ({'type': 'melee-switch', 'name': 'weaponmaster'}, 'value'),
+    ('keen-switch', 'value'),
+    ('improved-crit-switch', 'value'),
+    ('overwhelm-crit-switch', 'value'),
+    ('dev-crit-switch', 'value'),
+    ('shape-weapon-switch', 'value'),
+    ('shape-weapon-dropdown', 'value'),
+    ({'type': 'add-dmg-switch', 'name': ALL}, 'value'),
+    ({'type': 'add-dmg-input1', 'name': ALL}, 'value'),
+    ({'type': 'add-dmg-input2', 'name': ALL}, 'value'),
+    ({'type': 'add-dmg-input3', 'name': ALL}, 'value'),
+    ('target-ac-input', 'value'),
+    ('rounds-input', 'value'),
+    ('damage-limit-switch', 'value'),
+    ('damage-limit-input', 'value'),
+    ('dmg-vs-race-switch', 'value'),
+    ('shared-crit-dice-switch', 'value'),
+    ('racing-mode-switch', 'value'),
+    ('stratified-rolls-switch', 'value'),
+    ('mean-only-switch', 'value'),
+    ('relative-change-input', 'value'),
+    ('relative-std-input', 'value'),
+    ('target-error-input', 'value'),
+    ('target-immunities-switch', 'value'),
+    ({'type': 'immunity-input', 'name': ALL}, 'value'),
+]
+
+
+def build_user_config(cfg, current_cfg, ab, ab_capped, ab_prog, toon_size, combat_type, mighty, enhancement_set_bonus,
+                      str_mod, two_handed, weaponmaster, keen, improved_crit, overwhelm_crit, dev_crit, shape_weapon_override, shape_weapon,
+                      add_dmg_state, add_dmg1, add_dmg2, add_dmg3,
+                      target_ac, rounds, dmg_limit_flag, dmg_limit, dmg_vs_race, shared_crit_dice,
+                      racing_mode, stratified_rolls, mean_only, relative_change, relative_std, target_error, immunity_flag, immunity_values):
+    """Build the user config dict from the widget values (see USER_CONFIG_WIDGETS), convert with Config(**dict)"""
+    if current_cfg is None:
+        # fallback
+        current_cfg = asdict(cfg)
+        print("current_cfg was None and is initialized")
+
+    # build config dict instead of mutating globals
+    current_cfg['AB'] = ab
+    current_cfg['AB_CAPPED'] = ab_capped
+    current_cfg['AB_PROG'] = ab_prog
+    current_cfg['TOON_SIZE'] = toon_size
+    current_cfg['COMBAT_TYPE'] = combat_type
+    current_cfg['MIGHTY'] = mighty
+    current_cfg['ENHANCEMENT_SET_BONUS'] = int(enhancement_set_bonus)
+    current_cfg['STR_MOD'] = str_mod
+    current_cfg['TWO_HANDED'] = two_handed
+    current_cfg['WEAPONMASTER'] = weaponmaster
+    current_cfg['KEEN'] = keen
+    current_cfg['IMPROVED_CRIT'] = improved_crit
+    current_cfg['OVERWHELM_CRIT'] = overwhelm_crit
+    current_cfg['DEV_CRIT'] = dev_crit
+    current_cfg['SHAPE_WEAPON_OVERRIDE'] = shape_weapon_override
+    current_cfg['SHAPE_WEAPON'] = shape_weapon
+    current_cfg['TARGET_AC'] = target_ac
+    current_cfg['ROUNDS'] = rounds
+    current_cfg['DAMAGE_LIMIT_FLAG'] = dmg_limit_flag
+    current_cfg['DAMAGE_LIMIT'] = dmg_limit
+    current_cfg['DAMAGE_VS_RACE'] = dmg_vs_race
+    current_cfg['SHARED_CRIT_DICE'] = shared_crit_dice
+    current_cfg['RACING_MODE'] = racing_mode
+    current_cfg['STRATIFIED_ROLLS'] = stratified_rolls
+    current_cfg['MEAN_ONLY'] = mean_only
+    current_cfg['CHANGE_THRESHOLD'] = relative_change / 100     # convert to fraction
+    current_cfg['STD_THRESHOLD'] = relative_std / 100           # convert to fraction
+    current_cfg['TARGET_DPS_ERROR'] = target_error or 0.0
+    current_cfg['TARGET_IMMUNITIES_FLAG'] = immunity_flag
+
+    # Map immunity inputs back into a dictionary (normalize % -> fraction)
+    current_cfg['TARGET_IMMUNITIES'] = {
+        name: val / 100
+        for name, val in zip(cfg.TARGET_IMMUNITIES.keys(), immunity_values)
+    }
+
+    # Update additional damage sources
+    current_cfg['ADDITIONAL_DAMAGE'] = {
+        key: [add_dmg_state[idx], {next(iter(val[1].keys())): [add_dmg1[idx], add_dmg2[idx], add_dmg3[idx]]}]
+        for idx, (key, val) in enumerate(cfg.ADDITIONAL_DAMAGE.items())
+    }
+
+    return current_cfg
+
+
+def register_core_callbacks(app, cfg, result_cache=None):
 
     spinner_style = {
         'display': 'flex',
@@ -62,6 +164,7 @@ def register_core_callbacks(app, cfg):
         outputs=[
             Output('is-calculating', 'data'),
             Output('intermediate-value', 'data'),
+            Output('results-id', 'data'),
             Output('config-store', 'data'),
             Output('progress-text', 'children'),
             Output('global-error-body', 'children'),         # extra: error text
@@ -74,36 +177,8 @@ def register_core_callbacks(app, cfg):
         ],
         states=[
             State('config-store', 'data'),
-            State('ab-input', 'value'),
-            State('ab-capped-input', 'value'),
-            State('ab-prog-dropdown', 'value'),
-            State('toon-size-dropdown', 'value'),
-            State('combat-type-dropdown', 'value'),
-            State('mighty-input', 'value'),
-            State('enhancement-set-bonus-dropdown', 'value'),
-            State('str-mod-input', 'value'),
-            State({'type': 'melee-switch', 'name': 'two-handed'}, 'value'),
-            State({'type': 'melee-switch', 'name': 'weaponmaster'}, 'value'),
-            State('keen-switch', 'value'),
-            State('improved-crit-switch', 'value'),
-            State('overwhelm-crit-switch', 'value'),
-            State('dev-crit-switch', 'value'),
-            State('shape-weapon-switch', 'value'),
-            State('shape-weapon-dropdown', 'value'),
-            State({'type': 'add-dmg-switch', 'name': ALL}, 'value'),
-            State({'type': 'add-dmg-input1', 'name': ALL}, 'value'),
-            State({'type': 'add-dmg-input2', 'name': ALL}, 'value'),
-            State({'type': 'add-dmg-input3', 'name': ALL}, 'value'),
             State('weapon-dropdown', 'value'),
-            State('target-ac-input', 'value'),
-            State('rounds-input', 'value'),
-            State('damage-limit-switch', 'value'),
-            State('damage-limit-input', 'value'),
-            State('dmg-vs-race-switch', 'value'),
-            State('relative-change-input', 'value'),
-            State('relative-std-input', 'value'),
-            State('target-immunities-switch', 'value'),
-            State({'type': 'immunity-input', 'name': ALL}, 'value')
+            *[State(*widget) for widget in USER_CONFIG_WIDGETS],
         ],
         background=True,  # runs in a worker thread automatically
         cancel=[Input('cancel-calc-button', 'n_clicks')],   # Cancel operation button
@@ -123,189 +198,214 @@ def register_core_callbacks(app, cfg):
         ],  # Disable buttons & clear progress modal when calc starts, re-enable buttons when finishes
         prevent_initial_call=True
     )
-    def run_calculation(set_progress, _, __, current_cfg, ab, ab_capped, ab_prog, toon_size, combat_type, mighty, enhancement_set_bonus,
-                        str_mod, two_handed, weaponmaster, keen, improved_crit, overwhelm_crit, dev_crit, shape_weapon_override, shape_weapon,
-                        add_dmg_state, add_dmg1, add_dmg2, add_dmg3,
-                        weapons, target_ac, rounds, dmg_limit_flag, dmg_limit, dmg_vs_race,
-                        relative_change, relative_std, immunity_flag, immunity_values):
+    def run_calculation(set_progress, _, __, current_cfg, weapons, *widget_values):
 
         if not ctx.triggered_id or not weapons:
         # if spinner['display'] == 'none' or not weapons:
-            return False, dash.no_update, current_cfg, dash.no_update, dash.no_update, False
+            return False, dash.no_update, dash.no_update, current_cfg, dash.no_update, dash.no_update, False
 
         # if ctx.triggered_id == 'calculate-button' or ctx.triggered_id == 'recalculate-button':
         # if spinner['display'] == 'flex':
         print("Starting simulation...")
         # Start calculation
-        if current_cfg is None:
-            # fallback
-            current_cfg = asdict(cfg)
-            print("current_cfg was None and is initialized")
-
-        # build config dict instead of mutating globals
-        current_cfg['AB'] = ab
-        current_cfg['AB_CAPPED'] = ab_capped
-        current_cfg['AB_PROG'] = ab_prog
-        current_cfg['TOON_SIZE'] = toon_size
-        current_cfg['COMBAT_TYPE'] = combat_type
-        current_cfg['MIGHTY'] = mighty
-        current_cfg['ENHANCEMENT_SET_BONUS'] = int(enhancement_set_bonus)
-        current_cfg['STR_MOD'] = str_mod
-        current_cfg['TWO_HANDED'] = two_handed
-        current_cfg['WEAPONMASTER'] = weaponmaster
-        current_cfg['KEEN'] = keen
-        current_cfg['IMPROVED_CRIT'] = improved_crit
-        current_cfg['OVERWHELM_CRIT'] = overwhelm_crit
-        current_cfg['DEV_CRIT'] = dev_crit
-        current_cfg['SHAPE_WEAPON_OVERRIDE'] = shape_weapon_override
-        current_cfg['SHAPE_WEAPON'] = shape_weapon
-        current_cfg['TARGET_AC'] = target_ac
-        current_cfg['ROUNDS'] = rounds
-        current_cfg['DAMAGE_LIMIT_FLAG'] = dmg_limit_flag
-        current_cfg['DAMAGE_LIMIT'] = dmg_limit
-        current_cfg['DAMAGE_VS_RACE'] = dmg_vs_race
-        current_cfg['CHANGE_THRESHOLD'] = relative_change / 100     # convert to fraction
-        current_cfg['STD_THRESHOLD'] = relative_std / 100           # convert to fraction
-        current_cfg['TARGET_IMMUNITIES_FLAG'] = immunity_flag
-
-        # Map immunity inputs back into a dictionary (normalize % -> fraction)
-        current_cfg['TARGET_IMMUNITIES'] = {
-            name: val / 100
-            for name, val in zip(cfg.TARGET_IMMUNITIES.keys(), immunity_values)
-        }
-
-        # Update additional damage sources
-        current_cfg['ADDITIONAL_DAMAGE'] = {
-            key: [add_dmg_state[idx], {next(iter(val[1].keys())): [add_dmg1[idx], add_dmg2[idx], add_dmg3[idx]]}]
-            for idx, (key, val) in enumerate(cfg.ADDITIONAL_DAMAGE.items())
-        }
+        current_cfg = build_user_config(cfg, current_cfg, *widget_values)
 
         # Calculate DPS for all selected weapons
         total = len(weapons)
         user_cfg = Config(**current_cfg)    # convert dict back to Config object
+        use_cache = result_cache is not None and ctx.triggered_id == 'calculate-button'  # Recalculate runs a fresh simulation
         results_dict = {}
-        for i, weapon in enumerate(weapons, start=1):
-            # Send progress update to browser
-            set_progress((f"Simulating {weapon}...  ({i}/{total})", str(i), str(total)))
+        job_id = result_cache.begin_real_job() if result_cache is not None else None     # Preempt speculative jobs
+
+        def heartbeat(*_):
+            # Keep the real job alive while it runs, a job killed on cancel stops preempting once its heartbeat expires
+            if job_id is not None:
+                result_cache.heartbeat_real_job(job_id)
 
-            # Run the heavy calculation:
-            calculator = DamageSimulator(weapon, user_cfg)
-            results_dict[weapon] = calculator.simulate_dps()
+        try:
+            # Reuse results of the same config (e.g., precomputed by a speculative job), before any planning
+            cached_dict = {}
+            for weapon in weapons:
+                cached_results = result_cache.get(weapon, current_cfg) if use_cache else None
+                if cached_results is not None:
+                    cached_dict[weapon] = cached_results
+            missing = [weapon for weapon in weapons if weapon not in cached_dict]
 
+            if user_cfg.RACING_MODE and total > 1:
+                # Racing mode: all weapons advance in small steps, clearly inferior weapons are eliminated early.
+                # Weapons loaded from the cache don't race
+                results_dict.update(cached_dict)
 
-        return False, results_dict, current_cfg, "Done!", dash.no_update, False
+                def race_progress(active, rounds_done, max_rounds):
+                    heartbeat()
+                    set_progress((f"Racing {len(active)} of {len(missing)} weapons, {len(cached_dict)} loaded "
+                                  f"from cache...  ({rounds_done}/{max_rounds} rounds)", str(rounds_done), str(max_rounds)))
+
+                if missing:
+                    race = WeaponRace(missing, user_cfg)
+                    results_dict.update(race.run(race_progress))
+                    # Eliminated weapons stopped early because of the others, only complete results are cached
+                    if result_cache is not None:
+                        for weapon in missing:
+                            if weapon not in race.eliminated:
+                                result_cache.set(weapon, current_cfg, results_dict[weapon])
+                results_dict = {weapon: results_dict[weapon] for weapon in weapons}     # Order of the selection
+            else:
+                # Sample size planner: rounds per weapon for the requested DPS precision, and the expected runtime.
+                # Only the weapons missing from the cache are planned (pilot and timing runs are not free)
+                planned_rounds = {}
+                if user_cfg.TARGET_DPS_ERROR > 0 and missing:
+                    set_progress(("Planning rounds per weapon...", "0", str(total)))
+                    plan = SamplePlanner(user_cfg).plan(missing)
+                    planned_rounds = {weapon: weapon_plan["rounds"] for weapon, weapon_plan in plan.items()}
+                    set_progress((f"Planned up to {sum(planned_rounds.values())} rounds, "
+                                  f"expected runtime up to ~{SamplePlanner.get_runtime(plan):.0f}s", "0", str(total)))
+
+                for i, weapon in enumerate(weapons, start=1):
+                    if weapon in cached_dict:
+                        set_progress((f"Loaded {weapon} from cache...  ({i}/{total})", str(i), str(total)))
+                        results_dict[weapon] = cached_dict[weapon]
+                        continue
+
+                    # Send progress update to browser
+                    set_progress((f"Simulating {weapon}...  ({i}/{total})", str(i), str(total)))
+
+                    # Run the heavy calculation:
+                    weapon_cfg = Config(**{**current_cfg, 'ROUNDS': planned_rounds[weapon]}) if planned_rounds else user_cfg
+                    calculator = DamageSimulator(weapon, weapon_cfg, progress_callback=heartbeat)
+                    results_dict[weapon] = calculator.run_simulation()
+                    if result_cache is not None:
+                        result_cache.set(weapon, current_cfg, results_dict[weapon])
+
+            # Time to kill curves, stored with the run (only server-side copy): computed by this job, not by the plot
+            # callback, since the replicated fights of duration effects take a few seconds per weapon
+            ttk_dict = {}
+            if result_cache is not None:
+                for i, weapon in enumerate(weapons, start=1):
+                    heartbeat()
+                    set_progress((f"Computing time to kill of {weapon}...  ({i}/{total})", str(i), str(total)))
+                    try:
+                        ttk_dict[weapon] = TimeToKill.run_both(weapon, user_cfg)
+                    except ValueError:
+                        pass    # No damage or no target HP, the plot shows no curve
+        finally:
+            if job_id is not None:
+                result_cache.end_real_job(job_id)
+
+
+        # Server-side copy of the calculation, per-weapon callbacks load it by results ID instead of the browser store
+        results_id = uuid.uuid4().hex
+        if result_cache is not None:
+            result_cache.set_run(results_id, results_dict, current_cfg, ttk_dict)
+
+        return False, results_dict, results_id, current_cfg, "Done!", dash.no_update, False
 
 
     # Callback: update results based on stored calculation results
     @app.callback(
         [Output('comparative-table', 'children'),
-         Output('detailed-results', 'children')],
+         Output('detailed-results', 'children'),
+         Output('detailed-results', 'active_item')],
         [Input('intermediate-value', 'data')]
     )
     def update_results(results_dict):
         if not results_dict:
-            return "Run simulation to see results...", ""
-
-        detailed_results = []
-        for weapon, results in results_dict.items():
-            detailed_weapon_results = dbc.Card([
-                dbc.CardHeader(html.H5(weapon, className='mb-0')),
-                dbc.CardBody([
-                    # Attack Stats, Hit and Crit rates per attack
-                    dbc.Row([
-                        dbc.Col([
-                            html.H6('Summary', className='mb-3'),
-                            html.Pre(results["summary"], className='border rounded p-3 bg-dark-subtle', style={'overflow-x': 'auto'}),
-                        ], class_name='mb-4'),
-                    ]),
-                    dbc.Row([
-                        # Attack Statistics - full width on mobile, 4 cols on desktop
-                        dbc.Col([
-                            html.H6('Attack Statistics', className='mb-3'),
-                            html.Div([
-                                dbc.Table([
-                                    html.Thead([html.Tr([html.Th('Statistic'), html.Th('Actual'), html.Th('Theoretical')])]),
-                                    html.Tbody([
-                                        html.Tr([html.Td('Hit Rate'),
-                                                 html.Td(f'{results["hit_rate_actual"]:.1f}%'),
-                                                 html.Td(f'{results["hit_rate_theoretical"]:.1f}%')]),
-                                        html.Tr([html.Td('Crit Rate'),
-                                                 html.Td(f'{results["crit_rate_actual"]:.1f}%'),
-                                                 html.Td(f'{results["crit_rate_theoretical"]:.1f}%')]),
-                                        html.Tr([html.Td('Legend Proc Rate'),
-                                                 html.Td(f'{results["legend_proc_rate_actual"]:.1f}%'),
-                                                 html.Td(f'{results["legend_proc_rate_theoretical"]:.1f}%')]),
-                                    ])
-                                ], bordered=True, hover=True, striped=True, size='sm', class_name='table-responsive')
-                            ], style={'overflow-x': 'auto'})
-                        ], xs=12, md=4, class_name='mb-4'),
-
-                        # Hit Rate per Attack - full width on mobile, 4 cols on desktop
-                        dbc.Col([
-                            html.H6('Hit Rate per Attack', className='mb-3'),
-                            html.Div([
-                                dbc.Table([
-                                    html.Thead([html.Tr([html.Th('Attack #'), html.Th('Actual %'), html.Th('Theoretical %')])]),
-                                    html.Tbody([
-                                        html.Tr([
-                                            html.Td(f'Attack {i + 1}'),
-                                            html.Td(f'{results["hits_per_attack"][i]:.1f}%'),
-                                            html.Td(f'{results["hit_rate_per_attack_theoretical"][i]:.1f}%')
-                                        ]) for i in range(len(results["hits_per_attack"]))
-                                    ])
-                                ], bordered=True, hover=True, striped=True, size='sm', class_name='table-responsive')
-                            ], style={'overflow-x': 'auto'})
-                        ], xs=12, md=4, class_name='mb-4'),
-
-                        # Crit Rate per Attack - full width on mobile, 4 cols on desktop
-                        dbc.Col([
-                            html.H6('Crit Rate per Attack', className='mb-3'),
-                            html.Div([
-                                dbc.Table([
-                                    html.Thead([html.Tr([html.Th('Attack #'), html.Th('Actual %'), html.Th('Theoretical %')])]),
-                                    html.Tbody([
-                                        html.Tr([
-                                            html.Td(f'Attack {i + 1}'),
-                                            html.Td(f'{results["crits_per_attack"][i]:.1f}%'),
-                                            html.Td(f'{results["crit_rate_per_attack_theoretical"][i]:.1f}%')
-                                        ]) for i in range(len(results["crits_per_attack"]))
-                                    ])
-                                ], bordered=True, hover=True, striped=True, size='sm', class_name='table-responsive')
-                            ], style={'overflow-x': 'auto'})
-                        ], xs=12, md=4, class_name='mb-4')
-                    ], class_name='gx-4', style={'alignItems': 'flex-start'})  # Add horizontal spacing between columns
-                ])
-            ], class_name='mb-4')
-            detailed_results.append(detailed_weapon_results)
-
-        # Create comparative table - made responsive
-        comparative_df = pd.DataFrame({
-            weapon: {
-                'Weapon': weapon,
-                'Avg DPS (50/50)': results["avg_dps_both"],
-                'DPS (Crit Allowed)': results["dps_crits"],
-                'DPS (Crit Immune)': results["dps_no_crits"],
-                'Hit %': results["hit_rate_actual"],
-                'Crit %': results["crit_rate_actual"],
-                'Legend Proc %': results["legend_proc_rate_actual"],
-            }
-            for weapon, results in results_dict.items()
-        }).transpose()
-
-        comparative_df = comparative_df.reset_index(drop=True).sort_values('Avg DPS (50/50)', ascending=False)
-
-        # Wrap table in a responsive div
-        comparative_table = html.Div([
-            dbc.Table.from_dataframe(       # type: ignore[attr-defined]
-                comparative_df.round(2),
-                bordered=True,
-                hover=True,
-                striped=True,
-                class_name='table-responsive mb-4',
-            )
-        ], style={'overflow-x': 'auto'})
-
-        return comparative_table, html.Div(detailed_results)
+            return "Run simulation to see results...", [], []
+
+        # Detailed cards are NOT built here, only empty accordion items that are populated when expanded
+        return build_comparative_table(results_dict), build_detail_accordion_items(results_dict.keys()), []
+
+
+    # Callback: render detailed results of a weapon on demand, when its accordion item is expanded.
+    # The results are loaded from the server-side copy of the calculation, not uploaded by the browser
+    @app.callback(
+        Output({'type': 'weapon-detail', 'name': ALL}, 'children'),
+        Input('detailed-results', 'active_item'),
+        State('results-id', 'data'),
+        prevent_initial_call=True
+    )
+    def render_weapon_details(active_items, results_id):
+        detail_ids = [output['id'] for output in ctx.outputs_list]
+        run = result_cache.get_run(results_id) if result_cache is not None else None
+        if run is None or not active_items:
+            return [dash.no_update] * len(detail_ids)
+
+        results_dict = run['results']
+
+        active_items = active_items if isinstance(active_items, list) else [active_items]
+        # Stat weights of the build the results were simulated with, not of the inputs edited since then
+        user_cfg = Config(**run['config'])
+        return [
+            # Stat weights are exact (analytic engine), a few ms per weapon
+            build_weapon_detail(results_dict[detail_id['name']],
+                                StatWeights(detail_id['name'], user_cfg).analytic_weights())
+            if detail_id['name'] in active_items and detail_id['name'] in results_dict
+            else dash.no_update     # Collapsed items keep whatever they already rendered
+            for detail_id in detail_ids
+        ]
+
+
+    # Callback: save the current build as build A of the build comparison
+    @app.callback(
+        Output('build-a-store', 'data'),
+        Output('build-a-status', 'children'),
+        Input('save-build-a-button', 'n_clicks'),
+        State('config-store', 'data'),
+        *[State(*widget) for widget in USER_CONFIG_WIDGETS],
+        prevent_initial_call=True
+    )
+    def save_build_a(_, current_cfg, *widget_values):
+        # Copy, build_user_config() updates the dict in place and config-store is not an output here
+        build_a = build_user_config(cfg, dict(current_cfg) if current_cfg else None, *widget_values)
+        return build_a, "Build A saved. Edit the configuration, then compare the current build (B) with A."
+
+
+    # Callback: paired comparison of the current build (B) with the saved build A, on the selected weapons
+    @with_error_modal(
+        app,
+        outputs=[
+            Output('build-comparison', 'children'),
+            Output('global-error-body', 'children', allow_duplicate=True),     # extra: error text
+            Output('global-error-modal', 'is_open', allow_duplicate=True)      # extra: open modal
+        ],
+        inputs=[Input('compare-builds-button', 'n_clicks')],
+        states=[
+            State('build-a-store', 'data'),
+            State('config-store', 'data'),
+            State('weapon-dropdown', 'value'),
+            *[State(*widget) for widget in USER_CONFIG_WIDGETS],
+        ],
+        background=True,  # runs in a worker thread automatically
+        progress=[Output('build-comparison-status', 'children')],
+        running=[
+            (Output('save-build-a-button', 'disabled'), True, False),
+            (Output('compare-builds-button', 'disabled'), True, False),
+            (Output('build-comparison-status', 'children'), "Comparing builds...", ""),
+        ],
+        prevent_initial_call=True
+    )
+    def compare_builds(set_progress, _, build_a, current_cfg, weapons, *widget_values):
+        if not build_a or not weapons:
+            return "Save a build as A and select weapons first.", dash.no_update, False
+
+        build_b = build_user_config(cfg, dict(current_cfg) if current_cfg else None, *widget_values)
+        # The maximum number of rounds is a setting of the run, not of the build: the current one applies to both
+        config_a = Config(**{**build_a, 'ROUNDS': build_b['ROUNDS']})
+        config_b = Config(**build_b)
+        job_id = result_cache.begin_real_job() if result_cache is not None else None     # Preempt speculative jobs
+
+        def comparison_progress(weapon, i, total):
+            if job_id is not None:
+                result_cache.heartbeat_real_job(job_id)
+            set_progress((f"Comparing builds on {weapon}...  ({i}/{total})",))
+
+        try:
+            comparison = BuildComparison(weapons, config_a, config_b).run(comparison_progress)
+        finally:
+            if job_id is not None:
+                result_cache.end_real_job(job_id)
+
+        return build_build_comparison_table(comparison), dash.no_update, False
 
 
     # Callback: update config-store when inputs change
@@ -1,8 +1,14 @@
+# Standard library imports
+import math
+from collections import OrderedDict
+
 # Third-party imports
-from dash import Input, Output, State
+from dash import Input, Output
 import plotly.graph_objects as go
 import plotly.express as px
 
+# Local imports
+
 
 # Fixed color palette for damage types (keys are normalized to lowercase base token)
 DAMAGE_TYPE_PALETTE = {
@@ -21,6 +27,11 @@ DAMAGE_TYPE_PALETTE = {
 
 FALLBACK_COLORS = px.colors.qualitative.Plotly
 
+# Plot pipeline settings
+MAX_PLOT_POINTS = 1500      # Roughly 2 points per horizontal pixel of the per-weapon plot
+FIGURE_CACHE_SIZE = 64      # Max number of memoized (result ID, weapon) figure pairs
+_figure_cache = OrderedDict()
+
 
 # Dark theme helper to match Bootstrap dark mode
 def apply_dark_theme(fig):
@@ -43,7 +54,131 @@ def apply_dark_theme(fig):
     return fig
 
 
-def register_plots_callbacks(app):
+def decimate_series(x_vals, y_vals, max_points=MAX_PLOT_POINTS):
+    """
+    Downsample a line series to at most ~max_points points, using min/max decimation per bucket.
+    Keeping both extremes of every bucket preserves the visual envelope (spikes) of the original series.
+    :param x_vals: List of X values, e.g., cumulative damage per round
+    :param y_vals: List of Y values, e.g., rolling average DPS per round
+    :param max_points: Maximum number of points to return
+    :return: Tuple of (x_list, y_list) after decimation
+    """
+    n = min(len(x_vals), len(y_vals))
+    if n <= max_points:
+        return list(x_vals[:n]), list(y_vals[:n])
+
+    bucket_size = math.ceil(n / (max_points // 2))
+    indices = [0]
+    for start in range(1, n - 1, bucket_size):
+        end = min(start + bucket_size, n - 1)
+        bucket = range(start, end)
+        idx_min = min(bucket, key=y_vals.__getitem__)
+        idx_max = max(bucket, key=y_vals.__getitem__)
+        indices.extend(sorted({idx_min, idx_max}))     # Keep original (X) ordering within the bucket
+    indices.append(n - 1)
+
+    return [x_vals[i] for i in indices], [y_vals[i] for i in indices]
+
+
+def get_cached_figures(result_id, weapon, build_func, plot='weapon'):
+    """
+    Memoize built figures per (result ID, weapon, plot), so switching between weapons does not rebuild them.
+    :param result_id: Unique ID of the simulation results, or None to bypass the cache
+    :param weapon: Name of the weapon the figures are built for
+    :param build_func: Callable with no arguments that builds and returns the figures
+    :param plot: Name of the figures, e.g., 'ttk', so different plots of the same weapon are memoized apart
+    :return: The (possibly cached) figures
+    """
+    if result_id is None:
+        return build_func()
+
+    key = (result_id, weapon, plot)
+    if key in _figure_cache:
+        _figure_cache.move_to_end(key)
+        return _figure_cache[key]
+
+    figures = build_func()
+    _figure_cache[key] = figures
+    if len(_figure_cache) > FIGURE_CACHE_SIZE:
+        _figure_cache.popitem(last=False)   # Evict least recently used entry
+    return figures
+
+
+def build_weapon_figures(results):
+    """Build the 'DPS vs Cumulative Damage' line plot, the damage breakdown pie and the damage histogram of a weapon"""
+    # DPS vs Cumulative Damage: use cumulative damage (x) vs rolling avg DPS (y), thinned during the simulation
+    series = results.get('dps_vs_damage') or {}
+    dps_vals = series.get('y') or []
+    cum_damage = series.get('x') or []
+    fig1 = go.Figure()
+    if dps_vals and cum_damage:
+        # X = cumulative damage, Y = DPS, decimated to a pixel-appropriate size and drawn with WebGL
+        x_vals, y_vals = decimate_series(cum_damage, dps_vals)
+        fig1.add_trace(go.Scattergl(x=x_vals, y=y_vals, mode='lines'))
+        fig1.update_layout(title=f'', xaxis_title='Cumulative Damage', yaxis_title='Mean DPS')
+    else:
+        fig1.update_layout(title='Insufficient data for DPS vs Damage')
+    apply_dark_theme(fig1)
+
+    # Damage breakdown pie
+    dmg_by_type = results.get('damage_by_type') or {}
+    if dmg_by_type:
+        labels = [k.split('_')[0].title() for k in dmg_by_type.keys()]
+        values = [v for v in dmg_by_type.values()]
+        colors = []
+        for lab in labels:
+            key = lab.lower()
+            col = DAMAGE_TYPE_PALETTE.get(key)
+            if not col:
+                col = FALLBACK_COLORS[abs(hash(lab)) % len(FALLBACK_COLORS)]
+            colors.append(col)
+
+        fig2 = px.pie(names=labels, values=values, title=f'')
+        fig2.update_traces(textinfo='percent+label', textfont=dict(color='#f8f9fa'), marker=dict(colors=colors, line=dict(color='rgba(255,255,255,0.06)', width=1)))
+    else:
+        fig2 = go.Figure()
+        fig2.update_layout(title='No damage breakdown available')
+    apply_dark_theme(fig2)
+
+    # Damage per round histogram, from the bounded-memory streaming summary (no raw per-round lists)
+    round_summary = results.get('round_damage_summary') or {}
+    fig3 = go.Figure()
+    if round_summary.get('count'):
+        bin_width = round_summary['bin_width']
+        bin_centers = [(idx + 0.5) * bin_width for idx in range(len(round_summary['counts']))]
+        fig3.add_trace(go.Bar(x=bin_centers, y=round_summary['counts'], width=bin_width, name='Rounds'))
+        for stat in ('p50', 'p90', 'p99'):
+            fig3.add_vline(x=round_summary[stat], line_dash='dash', annotation_text=stat)
+        fig3.update_layout(xaxis_title='Damage per Round (crit allowed)', yaxis_title='Rounds', bargap=0, showlegend=False)
+    else:
+        fig3.update_layout(title='No damage distribution available')
+    apply_dark_theme(fig3)
+
+    return fig1, fig2, fig3
+
+
+def build_ttk_figure(ttk_results):
+    """Build the time to kill survival curves P(fight lasts more than n rounds), crits allowed and crits immune,
+    from the results computed with the calculation (see TimeToKill.run_both)"""
+    fig = go.Figure()
+    title = []
+    for name, key in (('Crits Allowed', 'crits'), ('Crits Immune', 'crit_imm')):
+        ttk = ttk_results[key]
+        fig.add_trace(go.Scatter(x=list(range(len(ttk['survival']))), y=ttk['survival'], mode='lines',
+                                 line_shape='hv', name=name))
+        if ttk['truncated']:    # Target still alive at the longest fight, the mean would only report the cut
+            mean_text = f"truncated at {len(ttk['survival']) - 1} rounds"
+        else:
+            mean_text = f"mean {ttk['mean_rounds']} rounds ({ttk['mean_seconds']}s)"
+        title.append(f"{name}: {mean_text}, p50/p90/p99 {ttk['p50']}/{ttk['p90']}/{ttk['p99']}")
+    fig.update_layout(title=dict(text='<br>'.join(title), font=dict(size=12)), xaxis_title='Rounds',
+                      yaxis_title='Target Alive (probability)',
+                      legend=dict(orientation='h', yanchor='bottom', y=-0.35, xanchor='right', x=1))
+    apply_dark_theme(fig)
+    return fig
+
+
+def register_plots_callbacks(app, result_cache=None):
 
     # Callback: weapon dropdown with available weapons from the simulation results
     @app.callback(
@@ -103,54 +238,47 @@ def register_plots_callbacks(app):
         apply_dark_theme(fig)
         return fig
 
-    # Callback: DPS vs damage and damage breakdown pie
+    # Callback: DPS vs damage, damage breakdown pie and damage histogram. Keyed by results ID and weapon only:
+    # memoized figures are returned without any results upload, on a miss the results are loaded server-side
     @app.callback(
         Output('plots-weapon-dps-vs-damage', 'figure'),
         Output('plots-weapon-breakdown', 'figure'),
+        Output('plots-weapon-damage-histogram', 'figure'),
         Input('plots-weapon-dropdown', 'value'),
-        State('intermediate-value', 'data')
+        Input('results-id', 'data'),
     )
-    def update_weapon_plots(selected_weapon, results_dict):
+    def update_weapon_plots(selected_weapon, result_id):
         empty_fig = go.Figure()
         empty_fig.update_layout(title='No simulation data')
         apply_dark_theme(empty_fig)
 
-        if not results_dict or not selected_weapon or selected_weapon not in results_dict:
-            return empty_fig, empty_fig
+        if not result_id or not selected_weapon or result_cache is None:
+            return empty_fig, empty_fig, empty_fig
 
-        results = results_dict[selected_weapon]
+        def build_figures():
+            results, _ = result_cache.get_run_results(result_id, selected_weapon)
+            return build_weapon_figures(results) if results is not None else (empty_fig, empty_fig, empty_fig)
 
-        # DPS vs Cumulative Damage: use cumulative damage (x) vs rolling avg DPS (y)
-        dps_vals = results.get('dps_rolling_avg') or results.get('dps_per_round') or []
-        cum_damage = results.get('cumulative_damage_per_round') or []
-        fig1 = go.Figure()
-        if dps_vals and cum_damage:
-            n = min(len(dps_vals), len(cum_damage))
-            # X = cumulative damage, Y = DPS
-            fig1.add_trace(go.Scatter(x=cum_damage[:n], y=dps_vals[:n], mode='lines+markers', marker=dict(opacity=0.9)))
-            fig1.update_layout(title=f'', xaxis_title='Cumulative Damage', yaxis_title='Mean DPS')
-        else:
-            fig1.update_layout(title='Insufficient data for DPS vs Damage')
-        apply_dark_theme(fig1)
-
-        # Damage breakdown pie
-        dmg_by_type = results.get('damage_by_type') or {}
-        if dmg_by_type:
-            labels = [k.split('_')[0].title() for k in dmg_by_type.keys()]
-            values = [v for v in dmg_by_type.values()]
-            colors = []
-            for lab in labels:
-                key = lab.lower()
-                col = DAMAGE_TYPE_PALETTE.get(key)
-                if not col:
-                    col = FALLBACK_COLORS[abs(hash(lab)) % len(FALLBACK_COLORS)]
-                colors.append(col)
-
-            fig2 = px.pie(names=labels, values=values, title=f'')
-            fig2.update_traces(textinfo='percent+label', textfont=dict(color='#f8f9fa'), marker=dict(colors=colors, line=dict(color='rgba(255,255,255,0.06)', width=1)))
-        else:
-            fig2 = go.Figure()
-            fig2.update_layout(title='No damage breakdown available')
-        apply_dark_theme(fig2)
+        return get_cached_figures(result_id, selected_weapon, build_figures)
+
+    # Callback: time to kill survival curve, exact (dynamic programming) or replicated fights. The curves are computed
+    # by the calculation job and stored with the run (build and target HP of the run, not the inputs edited since),
+    # the figure is memoized per results ID and weapon like the other weapon plots
+    @app.callback(
+        Output('plots-weapon-ttk-survival', 'figure'),
+        Input('plots-weapon-dropdown', 'value'),
+        Input('results-id', 'data'),
+    )
+    def update_ttk_plot(selected_weapon, result_id):
+        empty_fig = go.Figure()
+        empty_fig.update_layout(title='No simulation data')
+        apply_dark_theme(empty_fig)
+
+        if not result_id or not selected_weapon or result_cache is None:
+            return empty_fig
+
+        def build_figure():
+            ttk_results = result_cache.get_run_ttk(result_id, selected_weapon)
+            return build_ttk_figure(ttk_results) if ttk_results is not None else empty_fig
 
-        return fig1, fig2
+        return get_cached_figures(result_id, selected_weapon, build_figure, plot='ttk')
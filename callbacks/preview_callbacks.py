@@ -0,0 +1,95 @@
+# Standard library imports
+import json
+from dataclasses import asdict
+from functools import lru_cache
+
+# Third-party imports
+import dash
+from dash import html, Input, Output, State, ClientsideFunction
+import dash_bootstrap_components as dbc
+
+# Local imports
+from simulator.damage_simulator import DamageSimulator
+from simulator.analytic_engine import AnalyticEngine
+from simulator.config import Config
+from callbacks.core_callbacks import USER_CONFIG_WIDGETS, build_user_config
+
+
+PREVIEW_CACHE_SIZE = 256    # Max number of memoized (weapon, user config) estimates
+
+
+@lru_cache(maxsize=PREVIEW_CACHE_SIZE)
+def estimate_weapon_dps(weapon: str, user_cfg_json: str):
+    """
+    Instant DPS estimate of a single weapon, without running the simulation.
+    :param weapon: Weapon name, e.g., 'Spear'
+    :param user_cfg_json: User config dict, serialized to JSON (sorted keys) so it can be used as a cache key
+    :return: Dictionary with the keys avg_dps_both, dps_crits, dps_no_crits
+    """
+    user_cfg = Config(**json.loads(user_cfg_json))
+    calculator = DamageSimulator(weapon, user_cfg)
+    return AnalyticEngine(calculator).expected_dps()
+
+
+def build_preview_table(estimates: dict):
+    """Build the DPS preview table, estimates are None for weapons that can't be estimated (e.g., invalid inputs)"""
+    rows = []
+    for weapon, estimate in estimates.items():
+        if estimate is None:
+            rows.append(html.Tr([html.Td(weapon)] + [html.Td('-') for _ in range(3)]))
+        else:
+            rows.append(html.Tr([
+                html.Td(weapon),
+                html.Td(f"{estimate['avg_dps_both']:.2f}"),
+                html.Td(f"{estimate['dps_crits']:.2f}"),
+                html.Td(f"{estimate['dps_no_crits']:.2f}"),
+            ]))
+
+    return html.Div([
+        html.Small('Estimated DPS (instant, exact expected values), press Calculate for the full simulation:',
+                   className='text-muted'),
+        dbc.Table([
+            html.Thead(html.Tr([html.Th('Weapon'), html.Th('Est. Avg DPS'),
+                                html.Th('Est. DPS (Crit Allowed)'), html.Th('Est. DPS (Crit Immune)')])),
+            html.Tbody(rows),
+        ], bordered=True, hover=True, striped=True, size='sm', class_name='table-responsive mt-2 mb-0'),
+    ], style={'overflow-x': 'auto'})
+
+
+def register_preview_callbacks(app, cfg):
+
+    # Debounce the input edits in the browser, a burst of edits updates the trigger store only once
+    app.clientside_callback(
+        ClientsideFunction(namespace='preview', function_name='debounceTrigger'),
+        Output('preview-trigger', 'data'),
+        Input('weapon-dropdown', 'value'),
+        *[Input(*widget) for widget in USER_CONFIG_WIDGETS],
+    )
+
+
+    # Callback: update the instant DPS preview of the selected weapons
+    @app.callback(
+        Output('dps-preview', 'children'),
+        Input('preview-trigger', 'data'),
+        State('config-store', 'data'),
+        State('weapon-dropdown', 'value'),
+        *[State(*widget) for widget in USER_CONFIG_WIDGETS],
+    )
+    def update_dps_preview(_, current_cfg, weapons, *widget_values):
+        if not weapons:
+            return None
+
+        try:
+            current_cfg = build_user_config(cfg, current_cfg or asdict(cfg), *widget_values)
+            user_cfg_json = json.dumps(current_cfg, sort_keys=True)
+        except (TypeError, ValueError):     # Inputs are being edited (e.g., empty), keep the previous preview
+            return dash.no_update
+
+        estimates = {}
+        for weapon in weapons:
+            try:
+                estimates[weapon] = estimate_weapon_dps(weapon, user_cfg_json)
+            except (TypeError, ValueError, KeyError, ZeroDivisionError):
+                estimates[weapon] = None
+
+        return build_preview_table(estimates)
@@ -0,0 +1,78 @@
+# Standard library imports
+import os
+import time
+from dataclasses import asdict
+
+# Third-party imports
+import dash
+from dash import Input, Output, State
+
+# Local imports
+from simulator.damage_simulator import DamageSimulator, SimulationCancelled
+from simulator.config import Config
+from callbacks.core_callbacks import USER_CONFIG_WIDGETS, build_user_config
+
+
+SPECULATIVE_DELAY = 1.5     # Seconds the inputs must stay stable (on top of the preview debounce) before precomputing
+SPECULATIVE_NICENESS = 10   # Process niceness increment of speculative jobs (lower CPU priority than real jobs)
+
+
+def lower_process_priority():
+    """Lower the CPU priority of the current (background job) process, if supported by the OS"""
+    try:
+        os.nice(SPECULATIVE_NICENESS)
+    except (AttributeError, OSError):   # os.nice is not available on Windows
+        pass
+
+
+def register_speculative_callbacks(app, cfg, result_cache):
+
+    # Callback: precompute the results of the current config in the background, while the user is still editing.
+    # A new edit re-triggers the callback, which terminates the previous (now stale) job.
+    @app.callback(
+        Output('speculative-status', 'data'),
+        Input('preview-trigger', 'data'),
+        State('speculative-switch', 'value'),
+        State('config-store', 'data'),
+        State('weapon-dropdown', 'value'),
+        *[State(*widget) for widget in USER_CONFIG_WIDGETS],
+        background=True,
+        cancel=[Input('calculate-button', 'n_clicks'), Input('recalculate-button', 'n_clicks')],
+        prevent_initial_call=True,
+    )
+    def run_speculative_calculation(_, speculative, current_cfg, weapons, *widget_values):
+        if not speculative or not weapons:
+            return dash.no_update
+
+        try:
+            current_cfg = build_user_config(cfg, current_cfg or asdict(cfg), *widget_values)
+            user_cfg = Config(**current_cfg)
+        except (TypeError, ValueError):     # Inputs are being edited (e.g., empty), nothing to precompute
+            return dash.no_update
+
+        time.sleep(SPECULATIVE_DELAY)
+        lower_process_priority()
+
+        def preempt_check(round_num, total_rounds):
+            if result_cache.real_job_running():
+                raise SimulationCancelled(f"Preempted by a real job at round {round_num}/{total_rounds}")
+
+        precomputed = []
+        for weapon in weapons:
+            if result_cache.real_job_running():     # Real jobs have priority, stop precomputing
+                break
+            if result_cache.contains(weapon, current_cfg):
+                continue
+
+            try:
+                calculator = DamageSimulator(weapon, user_cfg, progress_callback=preempt_check)
+                results = calculator.run_simulation()
+            except SimulationCancelled:
+                break
+            except Exception:   # Invalid config for this weapon, the real job will report the error
+                continue
+
+            result_cache.set(weapon, current_cfg, results)
+            precomputed.append(weapon)
+
+        return {'weapons': precomputed}
@@ -1,6 +1,6 @@
 # Third-party imports
 import dash
-from dash import Input, Output, ALL, MATCH, State, ctx
+from dash import Input, Output, ALL, MATCH, State, ClientsideFunction
 
 # Local imports
 from simulator.config import Config
@@ -10,14 +10,12 @@ from weapons_db import WEAPON_PROPERTIES, PURPLE_WEAPONS
 
 def register_ui_callbacks(app, cfg):
 
-    # Callback: toggle additional damage inputs visibility
-    @app.callback(
+    # Callback: toggle additional damage inputs visibility (clientside)
+    app.clientside_callback(
+        ClientsideFunction(namespace='ui', function_name='toggleDisplay'),
         Output({'type': 'add-dmg-row', 'name': MATCH}, 'style'),
         Input({'type': 'add-dmg-switch', 'name': MATCH}, 'value'),
     )
-    def toggle_additional_damage(show):
-        style = {'display': 'flex'} if show else {'display': 'none'}
-        return style
 
 
     # Callback: update reference information
@@ -184,8 +182,13 @@ def register_ui_callbacks(app, cfg):
         Output('damage-limit-switch', 'value', allow_duplicate=True),
         Output('damage-limit-input', 'value', allow_duplicate=True),
         Output('dmg-vs-race-switch', 'value', allow_duplicate=True),
+        Output('shared-crit-dice-switch', 'value', allow_duplicate=True),
+        Output('racing-mode-switch', 'value', allow_duplicate=True),
+        Output('stratified-rolls-switch', 'value', allow_duplicate=True),
+        Output('mean-only-switch', 'value', allow_duplicate=True),
         Output('relative-change-input', 'value', allow_duplicate=True),
         Output('relative-std-input', 'value', allow_duplicate=True),
+        Output('target-error-input', 'value', allow_duplicate=True),
         Output('target-immunities-switch', 'value', allow_duplicate=True),
         Output({'type': 'immunity-input', 'name': ALL}, 'value', allow_duplicate=True),
         Output('immunities-store', 'data', allow_duplicate=True),
@@ -231,8 +234,13 @@ def register_ui_callbacks(app, cfg):
                 default_cfg.DAMAGE_LIMIT_FLAG,
                 default_cfg.DAMAGE_LIMIT,
                 default_cfg.DAMAGE_VS_RACE,
+                default_cfg.SHARED_CRIT_DICE,
+                default_cfg.RACING_MODE,
+                default_cfg.STRATIFIED_ROLLS,
+                default_cfg.MEAN_ONLY,
                 default_cfg.CHANGE_THRESHOLD * 100,  # convert to percentage
                 default_cfg.STD_THRESHOLD * 100,     # convert to percentage
+                default_cfg.TARGET_DPS_ERROR,
                 default_cfg.TARGET_IMMUNITIES_FLAG,
                 [val * 100 for val in default_cfg.TARGET_IMMUNITIES.values()],
                 reset_immunities_store,
@@ -305,51 +313,30 @@ def register_ui_callbacks(app, cfg):
             return [0] * n, updated_store
 
 
-    # Callback: toggle melee/ranged dependent params OFF and disabled
-    @app.callback(
-        # Output({'type': 'melee-row', 'name': ALL}, 'style'),
+    # Callback: toggle melee/ranged dependent params OFF and disabled (clientside)
+    app.clientside_callback(
+        ClientsideFunction(namespace='ui', function_name='toggleMeleeParams'),
         Output({'type': 'melee-switch', 'name': ALL}, 'value'),
         Output('mighty-input', 'value'),
         Output({'type': 'melee-switch', 'name': ALL}, 'disabled', allow_duplicate=True),
         Output('mighty-input', 'disabled', allow_duplicate=True),
         Input('combat-type-dropdown', 'value'),
+        State('validation-ranges', 'data'),
         prevent_initial_call='initial_duplicate'
     )
-    def toggle_melee_params(combat_type):
-        n = len(ctx.outputs_list[0])  # number of matching melee rows
-        if combat_type == 'ranged':
-            return (
-                [False] * n,  # Turn OFF all melee switches
-                20,  # Set mighty to 20
-                [True] * n,  # Disable all melee switches
-                False  # Enable mighty input
-            )
-        elif combat_type == 'melee':
-            return (
-                [dash.no_update] * n,  # Don't update the melee switches
-                0,  # Set mighty to 0
-                [False] * n,  # Enable all melee switches
-                True  # Disable mighty input
-            )
-        else:
-            return dash.no_update
 
 
-    # Callback: toggle shape weapon visibility
-    @app.callback(
+    # Callback: toggle shape weapon visibility (clientside)
+    app.clientside_callback(
+        ClientsideFunction(namespace='ui', function_name='toggleDisplay'),
         Output('shape-weapon-dropdown', 'style'),
         Input('shape-weapon-switch', 'value'),
     )
-    def toggle_shape_weapon(show):
-        style = {'display': 'flex'} if show else {'display': 'none'}
-        return style
 
 
-    # Callback: toggle damage limit visibility
-    @app.callback(
+    # Callback: toggle damage limit visibility (clientside)
+    app.clientside_callback(
+        ClientsideFunction(namespace='ui', function_name='toggleDisplay'),
         Output('damage-limit-input', 'style'),
         Input('damage-limit-switch', 'value'),
     )
-    def toggle_damage_limit(show):
-        style = {'display': 'flex'} if show else {'display': 'none'}
-        return style
@@ -1,9 +1,12 @@
 # Third-party imports
-from dash import Input, Output, MATCH, ctx
+from dash import Input, Output, State, MATCH, ClientsideFunction
 
 
-def register_validation_callbacks(app, cfg):
-
+def build_validation_ranges(cfg):
+    """
+    Export the validation ranges and defaults from Config as a JSON-serializable dict,
+    consumed by the clientside validation and UI toggle callbacks (see assets/clientside.js).
+    """
     # VALIDATIONS SCOPE - CHARACTER SETTINGS
     validations_inputs = {
         'ab-input':                         {'min': 0, 'max': 999, 'default': cfg.AB},
@@ -15,6 +18,7 @@ def register_validation_callbacks(app, cfg):
         'damage-limit-input':               {'min': 1, 'max': 9999999, 'default': cfg.DAMAGE_LIMIT},
         'relative-change-input':            {'min': 0.001, 'max': 1, 'default': cfg.CHANGE_THRESHOLD},
         'relative-std-input':               {'min': 0.001, 'max': 1, 'default': cfg.STD_THRESHOLD},
+        'target-error-input':               {'min': 0, 'max': 100, 'default': cfg.TARGET_DPS_ERROR},
     }
 
     # VALIDATIONS SCOPE - ADDITIONAL DAMAGE
@@ -32,9 +36,25 @@ def register_validation_callbacks(app, cfg):
     for k, v in cfg.TARGET_IMMUNITIES.items():
         validations_immunities[k] = {'min': -100, 'max': 100, 'default': v}
 
+    # DEFAULTS - MELEE/RANGED DEPENDENT PARAMS
+    melee_params = {
+        'melee':    {'mighty': cfg.MIGHTY},
+        'ranged':   {'mighty': 20},
+    }
+
+    return {
+        'inputs': validations_inputs,
+        'add_dmg': validations_add_dmg,
+        'immunities': validations_immunities,
+        'melee_params': melee_params,
+    }
+
 
-    # Validation callback for separate widget inputs
-    @app.callback(
+def register_validation_callbacks(app, cfg):
+
+    # Validation callback for separate widget inputs (clientside)
+    app.clientside_callback(
+        ClientsideFunction(namespace='validation', function_name='validateInputs'),
         [Output('ab-input', 'value', allow_duplicate=True),
          Output('ab-capped-input', 'value', allow_duplicate=True),
          Output('mighty-input', 'value', allow_duplicate=True),
@@ -43,7 +63,8 @@ def register_validation_callbacks(app, cfg):
          Output('rounds-input', 'value', allow_duplicate=True),
          Output('damage-limit-input', 'value', allow_duplicate=True),
          Output('relative-change-input', 'value', allow_duplicate=True),
-         Output('relative-std-input', 'value', allow_duplicate=True)],
+         Output('relative-std-input', 'value', allow_duplicate=True),
+         Output('target-error-input', 'value', allow_duplicate=True)],
         [Input('ab-input', 'value'),
          Input('ab-capped-input', 'value'),
          Input('mighty-input', 'value'),
@@ -52,28 +73,16 @@ def register_validation_callbacks(app, cfg):
          Input('rounds-input', 'value'),
          Input('damage-limit-input', 'value'),
          Input('relative-change-input', 'value'),
-         Input('relative-std-input', 'value')],
+         Input('relative-std-input', 'value'),
+         Input('target-error-input', 'value')],
+        State('validation-ranges', 'data'),
         prevent_initial_call=True,
     )
-    def validate_inputs(*args):
-        inputs_dict = ctx.inputs                        # Dictionary of all inputs
-        widget_id = ctx.triggered_id                    # ID of the widget changed
-        val = inputs_dict[f'{widget_id}.value']         # Get the value of input changed
-        limits = validations_inputs[widget_id]   # Get the limits of the value changed
-        try:
-            val = float(val) if val is not None else limits['default']
-            val = max(limits['min'], min(limits['max'], val))
-        except (ValueError, TypeError):
-            val = limits['default']
-
-        validated_dict = inputs_dict.copy()         # Copy inputs dictionary
-        validated_dict[f'{widget_id}.value'] = val  # Insert validated value into the dict
-        validated = list(validated_dict.values())   # Get all the values into a list
-        return validated
 
 
-    # Validation callback for additional damage inputs
-    @app.callback(
+    # Validation callback for additional damage inputs (clientside)
+    app.clientside_callback(
+        ClientsideFunction(namespace='validation', function_name='validateAdditionalDamage'),
         [Output({'type': 'add-dmg-input1', 'name': MATCH}, 'value', allow_duplicate=True),
          Output({'type': 'add-dmg-input2', 'name': MATCH}, 'value', allow_duplicate=True),
          Output({'type': 'add-dmg-input3', 'name': MATCH}, 'value', allow_duplicate=True)],
@@ -81,36 +90,17 @@ def register_validation_callbacks(app, cfg):
          Input({'type': 'add-dmg-input1', 'name': MATCH}, 'value'),
          Input({'type': 'add-dmg-input2', 'name': MATCH}, 'value'),
          Input({'type': 'add-dmg-input3', 'name': MATCH}, 'value')],
+        State('validation-ranges', 'data'),
         prevent_initial_call=True,
     )
-    def validate_additional_damage_inputs(widget_id, dice, sides, flat):
-        inputs = [dice, sides, flat]
-        validated = []
-        add_dmg_name = widget_id['name']
-        for val, (key, limits) in zip(inputs, validations_add_dmg[add_dmg_name].items()):
-            try:
-                val = float(val) if val is not None else limits['default']
-                val = max(limits['min'], min(limits['max'], val))
-            except (ValueError, TypeError):
-                val = limits['default']
-            validated.append(val)
 
-        return validated
 
-
-    # Validation callback for immunity inputs
-    @app.callback(
+    # Validation callback for immunity inputs (clientside)
+    app.clientside_callback(
+        ClientsideFunction(namespace='validation', function_name='validateImmunity'),
         Output({'type': 'immunity-input', 'name': MATCH}, 'value', allow_duplicate=True),
         Input({'type': 'immunity-input', 'name': MATCH}, 'value'),
+        State({'type': 'immunity-input', 'name': MATCH}, 'id'),
+        State('validation-ranges', 'data'),
         prevent_initial_call=True,
     )
-    def validate_immunity_input(val):
-        widget_id = ctx.triggered_id['name']            # ID 'name' of the widget changed (e.g., 'magical')
-        limits = validations_immunities[widget_id]      # Get the limits of the value changed
-        try:
-            val = float(val) if val is not None else limits['default']
-            val = max(limits['min'], min(limits['max'], val))
-        except (ValueError, TypeError):
-            val = limits['default']
-
-        return val
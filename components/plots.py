@@ -12,6 +12,8 @@ def build_plots_tab():
       - Dropdown to pick one of the weapons that were simulated.
       - Mean DPS vs Damage inflicted (line / scatter) for the selected weapon.
       - Damage breakdown pie chart for the selected weapon.
+      - Damage per round histogram for the selected weapon, from the streaming damage summary.
+      - Time to kill survival curve for the selected weapon, target HP is the damage limit.
     """
 
     return dbc.Tab(label='Plots', tab_id='plots', children=[
@@ -71,6 +73,36 @@ def build_plots_tab():
                         }
                     )
                  ], xs=12, md=6),
+             ], class_name='mt-3'),
+
+            dbc.Row([
+                dbc.Col([
+                    html.H6('Damage per Round Distribution'),
+                    dcc.Graph(
+                        id='plots-weapon-damage-histogram',
+                        config={
+                            'displayModeBar': 'hover',
+                            'modeBarButtonsToRemove': ['toImage', 'select2d', 'lasso2d'],
+                            'displaylogo': False,
+                            'scrollZoom': False,
+                            'toImageButtonOptions': {'format': 'png', 'filename': 'damage_histogram'},
+                        }
+                    )
+                 ], xs=12, md=6),
+
+                dbc.Col([
+                    html.H6('Time to Kill (Target HP = Damage Limit)'),
+                    dcc.Graph(
+                        id='plots-weapon-ttk-survival',
+                        config={
+                            'displayModeBar': 'hover',
+                            'modeBarButtonsToRemove': ['toImage', 'select2d', 'lasso2d'],
+                            'displaylogo': False,
+                            'scrollZoom': False,
+                            'toImageButtonOptions': {'format': 'png', 'filename': 'ttk_survival'},
+                        }
+                    )
+                 ], xs=12, md=6),
              ], class_name='mt-3')
 
          ], fluid=True, class_name='border-bottom rounded-bottom border-start border-end p-4 mb-4')
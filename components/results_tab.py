@@ -16,8 +16,201 @@ def build_results_tab():
             # Main comparative table
             html.Div(id='comparative-table', className='mb-4'),
 
-            # Detailed results per weapon
+            # Paired comparison of the current build (B) with a saved build (A), on the selected weapons
+            html.Div([
+                html.H4('Build Comparison', className='mt-4 mb-4'),
+                html.Div([
+                    dbc.Button("Save Current Build as A", id='save-build-a-button', color='secondary'),
+                    dbc.Button("Compare Current Build with A", id='compare-builds-button', color='primary',
+                               className='ms-3'),
+                ]),
+            ], style={'display': 'flex', 'alignItems': 'center', 'justifyContent': 'space-between'}),
+            html.Div("Save a build as A, edit the configuration, then compare the current build (B) with A.",
+                     id='build-a-status'),
+            html.Div(id='build-comparison-status', className='mb-3'),
+            html.Div(id='build-comparison', className='mb-4'),
+
+            # Detailed results per weapon, card bodies are rendered on demand when an item is expanded
             html.H4('Detailed Results Per Weapon', className='mt-4 mb-3'),
-            html.Div(id='detailed-results')
+            dbc.Accordion(id='detailed-results', always_open=True, start_collapsed=True, class_name='mb-4'),
         ], fluid=True, className='border-bottom rounded-bottom border-start border-end p-4 mb-4'),
-    ])
\ No newline at end of file
+    ])
+
+
+def build_detail_accordion_items(weapons):
+    """Build empty (lazy) accordion items, one per simulated weapon"""
+    return [
+        dbc.AccordionItem(
+            html.Div(id={'type': 'weapon-detail', 'name': weapon}),
+            title=weapon,
+            item_id=weapon,
+        )
+        for weapon in weapons
+    ]
+
+
+def build_comparative_table(results_dict):
+    """Build the comparative results table, sorted by average DPS (descending)"""
+    columns = {
+        'Weapon': None,
+        'Avg DPS (50/50)': 'avg_dps_both',
+        'DPS (Crit Allowed)': 'dps_crits',
+        'DPS (Crit Immune)': 'dps_no_crits',
+        'Hit %': 'hit_rate_actual',
+        'Crit %': 'crit_rate_actual',
+        'Legend Proc %': 'legend_proc_rate_actual',
+    }
+    sorted_results = sorted(results_dict.items(), key=lambda item: item[1]['avg_dps_both'], reverse=True)
+
+    rows = []
+    for weapon, results in sorted_results:
+        cells = [html.Td(weapon)]
+        cells.extend(html.Td(round(results[key], 2)) for key in columns.values() if key is not None)
+        rows.append(html.Tr(cells))
+
+    # Wrap table in a responsive div
+    return html.Div([
+        dbc.Table([
+            html.Thead(html.Tr([html.Th(col) for col in columns])),
+            html.Tbody(rows),
+        ], bordered=True, hover=True, striped=True, class_name='table-responsive mb-4')
+    ], style={'overflow-x': 'auto'})
+
+
+def build_build_comparison_table(comparison):
+    """Build the build comparison table (A vs B), one row per weapon in the order of the selection"""
+    verdict_labels = {'A': 'A is better', 'B': 'B is better', 'equal': 'Equivalent', 'inconclusive': 'Inconclusive'}
+    rows = [
+        html.Tr([
+            html.Td(weapon),
+            html.Td(f"{results['dps_a']:.2f}"),
+            html.Td(f"{results['dps_b']:.2f}"),
+            html.Td(f"{results['delta']:+.2f} ± {results['delta_error']:.2f}"),
+            html.Td(results['rounds']),
+            html.Td(verdict_labels[results['verdict']]),
+        ])
+        for weapon, results in comparison.items()
+    ]
+    return html.Div([
+        html.P("Average DPS (50/50) of build A and of the current build B, both rolled with the same dice."),
+        dbc.Table([
+            html.Thead(html.Tr([html.Th(col) for col in
+                                ['Weapon', 'Build A DPS', 'Build B DPS', 'A - B (99% CI)', 'Rounds', 'Verdict']])),
+            html.Tbody(rows),
+        ], bordered=True, hover=True, striped=True, class_name='table-responsive mb-4')
+    ], style={'overflow-x': 'auto'})
+
+
+def build_stat_weights_table(stat_weights):
+    """Build the stat weights table, DPS gained per +1 of a stat and per additional damage source (non-zero only)"""
+    stat_labels = {'AB': '+1 AB', 'STR_MOD': '+1 STR Modifier', 'ENHANCEMENT_SET_BONUS': '+1 Enhancement',
+                   'TARGET_AC': '+1 Target AC'}
+    rows = [html.Tr([html.Td(stat_labels.get(name, name.replace('_', ' '))), html.Td(f'{weight:+.2f}')])
+            for name, weight in stat_weights.items() if name in stat_labels or weight != 0]
+    return html.Div([
+        dbc.Table([
+            html.Thead([html.Tr([html.Th('Stat / Damage Source'), html.Th('DPS (50/50)')])]),
+            html.Tbody(rows)
+        ], bordered=True, hover=True, striped=True, size='sm', class_name='table-responsive')
+    ], style={'overflow-x': 'auto'})
+
+
+def build_damage_distribution_table(results):
+    """Build the table of the damage quantiles per round and per hit (crit allowed), from the streaming summaries"""
+    rows = []
+    for label, key in (('Per Round', 'round_damage_summary'), ('Per Hit', 'hit_damage_summary')):
+        summary = results.get(key)
+        if not summary or not summary['count']:
+            continue
+        rows.append(html.Tr([html.Td(label)] + [html.Td(f'{summary[stat]:.0f}') for stat in ('p50', 'p90', 'p99', 'max')]))
+    return html.Div([
+        dbc.Table([
+            html.Thead([html.Tr([html.Th('Damage'), html.Th('p50'), html.Th('p90'), html.Th('p99'), html.Th('Max')])]),
+            html.Tbody(rows)
+        ], bordered=True, hover=True, striped=True, size='sm', class_name='table-responsive')
+    ], style={'overflow-x': 'auto'})
+
+
+def build_weapon_detail(results, stat_weights=None):
+    """Build the detailed results (summary, attack statistics, damage distribution and stat weights) of a single weapon"""
+    extra_cols = []
+    if results.get('round_damage_summary'):
+        extra_cols.append(dbc.Col([
+            html.H6('Damage Distribution (crit allowed)', className='mb-3'),
+            build_damage_distribution_table(results),
+        ], xs=12, md=4, class_name='mb-4'))
+    if stat_weights:
+        extra_cols.append(dbc.Col([
+            html.H6('Stat Weights (exact DPS gained, damage sources toggled)', className='mb-3'),
+            build_stat_weights_table(stat_weights),
+        ], xs=12, md=4, class_name='mb-4'))
+    extra_rows = [dbc.Row(extra_cols, class_name='gx-4', style={'alignItems': 'flex-start'})] if extra_cols else []
+    return html.Div([
+        # Attack Stats, Hit and Crit rates per attack
+        dbc.Row([
+            dbc.Col([
+                html.H6('Summary', className='mb-3'),
+                html.Pre(results["summary"], className='border rounded p-3 bg-dark-subtle', style={'overflow-x': 'auto'}),
+            ], class_name='mb-4'),
+        ]),
+        dbc.Row([
+            # Attack Statistics - full width on mobile, 4 cols on desktop
+            dbc.Col([
+                html.H6('Attack Statistics', className='mb-3'),
+                html.Div([
+                    dbc.Table([
+                        html.Thead([html.Tr([html.Th('Statistic'), html.Th('Actual'), html.Th('Theoretical')])]),
+                        html.Tbody([
+                            html.Tr([html.Td('Hit Rate'),
+                                     html.Td(f'{results["hit_rate_actual"]:.1f}%'),
+                                     html.Td(f'{results["hit_rate_theoretical"]:.1f}%')]),
+                            html.Tr([html.Td('Crit Rate'),
+                                     html.Td(f'{results["crit_rate_actual"]:.1f}%'),
+                                     html.Td(f'{results["crit_rate_theoretical"]:.1f}%')]),
+                            html.Tr([html.Td('Legend Proc Rate'),
+                                     html.Td(f'{results["legend_proc_rate_actual"]:.1f}%'),
+                                     html.Td(f'{results["legend_proc_rate_theoretical"]:.1f}%')]),
+                            html.Tr([html.Td('Legend Effect Uptime'),
+                                     html.Td('-'),
+                                     html.Td(f'{results.get("legend_uptime_theoretical", 0.0):.1f}%')]),
+                        ])
+                    ], bordered=True, hover=True, striped=True, size='sm', class_name='table-responsive')
+                ], style={'overflow-x': 'auto'})
+            ], xs=12, md=4, class_name='mb-4'),
+
+            # Hit Rate per Attack - full width on mobile, 4 cols on desktop
+            dbc.Col([
+                html.H6('Hit Rate per Attack', className='mb-3'),
+                html.Div([
+                    dbc.Table([
+                        html.Thead([html.Tr([html.Th('Attack #'), html.Th('Actual %'), html.Th('Theoretical %')])]),
+                        html.Tbody([
+                            html.Tr([
+                                html.Td(f'Attack {i + 1}'),
+                                html.Td(f'{results["hits_per_attack"][i]:.1f}%'),
+                                html.Td(f'{results["hit_rate_per_attack_theoretical"][i]:.1f}%')
+                            ]) for i in range(len(results["hits_per_attack"]))
+                        ])
+                    ], bordered=True, hover=True, striped=True, size='sm', class_name='table-responsive')
+                ], style={'overflow-x': 'auto'})
+            ], xs=12, md=4, class_name='mb-4'),
+
+            # Crit Rate per Attack - full width on mobile, 4 cols on desktop
+            dbc.Col([
+                html.H6('Crit Rate per Attack', className='mb-3'),
+                html.Div([
+                    dbc.Table([
+                        html.Thead([html.Tr([html.Th('Attack #'), html.Th('Actual %'), html.Th('Theoretical %')])]),
+                        html.Tbody([
+                            html.Tr([
+                                html.Td(f'Attack {i + 1}'),
+                                html.Td(f'{results["crits_per_attack"][i]:.1f}%'),
+                                html.Td(f'{results["crit_rate_per_attack_theoretical"][i]:.1f}%')
+                            ]) for i in range(len(results["crits_per_attack"]))
+                        ])
+                    ], bordered=True, hover=True, striped=True, size='sm', class_name='table-responsive')
+                ], style={'overflow-x': 'auto'})
+            ], xs=12, md=4, class_name='mb-4')
+        ], class_name='gx-4', style={'alignItems': 'flex-start'}),  # Add horizontal spacing between columns
+        *extra_rows,
+    ])
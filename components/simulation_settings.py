@@ -65,6 +65,11 @@ def build_simulation_settings(cfg):
             ), xs=12, md=10),
         ], className=''),
 
+        # Instant DPS estimate of the selected weapons, refreshed while editing the inputs
+        dbc.Row([
+            dbc.Col(html.Div(id='dps-preview', className='mt-3'), xs=12, md={'size': 10, 'offset': 2}),
+        ], className=''),
+
         # Simulation Settings - Cont.
         dbc.Row([
             dbc.Col([
@@ -135,7 +140,8 @@ def build_simulation_settings(cfg):
                         style={'display': 'none'},
                     ), xs=6, md=6),
                     dbc.Tooltip(
-                        "Simulation will stop when the set damage limit is reached, regardless of convergence.",
+                        "Simulation will stop when the set damage limit is reached, regardless of convergence. "
+                        "The damage limit is also the target HP of the Time to Kill plot.",
                         target='damage-limit-switch',  # must match the component's id
                         placement='left',  # top, bottom, left, right
                         delay={'show': tooltip_delay},
@@ -159,6 +165,100 @@ def build_simulation_settings(cfg):
                     ),
                 ], class_name='switcher'),
 
+                # Shared crit dice (crit-immune damage reuses the crit-allowed dice)
+                dbc.Row([
+                    dbc.Col(dbc.Switch(
+                        id='shared-crit-dice-switch',
+                        label="Shared Crit Dice",
+                        value=cfg.SHARED_CRIT_DICE,
+                        persistence=True,
+                        persistence_type=persist_type,
+                    ), xs=6, md=6),
+                    dbc.Tooltip(
+                        "On a critical hit, crit-immune damage reuses the first set of crit dice, "
+                        "only the extra multiplier dice are rolled. Faster, and tightens the averaged DPS error.",
+                        target='shared-crit-dice-switch',  # must match the component's id
+                        placement='left',  # top, bottom, left, right
+                        delay={'show': tooltip_delay},
+                    ),
+                ], class_name='switcher'),
+
+                # Racing mode (clearly inferior weapons stop early)
+                dbc.Row([
+                    dbc.Col(dbc.Switch(
+                        id='racing-mode-switch',
+                        label="Racing Mode",
+                        value=cfg.RACING_MODE,
+                        persistence=True,
+                        persistence_type=persist_type,
+                    ), xs=6, md=6),
+                    dbc.Tooltip(
+                        "All selected weapons are simulated in small steps, weapons that are clearly worse than the best "
+                        "one are dropped early and the remaining rounds go to the close contenders. "
+                        "Much faster ranking of many weapons, dropped weapons are averaged over fewer rounds. "
+                        "Each weapon runs at most the Rounds setting, and stops at the Target DPS Error if set.",
+                        target='racing-mode-switch',  # must match the component's id
+                        placement='left',  # top, bottom, left, right
+                        delay={'show': tooltip_delay},
+                    ),
+                ], class_name='switcher'),
+
+                # Stratified rolls (vectorized blocks, every d20 face equally often per attack)
+                dbc.Row([
+                    dbc.Col(dbc.Switch(
+                        id='stratified-rolls-switch',
+                        label="Stratified Rolls",
+                        value=cfg.STRATIFIED_ROLLS,
+                        persistence=True,
+                        persistence_type=persist_type,
+                    ), xs=6, md=6),
+                    dbc.Tooltip(
+                        "Rounds are simulated in vectorized blocks, where every attack gets each d20 (and d100) face "
+                        "equally often, in random order. Same average DPS, with less noise. Applies to racing too. "
+                        "Weapons with a legendary effect with duration keep independent rolls.",
+                        target='stratified-rolls-switch',  # must match the component's id
+                        placement='left',  # top, bottom, left, right
+                        delay={'show': tooltip_delay},
+                    ),
+                ], class_name='switcher'),
+
+                # Mean-only runs (aggregated blocks, average DPS only)
+                dbc.Row([
+                    dbc.Col(dbc.Switch(
+                        id='mean-only-switch',
+                        label="Mean Only",
+                        value=cfg.MEAN_ONLY,
+                        persistence=True,
+                        persistence_type=persist_type,
+                    ), xs=6, md=6),
+                    dbc.Tooltip(
+                        "The hits, crits and damage of a whole block of rounds are drawn at once, much faster for many "
+                        "rounds. Only the average DPS and statistics are reported, without damage distribution and "
+                        "breakdown. Weapons with a legendary effect with duration are simulated as usual.",
+                        target='mean-only-switch',  # must match the component's id
+                        placement='left',  # top, bottom, left, right
+                        delay={'show': tooltip_delay},
+                    ),
+                ], class_name='switcher'),
+
+                # Speculative precomputation (results are ready when Calculate is pressed)
+                dbc.Row([
+                    dbc.Col(dbc.Switch(
+                        id='speculative-switch',
+                        label="Precompute While Editing",
+                        value=cfg.SPECULATIVE,
+                        persistence=True,
+                        persistence_type=persist_type,
+                    ), xs=6, md=6),
+                    dbc.Tooltip(
+                        "Simulation will start in the background (low priority) once the inputs stop changing, "
+                        "so Calculate usually returns instantly.",
+                        target='speculative-switch',  # must match the component's id
+                        placement='left',  # top, bottom, left, right
+                        delay={'show': tooltip_delay},
+                    ),
+                ], class_name='switcher'),
+
                 # Relative Change Convergence
                 dbc.Row([
                     dbc.Col(dbc.Label(
@@ -177,7 +277,9 @@ def build_simulation_settings(cfg):
                     dbc.Tooltip(
                         "Simulation will stop when both convergence criteria are met. "
                         "Relative Change checks the mean DPS fluctuation within a 15 rounds window. "
-                        "Lower values require smaller changes for convergence to be detected.",
+                        "Lower values require smaller changes for convergence to be detected. "
+                        f"The DPS must also be known within ±{cfg.REL_DPS_ERROR * 100:g}% (99% confidence), so runs last "
+                        "longer than with the window criteria alone.",
                         target='relative-change-input',  # must match the component's id
                         placement='right',  # top, bottom, left, right
                         delay={'show': tooltip_delay},
@@ -202,13 +304,43 @@ def build_simulation_settings(cfg):
                     dbc.Tooltip(
                         "Simulation will stop when both convergence criteria are met. "
                         "Relative STD checks the mean standard deviation relative to the mean within a 15 rounds window. "
-                        "Lower values demand more stability before the simulation is considered converged.",
+                        "Lower values demand more stability before the simulation is considered converged. "
+                        f"The DPS must also be known within ±{cfg.REL_DPS_ERROR * 100:g}% (99% confidence), so runs last "
+                        "longer than with the window criteria alone.",
                         target='relative-std-input',  # must match the component's id
                         placement='right',  # top, bottom, left, right
                         delay={'show': tooltip_delay},
                     ),
                 ], class_name=''),
 
+                # Target DPS precision (planned rounds per weapon)
+                dbc.Row([
+                    dbc.Col(dbc.Label(
+                        'Target DPS Precision:',
+                        html_for='target-error-input',
+                    ), xs=6, md=6),
+                    dbc.Col(dbc.Input(
+                        id='target-error-input',
+                        type='number',
+                        value=cfg.TARGET_DPS_ERROR,
+                        step=0.01,
+                        persistence=True,
+                        persistence_type=persist_type,
+                        debounce=True,
+                    ), xs=5, md=5),
+                    dbc.Col(html.Span("±"), xs=1, md=1),
+                    dbc.Tooltip(
+                        "Requested precision of the DPS (99% confidence). When set, a short pilot (or the exact variance) "
+                        "predicts the rounds each weapon needs, up to the max number of rounds, and the expected runtime. "
+                        "The DPS is then averaged from the exact expected damage of every attack, given the simulated "
+                        "legendary effect state, so the precision is usually reached in far fewer rounds. "
+                        "0 disables the planner.",
+                        target='target-error-input',  # must match the component's id
+                        placement='right',  # top, bottom, left, right
+                        delay={'show': tooltip_delay},
+                    ),
+                ], class_name=''),
+
             ], xs=12, md=6, class_name='col-left'),
 
             # Target Immunities
@@ -0,0 +1,141 @@
+from simulator.analytic_engine import AnalyticEngine
+from simulator.legend_effect import NO_LEGEND_EFFECT
+import numpy as np
+
+
+class AggregatedEngine:
+    """
+    Aggregated simulation of blocks of rounds, for mean-only runs (no per-round traces) of stateless weapons.
+    Per attack slot, the miss\\hit\\crit counts of a block are drawn at once from a multinomial with the exact
+    theoretical chances, then the damage total of each outcome group is drawn as a multinomial over the exact
+    per-attack damage distribution (all damage types, after immunities): the sum of n attacks is (counts @ values).
+    Same estimator as the attack by attack simulation, with a number of random draws that doesn't depend on the rounds.
+    Legendary effects with duration (Sunder, Darts AB, Heavy Flail, Crushing Blow) need the per-attack state,
+    these weapons are simulated by BatchEngine.
+    """
+    def __init__(self, damage_sim, seed=None):
+        """
+        :param damage_sim: DamageSimulator instance, provides the weapon, attack simulator and damage tables
+        :param seed: Seed of the NumPy generator, None for fresh entropy
+        """
+        if not self.is_supported(damage_sim):
+            raise ValueError(f"Weapon '{damage_sim.weapon.name_purple}' has a legendary effect with duration, "
+                             f"it can't be simulated in aggregated mode")
+
+        self.cfg = damage_sim.cfg
+        self.weapon = damage_sim.weapon
+        self.attack_sim = damage_sim.attack_sim
+        self.stats = damage_sim.stats
+        self.analytic = AnalyticEngine(damage_sim)     # Exact damage distributions and proc chance
+        self.rng = np.random.default_rng(seed)
+
+        self.attacks_per_round = self.attack_sim.attacks_per_round
+        self.offhand_idxs = self.analytic.offhand_idxs
+        self.outcome_chances = self.get_outcome_chances()
+
+        # Exact per-attack damage distributions, keys are (offhand, crit multiplier)
+        self.hit_pmfs = {}
+        self.hit_pmfs_crit_imm = {}
+        for offhand in ((False, True) if self.offhand_idxs else (False,)):
+            for crit_multiplier in (1, self.weapon.crit_multiplier):
+                dmg_dict, dmg_dict_crit_imm = self.analytic.damage_tables.get_tables(offhand, crit_multiplier)
+                self.hit_pmfs[(offhand, crit_multiplier)] = self.analytic.damage_pmf(dmg_dict, {})
+                self.hit_pmfs_crit_imm[(offhand, crit_multiplier)] = self.analytic.damage_pmf(dmg_dict_crit_imm, {})
+
+        # Legendary damage ignores target immunities, triggers on-hit by percentage, or on every critical hit
+        legend_dmg_dict = {dmg_type: dmg_list for dmg_type, dmg_list in self.analytic.dmg_dict_legend.items()
+                           if dmg_type not in ('proc', 'effect')}
+        self.legend_pmf = self.analytic.damage_pmf(legend_dmg_dict) if legend_dmg_dict else None
+        self.legend_proc = self.analytic.dmg_dict_legend.get('proc')
+        self.miss_dmg = self.analytic.expected_miss_damage()   # Tenacious Blow, flat damage on a miss
+
+    @staticmethod
+    def is_supported(damage_sim):
+        """:return: True if the weapon has no legendary effect with duration (the attacks are independent)"""
+        return damage_sim.legend_effect.effect == NO_LEGEND_EFFECT
+
+    def get_outcome_chances(self):
+        """:return: Numpy array of the exact (miss, non-crit hit, crit hit) chances, per attack slot"""
+        chances = np.array([[1 - hit_chance, noncrit_chance, crit_chance] for hit_chance, noncrit_chance, crit_chance
+                            in zip(self.attack_sim.hit_chance_list, self.attack_sim.noncrit_chance_list,
+                                   self.attack_sim.crit_chance_list)])
+        chances = np.clip(chances, 0.0, 1.0)
+        return chances / chances.sum(axis=1, keepdims=True)
+
+    def draw_total(self, pmf, num_attacks: int):
+        """
+        :param pmf: Numpy array, exact distribution of the damage of a single attack
+        :param num_attacks: Number of attacks
+        :return: int, total damage of the attacks (sum of num_attacks independent draws)
+        """
+        if num_attacks == 0 or pmf is None:
+            return 0
+        counts = self.rng.multinomial(num_attacks, pmf / pmf.sum())
+        return int(counts @ np.arange(len(pmf)))
+
+    def simulate_block(self, num_rounds: int):
+        """
+        :param num_rounds: Number of rounds to simulate
+        :return: Tuple of total damage of the block (crit allowed, crit immune)
+        """
+        outcome_counts = [self.rng.multinomial(num_rounds, chances) for chances in self.outcome_chances]
+        misses, hits, crits = 0, 0, 0
+        group_counts = {}  # Keys are (offhand, crit multiplier), Values are number of hits
+        for attack_idx, (slot_misses, slot_noncrits, slot_crits) in enumerate(outcome_counts):
+            offhand = attack_idx in self.offhand_idxs
+            for crit_multiplier, slot_hits in ((1, slot_noncrits), (self.weapon.crit_multiplier, slot_crits)):
+                group_counts[(offhand, crit_multiplier)] = group_counts.get((offhand, crit_multiplier), 0) + int(slot_hits)
+
+            self.stats.attempts_made_per_attack[attack_idx] += num_rounds
+            self.stats.hits_per_attack[attack_idx] += int(slot_noncrits + slot_crits)
+            self.stats.crits_per_attack[attack_idx] += int(slot_crits)
+            misses += int(slot_misses)
+            hits += int(slot_noncrits + slot_crits)
+            crits += int(slot_crits)
+
+        dmg, dmg_crit_imm = 0, 0
+        for group, num_attacks in group_counts.items():
+            group_dmg = self.draw_total(self.hit_pmfs[group], num_attacks)
+            dmg += group_dmg
+            # Critical hits vs crit immune target are rolled separately, as in the attack by attack simulation
+            dmg_crit_imm += group_dmg if group[1] == 1 else self.draw_total(self.hit_pmfs_crit_imm[group], num_attacks)
+
+        # Legendary damage, added to both totals
+        if isinstance(self.legend_proc, (int, float)):
+            legend_procs = int(self.rng.binomial(hits, self.analytic.legend_chain.proc_chance))
+        elif isinstance(self.legend_proc, str):
+            legend_procs = crits
+        else:
+            legend_procs = 0
+        legend_dmg = self.draw_total(self.legend_pmf, legend_procs)
+        miss_dmg = round(misses * self.miss_dmg)
+
+        self.stats.attempts_made += num_rounds * self.attacks_per_round
+        self.stats.hits += hits
+        self.stats.crit_hits += crits
+        self.stats.legend_procs += legend_procs
+        return dmg + legend_dmg + miss_dmg, dmg_crit_imm + legend_dmg + miss_dmg
+
+    def simulate(self, num_rounds: int, block_rounds: int = 1000):
+        """
+        :param num_rounds: Number of rounds to simulate
+        :param block_rounds: Number of rounds aggregated per block
+        :return: Dictionary with the average DPS, same keys (and rounding) as in DamageSimulator results,
+                 the DPS per block and the actual hit\\crit\\legend proc rates
+        """
+        self.stats.init_zeroes_lists(self.attacks_per_round)
+        block_sizes = [min(block_rounds, num_rounds - start) for start in range(0, num_rounds, block_rounds)]
+        blocks = np.array([self.simulate_block(size) for size in block_sizes], dtype=float)
+
+        dps, dps_crit_imm = blocks.sum(axis=0) / num_rounds / 6     # Round is 6 seconds
+        self.stats.calc_rates_percentages()
+        return {
+            "avg_dps_both": round((dps + dps_crit_imm) / 2, 2),
+            "dps_crits": round(dps, 2),
+            "dps_no_crits": round(dps_crit_imm, 2),
+            "dps_per_block": blocks[:, 0] / np.array(block_sizes) / 6,
+            "dps_crit_imm_per_block": blocks[:, 1] / np.array(block_sizes) / 6,
+            "hit_rate_actual": self.stats.hit_rate,
+            "crit_rate_actual": self.stats.crit_hit_rate,
+            "legend_proc_rate_actual": self.stats.legend_proc_rate,
+        }
@@ -0,0 +1,289 @@
+from simulator.dice_distribution import entries_pmf, entry_mean
+from simulator.legend_chain import LegendChain
+from simulator.immunities import ImmunityTable
+from simulator.legend_effect import NO_LEGEND_EFFECT
+import numpy as np
+
+
+class AnalyticEngine:
+    """
+    Exact expected DPS, without rolling any dice.
+    Combines the per-attack hit\\crit chances of the AttackSimulator with the exact damage distributions
+    of the compiled damage tables, including the floor\\min-1 rules of target immunities.
+    Legendary effects with duration (Sunder, Darts AB, Heavy Flail, Crushing Blow) are weighted by their
+    exact steady-state uptime per attack slot, from the LegendChain Markov model.
+    """
+    def __init__(self, damage_sim):
+        self.cfg = damage_sim.cfg
+        self.weapon = damage_sim.weapon
+        self.attack_sim = damage_sim.attack_sim
+        self.damage_tables = damage_sim.damage_tables
+        self.immunity_table = self.attack_sim.immunity_table
+        self.dmg_dict_legend = damage_sim.dmg_dict_legend
+        self.legend_chain = LegendChain(self.attack_sim, damage_sim.legend_effect)
+        self.legend_effect_spec = damage_sim.legend_effect.effect
+
+        # Legendary effect "common" damage and immunity factors, applied to the hits while the effect is active
+        legend_effect = damage_sim.legend_effect
+        self.legend_dmg_common = legend_effect.get_common_damage(self.dmg_dict_legend) if self.dmg_dict_legend else []
+        self.legend_imm_factors = legend_effect.get_immunity_factors()
+
+        # Check if offhand attack are present in the attack progression
+        attacks_per_round = self.attack_sim.attacks_per_round
+        self.offhand_idxs = (attacks_per_round - 2, attacks_per_round - 1) if self.attack_sim.dual_wield else ()
+
+    def get_immunity(self, dmg_type_name: str, imm_factors: dict = None):
+        """
+        :param dmg_type_name: Damage type name, e.g., 'fire_fw' or 'slashing'
+        :param imm_factors: Dictionary holding the target immunity factors (for example -0.1 (10%) due to legend property
+        :return: The target immunity (fraction) that applies to the damage type
+        """
+        return self.immunity_table.get_immunity(dmg_type_name, imm_factors)
+
+    @staticmethod
+    def apply_immunity(dmg_values, immunity: float):
+        """Vectorized immunity rules, see ImmunityTable.apply_array"""
+        return ImmunityTable.apply_array(dmg_values, immunity)
+
+    def expected_damage(self, damage_dict: dict, imm_factors: dict = None):
+        """
+        :param damage_dict: Damage dictionary, e.g., {'physical': [[2, 6], [0, 0, 21]], 'fire': [[1, 4, 10]]}
+        :param imm_factors: Dictionary holding the target immunity factors
+        :return: Exact expected damage after applying target immunities
+        """
+        expected = 0.0
+        for dmg_key, dmg_list in damage_dict.items():
+            pmf = entries_pmf(dmg_list)
+            dmg_values = np.arange(len(pmf), dtype=float)
+            immunity = self.get_immunity(dmg_key, imm_factors)
+            expected += float(np.dot(pmf, self.apply_immunity(dmg_values, immunity)))
+        return expected
+
+    def damage_pmf(self, damage_dict: dict, imm_factors: dict = None):
+        """
+        :param damage_dict: Damage dictionary, e.g., {'physical': [[2, 6], [0, 0, 21]], 'fire': [[1, 4, 10]]}
+        :param imm_factors: Dictionary holding the target immunity factors, None to ignore immunities (legendary damage)
+        :return: Numpy array, where item [v] is the probability that the total damage (all types, after immunities) equals v
+        """
+        pmf = np.array([1.0])
+        for dmg_key, dmg_list in damage_dict.items():
+            type_pmf = entries_pmf(dmg_list)
+            if imm_factors is not None:     # Map every damage value to its value after immunity
+                dmg_values = self.apply_immunity(np.arange(len(type_pmf), dtype=float), self.get_immunity(dmg_key, imm_factors))
+                type_pmf = np.bincount(dmg_values.astype(np.int64), weights=type_pmf)
+            pmf = np.convolve(pmf, type_pmf)
+        return pmf
+
+    def expected_legend_damage(self):
+        """
+        :return: Expected legendary damage of a single legend proc (legendary damage ignores target immunities)
+        """
+        if self.legend_effect_spec.common_damage:  # H.Flail damage is "common", applied by duration effect
+            return 0.0
+
+        expected = 0.0
+        for dmg_type, dmg_list in self.dmg_dict_legend.items():
+            if dmg_type in ('proc', 'effect'):
+                continue
+            expected += sum(entry_mean(dmg_sublist) for dmg_sublist in dmg_list)
+        return expected
+
+    def miss_damage_dict(self):
+        """:return: Damage dictionary of a miss, only Tenacious Blow inflicts damage on a miss"""
+        if ("Tenacious_Blow" in self.cfg.ADDITIONAL_DAMAGE
+                and self.cfg.ADDITIONAL_DAMAGE["Tenacious_Blow"][0] is True
+                and self.weapon.name_base in ["Dire Mace", "Double Axe", "Two-Bladed Sword"]):
+            return {'pure': [[0, 0, 4]]}
+        return {}
+
+    def expected_miss_damage(self):
+        """:return: Expected damage on a miss, only Tenacious Blow inflicts damage on a miss"""
+        return self.expected_damage(self.miss_damage_dict())
+
+    def expected_hit_damage(self, offhand: bool, effect: bool):
+        """
+        :param offhand: True if the attack is an offhand attack (Dual-Wield)
+        :param effect: True if the legendary effect applies to the hit (duration effect active, or procs on this hit)
+        :return: Tuple of expected damage of a (non-crit hit, crit hit, crit hit vs crit immune target)
+        """
+        legend_dmg_common = self.legend_dmg_common if effect else None
+        imm_factors = self.legend_imm_factors if effect else None
+        hit_dmg_dict, _ = self.damage_tables.get_tables(offhand, 1, legend_dmg_common)
+        crit_dmg_dict, crit_dmg_dict_crit_imm = self.damage_tables.get_tables(offhand, self.weapon.crit_multiplier,
+                                                                              legend_dmg_common)
+        return (self.expected_damage(hit_dmg_dict, imm_factors),
+                self.expected_damage(crit_dmg_dict, imm_factors),
+                self.expected_damage(crit_dmg_dict_crit_imm, imm_factors))
+
+    def expected_state_damage(self, attack_idx: int, active: bool):
+        """
+        Expected damage of an attack, conditioned on the legendary effect state before the attack
+        (the attack roll, its own legend proc and the damage rolls are integrated exactly).
+        :param attack_idx: Index of the attack in the attack progression
+        :param active: True if the legendary effect is active (legend_attacks_left > 0) before the attack
+        :return: Tuple of expected damage of the attack (crit allowed, crit immune)
+        """
+        offhand = attack_idx in self.offhand_idxs
+        chain = self.legend_chain
+
+        # Legendary damage, triggers on-hit by percentage, or on every critical hit
+        proc = self.dmg_dict_legend.get('proc')
+        legend_dmg = self.expected_legend_damage()
+        if chain.duration_effect:
+            legend_dmg_hit = legend_dmg_crit = chain.proc_chance * legend_dmg
+        elif isinstance(proc, str):
+            legend_dmg_hit, legend_dmg_crit = 0.0, legend_dmg
+        else:
+            legend_dmg_hit = legend_dmg_crit = 0.0
+
+        plain_dmg = self.expected_hit_damage(offhand, effect=False)
+        effect_dmg = self.expected_hit_damage(offhand, effect=True) if chain.duration_effect else plain_dmg
+
+        chances, effect_chance = (chain.active_chances, 1.0) if active else (chain.inactive_chances, chain.proc_chance)
+        hit_chance, crit_chance = chances[0][attack_idx], chances[1][attack_idx]
+        noncrit_chance = hit_chance - crit_chance
+        # The effect applies to all hits while active, otherwise only to the hits that proc it
+        hit_dmg, crit_dmg, crit_dmg_crit_imm = ((1 - effect_chance) * plain + effect_chance * effect
+                                                for plain, effect in zip(plain_dmg, effect_dmg))
+
+        miss_dmg = (1 - hit_chance) * self.expected_miss_damage()
+        noncrit_dmg = noncrit_chance * (hit_dmg + legend_dmg_hit)
+        attack_dmg = miss_dmg + noncrit_dmg + crit_chance * (crit_dmg + legend_dmg_crit)
+        attack_dmg_crit_imm = miss_dmg + noncrit_dmg + crit_chance * (crit_dmg_crit_imm + legend_dmg_crit)
+        return attack_dmg, attack_dmg_crit_imm
+
+    def expected_attack_damage(self, attack_idx: int):
+        """
+        :param attack_idx: Index of the attack in the attack progression
+        :return: Tuple of expected damage of the attack (crit allowed, crit immune), weighted by the effect uptime
+        """
+        active_chance = self.legend_chain.active_chances_per_attack[attack_idx]
+        attack_dmg, attack_dmg_crit_imm = 0.0, 0.0
+        for state_chance, active in ((1 - active_chance, False), (active_chance, True)):
+            if state_chance == 0:
+                continue
+            state_dmg, state_dmg_crit_imm = self.expected_state_damage(attack_idx, active)
+            attack_dmg += state_chance * state_dmg
+            attack_dmg_crit_imm += state_chance * state_dmg_crit_imm
+        return attack_dmg, attack_dmg_crit_imm
+
+    @staticmethod
+    def pmf_moments(pmf):
+        """:return: Tuple of the first and second moments (E[X], E[X^2]) of a damage distribution"""
+        dmg_values = np.arange(len(pmf), dtype=float)
+        return float(np.dot(pmf, dmg_values)), float(np.dot(pmf, dmg_values ** 2))
+
+    def round_variance(self):
+        """
+        Exact variance of the damage per round (crit allowed), for weapons without legendary effect with duration:
+        the attacks of a round are independent, so the round variance is the sum of the attack variances.
+        Each attack is a mixture of miss\\hit\\crit outcomes, a hit can add an independent legendary proc.
+        :return: Variance of the damage per round
+        """
+        if self.legend_effect_spec != NO_LEGEND_EFFECT:
+            raise ValueError(f"Weapon '{self.weapon.name_purple}' has a legendary effect with duration, "
+                             f"the attacks are not independent")
+
+        # Legendary damage, triggers on-hit by percentage, or on every critical hit
+        proc = self.dmg_dict_legend.get('proc')
+        legend_dmg_dict = {dmg_type: dmg_list for dmg_type, dmg_list in self.dmg_dict_legend.items()
+                           if dmg_type not in ('proc', 'effect')}
+        legend_m1, legend_m2 = self.pmf_moments(self.damage_pmf(legend_dmg_dict)) if legend_dmg_dict else (0.0, 0.0)
+        if isinstance(proc, (int, float)):
+            proc_hit = proc_crit = self.legend_chain.proc_chance
+        elif isinstance(proc, str):
+            proc_hit, proc_crit = 0.0, 1.0
+        else:
+            proc_hit = proc_crit = 0.0
+        miss_dmg = self.expected_miss_damage()     # Flat damage, no variance
+
+        variance = 0.0
+        for attack_idx in range(self.attack_sim.attacks_per_round):
+            offhand = attack_idx in self.offhand_idxs
+            hit_dict, _ = self.damage_tables.get_tables(offhand, 1)
+            crit_dict, _ = self.damage_tables.get_tables(offhand, self.weapon.crit_multiplier)
+
+            attack_m1 = attack_m2 = 0.0
+            outcomes = ((self.attack_sim.noncrit_chance_list[attack_idx], hit_dict, proc_hit),
+                        (self.attack_sim.crit_chance_list[attack_idx], crit_dict, proc_crit))
+            for outcome_chance, dmg_dict, proc_chance in outcomes:
+                dmg_m1, dmg_m2 = self.pmf_moments(self.damage_pmf(dmg_dict, {}))
+                # Hit damage plus the legendary damage, added with the proc chance: X = D + B * L
+                attack_m1 += outcome_chance * (dmg_m1 + proc_chance * legend_m1)
+                attack_m2 += outcome_chance * (dmg_m2 + 2 * proc_chance * dmg_m1 * legend_m1 + proc_chance * legend_m2)
+            miss_chance = 1 - self.attack_sim.hit_chance_list[attack_idx]
+            attack_m1 += miss_chance * miss_dmg
+            attack_m2 += miss_chance * miss_dmg ** 2
+            variance += attack_m2 - attack_m1 ** 2
+        return variance
+
+    @staticmethod
+    def mix_pmfs(weighted_pmfs):
+        """
+        :param weighted_pmfs: List of tuples (chance, damage distribution)
+        :return: Damage distribution of the mixture, padded to the longest distribution
+        """
+        mixture = np.zeros(max(len(pmf) for _, pmf in weighted_pmfs))
+        for chance, pmf in weighted_pmfs:
+            mixture[:len(pmf)] += chance * pmf
+        return mixture
+
+    def round_pmf(self, crit_imm: bool = False):
+        """
+        Exact distribution of the damage per round, for weapons without legendary effect with duration:
+        the attacks of a round are independent, so the round distribution is the convolution of the attack distributions.
+        Each attack is a mixture of miss\\hit\\crit outcomes, a hit can add an independent legendary proc.
+        :param crit_imm: True for a crit immune target
+        :return: Numpy array, probability of each (integer) damage per round
+        """
+        if self.legend_effect_spec != NO_LEGEND_EFFECT:
+            raise ValueError(f"Weapon '{self.weapon.name_purple}' has a legendary effect with duration, "
+                             f"the attacks are not independent")
+
+        # Legendary damage, triggers on-hit by percentage, or on every critical hit
+        proc = self.dmg_dict_legend.get('proc')
+        legend_dmg_dict = {dmg_type: dmg_list for dmg_type, dmg_list in self.dmg_dict_legend.items()
+                           if dmg_type not in ('proc', 'effect')}
+        legend_pmf = self.damage_pmf(legend_dmg_dict) if legend_dmg_dict else np.array([1.0])
+        if isinstance(proc, (int, float)):
+            proc_hit = proc_crit = self.legend_chain.proc_chance
+        elif isinstance(proc, str):
+            proc_hit, proc_crit = 0.0, 1.0
+        else:
+            proc_hit = proc_crit = 0.0
+        miss_pmf = self.damage_pmf(self.miss_damage_dict(), {})
+
+        round_pmf = np.array([1.0])
+        for attack_idx in range(self.attack_sim.attacks_per_round):
+            offhand = attack_idx in self.offhand_idxs
+            hit_dict, _ = self.damage_tables.get_tables(offhand, 1)
+            crit_dict, crit_dict_crit_imm = self.damage_tables.get_tables(offhand, self.weapon.crit_multiplier)
+            crit_dict = crit_dict_crit_imm if crit_imm else crit_dict
+
+            outcomes = [(1 - self.attack_sim.hit_chance_list[attack_idx], miss_pmf)]
+            for outcome_chance, dmg_dict, proc_chance in (
+                    (self.attack_sim.noncrit_chance_list[attack_idx], hit_dict, proc_hit),
+                    (self.attack_sim.crit_chance_list[attack_idx], crit_dict, proc_crit)):
+                # Hit damage plus the legendary damage, added with the proc chance: X = D + B * L
+                dmg_pmf = self.damage_pmf(dmg_dict, {})
+                proc_pmf = self.mix_pmfs([(1 - proc_chance, np.array([1.0])), (proc_chance, legend_pmf)])
+                outcomes.append((outcome_chance, np.convolve(dmg_pmf, proc_pmf)))
+            round_pmf = np.convolve(round_pmf, self.mix_pmfs(outcomes))
+        return round_pmf
+
+    def expected_dps(self):
+        """
+        :return: Dictionary with the exact expected DPS, same keys (and rounding) as in DamageSimulator results
+        """
+        dpr, dpr_crit_imm = 0.0, 0.0
+        for attack_idx in range(self.attack_sim.attacks_per_round):
+            attack_dmg, attack_dmg_crit_imm = self.expected_attack_damage(attack_idx)
+            dpr += attack_dmg
+            dpr_crit_imm += attack_dmg_crit_imm
+
+        dps, dps_crit_imm = dpr / 6, dpr_crit_imm / 6   # Round is 6 seconds
+        return {
+            "avg_dps_both": round((dps + dps_crit_imm) / 2, 2),
+            "dps_crits": round(dps, 2),
+            "dps_no_crits": round(dps_crit_imm, 2),
+        }
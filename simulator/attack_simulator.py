@@ -1,14 +1,21 @@
 from copy import deepcopy
-from math import floor
 from simulator.weapon import Weapon
 from simulator.config import Config
-import random
+from simulator.roll_source import RollSource
+from simulator.immunities import ImmunityTable
+import numpy as np
+
+
+# Attack outcome codes of the outcome lookup tables
+MISS, HIT, CRITICAL_HIT = 0, 1, 2
+OUTCOME_NAMES = ('miss', 'hit', 'critical_hit')
 
 
 class AttackSimulator:
-    def __init__(self, weapon_obj: Weapon, config: Config):
+    def __init__(self, weapon_obj: Weapon, config: Config, roll_source: RollSource = None):
         self.cfg = config
         self.weapon = weapon_obj
+        self.roll_source = roll_source or RollSource()  # Source of d20\dN rolls, shared with the legendary effect
         self.defender_ac = self.cfg.TARGET_AC
         self.ab_capped = self.cfg.AB_CAPPED
         self.ab = self.calculate_attack_bonus()
@@ -23,6 +30,8 @@ class AttackSimulator:
         self.attacks_per_round = len(self.attack_prog)
 
         (self.hit_chance_list, self.crit_chance_list, self.noncrit_chance_list) = self.calculate_hit_chances()
+        self._outcome_tables = {}   # Outcome lookup tables per attack slot, keys are (AB bonus, AC modifier) states
+        self.immunity_table = ImmunityTable(self.cfg.TARGET_IMMUNITIES)     # Compiled once, no deepcopy per attack
 
     def calculate_attack_bonus(self):
         """Calculate the attack bonus (AB) based on weapon enhancement and cap it if necessary"""
@@ -149,43 +158,83 @@ class AttackSimulator:
         self.ab = self.ab + dw_penalty
         return attack_prog
 
-    def attack_roll(self, attacker_ab: int, defender_ac_modifier: int = 0):
+    def build_outcome_table(self, attacker_ab: int, defender_ac_modifier: int = 0):
         """
+        Attack rules, evaluated once for every (d20 roll, threat roll) combination: a natural 1 misses, a natural 20
+        hits, a hit with a roll in the threat range is a critical hit if the threat roll (no auto-hit or auto-miss)
+        also hits.
         :param attacker_ab: AB of attacker
         :param defender_ac_modifier: AC modifier of the defender, e.g., -2 for legendary Sunder effect
-        :return: String that specifies: 'miss', 'hit', 'critical_hit', and the d20 roll result
+        :return: Numpy array (21 x 21) of outcome codes, indexed by [d20 roll, threat roll] (index 0 is unused),
+                 and a list of booleans, indexed by d20 roll, True if the outcome depends on the threat roll
         """
-        roll = random.randint(1, 20)        # Roll a 1d20
         defender_ac = self.defender_ac + defender_ac_modifier
-        if roll == 1:                             # Auto-miss on a natural 1
-            return 'miss', roll
-        elif (roll + attacker_ab) >= defender_ac or roll == 20:       # Check if a hit or miss, auto-hit on a natural 20
-            if roll >= self.weapon.crit_threat:
-                # Threat roll does not auto-hit if a natural 20 is rolled, nor does it auto-miss if a natural 1 is rolled:
-                threat_roll = random.randint(1, 20)
-                threat_hit = (threat_roll + attacker_ab) >= defender_ac  # Boolean, True if Threat roll succeeds, False otherwise
-                return 'critical_hit' if threat_hit is True else 'hit', roll
-            else:
-                return 'hit', roll
-        else:
-            return 'miss', roll
+        table = np.full((21, 21), MISS, dtype=np.int8)
+        threat_rows = [False] * 21
+        for roll in range(2, 21):   # Auto-miss on a natural 1
+            if (roll + attacker_ab) >= defender_ac or roll == 20:   # Auto-hit on a natural 20
+                table[roll, :] = HIT
+                if roll >= self.weapon.crit_threat:     # Threat roll does not auto-hit or auto-miss
+                    threat_rows[roll] = True
+                    for threat_roll in range(1, 21):
+                        if (threat_roll + attacker_ab) >= defender_ac:
+                            table[roll, threat_roll] = CRITICAL_HIT
+        return table, threat_rows
+
+    def get_outcome_tables(self, ab_bonus: int = 0, defender_ac_modifier: int = 0):
+        """
+        :param ab_bonus: AB bonus of the attacker, e.g., +2 for legendary Darts effect (AB is still capped)
+        :param defender_ac_modifier: AC modifier of the defender, e.g., -2 for legendary Sunder effect
+        :return: Tuple of (numpy array of outcome codes, stacked per attack slot, indexed by [slot, d20 roll, threat roll],
+                 list of per attack slot (outcome table as nested lists, threat rows)), built once per state
+        """
+        key = (ab_bonus, defender_ac_modifier)
+        if key not in self._outcome_tables:
+            slot_tables = [self.build_outcome_table(min(attack_ab + ab_bonus, self.ab_capped), defender_ac_modifier)
+                           for attack_ab in self.attack_prog]
+            stacked = np.stack([table for table, _ in slot_tables])
+            scalar = [(table.tolist(), threat_rows) for table, threat_rows in slot_tables]
+            self._outcome_tables[key] = (stacked, scalar)
+        return self._outcome_tables[key]
+
+    def resolve_attack(self, attack_idx: int, ab_bonus: int = 0, defender_ac_modifier: int = 0):
+        """
+        Roll an attack of an attack slot of the attack progression, the outcome is looked up in the outcome tables.
+        The threat roll is rolled only when the outcome depends on it.
+        :param attack_idx: Index of the attack in the attack progression
+        :param ab_bonus: AB bonus of the attacker, e.g., +2 for legendary Darts effect
+        :param defender_ac_modifier: AC modifier of the defender, e.g., -2 for legendary Sunder effect
+        :return: String that specifies: 'miss', 'hit', 'critical_hit'
+        """
+        table, threat_rows = self.get_outcome_tables(ab_bonus, defender_ac_modifier)[1][attack_idx]
+        roll = self.roll_source.d20()
+        threat_roll = self.roll_source.d20() if threat_rows[roll] else 0
+        return OUTCOME_NAMES[table[roll][threat_roll]]
 
-    @staticmethod
-    def damage_roll(num_dice: int, num_sides: int, flat_dmg: int):
+    def resolve_attacks(self, attack_idxs, rolls, threat_rolls, ab_bonus: int = 0, defender_ac_modifier: int = 0):
+        """
+        Vectorized version of resolve_attack, for a batch of attacks with pre-rolled d20 and threat rolls.
+        :param attack_idxs: Numpy array of attack slot indexes
+        :param rolls: Numpy array of d20 rolls (1-20)
+        :param threat_rolls: Numpy array of threat rolls (1-20), ignored where the outcome doesn't depend on them
+        :param ab_bonus: AB bonus of the attacker, a scalar (the tables are cached per state), same for all the attacks
+        :param defender_ac_modifier: AC modifier of the defender, a scalar
+        :return: Numpy array of outcome codes (MISS, HIT, CRITICAL_HIT)
+        """
+        stacked = self.get_outcome_tables(ab_bonus, defender_ac_modifier)[0]
+        return stacked[attack_idxs, rolls, threat_rolls]
+
+    def damage_roll(self, num_dice: int, num_sides: int, flat_dmg: int):
         """
         :param num_dice: The number of dice to roll, e.g., in 2d6 this value is 2
         :param num_sides: The number of sides of the die, e.g., in 2d6 this value is 6
         :param flat_dmg: Flat damage to be added to the roll, e.g., in 2d6+3 this value is 3
-        :return: int, Damage roll results
+        :return: int, Damage roll results, rolled from the shared roll source
         """
         if num_dice == 0 or num_sides == 0:  # no roll is performed, return only flat damage
             return flat_dmg
         else:
-            total_dmg_roll = 0
-            for i in range(num_dice):
-                dmg_roll = random.randint(1, num_sides)
-                total_dmg_roll += dmg_roll
-            return total_dmg_roll + flat_dmg
+            return self.roll_source.roll_dice(num_dice, num_sides, flat_dmg)
 
     def damage_immunity_reduction(self, damage_sums: dict, imm_factors: dict):
         """
@@ -194,35 +243,4 @@ class AttackSimulator:
         :param imm_factors: Dictionary holding the target immunity factors (for example -0.1 (10%) due to legend property
         :return: Damage to be inflicted after applying target immunities, e.g., if 10% divine, the final damage will be 9
         """
-        target_imms = deepcopy(self.cfg.TARGET_IMMUNITIES)
-        for dmg_type_name, imm_factor in imm_factors.items():
-            current_imm = target_imms[dmg_type_name]
-            target_imms[dmg_type_name] = current_imm + imm_factor
-
-        for dmg_type_name, dmg_value in damage_sums.items():
-            dmg_name_dict = {
-                'fire_fw': 'fire',    # Fire from Flame Weapon is treated as normal fire damage for immunities
-                'slashing': 'physical',
-                'piercing': 'physical',
-                'bludgeoning': 'physical'
-            }
-            corrected_dmg_type_name = dmg_name_dict.get(dmg_type_name, dmg_type_name)
-
-            if corrected_dmg_type_name not in target_imms.keys():
-                raise KeyError(f"Damage type '{corrected_dmg_type_name}' not found in TARGET_IMMUNITIES dictionary.")
-
-            elif target_imms[corrected_dmg_type_name] > 0:  # Damage Immunity (Reduction)
-                dmg_reduced = floor(dmg_value * target_imms[corrected_dmg_type_name])
-                dmg_reduced = 1 if dmg_reduced < 1 else dmg_reduced
-                dmg_after_immunity = max(0, dmg_value - dmg_reduced)
-
-            elif target_imms[corrected_dmg_type_name] < 0:   # Damage Vulnerability
-                dmg_added = floor(abs(dmg_value * target_imms[corrected_dmg_type_name]))
-                dmg_after_immunity = dmg_value + dmg_added
-
-            else:   # Immunity is 0%, No Immunity or Vulnerability
-                dmg_after_immunity = dmg_value
-
-            damage_sums[dmg_type_name] = dmg_after_immunity
-
-        return damage_sums
+        return self.immunity_table.reduce(damage_sums, imm_factors)
@@ -0,0 +1,321 @@
+from simulator.attack_simulator import MISS, CRITICAL_HIT
+from simulator.immunities import ImmunityTable
+from simulator.analytic_engine import AnalyticEngine
+from simulator.dice_distribution import get_alias_sampler
+from simulator.running_stats import BatchMeans
+from simulator.legend_effect import NO_LEGEND_EFFECT
+import numpy as np
+
+
+class BatchEngine:
+    """
+    Vectorized simulation of blocks of rounds, same rules as DamageSimulator.simulate_dps.
+    All rolls of a block are generated at once with NumPy, attack outcomes and legendary effect windows
+    are resolved by LegendEffect.scan_windows, and damage is rolled per group of attacks that share
+    the same damage table (offhand, crit multiplier, legendary effect), with the alias samplers.
+    In stratified mode, every attack slot of a block covers each d20 face (and d100 face) equally often, in random order.
+    """
+    def __init__(self, damage_sim, seed=None, stratified: bool = False):
+        """
+        :param damage_sim: DamageSimulator instance, provides the weapon, attack simulator, legend effect and damage tables
+        :param seed: Seed of the NumPy generator, None for fresh entropy
+        :param stratified: True to draw the attack, threat and legend proc rolls by stratified sampling (see stratified_rolls)
+        """
+        self.cfg = damage_sim.cfg
+        self.weapon = damage_sim.weapon
+        self.attack_sim = damage_sim.attack_sim
+        self.legend_effect = damage_sim.legend_effect
+        self.damage_tables = damage_sim.damage_tables
+        self.dmg_dict_legend = damage_sim.dmg_dict_legend
+        self.stats = damage_sim.stats
+        self.immunity_table = self.attack_sim.immunity_table   # Compiled target immunities
+        self.rng = np.random.default_rng(seed)
+
+        self.attacks_per_round = self.attack_sim.attacks_per_round
+        self.offhand_slots = np.zeros(self.attacks_per_round, dtype=bool)
+        if self.attack_sim.dual_wield:
+            self.offhand_slots[-2:] = True  # Last two attacks are the offhand attacks
+
+        # Legendary damage, effect "common" damage and immunity factors (see LegendEffect.get_legend_damage)
+        proc = self.dmg_dict_legend.get('proc')
+        self.legend_duration_effect = isinstance(proc, (int, float))
+        self.legend_proc_chance = np.count_nonzero(np.arange(1, 101) > 100 - proc * 100) / 100 if self.legend_duration_effect else 0.0
+        self.legend_dmg_common = self.legend_effect.get_common_damage(self.dmg_dict_legend) if self.dmg_dict_legend else []
+        self.legend_imm_factors = self.legend_effect.get_immunity_factors()
+        self.legend_dmg = {} if self.legend_effect.effect.common_damage else {
+            dmg_type: dmg_list for dmg_type, dmg_list in self.dmg_dict_legend.items() if dmg_type not in ('proc', 'effect')
+        }
+
+        self.tenacious_blow = ("Tenacious_Blow" in self.cfg.ADDITIONAL_DAMAGE
+                               and self.cfg.ADDITIONAL_DAMAGE["Tenacious_Blow"][0] is True
+                               and self.weapon.name_base in ["Dire Mace", "Double Axe", "Two-Bladed Sword"])
+
+        # Stratified rolls are drawn without replacement per attack slot, the rolls of an attack are then not independent
+        # of the earlier rolls, which would bias weapons whose effect state depends on the earlier hits
+        if stratified and self.legend_effect.effect != NO_LEGEND_EFFECT:
+            raise ValueError(f"Weapon '{self.weapon.name_purple}' has a legendary effect with duration, "
+                             f"it can't be simulated with stratified rolls")
+        self.stratified = stratified
+
+        self.damage_by_type = {}
+        self._damage_sim = damage_sim
+        self._state_means = None    # Expected damage per [attack slot, effect state], built on first use
+
+    def roll_entries(self, dmg_list: list, num_attacks: int):
+        """
+        :param dmg_list: Damage entries of a single damage type, e.g., [[14, 6, 21], [2, 12, 0]]
+        :param num_attacks: Number of attacks to roll the damage for
+        :return: Numpy array of the damage sums per attack (before immunities)
+        """
+        dmg_sums = np.zeros(num_attacks, dtype=np.int64)
+        for dmg_sublist in dmg_list:
+            num_dice, num_sides = dmg_sublist[0], dmg_sublist[1]
+            flat_dmg = dmg_sublist[2] if len(dmg_sublist) > 2 else 0
+            if num_dice == 0 or num_sides == 0:
+                dmg_sums += flat_dmg
+            else:
+                dmg_sums += get_alias_sampler(num_dice, num_sides).sample_many(self.rng.random(num_attacks)) + flat_dmg
+        return dmg_sums
+
+    def roll_damage(self, damage_dict: dict, num_attacks: int, imm_factors: dict = None):
+        """
+        :param damage_dict: Damage dictionary, e.g., {'physical': [[2, 6], [0, 0, 21]], 'fire': [[1, 4, 10]]}
+        :param num_attacks: Number of attacks to roll the damage for
+        :param imm_factors: Dictionary holding the target immunity factors, None to ignore immunities (legendary damage)
+        :return: Dictionary of numpy arrays, damage per type per attack
+        """
+        dmg_sums = {}
+        immunities = self.immunity_table.get_vector(imm_factors)[0] if imm_factors is not None else None
+        for dmg_type, dmg_list in damage_dict.items():
+            dmg_values = self.roll_entries(dmg_list, num_attacks)
+            if immunities is not None:
+                immunity = immunities[self.immunity_table.get_index(dmg_type)]
+                dmg_values = ImmunityTable.apply_array(dmg_values, immunity).astype(np.int64)
+            dmg_sums[dmg_type] = dmg_values
+        return dmg_sums
+
+    def add_damage(self, totals, attack_positions, dmg_sums: dict, track_types: bool = True):
+        """Add the damage sums per type to the per-attack totals (positions are unique), and to the damage by type statistics"""
+        for dmg_type, dmg_values in dmg_sums.items():
+            totals[attack_positions] += dmg_values
+            if track_types:
+                self.damage_by_type[dmg_type] = self.damage_by_type.get(dmg_type, 0) + dmg_values.sum().item()
+
+    def stratified_rolls(self, num_sides: int, num_rounds: int):
+        """
+        Stratified dN rolls: for each attack slot, the rolls of the block cover every face equally often, in random order.
+        If num_rounds is not a multiple of num_sides, a random subset of the last cover is used (each roll stays uniform).
+        :param num_sides: The number of sides of the die, e.g., 20 for d20
+        :param num_rounds: Number of rounds of the block
+        :return: Numpy array of rolls, in attack order (same layout as the attack slot indexes)
+        """
+        num_covers = -(-num_rounds // num_sides)    # Ceil division
+        faces = np.tile(np.arange(1, num_sides + 1), (self.attacks_per_round, num_covers))
+        rolls = self.rng.permuted(faces, axis=1)[:, :num_rounds]   # Indexed by [slot, round]
+        return rolls.T.ravel()
+
+    def resolve_block(self, num_rounds: int):
+        """
+        Roll the attacks of a block of rounds, resolve the outcomes and the legendary effect windows, and collect statistics.
+        :param num_rounds: Number of rounds to simulate
+        :return: Tuple of numpy arrays: attack slot indexes, outcome codes, effect active before the attack, procs
+        """
+        num_attacks = num_rounds * self.attacks_per_round
+        attack_idxs = np.tile(np.arange(self.attacks_per_round), num_rounds)
+        if self.stratified:
+            rolls = self.stratified_rolls(20, num_rounds)
+            threat_rolls = self.stratified_rolls(20, num_rounds)
+            proc_rolls = self.stratified_rolls(100, num_rounds)
+        else:
+            rolls = self.rng.integers(1, 21, size=num_attacks)
+            threat_rolls = self.rng.integers(1, 21, size=num_attacks)
+            proc_rolls = self.rng.integers(1, 101, size=num_attacks)
+
+        outcomes, active, procs = self.legend_effect.scan_windows(attack_idxs, rolls, threat_rolls, proc_rolls)
+        hits = outcomes != MISS
+        crits = outcomes == CRITICAL_HIT
+
+        # Statistics
+        self.stats.attempts_made += num_attacks
+        self.stats.hits += int(hits.sum())
+        self.stats.crit_hits += int(crits.sum())
+        hits_per_slot = hits.reshape(num_rounds, self.attacks_per_round).sum(axis=0)
+        crits_per_slot = crits.reshape(num_rounds, self.attacks_per_round).sum(axis=0)
+        for slot in range(self.attacks_per_round):
+            self.stats.attempts_made_per_attack[slot] += num_rounds
+            self.stats.hits_per_attack[slot] += int(hits_per_slot[slot])
+            self.stats.crits_per_attack[slot] += int(crits_per_slot[slot])
+
+        return attack_idxs, outcomes, active, procs
+
+    def simulate_block(self, num_rounds: int):
+        """
+        :param num_rounds: Number of rounds to simulate
+        :return: Tuple of numpy arrays, damage per round (crit allowed, crit immune)
+        """
+        return self.roll_block(*self.resolve_block(num_rounds))
+
+    def simulate_block_conditional(self, num_rounds: int):
+        """
+        Block of rounds with both estimators from the same attack rolls: the damage rolled (distributions, damage
+        breakdown), and the conditional expected damage given the effect state before each attack (DPS estimate).
+        Conditional Monte Carlo: the attack rolls drive the legendary effect windows, each attack adds its exact
+        expected damage given the effect state before the attack. Unbiased (same mean as the damage rolled), with much
+        lower variance: zero for weapons without duration effects.
+        :param num_rounds: Number of rounds to simulate
+        :return: Tuple of numpy arrays, damage per round (crit allowed, crit immune), and conditional expected damage
+                 per round (crit allowed, crit immune)
+        """
+        attack_idxs, outcomes, active, procs = self.resolve_block(num_rounds)
+        dmg_per_round, dmg_crit_imm_per_round = self.roll_block(attack_idxs, outcomes, active, procs)
+        round_means = self.get_round_means(attack_idxs, active, num_rounds)
+        return dmg_per_round, dmg_crit_imm_per_round, round_means[:, 0], round_means[:, 1]
+
+    def get_round_means(self, attack_idxs, active, num_rounds: int):
+        """
+        :return: Numpy array of the conditional expected damage per [round, crit immune], given the effect state
+                 before each attack
+        """
+        attack_means = self.get_state_means()[attack_idxs, active.astype(np.int64)]
+        return attack_means.reshape(num_rounds, self.attacks_per_round, 2).sum(axis=1)
+
+    def simulate_block_sampled(self, num_rounds: int, proc_sampling_rate: float = 1.0):
+        """
+        Block of rounds with both legendary proc estimators from the same attack rolls: the procs rolled at their
+        natural rate (distributions, damage breakdown), and the importance sampled procs (DPS estimate). The sampled
+        procs are drawn at the sampling rate instead of the proc percentage, and their legendary damage is weighted by
+        (proc percentage / sampling rate), same mean. 1.0 stratifies the procs: every hit adds its share of the
+        legendary damage.
+        :param num_rounds: Number of rounds to simulate
+        :param proc_sampling_rate: Chance (per hit) to draw a legendary proc, in (0, 1]
+        :return: Tuple of numpy arrays, damage per round (crit allowed, crit immune), and importance sampled damage
+                 per round (crit allowed, crit immune)
+        """
+        if not self.supports_proc_sampling():
+            raise ValueError(f"Legendary procs of weapon '{self.weapon.name_purple}' can't be importance sampled")
+        if not 0 < proc_sampling_rate <= 1:
+            raise ValueError("Proc sampling rate must be in (0, 1]")
+        attack_idxs, outcomes, active, procs = self.resolve_block(num_rounds)
+        hits = outcomes != MISS
+        dmg_per_round, dmg_crit_imm_per_round = self.roll_block(attack_idxs, outcomes, active, procs, with_legend=False)
+        legend = self.roll_legend(procs & hits).reshape(num_rounds, self.attacks_per_round).sum(axis=1)
+        sampled_procs = hits & (self.rng.random(len(hits)) < proc_sampling_rate)
+        sampled = self.roll_legend(sampled_procs, self.legend_proc_chance / proc_sampling_rate, track_types=False)
+        sampled = sampled.reshape(num_rounds, self.attacks_per_round).sum(axis=1)
+        return (dmg_per_round + legend, dmg_crit_imm_per_round + legend,
+                dmg_per_round + sampled, dmg_crit_imm_per_round + sampled)
+
+    def roll_legend(self, legend_procs, weight: float = 1, track_types: bool = True):
+        """
+        :param legend_procs: Boolean numpy array, attacks with a legendary proc
+        :param weight: Weight of the legendary damage, e.g., likelihood ratio of importance sampled procs
+        :param track_types: True to add the legendary damage to the damage by type statistics
+        :return: Numpy array of the legendary damage per attack, ignores target immunities
+        """
+        legend = np.zeros(len(legend_procs), dtype=np.int64 if weight == 1 else float)
+        positions = np.flatnonzero(legend_procs)
+        if positions.size:
+            legend_sums = self.roll_damage(self.legend_dmg, positions.size)
+            if weight != 1:
+                legend_sums = {dmg_type: dmg_values * weight for dmg_type, dmg_values in legend_sums.items()}
+            self.add_damage(legend, positions, legend_sums, track_types)
+        return legend
+
+    def roll_block(self, attack_idxs, outcomes, active, procs, with_legend: bool = True):
+        """
+        Roll the damage of a resolved block of rounds (see resolve_block).
+        :param with_legend: False to leave out the legendary damage, rolled by the caller (see simulate_block_sampled)
+        :return: Tuple of numpy arrays, damage per round (crit allowed, crit immune)
+        """
+        num_attacks = len(attack_idxs)
+        num_rounds = num_attacks // self.attacks_per_round
+        hits = outcomes != MISS
+        crits = outcomes == CRITICAL_HIT
+        effect = hits & (procs | active) if self.legend_duration_effect else np.zeros(num_attacks, dtype=bool)
+
+        dmg = np.zeros(num_attacks, dtype=np.int64)
+        dmg_crit_imm = np.zeros(num_attacks, dtype=np.int64)
+
+        # Weapon damage, per group of attacks that share the same damage tables
+        offhand = self.offhand_slots[attack_idxs]
+        crit_multipliers = (1, self.weapon.crit_multiplier)
+        for is_offhand in ((False, True) if self.attack_sim.dual_wield else (False,)):
+            for crit_multiplier in crit_multipliers:
+                for is_effect in (False, True):
+                    group = hits & (offhand == is_offhand) & (crits == (crit_multiplier > 1)) & (effect == is_effect)
+                    positions = np.flatnonzero(group)
+                    if positions.size == 0:
+                        continue
+                    legend_dmg_common = self.legend_dmg_common if is_effect else None
+                    imm_factors = self.legend_imm_factors if is_effect else {}
+                    dmg_dict, dmg_dict_crit_imm = self.damage_tables.get_roll_tables(is_offhand, crit_multiplier, legend_dmg_common)
+
+                    dmg_sums = self.roll_damage(dmg_dict, positions.size, imm_factors)
+                    self.add_damage(dmg, positions, dmg_sums)
+                    if crit_multiplier == 1:
+                        dmg_crit_imm[positions] = dmg[positions]
+                    else:
+                        self.add_damage(dmg_crit_imm, positions, self.roll_damage(dmg_dict_crit_imm, positions.size, imm_factors),
+                                        track_types=False)
+
+        # Legendary damage, ignores target immunities
+        if self.legend_dmg and with_legend:
+            legend = self.roll_legend(procs & hits)
+            dmg += legend
+            dmg_crit_imm += legend
+
+        # Tenacious Blow, damage on a miss
+        if self.tenacious_blow:
+            positions = np.flatnonzero(~hits)
+            if positions.size:
+                miss_sums = self.roll_damage({'pure': [[0, 0, 4]]}, positions.size, {})
+                self.add_damage(dmg_crit_imm, positions, miss_sums, track_types=False)
+                self.add_damage(dmg, positions, miss_sums)
+
+        dmg_per_round = dmg.reshape(num_rounds, self.attacks_per_round).sum(axis=1)
+        dmg_crit_imm_per_round = dmg_crit_imm.reshape(num_rounds, self.attacks_per_round).sum(axis=1)
+        return dmg_per_round, dmg_crit_imm_per_round
+
+    def get_state_means(self):
+        """:return: Numpy array of the exact expected damage per [attack slot, effect state (0 inactive, 1 active), crit immune]"""
+        if self._state_means is None:
+            analytic = AnalyticEngine(self._damage_sim)
+            self._state_means = np.array([[analytic.expected_state_damage(attack_idx, active) for active in (False, True)]
+                                          for attack_idx in range(self.attacks_per_round)])
+        return self._state_means
+
+    def get_results(self, dmg_per_round, dmg_crit_imm_per_round):
+        """
+        :return: Dictionary with the average DPS, same keys (and rounding) as in DamageSimulator results,
+                 the standard errors of the DPS (batch means), and the damage per round arrays
+        """
+        dps, dps_crit_imm = dmg_per_round.mean() / 6, dmg_crit_imm_per_round.mean() / 6    # Round is 6 seconds
+        return {
+            "avg_dps_both": round((dps + dps_crit_imm) / 2, 2),
+            "dps_crits": round(dps, 2),
+            "dps_no_crits": round(dps_crit_imm, 2),
+            "dps_std_error": BatchMeans.from_values(dmg_per_round).get_error_estimates()[0] / 6,
+            "dps_crit_imm_std_error": BatchMeans.from_values(dmg_crit_imm_per_round).get_error_estimates()[0] / 6,
+            "dmg_per_round": dmg_per_round,
+            "dmg_crit_imm_per_round": dmg_crit_imm_per_round,
+        }
+
+    def supports_proc_sampling(self):
+        """
+        :return: True if the legendary procs can be importance sampled: procs by percentage, with legendary damage,
+                 that don't change the attacks (no AB\\AC\\immunity\\common damage effect), so only the damage is reweighted
+        """
+        return self.legend_duration_effect and bool(self.legend_dmg) and self.legend_effect.effect == NO_LEGEND_EFFECT
+
+    def simulate(self, num_rounds: int, block_rounds: int = 1000):
+        """
+        :param num_rounds: Number of rounds to simulate
+        :param block_rounds: Number of rounds simulated per vectorized block
+        :return: Dictionary with the average DPS, same keys (and rounding) as in DamageSimulator results,
+                 the standard errors of the DPS (batch means), and the damage per round arrays
+        """
+        self.stats.init_zeroes_lists(self.attacks_per_round)
+        blocks = [self.simulate_block(min(block_rounds, num_rounds - start)) for start in range(0, num_rounds, block_rounds)]
+        dmg_per_round = np.concatenate([block[0] for block in blocks])
+        dmg_crit_imm_per_round = np.concatenate([block[1] for block in blocks])
+        return self.get_results(dmg_per_round, dmg_crit_imm_per_round)
@@ -0,0 +1,193 @@
+from simulator.damage_simulator import DamageSimulator
+from simulator.batch_engine import BatchEngine
+from simulator.running_stats import BatchMeans
+from simulator.config import Config
+from dataclasses import fields
+from statistics import NormalDist
+import numpy as np
+import argparse
+import math
+import ast
+
+
+class BuildComparison:
+    """
+    Paired comparison of two builds (configs), e.g., Overwhelm Critical vs Devastating Critical, on the same weapons.
+    Both builds are simulated with common random numbers: each block of rounds reseeds the two BatchEngines with the
+    same seed, so the attack, threat and proc rolls are the same and the DPS difference has a much smaller variance
+    than the difference of two independent runs. After each block, the confidence interval of the paired difference
+    of the average DPS (50/50) is checked (batch means), and the weapon stops once the test is conclusive:
+    the interval excludes zero (one build is better), or it's within +/- margin (the builds are equivalent).
+    Re-checking a fixed 99% interval after every block would be wrong far more often than 1% of the time, so the
+    intervals are widened by an alpha-spending boundary (O'Brien-Fleming type): each look only spends its share of
+    alpha, tiny at the first blocks and most of it at the last ones, and the shares add up to alpha (union bound).
+    """
+    def __init__(self, weapons: list, config_a, config_b, step_rounds: int = 500, alpha: float = 0.01,
+                 margin: float = 0.05, min_blocks: int = 4, seed=None):
+        """
+        :param weapons: List of weapon names, e.g., ['Spear', 'Scythe']
+        :param config_a: Config instance of build A, ROUNDS is the maximum number of rounds per weapon
+        :param config_b: Config instance of build B
+        :param step_rounds: Number of rounds per block
+        :param alpha: Overall error rate of the sequential test, 0.01 for 99% (same as DamageSimulator)
+        :param margin: DPS difference below which the builds are considered equivalent
+        :param min_blocks: Minimum number of blocks before the test is checked
+        :param seed: Seed of the common random numbers, None for fresh entropy
+        """
+        self.weapons = weapons
+        self.config_a = config_a
+        self.config_b = config_b
+        self.step_rounds = step_rounds
+        self.alpha = alpha
+        self.margin = margin
+        self.min_blocks = max(min_blocks, 2)    # At least two blocks for the standard error
+        self.max_blocks = max(-(-config_a.ROUNDS // step_rounds), self.min_blocks)
+        self.boundary = self.get_boundary(self.min_blocks, self.max_blocks, alpha)
+        self.weapon_seeds = dict(zip(weapons, np.random.SeedSequence(seed).spawn(len(weapons))))
+
+    @staticmethod
+    def get_boundary(min_blocks: int, max_blocks: int, alpha: float):
+        """
+        O'Brien-Fleming type alpha spending: alpha(t) = 2 * Phi(-z_alpha/2 / sqrt(t)) has been spent at the
+        information fraction t = blocks / max_blocks. Each look spends the increment since the previous look, its
+        z-score is the two-sided quantile of that increment.
+        :param min_blocks: Number of blocks of the first look
+        :param max_blocks: Number of blocks of the last look
+        :param alpha: Overall error rate, spent in total at the last look
+        :return: Dictionary of the z-score per look, {number of blocks: z}
+        """
+        normal = NormalDist()
+        z_alpha = -normal.inv_cdf(alpha / 2)    # Lower tails, precise for tiny alphas
+        boundary, spent = {}, 0.0
+        for num_blocks in range(min_blocks, max_blocks + 1):
+            total_spent = math.erfc(z_alpha / math.sqrt(2 * num_blocks / max_blocks))     # 2 * Phi(-z / sqrt(t))
+            alpha_look = total_spent - spent
+            # Nothing left to spend (underflow at the first looks of a long run): the look can't conclude anything
+            boundary[num_blocks] = -normal.inv_cdf(alpha_look / 2) if alpha_look > 0 else math.inf
+            spent = total_spent
+        return boundary
+
+    @staticmethod
+    def get_verdict(delta: float, delta_error: float, margin: float):
+        """
+        :param delta: DPS difference (build A - build B)
+        :param delta_error: Half-width of the confidence interval of the difference
+        :param margin: DPS difference below which the builds are considered equivalent
+        :return: 'A' or 'B' if the build is significantly better, 'equal' if the interval is within +/- margin,
+                 None if the test is not conclusive yet
+        """
+        if delta - delta_error > 0:
+            return 'A'
+        elif delta + delta_error < 0:
+            return 'B'
+        elif abs(delta) + delta_error < margin:
+            return 'equal'
+        return None
+
+    def compare_weapon(self, weapon: str):
+        """
+        :param weapon: Weapon name
+        :return: Dictionary with the average DPS (50/50) of both builds, the difference (A - B), the half-width of its
+                 confidence interval (z-score of the boundary at the stopping look), the number of rounds and the verdict ('A', 'B', 'equal' or 'inconclusive')
+        """
+        engine_a = BatchEngine(DamageSimulator(weapon, self.config_a))
+        engine_b = BatchEngine(DamageSimulator(weapon, self.config_b))
+        for engine in (engine_a, engine_b):
+            engine.stats.init_zeroes_lists(engine.attacks_per_round)
+
+        # Average DPS (50/50) per round of both builds, and their paired difference (A - B)
+        dps_a, dps_b, dps_diff = BatchMeans(), BatchMeans(), BatchMeans()
+        verdict, delta, delta_error = None, 0.0, float('nan')
+        for num_blocks, block_seed in enumerate(self.weapon_seeds[weapon].spawn(self.max_blocks), start=1):
+            # Common random numbers: both builds roll the block from the same seed
+            block_dps = []
+            for engine in (engine_a, engine_b):
+                engine.rng = np.random.default_rng(block_seed)
+                dmg_per_round, dmg_crit_imm_per_round = engine.simulate_block(self.step_rounds)
+                block_dps.append((dmg_per_round + dmg_crit_imm_per_round) / 2 / 6)    # Round is 6 seconds
+            dps_a.add_many(block_dps[0])
+            dps_b.add_many(block_dps[1])
+            dps_diff.add_many(block_dps[0] - block_dps[1])
+
+            if num_blocks >= self.min_blocks:
+                # Interval widened by the boundary of this look (alpha spent by this look only)
+                delta = dps_diff.mean
+                delta_error = self.boundary[num_blocks] * dps_diff.get_error_estimates()[0]
+                verdict = self.get_verdict(delta, delta_error, self.margin)
+                if verdict is not None:
+                    break
+
+        rounds = dps_diff.count
+        return {
+            "dps_a": round(float(dps_a.mean), 2),
+            "dps_b": round(float(dps_b.mean), 2),
+            "delta": round(float(delta), 2),
+            "delta_error": round(float(delta_error), 2),
+            "rounds": rounds,
+            "verdict": verdict or 'inconclusive',
+        }
+
+    def run(self, progress_callback=None):
+        """
+        :param progress_callback: Called before each weapon with (weapon, index, total), may raise SimulationCancelled
+        :return: Dictionary of the comparison results per weapon, see compare_weapon
+        """
+        results = {}
+        for i, weapon in enumerate(self.weapons, start=1):
+            if progress_callback is not None:
+                progress_callback(weapon, i, len(self.weapons))
+            results[weapon] = self.compare_weapon(weapon)
+        return results
+
+
+def parse_overrides(pairs: list):
+    """
+    :param pairs: List of 'KEY=VALUE' strings, e.g., ['OVERWHELM_CRIT=True', 'AB_PROG=5APR Classic'], values are
+                  Python literals, anything else is kept as a string
+    :return: Dictionary of the Config fields to override, e.g., {'OVERWHELM_CRIT': True}
+    """
+    config_fields = {config_field.name for config_field in fields(Config)}
+    overrides = {}
+    for pair in pairs:
+        key, sep, value = pair.partition('=')
+        if not sep or key not in config_fields:
+            raise ValueError(f"Invalid override '{pair}', expected KEY=VALUE with KEY a Config field")
+        try:
+            overrides[key] = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            overrides[key] = value
+    return overrides
+
+
+def main(argv=None):
+    """
+    Command line comparison of two builds, e.g.,
+    python -m simulator.build_comparison Spear Scythe --a OVERWHELM_CRIT=True --b DEV_CRIT=True
+    :param argv: List of the command line arguments, None for sys.argv
+    :return: Dictionary of the comparison results per weapon, see BuildComparison.compare_weapon
+    """
+    parser = argparse.ArgumentParser(description="Paired comparison of two builds (A vs B) on the same weapons")
+    parser.add_argument('weapons', nargs='+', help="Weapon names, e.g., Spear Scythe")
+    parser.add_argument('--a', nargs='*', default=[], metavar='KEY=VALUE', help="Config overrides of build A")
+    parser.add_argument('--b', nargs='*', default=[], metavar='KEY=VALUE', help="Config overrides of build B")
+    parser.add_argument('--rounds', type=int, default=Config().ROUNDS, help="Maximum number of rounds per weapon")
+    parser.add_argument('--margin', type=float, default=0.05, help="DPS difference of equivalent builds")
+    parser.add_argument('--seed', type=int, default=None, help="Seed of the common random numbers")
+    args = parser.parse_args(argv)
+
+    try:
+        config_a = Config(**{**parse_overrides(args.a), 'ROUNDS': args.rounds})
+        config_b = Config(**{**parse_overrides(args.b), 'ROUNDS': args.rounds})
+    except ValueError as e:
+        parser.error(str(e))
+
+    results = BuildComparison(args.weapons, config_a, config_b, margin=args.margin, seed=args.seed).run()
+    for weapon, weapon_results in results.items():
+        print(f"{weapon}: A {weapon_results['dps_a']:.2f} | B {weapon_results['dps_b']:.2f} | "
+              f"A - B {weapon_results['delta']:+.2f} ± {weapon_results['delta_error']:.2f} "
+              f"({weapon_results['rounds']} rounds) -> {weapon_results['verdict']}")
+    return results
+
+
+if __name__ == '__main__':
+    main()
@@ -29,6 +29,13 @@ class Config:
     DAMAGE_VS_RACE: bool = False
     CHANGE_THRESHOLD: float = 0.0002
     STD_THRESHOLD: float = 0.0002
+    TARGET_DPS_ERROR: float = 0.0   # Requested DPS precision (99% CI half-width), rounds are planned per weapon, 0 to disable
+    REL_DPS_ERROR: float = 0.01     # Default DPS precision (99% CI half-width / DPS), required by the window convergence, 0 to disable
+    SHARED_CRIT_DICE: bool = False  # Crit-immune damage reuses the first multiplier-set of the crit dice (correlated estimates)
+    RACING_MODE: bool = False   # Weapons advance in small increments, clearly inferior weapons are eliminated early
+    STRATIFIED_ROLLS: bool = False  # Vectorized blocks with stratified d20\d100 rolls, for weapons without effect with duration
+    MEAN_ONLY: bool = False     # Aggregated blocks (average DPS only, no damage distributions), for weapons without effect with duration
+    SPECULATIVE: bool = False   # Precompute results in the background while inputs are stable (not part of the simulation config)
 
     # USER INPUTS - CHARACTER
     AB: int = 68
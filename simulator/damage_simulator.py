@@ -1,48 +1,74 @@
 from simulator.weapon import Weapon
 from simulator.attack_simulator import AttackSimulator
 from simulator.stats_collector import StatsCollector
-from simulator.legend_effect import LegendEffect
+from simulator.legend_effect import LegendEffect, NO_LEGEND_EFFECT
+from simulator.damage_tables import DamageTables
+from simulator.legend_chain import LegendChain
+from simulator.damage_sketch import DamageSketch
+from simulator.running_stats import BatchMeans, ThinnedSeries
+from simulator.batch_engine import BatchEngine
+from simulator.aggregated_engine import AggregatedEngine
+from simulator.roll_source import RollSource, BufferedRollSource
 from simulator.config import Config
-from copy import deepcopy
 from collections import deque
+import numpy as np
 import statistics
-import math
+
+
+class SimulationCancelled(Exception):
+    """Raised by a progress callback to stop the simulation, e.g., when a speculative job is preempted"""
+    pass
 
 
 class DamageSimulator:
-    def __init__(self, weapon_chosen, config: Config, progress_callback=None):
+    MIN_BLOCK_ROUNDS = 5000     # Rounds of the block runs before the first stopping check (burn-in, enough rounds
+                                # for the rates and damage distributions, even with a zero-variance DPS estimator)
+
+    def __init__(self, weapon_chosen, config: Config, progress_callback=None, roll_source: RollSource = None):
         self.cfg = config
+        self.roll_source = roll_source or BufferedRollSource()  # Bulk pre-generated rolls, much faster than random.randint
         self.stats = StatsCollector()   # Create object for collecting statistics
         self.weapon = Weapon(weapon_chosen, config=self.cfg)  # Pass Config instance to Weapon
-        self.attack_sim = AttackSimulator(weapon_obj=self.weapon, config=self.cfg)
-        self.legend_effect = LegendEffect(stats_obj=self.stats, weapon_obj=self.weapon, attack_sim=self.attack_sim)
+        self.attack_sim = AttackSimulator(weapon_obj=self.weapon, config=self.cfg, roll_source=self.roll_source)
+        self.legend_effect = LegendEffect(stats_obj=self.stats, weapon_obj=self.weapon, attack_sim=self.attack_sim,
+                                          roll_source=self.roll_source)
         self.progress_callback = progress_callback
 
         self.dmg_type_names = []    # List of dmg type names, e.g., ['physical', 'acid']
         self.dmg_dict = {}    # Keys are dmg type names, Values are lists of damage dice, e.g., [[2, 6], [1, 8]]
         self.dmg_dict_legend = {}
         self.collect_damage_from_all_sources()
+        self.damage_tables = DamageTables(self.dmg_dict, self.weapon, self.cfg, dual_wield=self.attack_sim.dual_wield)
 
         # Convergence params, z-score lookup (normal distribution)
         z_values = {0.90: 1.645, 0.95: 1.96, 0.99: 2.576}
         self.confidence = 0.99
         self.z = z_values.get(self.confidence, 2.576)
         self.window_size = 15
-
-        # Convergence tracking - crit allowed
+        self.progress_interval = 100    # Rounds between calls of the progress callback
+        self.precision_interval = 500   # Rounds between checks of the requested DPS precision (TARGET_DPS_ERROR)
+        self.look_rounds = []           # Rounds of the remaining stopping checks of a block run
+        self.offhand_idxs = ()          # Offhand attack slots of the round by round simulation (see start_rounds)
+        self.legend_imm_factors = None  # Immunity factors of the last legendary effect roll (see simulate_round)
+
+        # Convergence tracking - crit allowed, streaming batch means and plot series (no per-round lists are kept)
+        self.num_rounds = 0
         self.total_dmg = 0
         self.dps_window = deque(maxlen=self.window_size)
-        self.dps_rolling_avg = []
-        self.dps_per_round = []
-        self.cumulative_damage_per_round = []
+        self.dps_batch_means = BatchMeans()
+        self.rounds_per_value = 1   # Rounds per value of the batch means, a whole block in mean-only runs
+        self.dps_vs_damage = ThinnedSeries()    # Cumulative damage (X) and running DPS (Y), for the convergence plot
 
         # Convergence tracking - crit immune
         self.total_dmg_crit_imm = 0
         self.dps_crit_imm_window = deque(maxlen=self.window_size)
-        self.dps_crit_imm_rolling_avg = []
-        self.dps_crit_imm_per_round = []
+        self.dps_crit_imm_batch_means = BatchMeans()
         self.cumulative_damage_by_type = {}
 
+        # Streaming damage distributions (crit allowed), bounded memory
+        self.round_dmg_sketch = DamageSketch(bin_width=10)
+        self.hit_dmg_sketch = DamageSketch(bin_width=5)
+
     def collect_damage_from_all_sources(self):
         """Collect damage information from all sources and organize it into dictionaries"""
         damage_sources = self.weapon.aggregate_damage_sources()
@@ -106,211 +132,418 @@ class DamageSimulator:
         # Relative change check with 'dynamic_window' values
         relative_change = (max(self.dps_window) - min(self.dps_window)) / dps_window_mean
 
-        # Convergence check
-        if relative_std < self.cfg.STD_THRESHOLD and relative_change < self.cfg.CHANGE_THRESHOLD:
+        # Convergence check, the window alone can settle on a noisy estimate: the batch means error must be within
+        # the default relative precision too
+        if (relative_std < self.cfg.STD_THRESHOLD and relative_change < self.cfg.CHANGE_THRESHOLD
+                and self.relative_precision_reached()):
             print(f"Converged after {round_num} rounds ({self.confidence * 100}% CI).")
             return True
 
         else:
             return False
 
-    def simulate_dps(self):
+    def relative_precision_reached(self) -> bool:
+        """:return: True if the batch means error of the DPS (crit allowed) is within REL_DPS_ERROR of the DPS"""
+        if self.cfg.REL_DPS_ERROR <= 0:
+            return True
+        std_error, _ = self.dps_batch_means.get_error_estimates()
+        return self.z * std_error <= self.cfg.REL_DPS_ERROR * self.dps_batch_means.mean
+
+    def precision_reached(self, round_num) -> bool:
+        """:return: True if the batch means error of the DPS (crit allowed) is within the requested precision"""
+        std_error, _ = self.dps_batch_means.get_error_estimates()
+        if self.z * std_error <= self.cfg.TARGET_DPS_ERROR:
+            print(f"Requested precision reached after {round_num} rounds ({self.confidence * 100}% CI).")
+            return True
+        return False
+
+    def start_rounds(self):
+        """Reset the per-run state of the round by round simulation (see simulate_round), before the first round"""
         self.stats.init_zeroes_lists(self.attack_sim.attacks_per_round)
-        total_rounds = self.cfg.ROUNDS
-        round_num = 0
-        legend_imm_factors = None
+        self.legend_imm_factors = None
 
         # Check if offhand attack are present in the attack progression
         if self.attack_sim.dual_wield:
             attack_prog_length = len(self.attack_sim.attack_prog)
-            offhand_attack_1_idx = attack_prog_length - 2   # First Offhand attack
-            offhand_attack_2_idx = attack_prog_length - 1   # Second Offhand attack
-            str_dmg = self.weapon.strength_bonus()                  # Find the STR bonus damage (again)
-            str_idx = self.dmg_dict['physical'].index(str_dmg['physical'])      # Store index of STR damage for halving it later
-
+            self.offhand_idxs = (attack_prog_length - 2, attack_prog_length - 1)    # First and second Offhand attacks
         else:
-            offhand_attack_1_idx = None
-            offhand_attack_2_idx = None
-            str_idx = None
-
-        for round_num in range(1, total_rounds + 1):
-            total_round_dmg = 0
-            total_round_dmg_crit_imm = 0
-
-            for attack_idx, attack_ab in enumerate(self.attack_sim.attack_prog):
-                self.stats.attempts_made += 1
-                self.stats.attempts_made_per_attack[attack_idx] += 1
-
-                legend_ab_bonus = self.legend_effect.ab_bonus()  # Get the AB bonus from the legendary effect
-                legend_ac_reduction = self.legend_effect.ac_reduction()  # Get the AC reduction from the legendary effect
-                current_ab = min(attack_ab + legend_ab_bonus, self.attack_sim.ab_capped)
-                outcome, roll = self.attack_sim.attack_roll(current_ab, defender_ac_modifier=legend_ac_reduction)
-
-                if outcome == 'miss':  # Attack missed the opponent, no damage is added
-                    if ("Tenacious_Blow" in self.cfg.ADDITIONAL_DAMAGE
-                            and self.cfg.ADDITIONAL_DAMAGE["Tenacious_Blow"][0] is True
-                            and self.weapon.name_base in ["Dire Mace", "Double Axe", "Two-Bladed Sword"]):
-                        dmg_dict = {'pure': [[0, 0, 4]]}
-                        if legend_imm_factors is None:
-                            legend_imm_factors = {}
-                        dmg_sums = self.get_damage_results(dmg_dict, legend_imm_factors)
-                        dmg_sums_crit_imm = dmg_sums
-                        legend_dmg_sums = {}  # No legend damage on miss, even with Tenacious Blow
-                    else:
-                        continue
-
-                else:  # Attack hits, critical hit logic is managed within this part:
-                    self.stats.hits += 1
-                    self.stats.hits_per_attack[attack_idx] += 1
-
-                    # On Critical Hit damage is NOT multiplied(!), it is rolled multiple times!
-                    crit_multiplier = 1 if outcome == 'hit' else self.weapon.crit_multiplier
-
-                    legend_dmg_sums, legend_dmg_common, legend_imm_factors = (
-                        self.legend_effect.get_legend_damage(self.dmg_dict_legend, crit_multiplier)
-                    )
-
-                    dmg_dict = deepcopy(self.dmg_dict)  # Prep dmg dict for CRIT calculation
-
-                    if self.attack_sim.dual_wield:  # Halve (and round down) Strength damage for offhand attacks
-                        if attack_idx in (offhand_attack_1_idx, offhand_attack_2_idx):
-                            current_str_flat_dmg = dmg_dict['physical'][str_idx][2]
-                            dmg_dict['physical'][str_idx][2] = math.floor(current_str_flat_dmg / 2)
-
-                    dmg_sneak = dmg_dict.pop('sneak', [])                                                # Remove the 'sneak' dmg from crit multiplication
-                    dmg_sneak_max = max(dmg_sneak, key=lambda sublist: sublist[0], default=None)         # Find the highest 'Sneak' dmg, can't stack sneak
-
-                    dmg_death = dmg_dict.pop('death', [])                                           # Remove the 'sneak' dmg from crit multiplication
-                    dmg_death_max = max(dmg_death, key=lambda sublist: sublist[0], default=None)    # Find the highest 'Sneak' dmg, can't stack sneak
-
-                    def get_max_dmg(dmg_list):
-                        dice = dmg_list[0]
-                        sides = dmg_list[1]
-                        flat = dmg_list[2] if len(dmg_list) > 2 else 0
-                        return dice * sides + flat
-
-                    dmg_massive = dmg_dict.pop('massive', [])                          # Remove the 'Massive' dmg from crit multiplication
-                    dmg_massive_max = max(dmg_massive, key=get_max_dmg, default=None)  # Find the highest 'Massive' dmg, can't stack massive
-
-                    dmg_flameweap = dmg_dict.pop('fire_fw', [])                            # Remove the 'Flame Weapon' dmg from crit multiplication
-                    dmg_flameweap_max = max(dmg_flameweap, key=get_max_dmg, default=None)  # Find the highest 'Flame on Hit' dmg, can't stack multiple on-hits
-
-                    if legend_dmg_common:   # Checking if list is NOT empty, then adding the legend common damage to ordinary damage dictionary
-                        dmg_type_name = legend_dmg_common.pop(2)
-                        dmg_popped = dmg_dict.pop(dmg_type_name, [])
-                        dmg_popped.extend([legend_dmg_common])
-                        dmg_dict[dmg_type_name] = dmg_popped
-
-                    dmg_dict_crit_imm = deepcopy(dmg_dict)  # Make a deep copy of dmg dict for NON-CRIT calculation
-
-                    if crit_multiplier > 1:     # Store an additional dictionary for damage without crit multiplication
-                        self.stats.crit_hits += 1
-                        self.stats.crits_per_attack[attack_idx] += 1
-                        dmg_dict = {k: [i for i in v for _ in range(crit_multiplier)]
-                                    for k, v in dmg_dict.items()}  # Copy dice information X times (X = crit multiplier)
-                        if dmg_massive_max is not None:
-                            dmg_dict['physical'].append(dmg_massive_max)  # Add 'Massive' again after dmg rolls have been multiplied
-
-                        # Overwhelm Critical: Add bonus damage based on crit multiplier
-                        if self.cfg.OVERWHELM_CRIT:
-                            if crit_multiplier == 2:
-                                overwhelm_dmg = [1, 6]  # 1d6
-                            elif crit_multiplier == 3:
-                                overwhelm_dmg = [2, 6]  # 2d6
-                            else:  # crit_multiplier >= 4
-                                overwhelm_dmg = [3, 6]  # 3d6
-                            dmg_dict.setdefault('physical', []).append(overwhelm_dmg)
-
-                        # Devastating Critical: Add bonus pure damage based on weapon size
-                        if self.cfg.DEV_CRIT:
-                            if self.weapon.size in ['T', 'S']:  # Tiny or Small
-                                dev_dmg = [0, 0, 10]  # +10 pure damage
-                            elif self.weapon.size == 'M':  # Medium
-                                dev_dmg = [0, 0, 20]  # +20 pure damage
-                            else:  # Large or larger
-                                dev_dmg = [0, 0, 30]  # +30 pure damage
-                            dmg_dict.setdefault('pure', []).append(dev_dmg)
-
-                    if dmg_sneak_max is not None:   # Add 'Sneak Attack' again after crit dmg rolls have been multiplied
-                        dmg_dict.setdefault('physical', []).append(dmg_sneak_max)
-                        dmg_dict_crit_imm.setdefault('physical', []).append(dmg_sneak_max)
-
-                    if dmg_death_max is not None:   # Add 'Death Attack' again after crit dmg rolls have been multiplied
-                        dmg_dict.setdefault('physical', []).append(dmg_death_max)
-                        dmg_dict_crit_imm.setdefault('physical', []).append(dmg_death_max)
-
-                    if dmg_flameweap_max is not None:   # Add 'Flame Weapon' again after crit dmg rolls have been multiplied
-                        dmg_dict.setdefault('fire', []).append(dmg_flameweap_max)
-                        dmg_dict_crit_imm.setdefault('fire', []).append(dmg_flameweap_max)
-
+            self.offhand_idxs = ()
+
+    def simulate_round(self):
+        """
+        Simulate a single round, attack by attack. The batch means, rolling windows, plot series, stats and damage
+        summaries are updated, so get_results can be called after any round.
+        :return: Tuple of the damage of the round (crit allowed, crit immune)
+        """
+        total_round_dmg = 0
+        total_round_dmg_crit_imm = 0
+        legend_imm_factors = self.legend_imm_factors
+
+        for attack_idx in range(self.attack_sim.attacks_per_round):
+            self.stats.attempts_made += 1
+            self.stats.attempts_made_per_attack[attack_idx] += 1
+
+            legend_ab_bonus = self.legend_effect.ab_bonus()  # Get the AB bonus from the legendary effect
+            legend_ac_reduction = self.legend_effect.ac_reduction()  # Get the AC reduction from the legendary effect
+            # Outcome lookup of the attack slot, tables are precomputed per (AB bonus, AC reduction) state
+            outcome = self.attack_sim.resolve_attack(attack_idx, legend_ab_bonus, legend_ac_reduction)
+
+            if outcome == 'miss':  # Attack missed the opponent, no damage is added
+                if ("Tenacious_Blow" in self.cfg.ADDITIONAL_DAMAGE
+                        and self.cfg.ADDITIONAL_DAMAGE["Tenacious_Blow"][0] is True
+                        and self.weapon.name_base in ["Dire Mace", "Double Axe", "Two-Bladed Sword"]):
+                    dmg_dict = {'pure': [[0, 0, 4]]}
+                    if legend_imm_factors is None:
+                        legend_imm_factors = {}
+                    dmg_sums = self.get_damage_results(dmg_dict, legend_imm_factors)
+                    dmg_sums_crit_imm = dmg_sums
+                    legend_dmg_sums = {}  # No legend damage on miss, even with Tenacious Blow
+                else:
+                    continue
+
+            else:  # Attack hits, critical hit logic is managed within this part:
+                self.stats.hits += 1
+                self.stats.hits_per_attack[attack_idx] += 1
+
+                # On Critical Hit damage is NOT multiplied(!), it is rolled multiple times!
+                crit_multiplier = 1 if outcome == 'hit' else self.weapon.crit_multiplier
+
+                legend_dmg_sums, legend_dmg_common, legend_imm_factors = (
+                    self.legend_effect.get_legend_damage(self.dmg_dict_legend, crit_multiplier)
+                )
+
+                if crit_multiplier > 1:
+                    self.stats.crit_hits += 1
+                    self.stats.crits_per_attack[attack_idx] += 1
+
+                # Get the compiled damage dictionaries of this attack (offhand halves STR damage, crit multiplies dice),
+                # dice of the same size are merged, so they are rolled at once
+                offhand = attack_idx in self.offhand_idxs
+                dmg_dict, dmg_dict_crit_imm = self.damage_tables.get_roll_tables(offhand, crit_multiplier, legend_dmg_common)
+
+                if crit_multiplier > 1 and self.cfg.SHARED_CRIT_DICE:
+                    # Crit-allowed damage = crit-immune dice + extra crit dice, immunities applied to each total
+                    dmg_extra = self.damage_tables.get_crit_extra_tables(offhand, crit_multiplier, legend_dmg_common)
+                    dmg_rolls_crit_imm = self.roll_damage(dmg_dict_crit_imm)
+                    dmg_rolls = self.roll_damage(dmg_extra, dict(dmg_rolls_crit_imm))
+                    dmg_sums = self.attack_sim.damage_immunity_reduction(dmg_rolls, legend_imm_factors)
+                    dmg_sums_crit_imm = self.attack_sim.damage_immunity_reduction(dmg_rolls_crit_imm, legend_imm_factors)
+                else:
                     dmg_sums = self.get_damage_results(dmg_dict, legend_imm_factors)
                     dmg_sums_crit_imm = dmg_sums if crit_multiplier == 1 else self.get_damage_results(dmg_dict_crit_imm, legend_imm_factors)
 
-                attack_dmg = sum(dmg_sums.values()) + sum(legend_dmg_sums.values())
-                attack_dmg_crit_imm = sum(dmg_sums_crit_imm.values()) + sum(legend_dmg_sums.values())
+            attack_dmg = sum(dmg_sums.values()) + sum(legend_dmg_sums.values())
+            attack_dmg_crit_imm = sum(dmg_sums_crit_imm.values()) + sum(legend_dmg_sums.values())
+            if outcome != 'miss':
+                self.hit_dmg_sketch.add(attack_dmg)
+
+            # Update cumulative damage by type for plotting/analysis
+            for k, v in dmg_sums.items():
+                self.cumulative_damage_by_type[k] = self.cumulative_damage_by_type.get(k, 0) + v
+            for k, v in legend_dmg_sums.items():
+                self.cumulative_damage_by_type[k] = self.cumulative_damage_by_type.get(k, 0) + v
+
+            total_round_dmg += attack_dmg
+            total_round_dmg_crit_imm += attack_dmg_crit_imm
+
+        self.legend_imm_factors = legend_imm_factors    # Carried over to the next round (Tenacious Blow on a miss)
+        self.num_rounds += 1
+        self.total_dmg += total_round_dmg
+        self.total_dmg_crit_imm += total_round_dmg_crit_imm
+        self.round_dmg_sketch.add(total_round_dmg)
+
+        # Current average DPS - crit allowed, the cumulative damage and running DPS are thinned for plotting
+        rolling_dpr = self.total_dmg / self.num_rounds
+        rolling_dps = rolling_dpr / 6
+        current_dps = total_round_dmg / 6
+        self.dps_window.append(rolling_dps)
+        self.dps_batch_means.add(current_dps)
+        self.dps_vs_damage.add(self.total_dmg, rolling_dps)
+
+        # Current average DPS - crit immune
+        rolling_dpr_crit_imm = self.total_dmg_crit_imm / self.num_rounds
+        rolling_dps_crit_imm = rolling_dpr_crit_imm / 6
+        current_dps_crit_imm = total_round_dmg_crit_imm / 6
+        self.dps_crit_imm_window.append(rolling_dps_crit_imm)
+        self.dps_crit_imm_batch_means.add(current_dps_crit_imm)
+
+        return total_round_dmg, total_round_dmg_crit_imm
+
+    def iter_rounds(self, block_size: int = 100, max_rounds: int = None):
+        """
+        Block by block generator of the round by round simulation (see simulate_round), yields after every block of
+        rounds. The generator has no stopping policy: the caller consumes blocks (e.g., progress reports, convergence
+        checks) and stops whenever it likes. get_results can be called at any point.
+        :param block_size: Number of rounds per block
+        :param max_rounds: Maximum number of rounds, None to run until the caller stops
+        :yield: Dictionary of the block: rounds simulated so far, rounds and damage (crit allowed, crit immune) of the
+                block, running DPS estimates, and the running DPS error (crit allowed, see dps_batch_means)
+        """
+        self.start_rounds()
+        round_num = 0
+        block_rounds, block_dmg, block_dmg_crit_imm = 0, 0, 0
 
-                # Update cumulative damage by type for plotting/analysis
-                for k, v in dmg_sums.items():
-                    self.cumulative_damage_by_type[k] = self.cumulative_damage_by_type.get(k, 0) + v
-                for k, v in legend_dmg_sums.items():
-                    self.cumulative_damage_by_type[k] = self.cumulative_damage_by_type.get(k, 0) + v
+        while max_rounds is None or round_num < max_rounds:
+            round_num += 1
+            total_round_dmg, total_round_dmg_crit_imm = self.simulate_round()
 
-                total_round_dmg += attack_dmg
-                total_round_dmg_crit_imm += attack_dmg_crit_imm
+            # Block aggregates, yielded when the block is full or the last round is simulated
+            block_rounds += 1
+            block_dmg += total_round_dmg
+            block_dmg_crit_imm += total_round_dmg_crit_imm
+            if block_rounds < block_size and round_num != max_rounds:
+                continue
 
-            self.total_dmg += total_round_dmg
-            self.total_dmg_crit_imm += total_round_dmg_crit_imm
+            dps_crits, dps_no_crits = self.total_dmg / self.num_rounds / 6, self.total_dmg_crit_imm / self.num_rounds / 6
+            yield {
+                "round_num": round_num,
+                "block_rounds": block_rounds,
+                "block_dmg": block_dmg,
+                "block_dmg_crit_imm": block_dmg_crit_imm,
+                "dps_crits": dps_crits,
+                "dps_no_crits": dps_no_crits,
+                "avg_dps_both": (dps_crits + dps_no_crits) / 2,
+                "dps_error": self.z * self.dps_batch_means.get_error_estimates()[0],
+            }
+            block_rounds, block_dmg, block_dmg_crit_imm = 0, 0, 0
 
-            # Track cumulative total damage per round for plotting
-            self.cumulative_damage_per_round.append(self.total_dmg)
+    def simulate_dps(self):
+        total_rounds = self.cfg.ROUNDS
+        round_num = 0
+        self.start_rounds()
 
-            # Current average DPS - crit allowed
-            rolling_dpr = self.total_dmg / round_num
-            rolling_dps = rolling_dpr / 6
-            current_dps = total_round_dmg / 6
-            self.dps_window.append(rolling_dps)
-            self.dps_rolling_avg.append(rolling_dps)
-            self.dps_per_round.append(current_dps)
+        # Simulate the rounds one by one (no per-round generator in the hot loop), the stopping rules are checked
+        # after every round
+        while round_num < total_rounds:
+            round_num += 1
+            self.simulate_round()
 
-            # Current average DPS - crit immune
-            rolling_dpr_crit_imm = self.total_dmg_crit_imm / round_num
-            rolling_dps_crit_imm = rolling_dpr_crit_imm / 6
-            current_dps_crit_imm = total_round_dmg_crit_imm / 6
-            self.dps_crit_imm_window.append(rolling_dps_crit_imm)
-            self.dps_crit_imm_rolling_avg.append(rolling_dps_crit_imm)
-            self.dps_crit_imm_per_round.append(current_dps_crit_imm)
+            # Report progress, the callback may raise SimulationCancelled to stop the simulation
+            if self.progress_callback is not None and round_num % self.progress_interval == 0:
+                self.progress_callback(round_num, total_rounds)
 
             # Stop if damage limit is reached
             if self.cfg.DAMAGE_LIMIT_FLAG and self.total_dmg >= self.cfg.DAMAGE_LIMIT:
                 print(f"\nDamage limit of {self.cfg.DAMAGE_LIMIT} reached at round {round_num}, stopping simulation.")
                 break
 
-            # Check for convergence
-            if len(self.dps_window) >= self.window_size:
+            # Check for convergence, on the requested DPS precision if set, otherwise on the rolling window
+            if self.cfg.TARGET_DPS_ERROR > 0:
+                if round_num % self.precision_interval == 0 and self.precision_reached(round_num):
+                    break
+            elif len(self.dps_window) >= self.window_size:
                 if self.convergence(round_num):
                     break
 
-        # DPS values (crit allowed)
-        dps_mean = statistics.mean(self.dps_per_round)
-        dps_stdev = statistics.stdev(self.dps_per_round) if round_num > 1 else 0
-        dps_error = self.z * (dps_stdev / math.sqrt(round_num))
+        return self.get_results(round_num)
+
+    def get_batch_engine(self, seed=None):
+        """
+        :param seed: Seed of the NumPy generator, None for fresh entropy
+        :return: BatchEngine of the config, with stratified rolls (STRATIFIED_ROLLS) for weapons without legendary
+                 effect with duration (the rolls of the others must stay independent)
+        """
+        stratified = self.cfg.STRATIFIED_ROLLS and self.legend_effect.effect == NO_LEGEND_EFFECT
+        return BatchEngine(self, seed=seed, stratified=stratified)
+
+    @classmethod
+    def get_look_rounds(cls, max_rounds: int):
+        """
+        :param max_rounds: Maximum number of rounds of the run
+        :return: List of the rounds of the stopping checks of a block run: MIN_BLOCK_ROUNDS, doubled until max_rounds,
+                 and max_rounds (the last check, forced)
+        """
+        look_rounds = []
+        rounds = cls.MIN_BLOCK_ROUNDS
+        while rounds < max_rounds:
+            look_rounds.append(rounds)
+            rounds *= 2
+        return look_rounds + [max_rounds]
+
+    @staticmethod
+    def get_sequential_z(num_looks: int, confidence: float = 0.99):
+        """
+        The interval is checked at several looks (optional stopping), each look at the nominal z would miss more
+        often than 1 - confidence. Bonferroni correction: each look is checked at (1 - confidence) / num_looks,
+        so all the intervals (the reported one included) hold together with the nominal confidence.
+        :param num_looks: Number of stopping checks of the run
+        :param confidence: Nominal confidence of the intervals
+        :return: z-score of each look
+        """
+        return statistics.NormalDist().inv_cdf(1 - (1 - confidence) / (2 * num_looks))
+
+    def simulate_dps_blocks(self, block_rounds: int = None, seed=None, conditional: bool = True):
+        """
+        Block by block counterpart of simulate_dps, with the vectorized BatchEngine (see get_batch_engine), used for
+        a requested DPS precision (TARGET_DPS_ERROR) or stratified rolls. By default, the DPS is estimated by
+        conditional Monte Carlo (see BatchEngine.simulate_block_conditional), unbiased with a much lower variance, so the
+        precision is reached in fewer rounds. The damage rolled from the same attack rolls still provides the damage
+        distributions and breakdown.
+        The stopping rules are checked by block_stop_reached, the rolling window is not tracked.
+        :param block_rounds: Number of rounds per block, None for precision_interval
+        :param seed: Seed of the NumPy generator, None for fresh entropy
+        :param conditional: False to estimate the DPS from the damage rolled
+        :return: Same dictionary as simulate_dps
+        """
+        block_rounds = block_rounds or self.precision_interval
+        total_rounds = self.cfg.ROUNDS
+        self.init_looks(total_rounds)
+        engine = self.get_batch_engine(seed)
+        engine.stats.init_zeroes_lists(engine.attacks_per_round)
+
+        while self.num_rounds < total_rounds:
+            num_rounds = min(block_rounds, total_rounds - self.num_rounds)
+            if conditional:
+                dmg_per_round, dmg_crit_imm_per_round, est_per_round, est_crit_imm_per_round = (
+                    engine.simulate_block_conditional(num_rounds))
+            else:
+                dmg_per_round, dmg_crit_imm_per_round = engine.simulate_block(num_rounds)
+                est_per_round, est_crit_imm_per_round = dmg_per_round, dmg_crit_imm_per_round
+            round_num = self.record_rounds(dmg_per_round, dmg_crit_imm_per_round, engine.damage_by_type,
+                                           est_per_round, est_crit_imm_per_round)
+            if self.block_stop_reached(round_num):
+                break
+
+        return self.get_results(self.num_rounds)
+
+    def simulate_dps_aggregated(self, block_rounds: int = None, seed=None):
+        """
+        Mean-only run (MEAN_ONLY) with the AggregatedEngine, for weapons without legendary effect with duration:
+        the outcomes and damage of a whole block are drawn at once, so the cost doesn't depend on the block size.
+        There are no per-round traces, the results have no damage distributions nor damage breakdown. The blocks are
+        the values of the batch means (rounds are independent), and the convergence plot has a point per block.
+        The stopping rules are the same as simulate_dps_blocks.
+        :param block_rounds: Number of rounds per block, None for precision_interval
+        :param seed: Seed of the NumPy generator, None for fresh entropy
+        :return: Same dictionary as simulate_dps
+        """
+        block_rounds = block_rounds or self.precision_interval
+        total_rounds = self.cfg.ROUNDS
+        self.init_looks(total_rounds)
+        engine = AggregatedEngine(self, seed=seed)
+        engine.stats.init_zeroes_lists(engine.attacks_per_round)
+        self.rounds_per_value = block_rounds
+
+        while self.num_rounds < total_rounds:
+            num_rounds = min(block_rounds, total_rounds - self.num_rounds)
+            dmg, dmg_crit_imm = engine.simulate_block(num_rounds)
+
+            self.num_rounds += num_rounds
+            self.total_dmg += dmg
+            self.total_dmg_crit_imm += dmg_crit_imm
+            self.dps_batch_means.add(dmg / num_rounds / 6)     # Round is 6 seconds
+            self.dps_crit_imm_batch_means.add(dmg_crit_imm / num_rounds / 6)
+            self.dps_vs_damage.add(self.total_dmg, self.total_dmg / self.num_rounds / 6)
+            if self.block_stop_reached(self.num_rounds):
+                break
+
+        return self.get_results(self.num_rounds)
+
+    def init_looks(self, max_rounds: int):
+        """Plan the stopping checks of a block run, the reported DPS errors use the z-score of the checks"""
+        self.look_rounds = self.get_look_rounds(max_rounds)
+        self.z = self.get_sequential_z(len(self.look_rounds), self.confidence)
+
+    def block_stop_reached(self, round_num) -> bool:
+        """
+        Progress report and stopping rules after a block: damage limit, then at the planned checks (see init_looks),
+        the requested DPS precision if set, otherwise the default relative precision (REL_DPS_ERROR).
+        :param round_num: Number of rounds simulated
+        :return: True to stop the simulation
+        """
+        # Report progress, the callback may raise SimulationCancelled to stop the simulation
+        if self.progress_callback is not None:
+            self.progress_callback(round_num, self.cfg.ROUNDS)
+
+        # Stop if damage limit is reached
+        if self.cfg.DAMAGE_LIMIT_FLAG and self.total_dmg >= self.cfg.DAMAGE_LIMIT:
+            print(f"\nDamage limit of {self.cfg.DAMAGE_LIMIT} reached at round {round_num}, stopping simulation.")
+            return True
+
+        # Check for convergence at the planned checks only, on the requested DPS precision if set, otherwise on the
+        # default relative precision
+        if not self.look_rounds or round_num < self.look_rounds[0]:
+            return False
+        while self.look_rounds and self.look_rounds[0] <= round_num:
+            self.look_rounds.pop(0)
+        if self.cfg.TARGET_DPS_ERROR > 0:
+            return self.precision_reached(round_num)
+        if self.relative_precision_reached():
+            print(f"Converged after {round_num} rounds ({self.confidence * 100}% CI).")
+            return True
+        return False
+
+    def run_simulation(self):
+        """
+        Run the simulation of the config, the same way for real and speculative jobs (cached results are shared):
+        aggregated blocks for a mean-only run of a weapon without legendary effect with duration, vectorized blocks
+        with the conditional Monte Carlo estimator for a requested DPS precision, vectorized blocks of stratified rolls
+        (plain estimator) if requested, otherwise the attack by attack simulation.
+        :return: Same dictionary as simulate_dps
+        """
+        if self.cfg.MEAN_ONLY and AggregatedEngine.is_supported(self):
+            return self.simulate_dps_aggregated()
+        if self.cfg.TARGET_DPS_ERROR > 0:
+            return self.simulate_dps_blocks()
+        if self.cfg.STRATIFIED_ROLLS:
+            return self.simulate_dps_blocks(conditional=False)
+        return self.simulate_dps()
+
+    def record_rounds(self, dmg_per_round, dmg_crit_imm_per_round, damage_by_type: dict,
+                      est_per_round=None, est_crit_imm_per_round=None):
+        """
+        Record rounds simulated by another engine (e.g., BatchEngine, which shares the stats), so get_results
+        can build the same results. Statistics are already collected by the engine.
+        :param dmg_per_round: Numpy array of the damage per round (crit allowed)
+        :param dmg_crit_imm_per_round: Numpy array of the damage per round (crit immune)
+        :param damage_by_type: Dictionary of the cumulative damage per damage type, e.g., {'physical': 1000}
+        :param est_per_round: Numpy array of the DPS estimator per round, in damage (crit allowed), e.g., the
+                              conditional expected damage, None for the damage per round
+        :param est_crit_imm_per_round: Same as est_per_round, crit immune
+        :return: Total number of rounds recorded
+        """
+        cumulative_dmg = self.total_dmg + np.cumsum(dmg_per_round)
+        round_nums = np.arange(self.num_rounds + 1, self.num_rounds + len(dmg_per_round) + 1)
+
+        self.num_rounds += len(dmg_per_round)
+        self.total_dmg = cumulative_dmg[-1].item()
+        self.total_dmg_crit_imm += np.sum(dmg_crit_imm_per_round).item()
+        est_per_round = dmg_per_round if est_per_round is None else est_per_round
+        est_crit_imm_per_round = dmg_crit_imm_per_round if est_crit_imm_per_round is None else est_crit_imm_per_round
+        self.dps_batch_means.add_many(np.asarray(est_per_round) / 6)
+        self.dps_crit_imm_batch_means.add_many(np.asarray(est_crit_imm_per_round) / 6)
+        self.dps_vs_damage.add_many(cumulative_dmg, cumulative_dmg / round_nums / 6)
+        self.cumulative_damage_by_type = dict(damage_by_type)
+        self.round_dmg_sketch.add_many(dmg_per_round)
+        return self.num_rounds
+
+    def get_results(self, round_num: int):
+        """
+        :param round_num: Number of rounds simulated
+        :return: Dictionary with the DPS results, statistics and the summary of the simulation
+        """
+        # DPS values (crit allowed), errors by batch means (correlated rounds)
+        dps_mean = self.dps_batch_means.mean
+        dps_std_error, effective_rounds = self.dps_batch_means.get_error_estimates()
+        effective_rounds *= self.rounds_per_value
+        dps_error = self.z * dps_std_error
 
         # DPS values (crit immune)
-        dps_crit_imm_mean = statistics.mean(self.dps_crit_imm_per_round)
-        dps_crit_imm_stdev = statistics.stdev(self.dps_crit_imm_per_round) if round_num > 1 else 0
-        dps_crit_imm_error = self.z * (dps_crit_imm_stdev / math.sqrt(round_num))
+        dps_crit_imm_mean = self.dps_crit_imm_batch_means.mean
+        dps_crit_imm_std_error, _ = self.dps_crit_imm_batch_means.get_error_estimates()
+        dps_crit_imm_error = self.z * dps_crit_imm_std_error
         # Averaging crit-allowed and crit-immune
         dps_both = (dps_mean + dps_crit_imm_mean) / 2
 
-        dpr = self.total_dmg / round_num
-        dpr_crit_imm = self.total_dmg_crit_imm / round_num
+        dpr = dps_mean * 6      # Same as the total damage / rounds, unless the DPS has its own estimator
+        dpr_crit_imm = dps_crit_imm_mean * 6
         dph = self.total_dmg / self.stats.hits
         dph_crit_imm = self.total_dmg_crit_imm / self.stats.hits
         warning = f">>> WARNING: Duplicate weapon damage bonus detected! Using higher damage values where applicable. <<<\n\n" if self.weapon.weapon_damage_stack_warning else ""
         summary = (
             f"{warning}"
             f"AB: {self.attack_sim.attack_prog} | Weapon: {self.weapon.name_purple} | Crit: {self.weapon.crit_threat}-20/x{self.weapon.crit_multiplier} | "
-            f"Target AC: {self.cfg.TARGET_AC} | Rounds averaged: {round_num}\n"
+            f"Target AC: {self.cfg.TARGET_AC} | Rounds averaged: {round_num} (effective: {effective_rounds:.0f})\n"
             f"DPS (Crit allowed | immune): {dps_mean:.2f} ± {dps_error:.2f} | {dps_crit_imm_mean:.2f} ± {dps_crit_imm_error:.2f}\n"
             f"TOTAL damage inflicted (Crit allowed | immune): {self.total_dmg} | {self.total_dmg_crit_imm}\n"
             f"AVERAGE damage inflicted per HIT (Crit allowed | immune): {dph:.2f} | {dph_crit_imm:.2f}\n"
@@ -319,16 +552,21 @@ class DamageSimulator:
         print(summary)
 
         self.stats.calc_rates_percentages()
-        legend_proc_theoretical = self.attack_sim.get_legend_proc_rate_theoretical()
+        legend_chain = LegendChain(self.attack_sim, self.legend_effect)    # Exact steady state of the legendary effect
+        legend_proc_theoretical = legend_chain.get_legend_proc_rate()
 
         return {
             "avg_dps_both": round(dps_both, 2),
             "dps_crits": round(dps_mean, 2),
             "dps_no_crits": round(dps_crit_imm_mean, 2),
-            "dps_per_round": self.dps_per_round,
-            "dps_rolling_avg": self.dps_rolling_avg,
-            "cumulative_damage_per_round": self.cumulative_damage_per_round,
+            "dps_error": dps_error,
+            "dps_crit_imm_error": dps_crit_imm_error,
+            "effective_rounds": effective_rounds,
+            "rounds": self.num_rounds,
+            "dps_vs_damage": self.dps_vs_damage.to_dict(),
             "damage_by_type": self.cumulative_damage_by_type,
+            "round_damage_summary": self.round_dmg_sketch.to_dict(),
+            "hit_damage_summary": self.hit_dmg_sketch.to_dict(),
             "attack_prog": self.attack_sim.attack_prog,
             "hit_rate_actual": self.stats.hit_rate,
             "crit_rate_actual": self.stats.crit_hit_rate,
@@ -338,13 +576,27 @@ class DamageSimulator:
             "hit_rate_theoretical": self.attack_sim.get_hit_chance() * 100,
             "crit_rate_theoretical": self.attack_sim.get_crit_chance() * 100,
             "legend_proc_rate_theoretical": legend_proc_theoretical * 100,
+            "legend_uptime_theoretical": legend_chain.get_uptime() * 100,
             "hit_rate_per_attack_theoretical": [x * 100 for x in self.attack_sim.hit_chance_list],
             "crit_rate_per_attack_theoretical": [x * 100 for x in self.attack_sim.crit_chance_list],
             "summary": summary,
         }
 
     def get_damage_results(self, damage_dict: dict, imm_factors: dict):
-        damage_sums = {}
+        damage_sums = self.roll_damage(damage_dict)
+
+        # Finally, apply target immunities and vulnerabilities
+        damage_sums = self.attack_sim.damage_immunity_reduction(damage_sums, imm_factors)
+
+        return damage_sums
+
+    def roll_damage(self, damage_dict: dict, damage_sums: dict = None):
+        """
+        :param damage_dict: Damage dictionary, e.g., {'physical': [[2, 6], [0, 0, 21]], 'fire': [[1, 4, 10]]}
+        :param damage_sums: Damage sums to add the rolls to, e.g., {'physical': 30}, a new dictionary if not provided
+        :return: Dictionary of damage sums per type, before applying target immunities
+        """
+        damage_sums = {} if damage_sums is None else damage_sums
         for dmg_key, dmg_list in damage_dict.items():
             for dmg_sublist in dmg_list:
                 dmg_popped = damage_sums.pop(dmg_key, 0)
@@ -354,7 +606,4 @@ class DamageSimulator:
                 dmg_roll_results = self.attack_sim.damage_roll(num_dice, num_sides, flat_dmg)
                 damage_sums[dmg_key] = dmg_popped + dmg_roll_results
 
-        # Finally, apply target immunities and vulnerabilities
-        damage_sums = self.attack_sim.damage_immunity_reduction(damage_sums, imm_factors)
-
         return damage_sums
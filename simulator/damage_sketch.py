@@ -0,0 +1,110 @@
+import numpy as np
+
+
+class DamageSketch:
+    """
+    Bounded-memory streaming summary of a damage distribution, e.g., damage per round or per hit.
+    Values are buffered (append only, cheap inside the simulation loop) and merged every buffer_size values into:
+    - a fixed-bin histogram (bins of bin_width damage, grown as larger values are seen)
+    - a merging quantile sketch (t-digest style): weighted centroids, sized by the arcsine scale function, so the
+      tails (p99) keep small centroids, and the memory is bounded by the compression (about compression / 2 centroids)
+    """
+    def __init__(self, bin_width: int = 10, compression: int = 200, buffer_size: int = 1000):
+        """
+        :param bin_width: Width of the histogram bins, in damage
+        :param compression: Compression of the quantile sketch, higher is more accurate (and more centroids)
+        :param buffer_size: Number of values buffered before they are merged
+        """
+        self.bin_width = bin_width
+        self.compression = compression
+        self.buffer_size = buffer_size
+        self.buffer = []
+        self.counts = np.zeros(0, dtype=np.int64)     # Histogram counts, bin i covers [i * bin_width, (i+1) * bin_width)
+        self.means = np.zeros(0)                      # Centroid means of the quantile sketch, sorted
+        self.weights = np.zeros(0)                    # Centroid weights (number of values)
+        self.count = 0
+        self.total = 0.0
+        self.min = float('inf')
+        self.max = float('-inf')
+
+    def add(self, value):
+        """Add a single value"""
+        self.buffer.append(value)
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+
+    def add_many(self, values):
+        """Add an array of values, e.g., the damage per round of a block"""
+        self.buffer.extend(np.asarray(values).tolist())
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        """Merge the buffered values into the histogram and the quantile sketch"""
+        if not self.buffer:
+            return
+        values = np.asarray(self.buffer, dtype=float)
+        self.buffer = []
+        self.count += len(values)
+        self.total += float(values.sum())
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+
+        # Histogram, negative values (not expected for damage) are counted in the first bin
+        bin_idxs = np.maximum(values // self.bin_width, 0).astype(np.int64)
+        batch_counts = np.bincount(bin_idxs)
+        if len(batch_counts) > len(self.counts):
+            self.counts = np.pad(self.counts, (0, len(batch_counts) - len(self.counts)))
+        self.counts[:len(batch_counts)] += batch_counts
+
+        # Quantile sketch: sort centroids and new values, then merge neighbours that fall into the same unit
+        # of the scale function k(q) = compression / (2 * pi) * asin(2q - 1), evaluated at the centroid's quantile
+        means = np.concatenate([self.means, values])
+        weights = np.concatenate([self.weights, np.ones(len(values))])
+        order = np.argsort(means, kind='stable')
+        means, weights = means[order], weights[order]
+        cum_weights = np.cumsum(weights)
+        quantiles = (cum_weights - weights / 2) / cum_weights[-1]
+        k_scale = self.compression / (2 * np.pi) * np.arcsin(2 * quantiles - 1)
+        cluster_idxs = np.floor(k_scale - k_scale[0]).astype(np.int64)
+        cluster_weights = np.bincount(cluster_idxs, weights=weights)
+        cluster_sums = np.bincount(cluster_idxs, weights=means * weights)
+        used = cluster_weights > 0
+        self.weights = cluster_weights[used]
+        self.means = cluster_sums[used] / self.weights
+
+    def quantile(self, q: float):
+        """
+        :param q: Quantile, between 0 and 1, e.g., 0.99
+        :return: Estimated value of the quantile, None if no values were added
+        """
+        self.flush()
+        if self.count == 0:
+            return None
+        # Interpolate between the centroid centers, the extremes are the exact min and max
+        centers = (np.cumsum(self.weights) - self.weights / 2) / self.count
+        positions = np.concatenate([[0.0], centers, [1.0]])
+        values = np.concatenate([[self.min], self.means, [self.max]])
+        return float(np.interp(q, positions, values))
+
+    def histogram(self):
+        """:return: Tuple of lists, left edges of the bins and the counts"""
+        self.flush()
+        return (np.arange(len(self.counts)) * self.bin_width).tolist(), self.counts.tolist()
+
+    def to_dict(self, quantiles=(0.5, 0.9, 0.99)):
+        """
+        :param quantiles: Quantiles of the summary
+        :return: JSON-serializable summary: count, mean, min, max, quantiles (keys as 'p50'), bin width and counts
+        """
+        _, counts = self.histogram()
+        summary = {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else None,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+            "bin_width": self.bin_width,
+            "counts": counts,
+        }
+        summary.update({f"p{round(q * 100):d}": self.quantile(q) for q in quantiles})
+        return summary
@@ -0,0 +1,166 @@
+from simulator.weapon import Weapon
+from simulator.config import Config
+from copy import deepcopy
+import math
+
+
+class DamageTables:
+    """
+    Per-weapon damage tables, compiled once from the collected damage dictionary.
+    Each table is the damage dictionary rolled for a single attack, per (offhand, crit multiplier) combination,
+    so the simulation does not need to rebuild (deepcopy, pop, multiply) the damage dictionary on every attack.
+    """
+    def __init__(self, dmg_dict: dict, weapon_obj: Weapon, config: Config, dual_wield: bool = False):
+        self.cfg = config
+        self.weapon = weapon_obj
+        self.dmg_dict = dmg_dict    # Keys are dmg type names, Values are lists of damage dice, e.g., [[2, 6], [1, 8]]
+
+        if dual_wield:
+            str_dmg = self.weapon.strength_bonus()                          # Find the STR bonus damage (again)
+            self.str_idx = self.dmg_dict['physical'].index(str_dmg['physical'])    # Store index of STR damage for halving it later
+        else:
+            self.str_idx = None
+
+        self._tables = {}   # Compiled tables, keys are (offhand, crit_multiplier, legend common damage)
+        self._roll_tables = {}  # Compiled tables with merged dice, same keys
+        self._crit_extra_tables = {}    # Extra crit dice of the shared crit dice mode, same keys
+
+    def get_tables(self, offhand: bool, crit_multiplier: int, legend_dmg_common: list = None):
+        """
+        :param offhand: True if the attack is an offhand attack (Dual-Wield), which halves the Strength damage
+        :param crit_multiplier: int, the critical multiplier, 1 if ordinary hit, >1 if critical hit
+        :param legend_dmg_common: list, legendary damage added to the "common" damage, e.g., [0, 0, 'physical']
+        :return: Tuple of (dmg_dict, dmg_dict_crit_imm), must be treated as read-only
+        """
+        key = (offhand, crit_multiplier, tuple(legend_dmg_common or ()))
+        if key not in self._tables:
+            self._tables[key] = self.build_tables(offhand, crit_multiplier, legend_dmg_common)
+        return self._tables[key]
+
+    def get_roll_tables(self, offhand: bool, crit_multiplier: int, legend_dmg_common: list = None):
+        """
+        Same as get_tables(), but the damage entries of each damage type are merged per die size,
+        e.g., a critical hit [[7, 6], [7, 6], [0, 0, 21]] is rolled as [[14, 6, 21]] (same distribution, fewer rolls).
+        """
+        key = (offhand, crit_multiplier, tuple(legend_dmg_common or ()))
+        if key not in self._roll_tables:
+            tables = self.get_tables(offhand, crit_multiplier, legend_dmg_common)
+            self._roll_tables[key] = tuple(self.merge_dice(dmg_dict) for dmg_dict in tables)
+        return self._roll_tables[key]
+
+    def get_crit_extra_tables(self, offhand: bool, crit_multiplier: int, legend_dmg_common: list = None):
+        """
+        Damage rolled on top of the crit-immune damage of a critical hit (shared crit dice mode):
+        the extra multiplier copies of the dice, Massive, Overwhelm and Devastating Critical damage.
+        The crit-immune dice + these extra dice have the same distribution as the crit-allowed dice.
+        :return: Damage dictionary with merged dice (see merge_dice), must be treated as read-only
+        """
+        key = (offhand, crit_multiplier, tuple(legend_dmg_common or ()))
+        if key not in self._crit_extra_tables:
+            dmg_dict, dmg_dict_crit_imm = self.get_tables(offhand, crit_multiplier, legend_dmg_common)
+            dmg_dict_extra = {}
+            for dmg_type, dmg_list in dmg_dict.items():
+                dmg_list_extra = list(dmg_list)
+                for dmg_sublist in dmg_dict_crit_imm.get(dmg_type, []):
+                    dmg_list_extra.remove(dmg_sublist)  # Remove a single copy of each crit-immune entry
+                if dmg_list_extra:
+                    dmg_dict_extra[dmg_type] = dmg_list_extra
+            self._crit_extra_tables[key] = self.merge_dice(dmg_dict_extra)
+        return self._crit_extra_tables[key]
+
+    @staticmethod
+    def merge_dice(dmg_dict: dict):
+        """
+        :param dmg_dict: Damage dictionary, e.g., {'physical': [[2, 6], [1, 6, 5], [0, 0, 21]]}
+        :return: Damage dictionary with a single entry per die size, flat damage added to the first entry,
+        e.g., {'physical': [[3, 6, 26]]}
+        """
+        merged_dict = {}
+        for dmg_type, dmg_list in dmg_dict.items():
+            dice_per_sides = {}
+            flat_total = 0
+            for dmg_sublist in dmg_list:
+                num_dice, num_sides = dmg_sublist[0], dmg_sublist[1]
+                flat_total += dmg_sublist[2] if len(dmg_sublist) > 2 else 0
+                if num_dice != 0 and num_sides != 0:
+                    dice_per_sides[num_sides] = dice_per_sides.get(num_sides, 0) + num_dice
+
+            merged_list = [[num_dice, num_sides, 0] for num_sides, num_dice in dice_per_sides.items()] or [[0, 0, 0]]
+            merged_list[0][2] = flat_total
+            merged_dict[dmg_type] = merged_list
+        return merged_dict
+
+    def build_tables(self, offhand: bool, crit_multiplier: int, legend_dmg_common: list = None):
+        """Build the damage dictionaries (crit allowed and crit immune) for a single attack"""
+        dmg_dict = deepcopy(self.dmg_dict)  # Prep dmg dict for CRIT calculation
+
+        if offhand and self.str_idx is not None:    # Halve (and round down) Strength damage for offhand attacks
+            current_str_flat_dmg = dmg_dict['physical'][self.str_idx][2]
+            dmg_dict['physical'][self.str_idx][2] = math.floor(current_str_flat_dmg / 2)
+
+        dmg_sneak = dmg_dict.pop('sneak', [])                                                # Remove the 'sneak' dmg from crit multiplication
+        dmg_sneak_max = max(dmg_sneak, key=lambda sublist: sublist[0], default=None)         # Find the highest 'Sneak' dmg, can't stack sneak
+
+        dmg_death = dmg_dict.pop('death', [])                                           # Remove the 'sneak' dmg from crit multiplication
+        dmg_death_max = max(dmg_death, key=lambda sublist: sublist[0], default=None)    # Find the highest 'Sneak' dmg, can't stack sneak
+
+        def get_max_dmg(dmg_list):
+            dice = dmg_list[0]
+            sides = dmg_list[1]
+            flat = dmg_list[2] if len(dmg_list) > 2 else 0
+            return dice * sides + flat
+
+        dmg_massive = dmg_dict.pop('massive', [])                          # Remove the 'Massive' dmg from crit multiplication
+        dmg_massive_max = max(dmg_massive, key=get_max_dmg, default=None)  # Find the highest 'Massive' dmg, can't stack massive
+
+        dmg_flameweap = dmg_dict.pop('fire_fw', [])                            # Remove the 'Flame Weapon' dmg from crit multiplication
+        dmg_flameweap_max = max(dmg_flameweap, key=get_max_dmg, default=None)  # Find the highest 'Flame on Hit' dmg, can't stack multiple on-hits
+
+        if legend_dmg_common:   # Checking if list is NOT empty, then adding the legend common damage to ordinary damage dictionary
+            legend_dmg_common = list(legend_dmg_common)
+            dmg_type_name = legend_dmg_common.pop(2)
+            dmg_popped = dmg_dict.pop(dmg_type_name, [])
+            dmg_popped.extend([legend_dmg_common])
+            dmg_dict[dmg_type_name] = dmg_popped
+
+        dmg_dict_crit_imm = deepcopy(dmg_dict)  # Make a deep copy of dmg dict for NON-CRIT calculation
+
+        if crit_multiplier > 1:     # Store an additional dictionary for damage without crit multiplication
+            dmg_dict = {k: [i for i in v for _ in range(crit_multiplier)]
+                        for k, v in dmg_dict.items()}  # Copy dice information X times (X = crit multiplier)
+            if dmg_massive_max is not None:
+                dmg_dict['physical'].append(dmg_massive_max)  # Add 'Massive' again after dmg rolls have been multiplied
+
+            # Overwhelm Critical: Add bonus damage based on crit multiplier
+            if self.cfg.OVERWHELM_CRIT:
+                if crit_multiplier == 2:
+                    overwhelm_dmg = [1, 6]  # 1d6
+                elif crit_multiplier == 3:
+                    overwhelm_dmg = [2, 6]  # 2d6
+                else:  # crit_multiplier >= 4
+                    overwhelm_dmg = [3, 6]  # 3d6
+                dmg_dict.setdefault('physical', []).append(overwhelm_dmg)
+
+            # Devastating Critical: Add bonus pure damage based on weapon size
+            if self.cfg.DEV_CRIT:
+                if self.weapon.size in ['T', 'S']:  # Tiny or Small
+                    dev_dmg = [0, 0, 10]  # +10 pure damage
+                elif self.weapon.size == 'M':  # Medium
+                    dev_dmg = [0, 0, 20]  # +20 pure damage
+                else:  # Large or larger
+                    dev_dmg = [0, 0, 30]  # +30 pure damage
+                dmg_dict.setdefault('pure', []).append(dev_dmg)
+
+        if dmg_sneak_max is not None:   # Add 'Sneak Attack' again after crit dmg rolls have been multiplied
+            dmg_dict.setdefault('physical', []).append(dmg_sneak_max)
+            dmg_dict_crit_imm.setdefault('physical', []).append(dmg_sneak_max)
+
+        if dmg_death_max is not None:   # Add 'Death Attack' again after crit dmg rolls have been multiplied
+            dmg_dict.setdefault('physical', []).append(dmg_death_max)
+            dmg_dict_crit_imm.setdefault('physical', []).append(dmg_death_max)
+
+        if dmg_flameweap_max is not None:   # Add 'Flame Weapon' again after crit dmg rolls have been multiplied
+            dmg_dict.setdefault('fire', []).append(dmg_flameweap_max)
+            dmg_dict_crit_imm.setdefault('fire', []).append(dmg_flameweap_max)
+
+        return dmg_dict, dmg_dict_crit_imm
@@ -0,0 +1,133 @@
+from functools import lru_cache
+import numpy as np
+
+
+def split_dmg_entry(dmg_list):
+    """
+    :param dmg_list: Damage entry, [dice, sides] or [dice, sides, flat]
+    :return: Tuple of integers (dice, sides, flat)
+    """
+    num_dice = int(dmg_list[0])
+    num_sides = int(dmg_list[1])
+    flat_dmg = int(dmg_list[2]) if len(dmg_list) > 2 else 0
+    return num_dice, num_sides, flat_dmg
+
+
+# Bounds of the process-wide caches, keys are (dice, sides) only: flat damage is added outside the caches, so
+# build-specific flat totals (merged by DamageTables.merge_dice) don't add entries for every user config
+DICE_CACHE_SIZE = 512
+
+
+@lru_cache(maxsize=DICE_CACHE_SIZE)
+def dice_sum_pmf(num_dice: int, num_sides: int):
+    """
+    Exact distribution of a NdS damage roll, without flat damage.
+    :param num_dice: The number of dice to roll, e.g., in 2d6 this value is 2
+    :param num_sides: The number of sides of the die, e.g., in 2d6 this value is 6
+    :return: Read-only numpy array, where item [v] is the probability that the damage roll equals v
+    """
+    if num_dice == 0 or num_sides == 0:  # no roll is performed
+        pmf = np.array([1.0])
+    else:
+        die_pmf = np.full(num_sides + 1, 1.0 / num_sides)
+        die_pmf[0] = 0.0
+        pmf = np.array([1.0])
+        for _ in range(num_dice):
+            pmf = np.convolve(pmf, die_pmf)
+
+    pmf.setflags(write=False)
+    return pmf
+
+
+def dice_pmf(num_dice: int, num_sides: int, flat_dmg: int = 0):
+    """
+    Exact distribution of a NdS+flat damage roll.
+    :param num_dice: The number of dice to roll, e.g., in 2d6 this value is 2
+    :param num_sides: The number of sides of the die, e.g., in 2d6 this value is 6
+    :param flat_dmg: Flat damage to be added to the roll, e.g., in 2d6+3 this value is 3
+    :return: Read-only numpy array, where item [v] is the probability that the damage roll equals v
+    """
+    pmf = dice_sum_pmf(num_dice, num_sides)
+    if flat_dmg == 0:
+        return pmf
+    pmf = np.concatenate([np.zeros(flat_dmg), pmf])
+    pmf.setflags(write=False)
+    return pmf
+
+
+def entries_pmf(dmg_lists: list):
+    """
+    :param dmg_lists: List of damage entries that are summed, e.g., [[2, 6], [1, 8, 5]]
+    :return: Numpy array, where item [v] is the probability that the sum of all damage rolls equals v
+    """
+    pmf = np.array([1.0])
+    for dmg_list in dmg_lists:
+        pmf = np.convolve(pmf, dice_pmf(*split_dmg_entry(dmg_list)))
+    return pmf
+
+
+def entry_mean(dmg_list):
+    """Calculates the average value of a damage entry: dice * ((1 + sides) / 2) + flat."""
+    num_dice, num_sides, flat_dmg = split_dmg_entry(dmg_list)
+    if num_dice == 0 or num_sides == 0:
+        return flat_dmg
+    return num_dice * ((1 + num_sides) / 2) + flat_dmg
+
+
+class AliasSampler:
+    """
+    Alias-method sampler (Vose) over the exact distribution of a NdS+flat damage roll.
+    A single uniform draw in [0, 1) yields the whole damage sum, regardless of the number of dice.
+    """
+    def __init__(self, pmf):
+        """:param pmf: Numpy array, where item [v] is the probability that the damage roll equals v"""
+        support = np.flatnonzero(pmf)
+        self.offset = int(support[0])                       # Lowest possible damage value
+        probs = np.asarray(pmf[self.offset:support[-1] + 1], dtype=float)
+        self.size = len(probs)
+
+        scaled = probs * self.size / probs.sum()
+        prob = np.ones(self.size)
+        alias = np.arange(self.size)
+        small = [i for i in range(self.size) if scaled[i] < 1.0]
+        large = [i for i in range(self.size) if scaled[i] >= 1.0]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            prob[less] = scaled[less]
+            alias[less] = more
+            scaled[more] = scaled[more] + scaled[less] - 1.0
+            (small if scaled[more] < 1.0 else large).append(more)
+
+        self.prob = prob                    # Numpy arrays, used for vectorized sampling
+        self.alias = alias + self.offset
+        self._prob = prob.tolist()          # Python lists, faster for scalar sampling
+        self._alias = self.alias.tolist()
+
+    def sample(self, uniform: float):
+        """
+        :param uniform: Uniform draw in [0, 1)
+        :return: int, Damage roll result
+        """
+        scaled = uniform * self.size
+        idx = int(scaled)
+        if idx == self.size:    # Floating point rounding of uniform draws close to 1
+            idx -= 1
+        return idx + self.offset if scaled - idx < self._prob[idx] else self._alias[idx]
+
+    def sample_many(self, uniforms):
+        """
+        :param uniforms: Numpy array of uniform draws in [0, 1)
+        :return: Numpy array of damage roll results
+        """
+        scaled = uniforms * self.size
+        idxs = np.minimum(scaled.astype(np.int64), self.size - 1)
+        return np.where(scaled - idxs < self.prob[idxs], idxs + self.offset, self.alias[idxs])
+
+
+@lru_cache(maxsize=DICE_CACHE_SIZE)
+def get_alias_sampler(num_dice: int, num_sides: int):
+    """
+    :return: AliasSampler of a NdS damage roll, compiled once and shared across weapons and simulations.
+             Flat damage is not part of the sampler, callers add it to the samples
+    """
+    return AliasSampler(dice_sum_pmf(num_dice, num_sides))
@@ -0,0 +1,104 @@
+from math import floor
+import numpy as np
+
+
+# Damage type keys that share the target immunity of another damage type
+DAMAGE_TYPE_ALIASES = {
+    'fire_fw': 'fire',    # Fire from Flame Weapon is treated as normal fire damage for immunities
+    'slashing': 'physical',
+    'piercing': 'physical',
+    'bludgeoning': 'physical'
+}
+
+
+class ImmunityTable:
+    """
+    Target immunities compiled once per config: damage type keys (including aliases) are mapped to integer indices,
+    and the immunities are held in a small array, with one precomputed vector per set of immunity factors
+    (e.g., legendary Crushing Blow). Applies the exact floor\\min-1 rules, to single values or to numpy arrays.
+    """
+    def __init__(self, target_immunities: dict):
+        """
+        :param target_immunities: Dictionary of the target immunities per damage type, e.g., {'fire': 0.25}
+        """
+        self.type_names = list(target_immunities.keys())
+        self.type_idx = {dmg_type_name: idx for idx, dmg_type_name in enumerate(self.type_names)}
+        for alias, dmg_type_name in DAMAGE_TYPE_ALIASES.items():
+            if dmg_type_name in self.type_idx:
+                self.type_idx[alias] = self.type_idx[dmg_type_name]
+        self.immunities = np.array([target_immunities[name] for name in self.type_names], dtype=float)
+        self._vectors = {}     # Keys are immunity factors (sorted items), Values are (immunities list, numpy array)
+
+    def get_index(self, dmg_type_name: str):
+        """
+        :param dmg_type_name: Damage type key, e.g., 'fire_fw' or 'slashing'
+        :return: Index of the damage type in the immunity vectors
+        """
+        idx = self.type_idx.get(dmg_type_name)
+        if idx is None:
+            corrected_dmg_type_name = DAMAGE_TYPE_ALIASES.get(dmg_type_name, dmg_type_name)
+            raise KeyError(f"Damage type '{corrected_dmg_type_name}' not found in TARGET_IMMUNITIES dictionary.")
+        return idx
+
+    def get_vector(self, imm_factors: dict = None):
+        """
+        :param imm_factors: Dictionary holding the target immunity factors (for example -0.1 (10%) due to legend property
+        :return: Tuple of the target immunities with the factors applied, as (list, numpy array), built once per factors
+        """
+        key = tuple(sorted(imm_factors.items())) if imm_factors else ()
+        vectors = self._vectors.get(key)
+        if vectors is None:
+            immunities = self.immunities.copy()
+            for dmg_type_name, imm_factor in key:
+                if dmg_type_name not in self.type_names:
+                    raise KeyError(dmg_type_name)
+                immunities[self.type_names.index(dmg_type_name)] += imm_factor
+            vectors = self._vectors[key] = (immunities.tolist(), immunities)
+        return vectors
+
+    def get_immunity(self, dmg_type_name: str, imm_factors: dict = None):
+        """:return: The target immunity (fraction) that applies to the damage type"""
+        return self.get_vector(imm_factors)[0][self.get_index(dmg_type_name)]
+
+    @staticmethod
+    def apply(dmg_value: int, immunity: float):
+        """
+        :param dmg_value: Damage value (before immunity)
+        :param immunity: Target immunity (fraction), negative values are vulnerability
+        :return: Damage value after applying the immunity
+        """
+        if immunity > 0:    # Damage Immunity (Reduction), at least 1 damage is reduced
+            dmg_reduced = floor(dmg_value * immunity)
+            dmg_reduced = 1 if dmg_reduced < 1 else dmg_reduced
+            return max(0, dmg_value - dmg_reduced)
+        elif immunity < 0:  # Damage Vulnerability
+            return dmg_value + floor(abs(dmg_value * immunity))
+        else:               # Immunity is 0%, No Immunity or Vulnerability
+            return dmg_value
+
+    @staticmethod
+    def apply_array(dmg_values, immunity: float):
+        """
+        Vectorized version of apply()
+        :param dmg_values: Numpy array of damage values (before immunity)
+        :param immunity: Target immunity (fraction), negative values are vulnerability
+        :return: Numpy array of damage values after applying the immunity
+        """
+        if immunity > 0:    # Damage Immunity (Reduction), at least 1 damage is reduced
+            dmg_reduced = np.maximum(np.floor(dmg_values * immunity), 1)
+            return np.maximum(0, dmg_values - dmg_reduced)
+        elif immunity < 0:  # Damage Vulnerability
+            return dmg_values + np.floor(np.abs(dmg_values * immunity))
+        else:               # Immunity is 0%, No Immunity or Vulnerability
+            return dmg_values
+
+    def reduce(self, damage_sums: dict, imm_factors: dict = None):
+        """
+        :param damage_sums: Dictionary holding a sum of the total damage inflicted, per damage type, e.g., {'divine': 10}
+        :param imm_factors: Dictionary holding the target immunity factors
+        :return: The same dictionary, damage values after applying target immunities
+        """
+        immunities = self.get_vector(imm_factors)[0]
+        for dmg_type_name, dmg_value in damage_sums.items():
+            damage_sums[dmg_type_name] = self.apply(dmg_value, immunities[self.get_index(dmg_type_name)])
+        return damage_sums
@@ -0,0 +1,106 @@
+from simulator.attack_simulator import MISS, CRITICAL_HIT
+import numpy as np
+
+
+class LegendChain:
+    """
+    Exact steady state of the legendary effect duration, as a Markov chain over legend_attacks_left.
+    Same rules as LegendEffect.get_legend_damage: a proc (on-hit, by percentage) resets the counter to
+    attacks_per_round * legend_effect_duration, any other hit decrements it while it's above 0.
+    The per attack slot hit chances depend on the state (Darts AB bonus, Sunder AC reduction), so the chain
+    is solved per slot, over the counter values before each attack of the round.
+    """
+    def __init__(self, attack_sim, legend_effect):
+        """
+        :param attack_sim: AttackSimulator instance, provides the per-state outcome tables
+        :param legend_effect: LegendEffect instance, provides the weapon and the effect duration
+        """
+        self.attack_sim = attack_sim
+        self.weapon = legend_effect.weapon
+        self.attacks_per_round = attack_sim.attacks_per_round
+        self.duration = self.attacks_per_round * legend_effect.legend_effect_duration
+
+        legend_dict = self.weapon.purple_props.get('legendary') or {}
+        self.proc = legend_dict.get('proc')
+        self.duration_effect = isinstance(self.proc, (int, float))
+
+        # Exact chance of a d100 roll above the threshold (the proc is then applied on hit)
+        roll_threshold = 100 - (self.proc * 100) if self.duration_effect else 100
+        self.proc_chance = np.count_nonzero(np.arange(1, 101) > roll_threshold) / 100
+
+        # Per attack slot (hit, crit) chances, while the effect is inactive and active
+        self.inactive_chances = self.get_outcome_chances(0, 0)
+        self.active_chances = self.get_outcome_chances(legend_effect.effect.ab_bonus, legend_effect.effect.ac_reduction)
+        self.counter_dists = self.solve()
+
+    def get_outcome_chances(self, ab_bonus: int, defender_ac_modifier: int):
+        """:return: Tuple of numpy arrays, per attack slot chance to hit (either crit or non-crit) and to crit-hit"""
+        tables = self.attack_sim.get_outcome_tables(ab_bonus, defender_ac_modifier)[0][:, 1:, 1:]  # Rolls 1-20
+        hit_chances = (tables != MISS).mean(axis=(1, 2))
+        crit_chances = (tables == CRITICAL_HIT).mean(axis=(1, 2))
+        return hit_chances, crit_chances
+
+    def transition_matrix(self, attack_idx: int):
+        """
+        :param attack_idx: Index of the attack in the attack progression
+        :return: Numpy array, row-stochastic transition matrix of the counter over the attack, indexed by [before, after]
+        """
+        num_states = self.duration + 1
+        matrix = np.zeros((num_states, num_states))
+        for counter in range(num_states):
+            chances = self.active_chances if counter > 0 else self.inactive_chances
+            hit_chance = chances[0][attack_idx]
+            matrix[counter, self.duration] += hit_chance * self.proc_chance             # Proc, reset
+            matrix[counter, max(counter - 1, 0)] += hit_chance * (1 - self.proc_chance)  # Other hit, decrement
+            matrix[counter, counter] += 1 - hit_chance                                  # Miss, unchanged
+        return matrix
+
+    def solve(self):
+        """
+        :return: Numpy array of the stationary counter distributions before each attack, indexed by [slot, counter]
+        """
+        num_states = self.duration + 1
+        if not self.duration_effect or self.proc_chance == 0:     # The counter stays at 0
+            counter_dists = np.zeros((self.attacks_per_round, num_states))
+            counter_dists[:, 0] = 1.0
+            return counter_dists
+
+        matrices = [self.transition_matrix(attack_idx) for attack_idx in range(self.attacks_per_round)]
+        round_matrix = np.linalg.multi_dot(matrices) if len(matrices) > 1 else matrices[0]
+
+        # Stationary distribution at the first attack: pi @ (P - I) = 0, with sum(pi) = 1 replacing one equation
+        equations = (round_matrix - np.eye(num_states)).T
+        equations[-1, :] = 1.0
+        rhs = np.zeros(num_states)
+        rhs[-1] = 1.0
+        dist = np.linalg.solve(equations, rhs)
+
+        counter_dists = [dist]
+        for matrix in matrices[:-1]:
+            counter_dists.append(counter_dists[-1] @ matrix)
+        return np.clip(np.array(counter_dists), 0.0, 1.0)
+
+    @property
+    def active_chances_per_attack(self):
+        """:return: Numpy array, per attack slot chance the effect is active (legend_attacks_left > 0) before the attack"""
+        return 1.0 - self.counter_dists[:, 0]
+
+    def get_uptime(self):
+        """:return: Steady-state fraction of attacks made while the legendary effect is active"""
+        return float(self.active_chances_per_attack.mean())
+
+    def get_hit_chances(self):
+        """:return: Tuple of numpy arrays, per attack slot steady-state chance to hit and to crit-hit"""
+        active = self.active_chances_per_attack
+        hit_chances = (1 - active) * self.inactive_chances[0] + active * self.active_chances[0]
+        crit_chances = (1 - active) * self.inactive_chances[1] + active * self.active_chances[1]
+        return hit_chances, crit_chances
+
+    def get_legend_proc_rate(self):
+        """:return: Steady-state legend procs out of total HITS, same definition as the actual proc rate"""
+        hit_chances, crit_chances = self.get_hit_chances()
+        if self.duration_effect:    # Proc is percentage, rolled on every hit
+            return self.proc_chance
+        elif isinstance(self.proc, str):    # Proc is 'on_crit'
+            return float(crit_chances.sum() / hit_chances.sum())
+        return 0.0
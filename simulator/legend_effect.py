@@ -1,22 +1,56 @@
 from simulator.weapon import Weapon
 from simulator.stats_collector import StatsCollector
 from simulator.attack_simulator import AttackSimulator
+from simulator.roll_source import RollSource
+from simulator.attack_simulator import MISS, CRITICAL_HIT
+from dataclasses import dataclass, field
+from typing import Dict
 from copy import deepcopy
-import random
+import numpy as np
+
+
+@dataclass(frozen=True)
+class LegendEffectSpec:
+    """Modifiers of a legendary effect with duration, applied while legend_attacks_left > 0 (and on the proc hit)"""
+    ab_bonus: int = 0           # Attacker AB bonus
+    ac_reduction: int = 0       # Defender AC modifier
+    immunity_factors: Dict[str, float] = field(default_factory=dict)   # Added to the target immunities
+    common_damage: bool = False     # Legendary damage is added to the "common" damage, instead of rolled on proc
+
+
+# Registry of the legendary effects, keyed by the 'effect' field of the PURPLE_WEAPONS legendary entries
+LEGEND_EFFECTS = {
+    'perfect_strike': LegendEffectSpec(ab_bonus=2),                             # Darts, +2 AB
+    'sunder': LegendEffectSpec(ac_reduction=-2),                                # Light Flail, Greatsword_Legion, -2 AC
+    'crushing_blow': LegendEffectSpec(immunity_factors={'physical': -0.05}),    # Club_Stone, -5% physical immunity
+    'common_damage': LegendEffectSpec(common_damage=True),                      # Heavy Flail, +5 physical
+}
+NO_LEGEND_EFFECT = LegendEffectSpec()
+
+
+def get_legend_effect_spec(weapon_obj: Weapon):
+    """
+    :param weapon_obj: Weapon instance
+    :return: LegendEffectSpec of the weapon's legendary effect, NO_LEGEND_EFFECT if it has no (modeled) effect
+    """
+    legend_dict = weapon_obj.purple_props.get('legendary') or {}
+    return LEGEND_EFFECTS.get(legend_dict.get('effect'), NO_LEGEND_EFFECT)
 
 
 class LegendEffect:
-    def __init__(self, stats_obj: StatsCollector, weapon_obj: Weapon, attack_sim: AttackSimulator):
+    def __init__(self, stats_obj: StatsCollector, weapon_obj: Weapon, attack_sim: AttackSimulator, roll_source: RollSource = None):
         self.stats = stats_obj
         self.weapon = weapon_obj
         self.attack_sim = attack_sim
+        self.roll_source = roll_source or attack_sim.roll_source     # Share the roll source of the attack simulator
 
         self.legend_effect_duration = 5  # Duration of the legendary effect in rounds
         self.legend_attacks_left = 0  # Track remaining attacks that benefit from legendary property
+        self.effect = get_legend_effect_spec(weapon_obj)    # Resolved once, no name checks per attack
 
     def legend_proc(self, legend_proc_identifier: float):
         roll_threshold = 100 - (legend_proc_identifier * 100)  # Roll above it triggers the property
-        legend_roll = random.randint(1, 100)
+        legend_roll = self.roll_source.d100()
         if legend_roll > roll_threshold:
             self.stats.legend_procs += 1
             self.legend_attacks_left = self.attack_sim.attacks_per_round * self.legend_effect_duration  # Reset\apply duration (5 rounds) for some unique properties
@@ -25,20 +59,33 @@ class LegendEffect:
             return False
 
     def ab_bonus(self):
-        relevant_legend_weapons = ['Darts']
-        if (self.legend_attacks_left > 0) and (self.weapon.name_purple in relevant_legend_weapons):
-            legend_ab_bonus = 2
-        else:
-            legend_ab_bonus = 0
-        return legend_ab_bonus
+        if self.legend_attacks_left > 0:
+            return self.effect.ab_bonus
+        return 0
 
     def ac_reduction(self):
-        relevant_legend_weapons = ['Light Flail', 'Greatsword_Legion']
-        if (self.legend_attacks_left > 0) and (self.weapon.name_purple in relevant_legend_weapons):
-            legend_ac_reduction = -2
-        else:
-            legend_ac_reduction = 0
-        return legend_ac_reduction
+        if self.legend_attacks_left > 0:
+            return self.effect.ac_reduction
+        return 0
+
+    def get_common_damage(self, legend_dict: dict):
+        """
+        :param legend_dict: dict, summary of damage dice per type, e.g., {'proc': 0.05, 'physical': [0, 0, 5]}
+        :return: list, legendary damage added to the "common" damage (e.g., H.Flail), e.g., [0, 0, 'physical']
+        """
+        legend_dmg_common = []
+        if self.effect.common_damage:  # H.Flail 5 bludg damage is "common"
+            hflail_phys_dmg = deepcopy(legend_dict['physical'][0])
+            # hflail_phys_dmg is [dice, sides, proc] or [dice, sides, flat, proc]
+            legend_dmg_common.extend(hflail_phys_dmg)
+            # remove proc (last element) and append damage type
+            legend_dmg_common.pop(-1)
+            legend_dmg_common.append('physical')
+        return legend_dmg_common
+
+    def get_immunity_factors(self):
+        """:return: dict, factor to apply to target's damage immunity while the legendary effect is active"""
+        return dict(self.effect.immunity_factors)
 
     def get_legend_damage(self, legend_dict: dict, crit_multiplier: int):
         """
@@ -68,13 +115,8 @@ class LegendEffect:
         proc = legend_dict['proc'] if 'proc' in legend_dict.keys() else None
 
         def add_legend_dmg():
-            if self.weapon.name_purple == 'Heavy Flail':  # H.Flail 5 bludg damage is "common"
-                hflail_phys_dmg = deepcopy(legend_dict['physical'][0])
-                # hflail_phys_dmg is [dice, sides, proc] or [dice, sides, flat, proc]
-                legend_dmg_common.extend(hflail_phys_dmg)
-                # remove proc (last element) and append damage type
-                legend_dmg_common.pop(-1)
-                legend_dmg_common.append('physical')
+            if self.effect.common_damage:  # H.Flail 5 bludg damage is "common"
+                legend_dmg_common.extend(self.get_common_damage(legend_dict))
             else:   # All other weapons
                  for dmg_type, dmg_list in legend_dict.items():
                      if dmg_type in ('proc', 'effect'):
@@ -88,9 +130,7 @@ class LegendEffect:
                         legend_dict_sums[dmg_type] = dmg_popped + self.attack_sim.damage_roll(num_dice, num_sides, flat_dmg)
 
         def get_immunity_factors():
-            physical_imm_factor_weapons = ['Club_Stone']    # Crushing Blow legendary property, -5% physical immunity
-            if self.weapon.name_purple in physical_imm_factor_weapons:
-                legend_imm_factors['physical'] = -0.05
+            legend_imm_factors.update(self.get_immunity_factors())
 
         if isinstance(proc, (int, float)):  # Legendary property triggers on-hit, by percentage
             if self.legend_proc(proc): # Check if the legendary property is triggered
@@ -99,7 +139,7 @@ class LegendEffect:
 
             elif self.legend_attacks_left > 0:
                 self.legend_attacks_left = self.legend_attacks_left - 1
-                add_legend_dmg() if self.weapon.name_purple == 'Heavy Flail' else None
+                add_legend_dmg() if self.effect.common_damage else None
                 get_immunity_factors()
 
         elif isinstance (proc, str) and crit_multiplier > 1:    # Legendary property triggers by crit-hit
@@ -107,3 +147,130 @@ class LegendEffect:
             add_legend_dmg()
 
         return legend_dict_sums, legend_dmg_common, legend_imm_factors
+
+    def scan_windows(self, attack_idxs, rolls, threat_rolls, proc_rolls, max_iterations: int = 32):
+        """
+        Batch version of the attack rolls and the legendary effect state, for a block of consecutive attacks.
+        The effect's active windows follow from the procs and the hits, with cumulative hit counts and a running
+        "last proc" index (segmented scan, see get_active_windows), so no per-attack loop is needed.
+        For effects that change the attack outcomes (Sunder, Darts AB), outcomes and windows depend on each other:
+        they are solved by fixed-point iteration, which converges in a few passes, since an attack's state only depends
+        on the earlier attacks. If it does not converge within max_iterations, falls back to scan_segments.
+        Updates legend_attacks_left (carried over to the next block) and the legend procs statistics.
+
+        :param attack_idxs: Numpy array of attack slot indexes, in attack order
+        :param rolls: Numpy array of d20 attack rolls
+        :param threat_rolls: Numpy array of d20 threat rolls
+        :param proc_rolls: Numpy array of d100 legendary proc rolls
+        :param max_iterations: Max number of fixed-point passes, before falling back to the segment by segment scan
+        :return: Tuple of numpy arrays: outcome codes, active (legend_attacks_left > 0 before the attack), procs
+        """
+        num_attacks = len(attack_idxs)
+        inactive_outcomes = self.attack_sim.resolve_attacks(attack_idxs, rolls, threat_rolls)
+        legend_dict = self.weapon.purple_props.get('legendary') or {}
+        proc = legend_dict.get('proc')
+
+        if not isinstance(proc, (int, float)):  # No duration effects, the state never changes
+            active = np.zeros(num_attacks, dtype=bool)
+            procs = np.zeros(num_attacks, dtype=bool)
+            if isinstance(proc, str):           # Legendary property triggers by crit-hit
+                procs[:] = inactive_outcomes == CRITICAL_HIT
+                self.stats.legend_procs += int(procs.sum())
+            return inactive_outcomes, active, procs
+
+        ab_bonus, ac_reduction = self.effect.ab_bonus, self.effect.ac_reduction
+        proc_passed = proc_rolls > 100 - (proc * 100)  # Roll above the threshold triggers the property (on hit)
+        duration = self.attack_sim.attacks_per_round * self.legend_effect_duration
+
+        if ab_bonus == 0 and ac_reduction == 0:     # Outcomes don't depend on the state, single pass
+            outcomes = inactive_outcomes
+            hits = outcomes != MISS
+            active, attacks_left = self.get_active_windows(hits, hits & proc_passed, self.legend_attacks_left, duration)
+        else:
+            active_outcomes = self.attack_sim.resolve_attacks(attack_idxs, rolls, threat_rolls, ab_bonus, ac_reduction)
+            active = np.zeros(num_attacks, dtype=bool)
+            for _ in range(max_iterations):
+                outcomes = np.where(active, active_outcomes, inactive_outcomes)
+                hits = outcomes != MISS
+                new_active, attacks_left = self.get_active_windows(hits, hits & proc_passed, self.legend_attacks_left, duration)
+                if np.array_equal(new_active, active):
+                    break
+                active = new_active
+            else:
+                return self.scan_segments(attack_idxs, rolls, threat_rolls, proc_rolls)
+
+        procs = hits & proc_passed
+        self.stats.legend_procs += int(procs.sum())
+        self.legend_attacks_left = attacks_left
+        return outcomes, active, procs
+
+    @staticmethod
+    def get_active_windows(hits, procs, attacks_left: int, duration: int):
+        """
+        Active state of the legendary effect before each attack, same rules as get_legend_damage:
+        a proc resets the counter to duration, any other hit decrements it while it's above 0.
+        Before attack i, the counter is (duration or the initial counter, if no proc yet)
+        minus the hits made since the last proc, i.e., a difference of the cumulative hit counts.
+
+        :param hits: Numpy bool array, attack hits the target
+        :param procs: Numpy bool array, attack triggers the legendary property (subset of hits)
+        :param attacks_left: Counter before the first attack (legend_attacks_left)
+        :param duration: Counter value after a proc
+        :return: Tuple: numpy bool array of the active state before each attack, counter after the last attack
+        """
+        num_attacks = len(hits)
+        hits_before = np.zeros(num_attacks + 1, dtype=np.int64)    # hits_before[i] is the number of hits before attack i
+        np.cumsum(hits, out=hits_before[1:])
+        last_proc = np.full(num_attacks + 1, -1, dtype=np.int64)  # last_proc[i] is the last proc before attack i, -1 if none
+        last_proc[1:] = np.maximum.accumulate(np.where(procs, np.arange(num_attacks), -1))
+
+        counter = np.where(last_proc >= 0, duration, attacks_left) - (hits_before - hits_before[last_proc + 1])
+        return counter[:num_attacks] > 0, max(int(counter[-1]), 0)
+
+    def scan_segments(self, attack_idxs, rolls, threat_rolls, proc_rolls, chunk_size: int = 128):
+        """
+        Segment by segment version of scan_windows (same arguments and return values), used as a fallback:
+        each segment is resolved at once with the outcome tables of its state (inactive, or active: Sunder, Darts AB),
+        and a new segment starts only where the state changes (legend proc, or the window runs out).
+
+        :param chunk_size: Max number of attacks resolved per segment
+        """
+        num_attacks = len(attack_idxs)
+        outcomes = np.empty(num_attacks, dtype=np.int8)
+        active = np.zeros(num_attacks, dtype=bool)
+        procs = np.zeros(num_attacks, dtype=bool)
+
+        inactive_tables = self.attack_sim.get_outcome_tables(0, 0)[0]
+        proc = self.weapon.purple_props['legendary']['proc']    # Duration effects only (proc by percentage)
+        active_tables = self.attack_sim.get_outcome_tables(self.effect.ab_bonus, self.effect.ac_reduction)[0]
+        roll_threshold = 100 - (proc * 100)  # Roll above it triggers the property
+        duration = self.attack_sim.attacks_per_round * self.legend_effect_duration
+
+        pos = 0
+        while pos < num_attacks:
+            seg = slice(pos, min(num_attacks, pos + chunk_size))
+            is_active = self.legend_attacks_left > 0
+            tables = active_tables if is_active else inactive_tables
+            seg_outcomes = tables[attack_idxs[seg], rolls[seg], threat_rolls[seg]]
+            seg_hits = seg_outcomes != MISS
+            seg_procs = seg_hits & (proc_rolls[seg] > roll_threshold)
+
+            # The segment stops at the first proc (resets the window), or when the active window runs out
+            stop = np.argmax(seg_procs) if seg_procs.any() else len(seg_outcomes)
+            if is_active:
+                nonproc_hits = np.cumsum(seg_hits & ~seg_procs)
+                runs_out = np.searchsorted(nonproc_hits, self.legend_attacks_left)   # Hit that brings the counter to 0
+                stop = min(stop, runs_out)
+
+            end = min(pos + stop + 1, seg.stop)
+            outcomes[pos:end] = seg_outcomes[:end - pos]
+            active[pos:end] = is_active
+            if stop < len(seg_outcomes) and seg_procs[stop]:
+                procs[pos + stop] = True
+                self.stats.legend_procs += 1
+                self.legend_attacks_left = duration
+            elif is_active:
+                self.legend_attacks_left -= int(np.count_nonzero(seg_hits[:end - pos]))
+            pos = end
+
+        return outcomes, active, procs
@@ -0,0 +1,113 @@
+import hashlib
+import json
+import time
+import uuid
+
+
+class ResultCache:
+    """
+    Simulation results, stored per (weapon, user config) in a shared diskcache.Cache,
+    so results precomputed in the background (speculative mode) can be reused when Calculate is pressed.
+    Also keeps a server-side copy of every calculation (all weapons, the config they were simulated with, and the
+    time to kill curves computed with them), keyed by its results ID, so per-weapon callbacks don't need the results store uploaded by the browser.
+    Also tracks the running real (user requested) jobs, which preempt the speculative jobs. Each job has its own
+    deadline, refreshed by heartbeats: a job killed on cancel (or by a worker crash) never ends itself, its entry
+    just expires, so it can't preempt the speculative jobs forever.
+    """
+    KEY_PREFIX = 'results-'
+    RUN_PREFIX = 'run-'
+    REAL_JOBS_KEY = 'real-jobs'
+
+    def __init__(self, cache, expire: float = 24 * 60 * 60, job_ttl: float = 60.0):
+        """
+        :param cache: diskcache.Cache instance (shared between the web server and the background job processes)
+        :param expire: Seconds until a stored result expires
+        :param job_ttl: Seconds a real job counts as running after its last heartbeat
+        """
+        self.cache = cache
+        self.expire = expire
+        self.job_ttl = job_ttl
+        self._last_beats = {}   # Per job ID, time of the last heartbeat written by this process
+
+    @classmethod
+    def make_key(cls, weapon: str, user_cfg: dict):
+        """
+        :param weapon: Weapon name, e.g., 'Spear'
+        :param user_cfg: User config dictionary (Config fields)
+        :return: Cache key, hash of the weapon and the config serialized with sorted keys
+        """
+        payload = json.dumps({'weapon': weapon, 'config': user_cfg}, sort_keys=True)
+        return cls.KEY_PREFIX + hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, weapon: str, user_cfg: dict):
+        """:return: Stored simulation results, None if not found"""
+        return self.cache.get(self.make_key(weapon, user_cfg))
+
+    def set(self, weapon: str, user_cfg: dict, results: dict):
+        """Store the simulation results of a weapon"""
+        self.cache.set(self.make_key(weapon, user_cfg), results, expire=self.expire)
+
+    def contains(self, weapon: str, user_cfg: dict):
+        return self.make_key(weapon, user_cfg) in self.cache
+
+    def set_run(self, results_id: str, results_dict: dict, user_cfg: dict, ttk_dict: dict = None):
+        """
+        :param results_id: Unique ID of the calculation, e.g., the 'results-id' store
+        :param results_dict: Simulation results per weapon
+        :param user_cfg: User config dictionary the weapons were simulated with
+        :param ttk_dict: Time to kill results per weapon (see TimeToKill.run_both), None if not computed
+        """
+        run = {'results': results_dict, 'config': user_cfg, 'ttk': ttk_dict or {}}
+        self.cache.set(self.RUN_PREFIX + results_id, run, expire=self.expire)
+
+    def get_run(self, results_id: str):
+        """:return: Dictionary with the 'results' per weapon and the 'config' of the calculation, None if not found"""
+        return self.cache.get(self.RUN_PREFIX + results_id) if results_id else None
+
+    def get_run_results(self, results_id: str, weapon: str):
+        """:return: Tuple of the results of a weapon and the config of the calculation, (None, None) if not found"""
+        run = self.get_run(results_id)
+        if run is None or weapon not in run['results']:
+            return None, None
+        return run['results'][weapon], run['config']
+
+    def get_run_ttk(self, results_id: str, weapon: str):
+        """:return: Time to kill results of a weapon (see TimeToKill.run_both), None if not found"""
+        run = self.get_run(results_id)
+        return run['ttk'].get(weapon) if run is not None else None
+
+    def _update_real_jobs(self, job_id: str, deadline: float = None):
+        """Set (or remove, if deadline is None) the deadline of a real job, and drop the expired jobs"""
+        now = time.time()
+        with self.cache.transact():
+            jobs = {other_id: other_deadline for other_id, other_deadline in self.cache.get(self.REAL_JOBS_KEY, {}).items()
+                    if other_deadline > now and other_id != job_id}
+            if deadline is not None:
+                jobs[job_id] = deadline
+            self.cache.set(self.REAL_JOBS_KEY, jobs)
+
+    def begin_real_job(self):
+        """
+        Mark a real job as running, speculative jobs stop at their next preemption check
+        :return: Job ID, for heartbeat_real_job and end_real_job
+        """
+        job_id = uuid.uuid4().hex
+        self._last_beats[job_id] = time.time()
+        self._update_real_jobs(job_id, self._last_beats[job_id] + self.job_ttl)
+        return job_id
+
+    def heartbeat_real_job(self, job_id: str):
+        """Extend the deadline of a running real job, written at most every job_ttl / 4 seconds (cheap to call often)"""
+        now = time.time()
+        if now - self._last_beats.get(job_id, 0.0) >= self.job_ttl / 4:
+            self._last_beats[job_id] = now
+            self._update_real_jobs(job_id, now + self.job_ttl)
+
+    def end_real_job(self, job_id: str):
+        """Mark a real job as finished (or cancelled)"""
+        self._last_beats.pop(job_id, None)
+        self._update_real_jobs(job_id)
+
+    def real_job_running(self):
+        now = time.time()
+        return any(deadline > now for deadline in self.cache.get(self.REAL_JOBS_KEY, {}).values())
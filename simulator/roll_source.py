@@ -0,0 +1,77 @@
+from itertools import islice
+from simulator.dice_distribution import get_alias_sampler
+import numpy as np
+import random
+
+
+class RollSource:
+    """
+    Source of the random rolls (d20 attack\\threat rolls, dN damage dice, d100 legendary procs).
+    This default source rolls each die with Python's random module, one call per die.
+    """
+    def d20(self):
+        """:return: int, 1d20 roll"""
+        return random.randint(1, 20)
+
+    def d100(self):
+        """:return: int, 1d100 (percentile) roll"""
+        return random.randint(1, 100)
+
+    def roll_dice(self, num_dice: int, num_sides: int, flat_dmg: int = 0):
+        """
+        :param num_dice: The number of dice to roll, e.g., in 2d6 this value is 2
+        :param num_sides: The number of sides of the die, e.g., in 2d6 this value is 6
+        :param flat_dmg: Flat damage to be added to the roll, e.g., in 2d6+3 this value is 3
+        :return: int, Sum of the dice rolls and the flat damage
+        """
+        total_dmg_roll = 0
+        for i in range(num_dice):
+            total_dmg_roll += random.randint(1, num_sides)
+        return total_dmg_roll + flat_dmg
+
+
+class BufferedRollSource(RollSource):
+    """
+    Pre-generates large blocks of rolls per die size with a NumPy generator, and hands them out one by one.
+    A block is refilled in bulk only once it is exhausted, so each roll costs a single iterator step.
+    Damage entries with many dice are rolled at once, with a single uniform draw from a cached alias-method sampler.
+    """
+    def __init__(self, seed=None, block_size: int = 65536, alias_min_dice: int = 4):
+        """
+        :param seed: Seed of the NumPy generator, None for fresh entropy
+        :param block_size: Number of rolls generated per refill (per die size)
+        :param alias_min_dice: Minimal number of dice to roll the sum with an alias sampler, instead of die by die
+        """
+        self.rng = np.random.default_rng(seed)
+        self.block_size = block_size
+        self.alias_min_dice = alias_min_dice
+        self._streams = {}  # Keys are die sizes, Values are infinite iterators of rolls
+        self._d20 = self.get_stream(20)
+        self._d100 = self.get_stream(100)
+        self._uniform = self._generate_uniform_blocks()
+
+    def get_stream(self, num_sides: int):
+        """:return: Infinite iterator of dN rolls, shared by all callers of the same die size"""
+        stream = self._streams.get(num_sides)
+        if stream is None:
+            stream = self._streams[num_sides] = self._generate_blocks(num_sides)
+        return stream
+
+    def _generate_blocks(self, num_sides: int):
+        while True:
+            yield from self.rng.integers(1, num_sides + 1, size=self.block_size).tolist()
+
+    def _generate_uniform_blocks(self):
+        while True:
+            yield from self.rng.random(self.block_size).tolist()
+
+    def d20(self):
+        return next(self._d20)
+
+    def d100(self):
+        return next(self._d100)
+
+    def roll_dice(self, num_dice: int, num_sides: int, flat_dmg: int = 0):
+        if num_dice >= self.alias_min_dice:
+            return get_alias_sampler(num_dice, num_sides).sample(next(self._uniform)) + flat_dmg
+        return sum(islice(self.get_stream(num_sides), num_dice)) + flat_dmg
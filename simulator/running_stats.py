@@ -0,0 +1,168 @@
+import numpy as np
+import math
+
+
+class BatchMeans:
+    """
+    Bounded-memory streaming batch means of a per-round value, e.g., DPS per round.
+    The rounds are summed into batches of batch_rounds rounds. When max_batches batches are full, neighbouring batches
+    are merged by pairs and the batch size doubles, so there are always between max_batches / 2 and max_batches batches
+    (of a size growing with the rounds, like the sqrt(n) batches of the classic batch means), without keeping the rounds.
+    The spread of the batch means includes the correlation of consecutive rounds (e.g., legendary effect windows
+    spanning several rounds), unlike stdev / sqrt(n).
+    """
+    def __init__(self, max_batches: int = 128):
+        """
+        :param max_batches: Maximum number of batches, must be even (batches are merged by pairs)
+        """
+        if max_batches < 4 or max_batches % 2:
+            raise ValueError("Maximum number of batches must be even, and at least 4")
+        self.max_batches = max_batches
+        self.batch_rounds = 1
+        self.batch_sums = []        # Sums of the full batches, in order
+        self.partial_sum = 0.0      # Sum of the batch being filled
+        self.partial_rounds = 0
+        self.count = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+
+    @classmethod
+    def from_values(cls, values, max_batches: int = 128):
+        """
+        :param values: Array of per-round values, e.g., DPS per round of a whole run
+        :param max_batches: Maximum number of batches, must be even
+        :return: BatchMeans of the values
+        """
+        batch_means = cls(max_batches)
+        batch_means.add_many(values)
+        return batch_means
+
+    def add(self, value):
+        """Add the value of a single round"""
+        self.count += 1
+        self.total += value
+        self.total_sq += value * value
+        self.partial_sum += value
+        self.partial_rounds += 1
+        if self.partial_rounds == self.batch_rounds:
+            self.close_batch()
+
+    def add_many(self, values):
+        """Add an array of values, e.g., the DPS per round of a block"""
+        values = np.asarray(values, dtype=float)
+        self.count += len(values)
+        self.total += float(values.sum())
+        self.total_sq += float(np.dot(values, values))
+
+        pos = 0
+        while pos < len(values):
+            if self.partial_rounds == 0 and len(values) - pos >= self.batch_rounds:
+                # Whole batches at once, up to the next merge
+                num_batches = min((len(values) - pos) // self.batch_rounds, self.max_batches - len(self.batch_sums))
+                end = pos + num_batches * self.batch_rounds
+                self.batch_sums.extend(values[pos:end].reshape(num_batches, self.batch_rounds).sum(axis=1).tolist())
+                pos = end
+                if len(self.batch_sums) == self.max_batches:
+                    self.merge_batches()
+            else:
+                end = min(pos + self.batch_rounds - self.partial_rounds, len(values))
+                self.partial_sum += float(values[pos:end].sum())
+                self.partial_rounds += end - pos
+                pos = end
+                if self.partial_rounds == self.batch_rounds:
+                    self.close_batch()
+
+    def close_batch(self):
+        """Store the full batch being filled, and merge the batches if the maximum is reached"""
+        self.batch_sums.append(self.partial_sum)
+        self.partial_sum, self.partial_rounds = 0.0, 0
+        if len(self.batch_sums) == self.max_batches:
+            self.merge_batches()
+
+    def merge_batches(self):
+        """Merge neighbouring batches by pairs, the batch size doubles"""
+        self.batch_sums = [first + second for first, second in zip(self.batch_sums[::2], self.batch_sums[1::2])]
+        self.batch_rounds *= 2
+
+    @property
+    def mean(self):
+        """:return: Mean of all the rounds, NaN if no rounds were added"""
+        return self.total / self.count if self.count else float('nan')
+
+    @property
+    def variance(self):
+        """:return: Sample variance of the rounds (no correlation), 0 for a single round"""
+        if self.count < 2:
+            return 0.0
+        return max(self.total_sq - self.total ** 2 / self.count, 0.0) / (self.count - 1)
+
+    def get_error_estimates(self):
+        """
+        Autocorrelation-aware error of the mean, by batch means over the full batches.
+        :return: Tuple of the standard error of the mean, and the effective sample size (number of independent rounds)
+        """
+        if self.count == 0:
+            return float('nan'), 0.0
+        if len(self.batch_sums) >= 2:
+            batch_means = np.array(self.batch_sums) / self.batch_rounds
+            std_error = float(batch_means.std(ddof=1) / math.sqrt(len(batch_means)))
+        else:   # Not enough batches, independent rounds are assumed
+            std_error = math.sqrt(self.variance / self.count)
+        effective_rounds = self.variance / std_error ** 2 if std_error > 0 else float(self.count)
+        return std_error, effective_rounds
+
+
+class ThinnedSeries:
+    """
+    Bounded-memory streaming (x, y) line series, e.g., cumulative damage and running DPS of every round.
+    The points of every stride-th round are kept. When more than max_points points are kept, every other point is
+    dropped and the stride doubles, so the series keeps between max_points / 2 and max_points evenly spaced points,
+    plus the latest point.
+    """
+    def __init__(self, max_points: int = 1500):
+        """
+        :param max_points: Maximum number of kept points, roughly 2 points per horizontal pixel of the plot
+        """
+        self.max_points = max_points
+        self.stride = 1
+        self.x_vals = []
+        self.y_vals = []
+        self.count = 0
+        self.last_point = None
+
+    def add(self, x, y):
+        """Add the point of a single round"""
+        self.count += 1
+        self.last_point = (x, y)
+        if self.count % self.stride == 0:
+            self.x_vals.append(x)
+            self.y_vals.append(y)
+            if len(self.x_vals) > self.max_points:
+                self.thin()
+
+    def add_many(self, x_vals, y_vals):
+        """Add arrays of points, e.g., the cumulative damage and running DPS of a block of rounds"""
+        if len(x_vals) == 0:
+            return
+        while len(self.x_vals) + (self.count + len(x_vals)) // self.stride - self.count // self.stride > self.max_points:
+            self.thin()
+        # Rounds count + 1 ... count + n, the kept rounds are the multiples of the stride
+        first = self.stride - 1 - self.count % self.stride
+        self.x_vals.extend(np.asarray(x_vals)[first::self.stride].tolist())
+        self.y_vals.extend(np.asarray(y_vals)[first::self.stride].tolist())
+        self.count += len(x_vals)
+        self.last_point = (np.asarray(x_vals)[-1].item(), np.asarray(y_vals)[-1].item())
+
+    def thin(self):
+        """Drop every other kept point, the stride doubles: only the rounds multiple of the new stride are kept"""
+        self.x_vals = self.x_vals[1::2]
+        self.y_vals = self.y_vals[1::2]
+        self.stride *= 2
+
+    def to_dict(self):
+        """:return: JSON-serializable series, lists of the X and Y values (the latest point included)"""
+        x_vals, y_vals = list(self.x_vals), list(self.y_vals)
+        if self.last_point is not None and self.count % self.stride:
+            x_vals.append(self.last_point[0])
+            y_vals.append(self.last_point[1])
+        return {"x": x_vals, "y": y_vals}
@@ -0,0 +1,92 @@
+from simulator.damage_simulator import DamageSimulator
+from simulator.analytic_engine import AnalyticEngine
+from simulator.batch_engine import BatchEngine
+from simulator.config import Config
+import math
+import time
+
+
+class SamplePlanner:
+    """
+    Sample size planner: predicts the rounds each weapon needs to reach the requested DPS precision,
+    i.e., the half-width of the confidence interval of the DPS (crit allowed), z * sigma / sqrt(rounds).
+    The standard deviation of the DPS per round (sigma) is exact (AnalyticEngine) for weapons without legendary
+    effect with duration, otherwise it's estimated by a short pilot run of the BatchEngine (batch means, so the
+    correlation of the rounds through the effect duration is included).
+    The runtime is predicted from a short timed run of the vectorized blocks the precision run uses
+    (DamageSimulator.simulate_dps_blocks). That run estimates the DPS by conditional Monte Carlo, whose variance is
+    at most the plain sigma: the planned rounds and runtime are upper bounds, the run stops once the precision is reached.
+    The run checks the precision at a few looks, from DamageSimulator.MIN_BLOCK_ROUNDS rounds (see
+    DamageSimulator.get_look_rounds), with a widened z-score: the plan uses the same minimum and z-score.
+    """
+    def __init__(self, config: Config, target_error: float = None, z: float = None, pilot_rounds: int = 2000,
+                 timing_rounds: int = 300, seed=None):
+        """
+        :param config: Config instance, ROUNDS is the maximum number of rounds per weapon
+        :param target_error: Requested half-width of the DPS confidence interval, None for config.TARGET_DPS_ERROR
+        :param z: z-score of the confidence intervals, None for the z-score of the looks of the precision run (99%)
+        :param pilot_rounds: Number of rounds of the pilot runs
+        :param timing_rounds: Number of rounds of the timed runs
+        :param seed: Seed of the pilot runs, None for fresh entropy
+        """
+        self.cfg = config
+        self.target_error = target_error if target_error is not None else config.TARGET_DPS_ERROR
+        if not self.target_error > 0:
+            raise ValueError("Target DPS error must be positive")
+        self.z = z if z is not None else DamageSimulator.get_sequential_z(len(DamageSimulator.get_look_rounds(config.ROUNDS)))
+        self.pilot_rounds = pilot_rounds
+        self.timing_rounds = timing_rounds
+        self.seed = seed
+
+    def get_round_std(self, weapon: str):
+        """
+        :param weapon: Weapon name
+        :return: Tuple of the standard deviation of the DPS per round, and True if it's exact (False for a pilot estimate)
+        """
+        calculator = DamageSimulator(weapon, self.cfg)
+        try:
+            return math.sqrt(AnalyticEngine(calculator).round_variance()) / 6, True     # Round is 6 seconds
+        except ValueError:
+            # Pilot run, the batch means standard error includes the correlation of the rounds (see BatchMeans)
+            results = BatchEngine(calculator, seed=self.seed).simulate(self.pilot_rounds)
+            return results['dps_std_error'] * math.sqrt(self.pilot_rounds), False
+
+    def get_seconds_per_round(self, weapon: str):
+        """:return: Measured runtime of a single round of the precision run (vectorized blocks, both estimators)"""
+        engine = BatchEngine(DamageSimulator(weapon, self.cfg), seed=self.seed)
+        engine.stats.init_zeroes_lists(engine.attacks_per_round)
+        engine.get_state_means()    # Built once per run, not per round
+        start = time.perf_counter()
+        engine.simulate_block_conditional(self.timing_rounds)
+        return (time.perf_counter() - start) / self.timing_rounds
+
+    def get_rounds(self, round_std: float):
+        """
+        :param round_std: Standard deviation of the DPS per round
+        :return: Rounds needed to reach the target error, at least the minimum rounds of the precision run and at most
+                 config.ROUNDS
+        """
+        rounds = math.ceil((self.z * round_std / self.target_error) ** 2)
+        return min(max(rounds, DamageSimulator.MIN_BLOCK_ROUNDS), self.cfg.ROUNDS)
+
+    def plan(self, weapons: list):
+        """
+        :param weapons: List of weapon names
+        :return: Dictionary of the plan per weapon: rounds, predicted seconds, predicted DPS error, exact sigma
+        """
+        plan = {}
+        for weapon in weapons:
+            round_std, exact = self.get_round_std(weapon)
+            rounds = self.get_rounds(round_std)
+            plan[weapon] = {
+                "rounds": rounds,
+                "seconds": rounds * self.get_seconds_per_round(weapon),
+                "dps_error": self.z * round_std / math.sqrt(rounds),
+                "exact": exact,
+            }
+        return plan
+
+    @staticmethod
+    def get_runtime(plan: dict):
+        """:return: Predicted runtime of the plan, in seconds"""
+        return sum(weapon_plan["seconds"] for weapon_plan in plan.values())
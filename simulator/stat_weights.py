@@ -0,0 +1,63 @@
+from simulator.damage_simulator import DamageSimulator
+from simulator.analytic_engine import AnalyticEngine
+from simulator.config import Config
+from dataclasses import asdict
+from copy import deepcopy
+
+
+# Config fields of the stat weights, and the step of each perturbation
+STAT_STEPS = {
+    'AB': 1,
+    'STR_MOD': 1,
+    'ENHANCEMENT_SET_BONUS': 1,
+    'TARGET_AC': 1,
+}
+
+
+class StatWeights:
+    """
+    Stat weights: the DPS gained per +1 of a stat (AB, STR, enhancement set bonus, target AC),
+    and per additional damage source (buff), as finite differences of the DPS of a build.
+    The differences are exact, from the AnalyticEngine (no dice rolled, a few ms per perturbation), for all weapons.
+    """
+    def __init__(self, weapon: str, config: Config):
+        """
+        :param weapon: Weapon name, e.g., 'Spear'
+        :param config: Config instance of the base build
+        """
+        self.weapon = weapon
+        self.cfg = config
+
+    def perturbations(self):
+        """
+        :return: Dictionary of the perturbed configs, keys are the stat (or additional damage source) names.
+                 Additional damage sources are toggled: the weight is the DPS the source adds, whether it's enabled or not
+        """
+        configs = {}
+        for stat, step in STAT_STEPS.items():
+            cfg_dict = deepcopy(asdict(self.cfg))
+            cfg_dict[stat] += step
+            configs[stat] = Config(**cfg_dict)
+        for source in self.cfg.ADDITIONAL_DAMAGE:
+            cfg_dict = deepcopy(asdict(self.cfg))
+            cfg_dict['ADDITIONAL_DAMAGE'][source][0] = not cfg_dict['ADDITIONAL_DAMAGE'][source][0]
+            configs[source] = Config(**cfg_dict)
+        return configs
+
+    def sign(self, name: str):
+        """:return: 1 if the perturbation adds the stat (or damage source), -1 if it removes an enabled source"""
+        if name in self.cfg.ADDITIONAL_DAMAGE and self.cfg.ADDITIONAL_DAMAGE[name][0] is True:
+            return -1
+        return 1
+
+    def analytic_weights(self, metric: str = 'avg_dps_both'):
+        """
+        :param metric: Key of the DPS results, e.g., 'avg_dps_both', 'dps_crits' or 'dps_no_crits'
+        :return: Dictionary of the exact DPS gained per stat (or damage source)
+        """
+        base_dps = AnalyticEngine(DamageSimulator(self.weapon, self.cfg)).expected_dps()[metric]
+        weights = {}
+        for name, config in self.perturbations().items():
+            dps = AnalyticEngine(DamageSimulator(self.weapon, config)).expected_dps()[metric]
+            weights[name] = round(self.sign(name) * (dps - base_dps), 2)
+        return weights
@@ -0,0 +1,202 @@
+from simulator.damage_simulator import DamageSimulator
+from simulator.analytic_engine import AnalyticEngine
+from simulator.batch_engine import BatchEngine
+from simulator.config import Config
+from simulator.legend_effect import NO_LEGEND_EFFECT
+import numpy as np
+
+
+class TimeToKill:
+    """
+    Time to kill: the distribution of the rounds needed to deal target_hp damage, i.e., N = min{n : S_n >= target_hp},
+    where S_n is the cumulative damage after n rounds. The distribution is given by its survival curve P(N > n).
+    For weapons without legendary effect with duration, the rounds are independent and identically distributed, so
+    P(N > n) = P(S_n < target_hp) is exact: dynamic programming over the damage per round distribution (AnalyticEngine),
+    the distribution of S_n is convolved round by round and truncated at target_hp (the target is dead above it).
+    Otherwise, many fights are replicated with the BatchEngine (one vectorized block of rounds per fight, each fight
+    starts without legendary effect active).
+    By default, the longest fight is sized from the expected fight length, target_hp / E[damage per round]. A curve
+    still cut before the target is dead is flagged as truncated, and has no mean (it would only report the cut).
+    """
+    MAX_ROUNDS_LIMIT = 100000       # Hard cap of the automatic fight length, bounds the cost of a single curve
+
+    def __init__(self, weapon: str, config: Config, target_hp: int = None, crit_imm: bool = False,
+                 max_rounds: int = None, replications: int = 2000, seed=None):
+        """
+        :param weapon: Weapon name, e.g., 'Spear'
+        :param config: Config instance
+        :param target_hp: Hit points of the target, None for config.DAMAGE_LIMIT
+        :param crit_imm: True for a crit immune target
+        :param max_rounds: Maximum length of a fight, the survival curve is truncated after it. None to size it from
+                           the expected length of the fight
+        :param replications: Number of simulated fights, for weapons with legendary effect with duration
+        :param seed: Seed of the simulated fights, None for fresh entropy
+        """
+        self.weapon = weapon
+        self.cfg = config
+        self.target_hp = int(target_hp if target_hp is not None else config.DAMAGE_LIMIT)
+        if self.target_hp < 1:
+            raise ValueError("Target HP must be positive")
+        self.crit_imm = crit_imm
+        self.replications = replications
+        self.seed = seed
+        self.calculator = DamageSimulator(weapon, config)
+        self.analytic_engine = AnalyticEngine(self.calculator)
+        self.exact = self.analytic_engine.legend_effect_spec == NO_LEGEND_EFFECT
+        self.max_rounds = max_rounds if max_rounds is not None else self.get_max_rounds()
+
+    def get_max_rounds(self):
+        """
+        Size the longest fight from the expected fight length n0 = target_hp / E[dpr]. Without legendary effect with
+        duration, the rounds are independent and the length has standard deviation ~ sqrt(n0 * Var[dpr]) / E[dpr],
+        the curve goes 10 standard deviations past n0. Otherwise, the fight is given twice its expected length.
+        :return: Maximum number of rounds of a fight, at most MAX_ROUNDS_LIMIT
+        """
+        if self.exact:
+            dpr, dpr_m2 = self.analytic_engine.pmf_moments(self.analytic_engine.round_pmf(self.crit_imm))
+            if not dpr > 0:
+                return 1    # No damage, the fight is never over (raised when the curve is computed)
+            expected_rounds = self.target_hp / dpr
+            std_rounds = np.sqrt(max(dpr_m2 - dpr ** 2, 0.0) * expected_rounds) / dpr
+            max_rounds = 1.2 * expected_rounds + 10 * std_rounds + 20
+        else:
+            dpr = self.analytic_engine.expected_dps()['dps_no_crits' if self.crit_imm else 'dps_crits'] * 6
+            if not dpr > 0:
+                return 1
+            max_rounds = 2 * self.target_hp / dpr + 20
+        return int(min(np.ceil(max_rounds), self.MAX_ROUNDS_LIMIT))
+
+    @staticmethod
+    def convolve(a, b):
+        """:return: Convolution of two distributions, through the FFT for long arrays (direct convolution is O(n*m))"""
+        if min(len(a), len(b)) < 64:
+            return np.convolve(a, b)
+        size = len(a) + len(b) - 1
+        result = np.fft.irfft(np.fft.rfft(a, size) * np.fft.rfft(b, size), size)
+        return np.maximum(result, 0.0)      # FFT round-off can give tiny negative probabilities
+
+    def get_skip_rounds(self, round_pmf):
+        """
+        :param round_pmf: Numpy array, probability of each damage per round
+        :return: Largest n with E[S_n] + 10 * std(S_n) + maximum damage of a round below target_hp, at least 0
+        """
+        dpr, dpr_m2 = self.analytic_engine.pmf_moments(round_pmf)
+        std_dpr = np.sqrt(max(dpr_m2 - dpr ** 2, 0.0))
+        margin = self.target_hp - len(round_pmf)
+        if margin <= 0:
+            return 0
+        # n * dpr + 10 * std_dpr * sqrt(n) = margin, quadratic in sqrt(n)
+        sqrt_rounds = (-10 * std_dpr + np.sqrt(100 * std_dpr ** 2 + 4 * dpr * margin)) / (2 * dpr)
+        return int(sqrt_rounds ** 2)
+
+    def exact_survival(self, tolerance: float = 1e-9):
+        """
+        :param tolerance: Survival probability below which the curve is cut
+        :return: Numpy array of P(N > n), for n = 0, 1, ... (at most max_rounds)
+        """
+        round_pmf = self.analytic_engine.round_pmf(self.crit_imm)
+        if round_pmf[0] >= 1.0:
+            raise ValueError(f"Weapon '{self.weapon}' inflicts no damage, the target is never killed")
+
+        # Distribution of the cumulative damage of the fights still alive, starting at offset damage and truncated at
+        # target_hp. Values of negligible probability at both ends are dropped, so the window only grows as sqrt(n)
+        alive_pmf, offset = np.array([1.0]), 0
+        survival = [1.0]
+
+        # Skip ahead the rounds that cannot kill the target: while S_n stays 10 standard deviations (and a round of
+        # maximum damage) below target_hp, nothing is truncated and S_n is the n-fold convolution of a round. It is
+        # computed at once in the Fourier domain, only the rounds around the kill are convolved one by one
+        skip_rounds = min(self.get_skip_rounds(round_pmf), self.max_rounds)
+        if skip_rounds > 1:
+            alive_pmf = np.fft.irfft(np.fft.rfft(round_pmf, self.target_hp) ** skip_rounds, self.target_hp)
+            kept = np.flatnonzero(alive_pmf > tolerance * 1e-3)
+            alive_pmf, offset = alive_pmf[kept[0]:kept[-1] + 1], int(kept[0])
+            survival.extend([1.0] * (skip_rounds - 1) + [float(alive_pmf.sum())])
+        while survival[-1] > tolerance and len(survival) <= self.max_rounds:
+            alive_pmf = self.convolve(alive_pmf, round_pmf)[:self.target_hp - offset]
+            kept = np.flatnonzero(alive_pmf > tolerance * 1e-3)
+            if kept.size == 0:
+                survival.append(0.0)
+                break
+            alive_pmf, offset = alive_pmf[kept[0]:kept[-1] + 1], offset + kept[0]
+            survival.append(float(alive_pmf.sum()))
+        return np.array(survival)
+
+    def simulated_survival(self):
+        """:return: Numpy array of P(N > n), for n = 0, 1, ... (at most max_rounds), from the replicated fights"""
+        engine = BatchEngine(self.calculator, seed=self.seed)
+        engine.stats.init_zeroes_lists(engine.attacks_per_round)
+        dpr = self.analytic_engine.expected_dps()['dps_no_crits' if self.crit_imm else 'dps_crits'] * 6
+        if not dpr > 0:
+            raise ValueError(f"Weapon '{self.weapon}' inflicts no damage, the target is never killed")
+
+        # One block per fight, so each fight starts without legendary effect active (a single stream of rounds would
+        # carry the effect state of a fight over to the next one). A fight longer than its first block (1.5x the
+        # expected length) continues in further blocks, with its own effect state
+        chunk_rounds = int(min(np.ceil(1.5 * self.target_hp / dpr) + 1, self.max_rounds))
+        kill_rounds = np.full(self.replications, self.max_rounds + 1)   # Fights not over by max_rounds
+        for fight in range(self.replications):
+            engine.legend_effect.legend_attacks_left = 0
+            cum_dmg, rounds_done = 0, 0
+            while rounds_done < self.max_rounds:
+                num_rounds = min(chunk_rounds, self.max_rounds - rounds_done)
+                dmg_per_round, dmg_crit_imm_per_round = engine.simulate_block(num_rounds)
+                fight_dmg = cum_dmg + np.cumsum(dmg_crit_imm_per_round if self.crit_imm else dmg_per_round)
+                if fight_dmg[-1] >= self.target_hp:
+                    kill_rounds[fight] = rounds_done + 1 + np.argmax(fight_dmg >= self.target_hp)
+                    break
+                cum_dmg = fight_dmg[-1]
+                rounds_done += num_rounds
+
+        # Fights not over by max_rounds are not counted as kills, the curve then ends above 0 (truncated)
+        counts = np.bincount(kill_rounds, minlength=self.max_rounds + 2)[:self.max_rounds + 1]
+        survival = 1.0 - np.cumsum(counts) / self.replications
+        return survival[:np.argmax(survival <= 0.0) + 1] if (survival <= 0.0).any() else survival
+
+    @staticmethod
+    def get_quantile(survival, q: float):
+        """
+        :param survival: Numpy array of P(N > n)
+        :param q: Quantile, between 0 and 1, e.g., 0.9
+        :return: Smallest number of rounds n with P(N <= n) >= q, None if beyond the survival curve
+        """
+        reached = np.flatnonzero(1.0 - survival >= q - 1e-12)
+        return int(reached[0]) if reached.size else None
+
+    def run(self, quantiles=(0.1, 0.5, 0.9, 0.99), tolerance: float = 1e-9):
+        """
+        :param quantiles: Quantiles of the rounds to kill
+        :param tolerance: Survival probability below which the curve is cut (exact curve), and above which a curve
+                          cut at max_rounds is truncated
+        :return: JSON-serializable dictionary: target HP, exact and truncated flags, mean rounds and seconds (None if
+                 truncated), quantiles in rounds (keys as 'p50', None if beyond the curve), and the survival curve
+                 P(N > n) per round
+        """
+        survival = self.exact_survival(tolerance) if self.exact else self.simulated_survival()
+        truncated = bool(survival[-1] > tolerance)
+
+        mean_rounds = float(survival.sum())     # E[N] = sum of P(N > n), for n >= 0, only if the curve is complete
+        results = {
+            "target_hp": self.target_hp,
+            "exact": self.exact,
+            "truncated": truncated,
+            "mean_rounds": None if truncated else round(mean_rounds, 2),
+            "mean_seconds": None if truncated else round(mean_rounds * 6, 1),     # Round is 6 seconds
+            "survival": survival.tolist(),
+        }
+        results.update({f"p{round(q * 100):d}": self.get_quantile(survival, q) for q in quantiles})
+        return results
+
+    @classmethod
+    def run_both(cls, weapon: str, config: Config, **kwargs):
+        """
+        :param weapon: Weapon name, e.g., 'Spear'
+        :param config: Config instance
+        :param kwargs: Other arguments of TimeToKill, e.g., target_hp
+        :return: JSON-serializable dictionary of the results (see run) vs a target with crits allowed ('crits'), and
+                 vs a crit immune target ('crit_imm')
+        """
+        return {
+            "crits": cls(weapon, config, crit_imm=False, **kwargs).run(),
+            "crit_imm": cls(weapon, config, crit_imm=True, **kwargs).run(),
+        }
@@ -0,0 +1,119 @@
+from simulator.damage_simulator import DamageSimulator
+from simulator.running_stats import BatchMeans
+import numpy as np
+
+
+class WeaponRace:
+    """
+    Racing (successive elimination) of the weapons, to rank many weapons with less total work.
+    All weapons advance in small round increments with the BatchEngine, after each increment the confidence interval
+    of the average DPS (50/50) is computed per weapon (streaming batch means, see BatchMeans). For weapons with rare
+    legendary procs (by percentage, no effect), the DPS is estimated with importance sampled procs (every hit adds its
+    share of the legendary damage), the procs rolled at their natural rate still give the damage distributions. Weapons whose upper
+    bound is below the lower bound of the leader are eliminated, the remaining rounds go to the close contenders.
+    With a requested DPS precision (TARGET_DPS_ERROR), a weapon stops once its DPS (crit allowed) reaches it, and
+    stays in the ranking. Eliminated weapons keep the results of the rounds they ran, so the comparative table still
+    lists all weapons.
+    """
+    def __init__(self, weapons: list, config, step_rounds: int = 500, z: float = 2.576, seed=None):
+        """
+        :param weapons: List of weapon names, e.g., ['Spear', 'Scythe']
+        :param config: Config instance, ROUNDS is the maximum number of rounds per weapon
+        :param step_rounds: Number of rounds per increment, at most half of ROUNDS so the first check has two
+                            increments
+        :param z: z-score of the confidence intervals, 2.576 for 99% (same as DamageSimulator)
+        :param seed: Seed of the NumPy generators, None for fresh entropy
+        """
+        self.cfg = config
+        self.max_rounds = config.ROUNDS
+        self.step_rounds = max(min(step_rounds, self.max_rounds // 2), 1)
+        self.z = z
+
+        seeds = np.random.SeedSequence(seed).spawn(len(weapons))
+        self.calculators = {weapon: DamageSimulator(weapon, config) for weapon in weapons}
+        self.engines = {weapon: calculator.get_batch_engine(seed=weapon_seed)   # Stratified rolls if requested
+                        for (weapon, calculator), weapon_seed in zip(self.calculators.items(), seeds)}
+        for weapon, engine in self.engines.items():
+            engine.stats.init_zeroes_lists(engine.attacks_per_round)
+
+        self.dps_batch_means = {weapon: BatchMeans() for weapon in weapons}    # DPS per round (50/50 average)
+        self.active = list(weapons)     # Weapons still in the race
+        self.eliminated = []            # Weapons in the order they were eliminated
+        self.finished = []              # Weapons in the race that reached the requested DPS precision
+
+    def rounds_done(self, weapon: str):
+        """:return: Number of rounds simulated for the weapon"""
+        return self.calculators[weapon].num_rounds
+
+    def get_interval(self, weapon: str):
+        """
+        :param weapon: Weapon name
+        :return: Tuple of the average DPS (50/50) of the weapon and the half-width of its confidence interval
+        """
+        batch_means = self.dps_batch_means[weapon]
+        return batch_means.mean, self.z * batch_means.get_error_estimates()[0]
+
+    def advance(self, weapon: str):
+        """Simulate the next increment of rounds of the weapon"""
+        engine = self.engines[weapon]
+        num_rounds = min(self.step_rounds, self.max_rounds - self.rounds_done(weapon))
+        if engine.supports_proc_sampling():
+            dmg_per_round, dmg_crit_imm_per_round, est_per_round, est_crit_imm_per_round = (
+                engine.simulate_block_sampled(num_rounds))
+        else:
+            dmg_per_round, dmg_crit_imm_per_round = engine.simulate_block(num_rounds)
+            est_per_round, est_crit_imm_per_round = dmg_per_round, dmg_crit_imm_per_round
+        self.calculators[weapon].record_rounds(dmg_per_round, dmg_crit_imm_per_round, engine.damage_by_type,
+                                               est_per_round, est_crit_imm_per_round)
+        self.dps_batch_means[weapon].add_many((est_per_round + est_crit_imm_per_round) / 2 / 6)  # Round is 6 seconds
+
+        # Requested DPS precision, from two blocks as the other stopping rules
+        calculator = self.calculators[weapon]
+        if (self.cfg.TARGET_DPS_ERROR > 0 and calculator.num_rounds >= 2 * self.step_rounds
+                and calculator.precision_reached(calculator.num_rounds)):
+            self.finished.append(weapon)
+
+    def get_running(self):
+        """:return: List of the weapons in the race that still advance (below the requested precision and ROUNDS)"""
+        return [weapon for weapon in self.active
+                if weapon not in self.finished and self.rounds_done(weapon) < self.max_rounds]
+
+    def eliminate(self):
+        """
+        Eliminate the weapons whose upper bound is below the lower bound of the leader
+        :return: List of the weapons eliminated
+        """
+        intervals = {weapon: self.get_interval(weapon) for weapon in self.active}
+        leader_dps, leader_error = max(intervals.values(), key=lambda interval: interval[0])
+        leader_lower = leader_dps - leader_error
+        eliminated = [weapon for weapon, (dps, dps_error) in intervals.items() if dps + dps_error < leader_lower]
+        for weapon in eliminated:
+            self.active.remove(weapon)
+            self.eliminated.append(weapon)
+        return eliminated
+
+    def run(self, progress_callback=None):
+        """
+        :param progress_callback: Called after each increment with (active weapons, rounds done, max rounds),
+                                  may raise SimulationCancelled to stop the race
+        :return: Dictionary of the results per weapon, same format as DamageSimulator.simulate_dps
+        """
+        # Once a single weapon is left, the ranking is settled and the winner runs the remaining rounds. Weapons that
+        # reached the requested precision no longer advance, but can still be eliminated or eliminate the others
+        running = self.get_running()
+        while running:
+            for weapon in running:
+                self.advance(weapon)
+            if len(self.active) > 1 and all(self.rounds_done(weapon) >= 2 * self.step_rounds for weapon in self.active):
+                self.eliminate()
+            if progress_callback is not None:
+                rounds_done = max(self.rounds_done(weapon) for weapon in self.active)
+                progress_callback(list(self.active), rounds_done, self.max_rounds)
+            running = self.get_running()
+
+        return {weapon: calculator.get_results(self.rounds_done(weapon))
+                for weapon, calculator in self.calculators.items()}
+
+    def total_rounds(self):
+        """:return: Total number of rounds simulated, over all weapons"""
+        return sum(self.rounds_done(weapon) for weapon in self.calculators)
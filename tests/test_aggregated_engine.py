@@ -0,0 +1,105 @@
+"""
+Unit tests for the AggregatedEngine class from simulator/aggregated_engine.py
+
+This test suite covers:
+- Supported weapons (no legendary effect with duration)
+- Result keys, per-block DPS and actual rates
+- Statistics aggregated per attack slot
+- Reproducibility of seeded runs
+- Expected DPS compared to the AnalyticEngine, including on-hit, on-crit and Tenacious Blow damage
+"""
+
+import pytest
+import numpy as np
+
+from simulator.aggregated_engine import AggregatedEngine
+from simulator.analytic_engine import AnalyticEngine
+from simulator.damage_simulator import DamageSimulator
+from simulator.config import Config
+
+
+@pytest.fixture
+def cfg():
+    return Config()
+
+
+def build_engine(cfg, weapon='Scimitar', seed=7):
+    return AggregatedEngine(DamageSimulator(weapon, cfg), seed=seed)
+
+
+class TestSupport:
+    """Tests for the supported weapons."""
+
+    @pytest.mark.parametrize('weapon', ['Scimitar', 'Spear', 'Longsword', 'Halberd'])
+    def test_stateless_weapons(self, weapon):
+        assert AggregatedEngine.is_supported(DamageSimulator(weapon, Config()))
+
+    @pytest.mark.parametrize('weapon', ['Darts', 'Light Flail', 'Club_Stone', 'Heavy Flail'])
+    def test_duration_effects_not_supported(self, weapon):
+        calculator = DamageSimulator(weapon, Config())
+        assert not AggregatedEngine.is_supported(calculator)
+        with pytest.raises(ValueError):
+            AggregatedEngine(calculator)
+
+
+class TestSimulate:
+    """Tests for the aggregated simulation results."""
+
+    def test_result_keys(self, cfg):
+        results = build_engine(cfg).simulate(2500, block_rounds=1000)
+
+        assert results['avg_dps_both'] == pytest.approx((results['dps_crits'] + results['dps_no_crits']) / 2, abs=0.01)
+        assert len(results['dps_per_block']) == 3
+        assert np.mean(results['dps_per_block']) > 0
+        assert 0 < results['crit_rate_actual'] < results['hit_rate_actual'] < 100
+
+    def test_outcome_chances(self, cfg):
+        """Test that the multinomial chances are the exact theoretical chances."""
+        engine = build_engine(cfg)
+        np.testing.assert_allclose(engine.outcome_chances.sum(axis=1), 1.0)
+        np.testing.assert_allclose(engine.outcome_chances[:, 2], engine.attack_sim.crit_chance_list)
+
+    def test_statistics(self, cfg):
+        engine = build_engine(cfg)
+        engine.simulate(1000)
+        stats = engine.stats
+
+        assert stats.attempts_made == 1000 * engine.attacks_per_round
+        assert stats.attempts_made_per_attack == [1000] * engine.attacks_per_round
+        assert stats.hit_rate == pytest.approx(engine.attack_sim.get_hit_chance() * 100, abs=2)
+
+    def test_seeded_runs_are_reproducible(self, cfg):
+        results_a = build_engine(cfg, 'Spear', seed=3).simulate(5000)
+        results_b = build_engine(cfg, 'Spear', seed=3).simulate(5000)
+
+        np.testing.assert_array_equal(results_a['dps_per_block'], results_b['dps_per_block'])
+
+
+class TestAgreement:
+    """Tests comparing the aggregated engine to the exact expected DPS."""
+
+    @pytest.mark.parametrize('weapon', ['Scimitar', 'Spear', 'Longsword', 'Halberd', 'Dagger_FW'])
+    def test_matches_analytic_engine(self, cfg, weapon):
+        """Test that a long aggregated run agrees with the exact expected DPS (within 0.5%)."""
+        expected = AnalyticEngine(DamageSimulator(weapon, cfg)).expected_dps()
+        results = build_engine(cfg, weapon).simulate(500000)
+
+        assert results['dps_crits'] == pytest.approx(expected['dps_crits'], rel=0.005)
+        assert results['dps_no_crits'] == pytest.approx(expected['dps_no_crits'], rel=0.005)
+
+    def test_tenacious_blow(self, cfg):
+        """Test that the Tenacious Blow miss damage is included."""
+        cfg.ADDITIONAL_DAMAGE["Tenacious_Blow"][0] = True
+        expected = AnalyticEngine(DamageSimulator('Dire Mace', cfg)).expected_dps()
+        results = build_engine(cfg, 'Dire Mace').simulate(500000)
+
+        assert results['dps_crits'] == pytest.approx(expected['dps_crits'], rel=0.005)
+
+    def test_immunity_distribution(self, cfg):
+        """Test that the damage distribution after immunities has the exact expected damage."""
+        engine = build_engine(cfg)
+        dmg_dict, _ = engine.analytic.damage_tables.get_tables(False, 1)
+        pmf = engine.analytic.damage_pmf(dmg_dict, {})
+
+        assert pmf.sum() == pytest.approx(1.0)
+        assert np.dot(np.arange(len(pmf)), pmf) == pytest.approx(engine.analytic.expected_damage(dmg_dict))
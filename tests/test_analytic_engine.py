@@ -0,0 +1,197 @@
+"""
+Unit tests for the AnalyticEngine class from simulator/analytic_engine.py
+
+This test suite covers:
+- Immunity lookup (damage type aliases and missing types)
+- Vectorized immunity and vulnerability rules, matching AttackSimulator.damage_immunity_reduction
+- Exact expected damage of damage dictionaries
+- Expected legendary and Tenacious Blow damage
+- Expected DPS, compared to the Monte Carlo simulation
+- Duration legendary effects, weighted by the LegendChain uptime
+- Exact variance and distribution of the damage per round
+"""
+
+import pytest
+import numpy as np
+
+from simulator.analytic_engine import AnalyticEngine
+from simulator.damage_simulator import DamageSimulator
+from simulator.config import Config
+from simulator.roll_source import BufferedRollSource
+
+
+@pytest.fixture
+def cfg():
+    return Config()
+
+
+def build_engine(cfg, weapon='Scimitar'):
+    return AnalyticEngine(DamageSimulator(weapon, cfg))
+
+
+class TestImmunities:
+    """Tests for the immunity lookup and rules."""
+
+    def test_physical_aliases(self, cfg):
+        """Test that physical damage types and flame weapon fire use the base immunities."""
+        engine = build_engine(cfg)
+        assert engine.get_immunity('slashing') == cfg.TARGET_IMMUNITIES['physical']
+        assert engine.get_immunity('fire_fw') == cfg.TARGET_IMMUNITIES['fire']
+
+    def test_immunity_factors(self, cfg):
+        """Test that immunity factors (e.g., legendary Sunder) are added to the target immunity."""
+        engine = build_engine(cfg)
+        assert engine.get_immunity('physical', {'physical': -0.1}) == pytest.approx(cfg.TARGET_IMMUNITIES['physical'] - 0.1)
+
+    def test_missing_damage_type(self, cfg):
+        """Test that an unknown damage type raises KeyError."""
+        engine = build_engine(cfg)
+        with pytest.raises(KeyError):
+            engine.get_immunity('unknown')
+
+    @pytest.mark.parametrize('immunity', [0.25, 0.1, 0.0, -0.1, -0.5, 1.0])
+    def test_matches_attack_simulator(self, cfg, immunity):
+        """Test that the vectorized rules match the scalar immunity reduction of the AttackSimulator."""
+        cfg.TARGET_IMMUNITIES['fire'] = immunity
+        engine = build_engine(cfg)
+        dmg_values = np.arange(0, 60)
+        expected = [engine.attack_sim.damage_immunity_reduction({'fire': int(v)}, {})['fire'] for v in dmg_values]
+        assert np.array_equal(engine.apply_immunity(dmg_values, immunity), expected)
+
+
+class TestExpectedDamage:
+    """Tests for the exact expected damage."""
+
+    def test_no_immunity(self, cfg):
+        """Test that the expected damage without immunity is the average damage."""
+        engine = build_engine(cfg)
+        assert engine.expected_damage({'pure': [[2, 6, 3]]}) == pytest.approx(10.0)
+
+    def test_immunity_floor_rules(self, cfg):
+        """Test the expected damage of a flat damage against 25% immunity (min. 1 damage reduced)."""
+        engine = build_engine(cfg)
+        assert engine.expected_damage({'fire': [[0, 0, 3]]}) == pytest.approx(2.0)
+        assert engine.expected_damage({'fire': [[0, 0, 10]]}) == pytest.approx(8.0)
+
+    def test_tenacious_blow_miss_damage(self, cfg):
+        """Test that only Tenacious Blow with a double weapon inflicts damage on a miss."""
+        assert build_engine(cfg).expected_miss_damage() == 0.0
+
+        cfg.ADDITIONAL_DAMAGE['Tenacious_Blow'][0] = True
+        assert build_engine(cfg, 'Dire Mace').expected_miss_damage() == pytest.approx(4.0)
+
+    def test_heavy_flail_legend_damage(self, cfg):
+        """Test that Heavy Flail legendary damage is not counted as on-hit damage."""
+        assert build_engine(cfg, 'Heavy Flail').expected_legend_damage() == 0.0
+
+
+class TestExpectedDps:
+    """Tests for the expected DPS."""
+
+    def test_result_keys(self, cfg):
+        """Test that the expected DPS has the same keys as the simulation results."""
+        dps = build_engine(cfg).expected_dps()
+        assert set(dps) == {'avg_dps_both', 'dps_crits', 'dps_no_crits'}
+        assert dps['dps_crits'] > dps['dps_no_crits'] > 0
+        assert dps['avg_dps_both'] == pytest.approx((dps['dps_crits'] + dps['dps_no_crits']) / 2, abs=0.01)
+
+    def test_higher_ac_lowers_dps(self, cfg):
+        """Test that the expected DPS decreases as the target AC increases."""
+        dps_low_ac = build_engine(cfg).expected_dps()['avg_dps_both']
+        cfg.TARGET_AC += 10
+        dps_high_ac = build_engine(cfg).expected_dps()['avg_dps_both']
+        assert dps_high_ac < dps_low_ac
+
+    @pytest.mark.parametrize('weapon', ['Scimitar', 'Spear'])
+    def test_matches_simulation(self, cfg, weapon):
+        """Test that the expected DPS agrees with the Monte Carlo simulation (within 3%)."""
+        cfg.ROUNDS = 5000
+        calculator = DamageSimulator(weapon, cfg, roll_source=BufferedRollSource(seed=7))
+        expected = AnalyticEngine(calculator).expected_dps()
+        results = calculator.simulate_dps()
+
+        assert results['dps_crits'] == pytest.approx(expected['dps_crits'], rel=0.03)
+        assert results['dps_no_crits'] == pytest.approx(expected['dps_no_crits'], rel=0.03)
+
+    @pytest.mark.parametrize('weapon', ['Darts', 'Light Flail', 'Club_Stone'])
+    def test_duration_effects_match_simulation(self, cfg, weapon):
+        """Test that duration legendary effects agree with the Monte Carlo simulation (within 3%)."""
+        cfg.ROUNDS = 10000
+        cfg.CHANGE_THRESHOLD = 0    # Run all rounds
+        calculator = DamageSimulator(weapon, cfg, roll_source=BufferedRollSource(seed=7))
+        expected = AnalyticEngine(calculator).expected_dps()
+        results = calculator.simulate_dps()
+
+        assert results['dps_crits'] == pytest.approx(expected['dps_crits'], rel=0.03)
+        assert results['dps_no_crits'] == pytest.approx(expected['dps_no_crits'], rel=0.03)
+
+    def test_duration_effect_raises_dps(self, cfg):
+        """Test that the Darts AB bonus raises the expected DPS above the effect-less estimate."""
+        engine = build_engine(cfg, 'Darts')
+        with_effect = engine.expected_dps()['dps_crits']
+        engine.legend_chain.counter_dists[:, :] = 0.0
+        engine.legend_chain.counter_dists[:, 0] = 1.0   # Effect never active
+        without_effect = engine.expected_dps()['dps_crits']
+
+        assert with_effect > without_effect
+
+
+class TestRoundVariance:
+    """Tests for the exact variance of the damage per round."""
+
+    def test_pmf_moments(self):
+        assert AnalyticEngine.pmf_moments(np.array([0.5, 0.0, 0.5])) == (1.0, 2.0)
+
+    @pytest.mark.parametrize('weapon', ['Scimitar', 'Longsword', 'Dagger_FW'])
+    def test_matches_simulation(self, cfg, weapon):
+        """Test that the exact standard deviation per round agrees with the simulated one (within 2%)."""
+        from simulator.batch_engine import BatchEngine
+        variance = build_engine(cfg, weapon).round_variance()
+        results = BatchEngine(DamageSimulator(weapon, cfg), seed=7).simulate(50000)
+
+        assert np.sqrt(variance) == pytest.approx(results['dmg_per_round'].std(), rel=0.02)
+
+    def test_duration_effect_raises(self, cfg):
+        with pytest.raises(ValueError):
+            build_engine(cfg, 'Darts').round_variance()
+
+
+class TestRoundPmf:
+    """Tests for the exact distribution of the damage per round."""
+
+    def test_mix_pmfs(self):
+        mixture = AnalyticEngine.mix_pmfs([(0.5, np.array([1.0])), (0.5, np.array([0.0, 0.0, 1.0]))])
+        np.testing.assert_allclose(mixture, [0.5, 0.0, 0.5])
+
+    @pytest.mark.parametrize('weapon', ['Scimitar', 'Longsword', 'Dagger_FW'])
+    def test_moments(self, cfg, weapon):
+        """Test that the distribution sums to 1, and its mean and variance are the exact ones."""
+        engine = build_engine(cfg, weapon)
+        expected = engine.expected_dps()
+        for crit_imm, dps_key in ((False, 'dps_crits'), (True, 'dps_no_crits')):
+            pmf = engine.round_pmf(crit_imm)
+            mean, second_moment = AnalyticEngine.pmf_moments(pmf)
+            assert pmf.sum() == pytest.approx(1.0)
+            assert mean / 6 == pytest.approx(expected[dps_key], abs=0.01)
+        mean, second_moment = AnalyticEngine.pmf_moments(engine.round_pmf())
+        assert second_moment - mean ** 2 == pytest.approx(engine.round_variance())
+
+    def test_miss_damage_immunity(self, cfg):
+        """Test that the Tenacious Blow damage on a miss is reduced by the target immunity, as in the expected DPS."""
+        cfg.ADDITIONAL_DAMAGE['Tenacious_Blow'][0] = True
+        cfg.TARGET_IMMUNITIES['pure'] = 0.5
+        engine = build_engine(cfg, 'Dire Mace')
+        mean, _ = AnalyticEngine.pmf_moments(engine.round_pmf())
+        assert mean / 6 == pytest.approx(engine.expected_dps()['dps_crits'], abs=0.01)
+
+    def test_matches_simulation(self, cfg):
+        """Test that the quantiles of the distribution agree with the simulated damage per round."""
+        from simulator.batch_engine import BatchEngine
+        cdf = np.cumsum(build_engine(cfg, 'Scimitar').round_pmf())
+        results = BatchEngine(DamageSimulator('Scimitar', cfg), seed=7).simulate(50000)
+        for q in (0.1, 0.5, 0.9):
+            assert np.searchsorted(cdf, q) == pytest.approx(np.quantile(results['dmg_per_round'], q), rel=0.03)
+
+    def test_duration_effect_raises(self, cfg):
+        with pytest.raises(ValueError):
+            build_engine(cfg, 'Darts').round_pmf()
@@ -6,15 +6,18 @@ This test suite covers:
 - Hit chance calculations for different attack progressions
 - Critical hit chance calculations with various threat ranges
 - Attack roll mechanics (hit, miss, critical hit)
-- Damage roll mechanics with varying dice and flat damage
+- Outcome lookup tables per attack slot and (AB bonus, AC modifier) state
+- Damage roll mechanics with varying dice and flat damage, from the shared roll source
 - Dual-wield penalty application based on character and weapon sizes
 - Legend proc rate calculations (percentage and on-crit triggers)
 - Damage immunity and vulnerability application
 """
 
 import pytest
-import random
-from simulator.attack_simulator import AttackSimulator
+import numpy as np
+from unittest.mock import Mock
+from simulator.attack_simulator import AttackSimulator, MISS, HIT, CRITICAL_HIT
+from simulator.roll_source import RollSource
 from simulator.weapon import Weapon
 from simulator.config import Config
 
@@ -381,176 +384,205 @@ class TestCriticalHitCalculations:
                 assert crit <= hit
 
 
+class FixedRollSource(RollSource):
+    """Roll source that returns predefined d20 rolls, in order."""
+    def __init__(self, rolls):
+        self.rolls = iter(rolls)
+
+    def d20(self):
+        return next(self.rolls)
+
+
 class TestAttackRoll:
     """Tests for individual attack roll mechanics."""
 
     def test_natural_1_always_misses(self):
         """Test that a natural 1 always results in a miss."""
         cfg = Config(AB=100, TARGET_AC=0)  # Guaranteed hit otherwise
-        weapon = Weapon("Scimitar", cfg)
-        simulator = AttackSimulator(weapon, cfg)
-
-        # Mock random to return 1
-        random.seed(42)
-        original_randint = random.randint
+        simulator = AttackSimulator(Weapon("Scimitar", cfg), cfg)
 
-        def mock_randint_1(a, b):
-            if a == 1 and b == 20:
-                return 1
-            return original_randint(a, b)
-
-        random.randint = mock_randint_1
-        try:
-            result, roll = simulator.attack_roll(simulator.ab)
-            assert result == 'miss'
-            assert roll == 1
-        finally:
-            random.randint = original_randint
+        simulator.roll_source = FixedRollSource([1])
+        assert simulator.resolve_attack(0) == 'miss'
 
     def test_natural_20_always_hits(self):
         """Test that a natural 20 always results in a hit or critical."""
         cfg = Config(AB=0, TARGET_AC=100)  # Guaranteed miss otherwise
-        weapon = Weapon("Scimitar", cfg)
-        simulator = AttackSimulator(weapon, cfg)
+        simulator = AttackSimulator(Weapon("Scimitar", cfg), cfg)
+
+        simulator.roll_source = FixedRollSource([20, 20])
+        assert simulator.resolve_attack(0) in ['hit', 'critical_hit']
 
-        # Mock random to return 20
-        random.seed(42)
-        original_randint = random.randint
-        call_count = [0]
-
-        def mock_randint_20(a, b):
-            call_count[0] += 1
-            if a == 1 and b == 20 and call_count[0] == 1:
-                return 20
-            return original_randint(a, b)
-
-        random.randint = mock_randint_20
-        try:
-            result, roll = simulator.attack_roll(simulator.ab)
-            assert result in ['hit', 'critical_hit']
-            assert roll == 20
-        finally:
-            random.randint = original_randint
-
-    def test_attack_roll_returns_tuple(self):
-        """Test that attack_roll returns (result_string, roll_value)."""
+    def test_resolve_attack_returns_outcome(self):
+        """Test that resolve_attack returns the outcome name."""
         cfg = Config()
-        weapon = Weapon("Scimitar", cfg)
-        simulator = AttackSimulator(weapon, cfg)
+        simulator = AttackSimulator(Weapon("Scimitar", cfg), cfg)
 
-        result = simulator.attack_roll(simulator.ab)
-        assert isinstance(result, tuple)
-        assert len(result) == 2
-        assert isinstance(result[0], str)
-        assert isinstance(result[1], int)
-        assert result[0] in ['miss', 'hit', 'critical_hit']
-        assert 1 <= result[1] <= 20
+        assert simulator.resolve_attack(0) in ['miss', 'hit', 'critical_hit']
 
     def test_attack_roll_with_ac_modifier(self):
         """Test that AC modifier affects hit calculation - specifically the roll needed to hit.
 
-        This test verifies that lowering AC (negative modifier) makes it easier to hit
-        by allowing lower d20 rolls to succeed, and raising AC makes it harder.
-
-        Example with AB=50:
-        - AC=50: need d20 >= 0, so all rolls hit (except natural 1)
-        - AC=52 (no modifier): need d20 >= 2, so d20=1 misses
-        - AC=48 (AC modifier -2): need d20 >= -2 (always hits except natural 1)
+        With AB=50 and AC=50, a d20 roll of 2 gives 52:
+        - no modifier: 52 >= 50, hit
+        - AC modifier -5: 52 >= 45, hit (even easier)
+        - AC modifier +5: 52 < 55, miss (harder)
         """
         cfg = Config(AB=50, TARGET_AC=50)
-        weapon = Weapon("Scimitar", cfg)
-        simulator = AttackSimulator(weapon, cfg)
-
-        # Test with controlled rolls to verify AC modifier impact
-        original_randint = random.randint
+        simulator = AttackSimulator(Weapon("Scimitar", cfg), cfg)
+        outcomes = {}
+        for ac_modifier in (0, -5, 5):
+            simulator.roll_source = FixedRollSource([2])   # Low roll, outside the threat range
+            outcomes[ac_modifier] = simulator.resolve_attack(0, defender_ac_modifier=ac_modifier)
 
-        # Mock d20 to return 2 for consistent testing
-        def mock_roll(a, b):
-            if a == 1 and b == 20:
-                return 2  # Low roll that might miss depending on AC
-            return original_randint(a, b)
-
-        random.randint = mock_roll
-
-        # Test baseline (no modifier)
-        result_base = simulator.attack_roll(simulator.ab, defender_ac_modifier=0)
-
-        # Test with reduced AC (easier to hit)
-        result_reduced_ac = simulator.attack_roll(simulator.ab, defender_ac_modifier=-5)
-
-        # Test with increased AC (harder to hit)
-        result_increased_ac = simulator.attack_roll(simulator.ab, defender_ac_modifier=5)
-
-        random.randint = original_randint
-
-        # Verify AC modifier actually changes outcomes
-        # With base AC=50 and roll=2: d20(2) + AB(50) = 52 >= AC(50) = HIT
-        # With AC modifier -5: d20(2) + AB(50) = 52 >= AC(45) = HIT (even easier)
-        # With AC modifier +5: d20(2) + AB(50) = 52 >= AC(55) = MISS (harder)
-
-        assert result_base[0] == 'hit'  # 2 + 50 = 52 >= 50 → HIT
-        assert result_reduced_ac[0] == 'hit'  # 2 + 50 = 52 >= 45 → HIT (same result, but objectively easier)
-        assert result_increased_ac[0] == 'miss'  # 2 + 50 = 52 >= 55 → MISS (harder, so miss)
+        assert outcomes[0] == 'hit'
+        assert outcomes[-5] == 'hit'
+        assert outcomes[5] == 'miss'
 
     def test_multiple_attack_rolls_vary(self):
         """Test that multiple attack rolls produce varying results."""
         cfg = Config(AB=50, TARGET_AC=50)
-        weapon = Weapon("Scimitar", cfg)
-        simulator = AttackSimulator(weapon, cfg)
+        simulator = AttackSimulator(Weapon("Scimitar", cfg), cfg)
 
-        results = [simulator.attack_roll(simulator.ab)[0] for _ in range(100)]
+        results = [simulator.resolve_attack(0) for _ in range(100)]
 
         # Should have variety in results
         unique_results = set(results)
         assert len(unique_results) > 1  # Not all the same result
 
 
+class TestOutcomeTables:
+    """Tests for the precomputed attack outcome lookup tables."""
+
+    @pytest.mark.parametrize('weapon_name, target_ac', [("Scythe", 65), ("Scimitar", 80), ("Rapier_Stinger", 90)])
+    def test_table_matches_attack_rules(self, weapon_name, target_ac):
+        """Test that every (d20 roll, threat roll) outcome matches the attack rules."""
+        cfg = Config(TARGET_AC=target_ac)
+        simulator = AttackSimulator(Weapon(weapon_name, cfg), cfg)
+        table, threat_rows = simulator.build_outcome_table(simulator.ab, defender_ac_modifier=-2)
+        ab, ac, crit_threat = simulator.ab, target_ac - 2, simulator.weapon.crit_threat
+
+        for roll in range(1, 21):
+            hit = roll != 1 and (roll + ab >= ac or roll == 20)    # Natural 1 misses, natural 20 hits
+            assert threat_rows[roll] == (hit and roll >= crit_threat)
+            for threat_roll in range(1, 21):
+                if not hit:
+                    expected = MISS
+                elif roll >= crit_threat and threat_roll + ab >= ac:  # Threat roll doesn't auto-hit or auto-miss
+                    expected = CRITICAL_HIT
+                else:
+                    expected = HIT
+                assert table[roll, threat_roll] == expected
+
+    def test_natural_rolls(self):
+        """Test that a natural 1 always misses and a natural 20 always hits."""
+        cfg = Config(TARGET_AC=200)
+        simulator = AttackSimulator(Weapon("Scythe", cfg), cfg)
+        table, threat_rows = simulator.build_outcome_table(simulator.ab)
+        assert np.all(table[1, :] == MISS)
+        assert np.all(table[20, 1:] == HIT)     # Threat rolls can't reach the AC
+        assert threat_rows[20] is True
+
+    def test_tables_cached_per_state(self):
+        """Test that the tables are built once per (AB bonus, AC modifier) state, one per attack slot."""
+        cfg = Config(AB_PROG="5APR Classic")
+        simulator = AttackSimulator(Weapon("Scimitar", cfg), cfg)
+        stacked, scalar = simulator.get_outcome_tables(2, 0)
+        assert stacked.shape == (simulator.attacks_per_round, 21, 21)
+        assert len(scalar) == simulator.attacks_per_round
+        assert simulator.get_outcome_tables(2, 0)[0] is stacked
+        assert simulator.get_outcome_tables(0, -2)[0] is not stacked
+
+    def test_ab_bonus_is_capped(self):
+        """Test that the AB bonus state respects the AB cap."""
+        cfg = Config(AB=70, AB_CAPPED=70)
+        simulator = AttackSimulator(Weapon("Scimitar", cfg), cfg)
+        assert np.array_equal(simulator.get_outcome_tables(2, 0)[0][0], simulator.get_outcome_tables(0, 0)[0][0])
+
+    def test_resolve_attack(self):
+        """Test the scalar table lookup, including when the threat roll is rolled."""
+        cfg = Config(AB=68, TARGET_AC=80)
+        simulator = AttackSimulator(Weapon("Scimitar", cfg), cfg)
+
+        simulator.roll_source = FixedRollSource([1])
+        assert simulator.resolve_attack(0) == 'miss'
+        simulator.roll_source = FixedRollSource([20, 20])
+        assert simulator.resolve_attack(0) == 'critical_hit'
+        simulator.roll_source = FixedRollSource([20, 1])
+        assert simulator.resolve_attack(0) == 'hit'
+
+    def test_resolve_attacks_matches_scalar(self):
+        """Test that the vectorized lookup matches the scalar lookup."""
+        cfg = Config(TARGET_AC=75, AB_PROG="5APR Classic")
+        simulator = AttackSimulator(Weapon("Scimitar", cfg), cfg)
+        rng = np.random.default_rng(0)
+        attack_idxs = rng.integers(0, simulator.attacks_per_round, size=500)
+        rolls = rng.integers(1, 21, size=500)
+        threat_rolls = rng.integers(1, 21, size=500)
+
+        codes = simulator.resolve_attacks(attack_idxs, rolls, threat_rolls, 0, -2)
+        for attack_idx, roll, threat_roll, code in zip(attack_idxs, rolls, threat_rolls, codes):
+            simulator.roll_source = FixedRollSource([int(roll), int(threat_roll)])
+            assert simulator.resolve_attack(int(attack_idx), 0, -2) == ('miss', 'hit', 'critical_hit')[code]
+
+
 class TestDamageRoll:
     """Tests for damage roll mechanics."""
 
-    def test_zero_dice_returns_flat_damage_only(self):
+    @pytest.fixture
+    def simulator(self):
+        cfg = Config()
+        return AttackSimulator(Weapon("Scimitar", cfg), cfg)
+
+    def test_zero_dice_returns_flat_damage_only(self, simulator):
         """Test that 0d6+5 returns only the flat damage."""
-        result = AttackSimulator.damage_roll(0, 6, 5)
+        result = simulator.damage_roll(0, 6, 5)
         assert result == 5
 
-    def test_zero_sides_returns_flat_damage_only(self):
+    def test_zero_sides_returns_flat_damage_only(self, simulator):
         """Test that 2d0+5 returns only the flat damage."""
-        result = AttackSimulator.damage_roll(2, 0, 5)
+        result = simulator.damage_roll(2, 0, 5)
         assert result == 5
 
-    def test_both_zero_returns_flat_damage(self):
+    def test_both_zero_returns_flat_damage(self, simulator):
         """Test that 0d0+5 returns only the flat damage."""
-        result = AttackSimulator.damage_roll(0, 0, 5)
+        result = simulator.damage_roll(0, 0, 5)
         assert result == 5
 
-    def test_damage_roll_within_range(self):
+    def test_damage_roll_within_range(self, simulator):
         """Test that damage roll result is within expected range."""
         # 2d6+3: minimum 5, maximum 15
         for _ in range(100):
-            result = AttackSimulator.damage_roll(2, 6, 3)
+            result = simulator.damage_roll(2, 6, 3)
             assert 5 <= result <= 15
 
-    def test_single_die_roll(self):
+    def test_single_die_roll(self, simulator):
         """Test damage roll with a single die."""
         # 1d6+0: minimum 1, maximum 6
         for _ in range(100):
-            result = AttackSimulator.damage_roll(1, 6, 0)
+            result = simulator.damage_roll(1, 6, 0)
             assert 1 <= result <= 6
 
-    def test_damage_roll_includes_flat_damage(self):
+    def test_damage_roll_includes_flat_damage(self, simulator):
         """Test that flat damage is always included in roll."""
         # 0d0+10 should always return 10
         for _ in range(10):
-            result = AttackSimulator.damage_roll(0, 0, 10)
+            result = simulator.damage_roll(0, 0, 10)
             assert result == 10
 
-    def test_large_damage_roll(self):
+    def test_large_damage_roll(self, simulator):
         """Test damage roll with many dice."""
         # 10d8+5: minimum 15, maximum 85
         for _ in range(100):
-            result = AttackSimulator.damage_roll(10, 8, 5)
+            result = simulator.damage_roll(10, 8, 5)
             assert 15 <= result <= 85
 
+    def test_uses_shared_roll_source(self, simulator):
+        """Test that the damage is rolled from the roll source of the attack simulator."""
+        simulator.roll_source = Mock(spec=RollSource)
+        simulator.roll_source.roll_dice.return_value = 11
+        assert simulator.damage_roll(2, 6, 3) == 11
+        simulator.roll_source.roll_dice.assert_called_once_with(2, 6, 3)
+
 
 class TestDualWieldPenalty:
     """Tests for dual-wield penalty calculations based on sizes."""
@@ -883,8 +915,8 @@ class TestAttackSimulatorEdgeCases:
         weapon = Weapon("Scimitar", cfg)
         simulator = AttackSimulator(weapon, cfg)
 
-        result = simulator.attack_roll(simulator.ab, defender_ac_modifier=-10)
-        assert result[0] in ['miss', 'hit', 'critical_hit']
+        result = simulator.resolve_attack(0, defender_ac_modifier=-10)
+        assert result in ['miss', 'hit', 'critical_hit']
 
     def test_large_positive_ac_modifier(self):
         """Test attack roll with large positive AC modifier."""
@@ -892,9 +924,9 @@ class TestAttackSimulatorEdgeCases:
         weapon = Weapon("Scimitar", cfg)
         simulator = AttackSimulator(weapon, cfg)
 
-        result = simulator.attack_roll(simulator.ab, defender_ac_modifier=50)
+        result = simulator.resolve_attack(0, defender_ac_modifier=50)
         # Should likely miss with large AC boost
-        assert result[0] in ['miss', 'hit', 'critical_hit']
+        assert result in ['miss', 'hit', 'critical_hit']
 
     def test_single_attack_progression(self):
         """Test with single attack (shouldn't happen in game but test it anyway)."""
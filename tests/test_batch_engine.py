@@ -0,0 +1,254 @@
+"""
+Unit tests for the BatchEngine class from simulator/batch_engine.py
+
+This test suite covers:
+- Result keys and per-round damage arrays
+- Statistics collected from the batch rounds
+- Reproducibility of seeded runs
+- Expected DPS of stateless weapons, compared to the AnalyticEngine
+- Duration legendary effects (Darts AB, Sunder, Club_Stone, Heavy Flail), compared to the scalar simulation
+- Conditional Monte Carlo (Rao-Blackwellized) estimator and batch means standard errors
+- Importance sampling (and stratification) of rare legendary procs
+- Stratified d20 sampling mode
+"""
+
+import pytest
+import numpy as np
+
+from simulator.batch_engine import BatchEngine
+from simulator.analytic_engine import AnalyticEngine
+from simulator.damage_simulator import DamageSimulator
+from simulator.config import Config
+from simulator.roll_source import BufferedRollSource
+
+
+@pytest.fixture
+def cfg():
+    return Config()
+
+
+def build_engine(cfg, weapon='Scimitar', seed=7, stratified=False):
+    return BatchEngine(DamageSimulator(weapon, cfg), seed=seed, stratified=stratified)
+
+
+def simulate_both(engine, simulate_block, num_rounds, block_rounds=1000, **kwargs):
+    """Run blocks of a method with both estimators, :return: results of the damage rolled, and of the estimator"""
+    engine.stats.init_zeroes_lists(engine.attacks_per_round)
+    blocks = [simulate_block(block_rounds, **kwargs) for _ in range(num_rounds // block_rounds)]
+    rolled, estimated = ([np.concatenate([block[idx] for block in blocks]) for idx in idxs] for idxs in ((0, 1), (2, 3)))
+    return engine.get_results(*rolled), engine.get_results(*estimated)
+
+
+class TestSimulate:
+    """Tests for the batch simulation results."""
+
+    def test_result_keys(self, cfg):
+        """Test that the results have the DamageSimulator keys and the per-round arrays."""
+        results = build_engine(cfg).simulate(2500, block_rounds=1000)
+
+        assert results['avg_dps_both'] == pytest.approx((results['dps_crits'] + results['dps_no_crits']) / 2, abs=0.01)
+        assert len(results['dmg_per_round']) == 2500
+        assert len(results['dmg_crit_imm_per_round']) == 2500
+        assert np.all(results['dmg_crit_imm_per_round'] <= results['dmg_per_round'])
+
+    def test_statistics(self, cfg):
+        """Test that the attempts, hits and crits are counted per attack slot."""
+        engine = build_engine(cfg)
+        engine.simulate(1000)
+        stats = engine.stats
+
+        assert stats.attempts_made == 1000 * engine.attacks_per_round
+        assert stats.attempts_made_per_attack == [1000] * engine.attacks_per_round
+        assert stats.hits == sum(stats.hits_per_attack)
+        assert stats.crit_hits == sum(stats.crits_per_attack)
+        assert 0 < stats.crit_hits < stats.hits < stats.attempts_made
+
+    def test_seeded_runs_are_reproducible(self, cfg):
+        """Test that the same seed gives the same results."""
+        results_a = build_engine(cfg, 'Darts', seed=3).simulate(1000)
+        results_b = build_engine(cfg, 'Darts', seed=3).simulate(1000)
+
+        np.testing.assert_array_equal(results_a['dmg_per_round'], results_b['dmg_per_round'])
+        assert results_a['avg_dps_both'] == results_b['avg_dps_both']
+
+
+class TestAgreement:
+    """Tests comparing the batch engine to the other engines."""
+
+    @pytest.mark.parametrize('weapon', ['Scimitar', 'Spear', 'Longsword'])
+    def test_matches_analytic_engine(self, cfg, weapon):
+        """Test that weapons without duration effects agree with the exact expected DPS (within 2%)."""
+        expected = AnalyticEngine(DamageSimulator(weapon, cfg)).expected_dps()
+        results = build_engine(cfg, weapon).simulate(50000)
+
+        assert results['dps_crits'] == pytest.approx(expected['dps_crits'], rel=0.02)
+        assert results['dps_no_crits'] == pytest.approx(expected['dps_no_crits'], rel=0.02)
+
+    @pytest.mark.parametrize('weapon', ['Darts', 'Light Flail', 'Club_Stone', 'Heavy Flail'])
+    def test_matches_scalar_simulation(self, cfg, weapon):
+        """Test that duration legendary effects agree with the attack by attack simulation (within 3%)."""
+        cfg.ROUNDS = 10000
+        cfg.CHANGE_THRESHOLD = 0    # Run all rounds
+        calculator = DamageSimulator(weapon, cfg, roll_source=BufferedRollSource(seed=7))
+        scalar_results = calculator.simulate_dps()
+        results = build_engine(cfg, weapon).simulate(50000)
+
+        assert results['dps_crits'] == pytest.approx(scalar_results['dps_crits'], rel=0.03)
+        assert results['dps_no_crits'] == pytest.approx(scalar_results['dps_no_crits'], rel=0.03)
+
+
+class TestConditionalEstimator:
+    """Tests for the conditional Monte Carlo estimator."""
+
+    def test_state_means_match_analytic(self, cfg):
+        """Test that the state means, weighted by the exact uptime, give the exact expected damage per round."""
+        engine = build_engine(cfg, 'Darts')
+        state_means = engine.get_state_means()
+        active_chances = AnalyticEngine(DamageSimulator('Darts', cfg)).legend_chain.active_chances_per_attack
+        expected = AnalyticEngine(DamageSimulator('Darts', cfg)).expected_dps()
+
+        dpr = ((1 - active_chances) * state_means[:, 0, 0] + active_chances * state_means[:, 1, 0]).sum()
+        assert dpr / 6 == pytest.approx(expected['dps_crits'], abs=0.01)
+
+    def test_stateless_weapon_is_exact(self, cfg):
+        """Test that weapons without duration effects have zero variance, and the exact expected DPS."""
+        expected = AnalyticEngine(DamageSimulator('Spear', cfg)).expected_dps()
+        engine = build_engine(cfg, 'Spear')
+        _, results = simulate_both(engine, engine.simulate_block_conditional, 3000)
+
+        assert results['dps_crits'] == pytest.approx(expected['dps_crits'], abs=0.01)
+        assert results['dps_std_error'] == pytest.approx(0.0, abs=1e-9)
+
+    @pytest.mark.parametrize('weapon', ['Darts', 'Club_Stone'])
+    def test_lower_standard_error(self, cfg, weapon):
+        """Test that the conditional estimator agrees with the plain one, with a much smaller standard error."""
+        expected = AnalyticEngine(DamageSimulator(weapon, cfg)).expected_dps()
+        engine = build_engine(cfg, weapon)
+        plain, conditional = simulate_both(engine, engine.simulate_block_conditional, 50000)
+
+        assert conditional['dps_crits'] == pytest.approx(expected['dps_crits'], rel=0.01)
+        assert conditional['dps_std_error'] < plain['dps_std_error'] / 2
+
+    def test_block_with_both_estimators(self, cfg):
+        """Test that a block rolls the damage, and the conditional means from the same attack rolls."""
+        engine = build_engine(cfg, 'Darts', seed=4)
+        engine.stats.init_zeroes_lists(engine.attacks_per_round)
+        dmg, dmg_crit_imm, means, means_crit_imm = engine.simulate_block_conditional(2000)
+
+        assert means.shape == means_crit_imm.shape == (2000,)
+        assert np.all(means >= means_crit_imm)
+        assert dmg.dtype == np.int64 and np.all(dmg >= dmg_crit_imm)
+        assert dmg.mean() == pytest.approx(means.mean(), rel=0.05)
+        assert sum(engine.damage_by_type.values()) == dmg.sum()
+
+    def test_statistics_collected(self, cfg):
+        engine = build_engine(cfg, 'Darts')
+        simulate_both(engine, engine.simulate_block_conditional, 1000)
+        assert engine.stats.attempts_made == 1000 * engine.attacks_per_round
+        assert engine.stats.hits > 0
+
+
+class TestProcSampling:
+    """Tests for the importance sampling of the legendary procs."""
+
+    def test_supported_weapons(self, cfg):
+        assert build_engine(cfg, 'Dagger_FW').supports_proc_sampling()
+        assert build_engine(cfg, 'Spear').supports_proc_sampling()
+        assert not build_engine(cfg, 'Scimitar').supports_proc_sampling()     # No legendary property
+        assert not build_engine(cfg, 'Longsword').supports_proc_sampling()    # On-crit proc
+        assert not build_engine(cfg, 'Darts').supports_proc_sampling()        # Proc changes the attacks (AB)
+
+    @pytest.mark.parametrize('rate', [0.0, 1.5])
+    def test_invalid_rate_raises(self, cfg, rate):
+        with pytest.raises(ValueError):
+            build_engine(cfg, 'Dagger_FW').simulate_block_sampled(100, proc_sampling_rate=rate)
+
+    @pytest.mark.parametrize('rate', [0.25, 1.0])
+    def test_unbiased(self, cfg, rate):
+        """Test that the reweighted procs agree with the exact expected DPS."""
+        expected = AnalyticEngine(DamageSimulator('Dagger_FW', cfg)).expected_dps()
+        engine = build_engine(cfg, 'Dagger_FW')
+        _, results = simulate_both(engine, engine.simulate_block_sampled, 50000, proc_sampling_rate=rate)
+
+        assert results['dps_crits'] == pytest.approx(expected['dps_crits'], rel=0.01)
+
+    def test_lower_standard_error(self, cfg):
+        """Test that stratified procs lower the standard error of a rare, heavy proc."""
+        engine = build_engine(cfg, 'Dagger_FW')
+        plain, stratified = simulate_both(engine, engine.simulate_block_sampled, 50000, proc_sampling_rate=1.0)
+
+        assert stratified['dps_std_error'] < plain['dps_std_error']
+
+    def test_block_with_both_estimators(self, cfg):
+        """Test that a block rolls the procs at the natural rate, and the importance sampled DPS from the same rolls."""
+        engine = build_engine(cfg, 'Dagger_FW')
+        engine.stats.init_zeroes_lists(engine.attacks_per_round)
+        blocks = [engine.simulate_block_sampled(1000) for _ in range(50)]
+        dmg, sampled = (np.concatenate([block[idx] for block in blocks]) for idx in (0, 2))
+        expected = AnalyticEngine(DamageSimulator('Dagger_FW', cfg)).expected_dps()
+
+        assert dmg.dtype == np.int64
+        assert sum(engine.damage_by_type.values()) == dmg.sum()
+        assert sampled.mean() / 6 == pytest.approx(expected['dps_crits'], rel=0.01)
+        assert sampled.var() < dmg.var()
+        assert engine.stats.legend_procs / engine.stats.hits == pytest.approx(0.02, abs=0.005)
+
+    def test_block_sampled_unsupported_raises(self, cfg):
+        engine = build_engine(cfg, 'Darts')
+        with pytest.raises(ValueError):
+            engine.simulate_block_sampled(100)
+
+    def test_proc_statistics_unchanged(self, cfg):
+        """Test that the legend proc statistics still count the procs at the natural rate."""
+        engine = build_engine(cfg, 'Dagger_FW')
+        simulate_both(engine, engine.simulate_block_sampled, 20000, proc_sampling_rate=1.0)
+
+        assert engine.stats.legend_procs / engine.stats.hits == pytest.approx(0.02, abs=0.005)
+
+
+
+class TestStratifiedSampling:
+    """Tests for the stratified sampling of the d20 (and d100) rolls."""
+
+    def test_rolls_cover_every_face(self, cfg):
+        """Test that each attack slot of a block gets every face equally often."""
+        engine = build_engine(cfg, stratified=True)
+        rolls = engine.stratified_rolls(20, 100).reshape(100, engine.attacks_per_round)
+
+        for slot_rolls in rolls.T:
+            np.testing.assert_array_equal(np.bincount(slot_rolls, minlength=21)[1:], [5] * 20)
+
+    def test_partial_cover(self, cfg):
+        """Test that a number of rounds that isn't a multiple of the faces still gives valid rolls."""
+        engine = build_engine(cfg, stratified=True)
+        rolls = engine.stratified_rolls(20, 30)
+
+        assert len(rolls) == 30 * engine.attacks_per_round
+        assert rolls.min() >= 1 and rolls.max() <= 20
+
+    def test_exact_hits_per_slot(self, cfg):
+        """Test that the hits per slot match the exact hit chance, when the rounds are a multiple of 20."""
+        engine = build_engine(cfg, stratified=True)
+        engine.simulate(2000, block_rounds=1000)
+        hit_chances = AnalyticEngine(DamageSimulator('Scimitar', cfg)).legend_chain.inactive_chances[0]
+
+        np.testing.assert_array_equal(engine.stats.hits_per_attack, np.round(hit_chances * 2000).astype(int))
+
+    @pytest.mark.parametrize('weapon', ['Scimitar', 'Dagger_FW'])
+    def test_matches_analytic_engine(self, cfg, weapon):
+        """Test that the stratified rolls agree with the exact expected DPS (within 1%)."""
+        expected = AnalyticEngine(DamageSimulator(weapon, cfg)).expected_dps()
+        results = build_engine(cfg, weapon, stratified=True).simulate(20000)
+
+        assert results['dps_crits'] == pytest.approx(expected['dps_crits'], rel=0.01)
+
+    def test_lower_spread(self, cfg):
+        """Test that the DPS of short seeded runs spreads less than with independent rolls."""
+        plain = [build_engine(cfg, seed=seed).simulate(1000)['dps_crits'] for seed in range(10)]
+        stratified = [build_engine(cfg, seed=seed, stratified=True).simulate(1000)['dps_crits'] for seed in range(10)]
+
+        assert np.std(stratified) < np.std(plain)
+
+    def test_duration_effect_raises(self, cfg):
+        with pytest.raises(ValueError):
+            build_engine(cfg, 'Darts', stratified=True)
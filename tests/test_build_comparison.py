@@ -0,0 +1,115 @@
+"""
+Unit tests for the BuildComparison class from simulator/build_comparison.py
+
+This test suite covers:
+- Verdicts of the sequential test on the paired DPS difference
+- Alpha-spending boundary of the repeated looks
+- Common random numbers (same build gives zero difference)
+- Significant differences between builds, agreement with the exact expected DPS
+- Inconclusive comparisons stop at the maximum number of rounds
+- Command line entry point and its Config overrides
+"""
+
+import math
+import pytest
+from statistics import NormalDist
+
+from simulator.build_comparison import BuildComparison, parse_overrides, main
+from simulator.analytic_engine import AnalyticEngine
+from simulator.damage_simulator import DamageSimulator
+from simulator.config import Config
+
+
+class TestGetVerdict:
+    """Tests for the verdict of the confidence interval of the difference."""
+
+    @pytest.mark.parametrize('delta, delta_error, verdict', [
+        (1.0, 0.5, 'A'),
+        (-1.0, 0.5, 'B'),
+        (0.01, 0.02, 'equal'),
+        (0.1, 0.2, None),
+    ])
+    def test_verdicts(self, delta, delta_error, verdict):
+        assert BuildComparison.get_verdict(delta, delta_error, margin=0.05) == verdict
+
+
+class TestGetBoundary:
+    """Tests for the O'Brien-Fleming type alpha-spending boundary."""
+
+    def test_spends_alpha(self):
+        """Test that the looks spend exactly alpha in total, decreasing z-scores, wider than a fixed interval."""
+        boundary = BuildComparison.get_boundary(4, 30, 0.01)
+        alpha_spent = sum(math.erfc(z / math.sqrt(2)) for z in boundary.values())
+
+        assert list(boundary) == list(range(4, 31))
+        assert alpha_spent == pytest.approx(0.01, rel=1e-6)
+        assert all(z_prev > z for z_prev, z in zip(boundary.values(), list(boundary.values())[1:]))
+        assert min(boundary.values()) > NormalDist().inv_cdf(1 - 0.01 / 2)
+
+    def test_single_look(self):
+        """Test that a single look is the plain confidence interval."""
+        assert BuildComparison.get_boundary(4, 4, 0.01) == {4: pytest.approx(2.5758, abs=1e-4)}
+
+
+class TestCompareWeapon:
+    """Tests for the paired comparison of two builds."""
+
+    def test_same_build_is_equal(self):
+        """Test that common random numbers give exactly the same DPS for the same build."""
+        results = BuildComparison(['Darts'], Config(), Config(), seed=1).run()
+
+        assert results['Darts']['delta'] == 0.0
+        assert results['Darts']['dps_a'] == results['Darts']['dps_b']
+        assert results['Darts']['verdict'] == 'equal'
+
+    @pytest.mark.parametrize('weapon', ['Scythe', 'Club_Stone'])
+    def test_significant_difference(self, weapon):
+        """Test that Devastating Critical beats Overwhelm Critical, by the exact expected difference."""
+        config_a, config_b = Config(OVERWHELM_CRIT=True), Config(DEV_CRIT=True)
+        results = BuildComparison([weapon], config_a, config_b, seed=1).run()[weapon]
+        expected_a = AnalyticEngine(DamageSimulator(weapon, config_a)).expected_dps()['avg_dps_both']
+        expected_b = AnalyticEngine(DamageSimulator(weapon, config_b)).expected_dps()['avg_dps_both']
+
+        assert results['verdict'] == 'B'
+        assert results['delta'] == pytest.approx(expected_a - expected_b, abs=max(3 * results['delta_error'], 0.05))
+        assert results['rounds'] < Config().ROUNDS   # Stopped early
+
+    def test_inconclusive_stops_at_max_rounds(self):
+        """Test that a difference below the test resolution runs all rounds and is inconclusive."""
+        config_a, config_b = Config(ROUNDS=3000), Config(ROUNDS=3000, AB=67)
+        results = BuildComparison(['Spear'], config_a, config_b, alpha=1e-300, margin=0.0, seed=1).run()['Spear']
+
+        assert results['rounds'] == 3000
+        assert results['verdict'] == 'inconclusive'
+        assert results['delta'] > 0
+
+    def test_progress_callback(self):
+        calls = []
+        BuildComparison(['Spear', 'Scythe'], Config(), Config(), seed=1).run(lambda *args: calls.append(args))
+        assert calls == [('Spear', 1, 2), ('Scythe', 2, 2)]
+
+
+class TestCommandLine:
+    """Tests for the command line entry point."""
+
+    def test_parse_overrides(self):
+        overrides = parse_overrides(['OVERWHELM_CRIT=True', 'AB=67', 'AB_PROG=5APR Dual-Wield'])
+        assert overrides == {'OVERWHELM_CRIT': True, 'AB': 67, 'AB_PROG': '5APR Dual-Wield'}
+
+    @pytest.mark.parametrize('pair', ['NOT_A_FIELD=1', 'AB'])
+    def test_invalid_override(self, pair):
+        with pytest.raises(ValueError):
+            parse_overrides([pair])
+
+    def test_main(self, capsys):
+        """Test that the builds of the overrides are compared, one line per weapon."""
+        results = main(['Scythe', '--a', 'OVERWHELM_CRIT=True', '--b', 'DEV_CRIT=True', '--seed', '1'])
+        output = capsys.readouterr().out
+
+        assert results['Scythe']['verdict'] == 'B'
+        assert output.startswith('Scythe: A ')
+        assert output.strip().endswith('-> B')
+
+    def test_main_invalid_override(self):
+        with pytest.raises(SystemExit):
+            main(['Spear', '--a', 'NOT_A_FIELD=1'])
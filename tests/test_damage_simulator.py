@@ -10,21 +10,34 @@ This test suite covers:
 - Dual-wield offhand strength bonus reduction
 - Tenacious Blow feat damage on hit and miss
 - Critical hit damage multiplier application
+- Shared crit dice mode (crit-immune damage reuses the crit dice)
 - Cumulative damage tracking and statistics
+- Results of rounds recorded from another engine
+- Batch means errors, effective sample size and the requested precision stopping rule
+- Streaming damage distributions per round and per hit
+- Round by round generator (per-block aggregates, running estimates, stopping by the caller)
+- Vectorized precision run (conditional Monte Carlo estimator), chosen for a requested DPS precision
+- Stratified and mean-only (aggregated) runs, chosen by STRATIFIED_ROLLS and MEAN_ONLY
+- Progress callback and cancellation
 - Edge cases and configuration combinations
 """
 
+import json
 import pytest
 import math
+from itertools import islice
+import numpy as np
 from unittest.mock import Mock, patch, MagicMock
 from collections import deque
 
-from simulator.damage_simulator import DamageSimulator
+from simulator.damage_simulator import DamageSimulator, SimulationCancelled
 from simulator.weapon import Weapon
 from simulator.config import Config
 from simulator.attack_simulator import AttackSimulator
 from simulator.stats_collector import StatsCollector
 from simulator.legend_effect import LegendEffect
+from simulator.roll_source import BufferedRollSource
+from simulator.analytic_engine import AnalyticEngine
 
 
 class TestDamageSimulatorInitialization:
@@ -76,8 +89,9 @@ class TestDamageSimulatorInitialization:
 
         assert simulator.total_dmg == 0
         assert simulator.total_dmg_crit_imm == 0
-        assert len(simulator.dps_per_round) == 0
-        assert len(simulator.dps_crit_imm_per_round) == 0
+        assert simulator.num_rounds == 0
+        assert simulator.dps_batch_means.count == 0
+        assert simulator.dps_crit_imm_batch_means.count == 0
 
     def test_dps_window_initialized(self):
         """Test that DPS tracking windows are initialized correctly."""
@@ -283,13 +297,13 @@ class TestSimulationRound:
             result = simulator.simulate_dps()
 
         required_keys = {
-            'avg_dps_both', 'dps_crits', 'dps_no_crits', 'dps_per_round',
-            'dps_rolling_avg', 'cumulative_damage_per_round', 'damage_by_type',
+            'avg_dps_both', 'dps_crits', 'dps_no_crits', 'rounds', 'dps_vs_damage', 'damage_by_type',
             'attack_prog', 'hit_rate_actual', 'crit_rate_actual', 'legend_proc_rate_actual',
             'hits_per_attack', 'crits_per_attack', 'hit_rate_theoretical',
-            'crit_rate_theoretical', 'legend_proc_rate_theoretical',
+            'crit_rate_theoretical', 'legend_proc_rate_theoretical', 'legend_uptime_theoretical',
             'hit_rate_per_attack_theoretical', 'crit_rate_per_attack_theoretical',
-            'summary'
+            'dps_error', 'dps_crit_imm_error', 'effective_rounds', 'summary',
+            'round_damage_summary', 'hit_damage_summary'
         }
         assert required_keys.issubset(result.keys())
 
@@ -328,6 +342,28 @@ class TestSimulationRound:
         # Should stop before reaching full rounds
         assert simulator.total_dmg >= cfg.DAMAGE_LIMIT
 
+    def test_simulate_dps_reports_progress(self):
+        """Test that the progress callback is called every progress interval."""
+        cfg = Config(ROUNDS=250, STD_THRESHOLD=0, CHANGE_THRESHOLD=0)    # Never converges
+        callback = Mock()
+        simulator = DamageSimulator("Scimitar", cfg, progress_callback=callback)
+
+        with patch('builtins.print'):
+            simulator.simulate_dps()
+
+        assert callback.call_args_list == [((100, 250),), ((200, 250),)]
+
+    def test_simulate_dps_cancelled_by_progress_callback(self):
+        """Test that the progress callback can stop the simulation (e.g., preempted speculative job)."""
+        cfg = Config(ROUNDS=1000, STD_THRESHOLD=0, CHANGE_THRESHOLD=0)
+        callback = Mock(side_effect=SimulationCancelled)
+        simulator = DamageSimulator("Scimitar", cfg, progress_callback=callback)
+
+        with patch('builtins.print'), pytest.raises(SimulationCancelled):
+            simulator.simulate_dps()
+
+        assert simulator.num_rounds == simulator.progress_interval
+
 
 class TestDualWieldMechanics:
     """Tests for dual-wield specific mechanics."""
@@ -440,6 +476,36 @@ class TestCriticalDamage:
         assert simulator.total_dmg_crit_imm > 0
 
 
+class TestSharedCritDice:
+    """Tests for the shared crit dice mode (crit-immune damage reuses the crit dice)."""
+
+    def test_roll_damage_adds_to_sums(self):
+        """Test that roll_damage adds the rolls to the provided damage sums, without immunities."""
+        simulator = DamageSimulator("Scimitar", Config())
+        damage_sums = simulator.roll_damage({'physical': [[0, 0, 10]], 'fire': [[0, 0, 4]]}, {'physical': 5})
+        assert damage_sums == {'physical': 15, 'fire': 4}
+
+    def test_crit_allowed_at_least_crit_immune(self):
+        """Test that crit-allowed damage is never lower than crit-immune damage on every round."""
+        cfg = Config(ROUNDS=300, SHARED_CRIT_DICE=True, TARGET_IMMUNITIES={k: 0.0 for k in Config().TARGET_IMMUNITIES})
+        simulator = DamageSimulator("Scythe", cfg)
+        blocks = list(simulator.iter_rounds(block_size=1, max_rounds=cfg.ROUNDS))
+
+        assert all(block['block_dmg'] >= block['block_dmg_crit_imm'] for block in blocks)
+
+    def test_same_expected_dps(self):
+        """Test that the shared crit dice mode doesn't bias the DPS."""
+        cfg = Config(ROUNDS=5000, SHARED_CRIT_DICE=True, OVERWHELM_CRIT=True)
+        simulator = DamageSimulator("Scythe", cfg, roll_source=BufferedRollSource(seed=1))
+        expected = AnalyticEngine(simulator).expected_dps()
+
+        with patch('builtins.print'):
+            result = simulator.simulate_dps()
+
+        assert result['dps_crits'] == pytest.approx(expected['dps_crits'], rel=0.03)
+        assert result['dps_no_crits'] == pytest.approx(expected['dps_no_crits'], rel=0.03)
+
+
 class TestDamageImmunityVulnerability:
     """Tests for damage immunity and vulnerability mechanics."""
 
@@ -1226,3 +1292,242 @@ class TestDevastatingCritical:
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
 
+
+
+class TestRecordRounds:
+    """Tests for the rounds recorded from another engine (e.g., BatchEngine)."""
+
+    def test_recorded_rounds_results(self):
+        """Test that the results are built from the recorded rounds, in increments."""
+        cfg = Config()
+        simulator = DamageSimulator('Spear', cfg)
+        simulator.stats.attempts_made_per_attack = [4] * simulator.attack_sim.attacks_per_round
+        simulator.stats.hits_per_attack = [2] * simulator.attack_sim.attacks_per_round
+        simulator.stats.crits_per_attack = [0] * simulator.attack_sim.attacks_per_round
+        simulator.stats.attempts_made, simulator.stats.hits = 20, 10
+
+        simulator.record_rounds(np.array([60, 120]), np.array([60, 60]), {'physical': 150})
+        round_num = simulator.record_rounds(np.array([180, 240]), np.array([60, 60]), {'physical': 500})
+        results = simulator.get_results(round_num)
+
+        assert round_num == 4
+        assert results['rounds'] == 4
+        assert results['dps_vs_damage']['x'] == [60, 180, 360, 600]
+        assert results['dps_vs_damage']['y'] == pytest.approx([10, 15, 20, 25])
+        assert results['dps_crits'] == 25
+        assert results['dps_no_crits'] == 10
+        assert results['damage_by_type'] == {'physical': 500}
+
+
+class TestErrorEstimates:
+    """Tests for the autocorrelation-aware (batch means) errors."""
+
+    def test_stops_at_requested_precision(self):
+        """Test that the simulation stops once the batch means error is within the requested precision."""
+        cfg = Config(ROUNDS=15000, TARGET_DPS_ERROR=1.0)
+        simulator = DamageSimulator('Spear', cfg, roll_source=BufferedRollSource(seed=1))
+        with patch('builtins.print'):
+            result = simulator.simulate_dps()
+
+        assert result['rounds'] < cfg.ROUNDS
+        assert result['rounds'] % simulator.precision_interval == 0
+        assert result['dps_error'] <= 1.0
+
+    def test_default_stop_checks_batch_means_error(self):
+        """Test that the rolling window stops only once the batch means error is within REL_DPS_ERROR of the DPS."""
+        results = {}
+        for rel_error in (0.0, 0.01):
+            cfg = Config(REL_DPS_ERROR=rel_error)
+            simulator = DamageSimulator('Spear', cfg, roll_source=BufferedRollSource(seed=1))
+            with patch('builtins.print'):
+                results[rel_error] = simulator.simulate_dps()
+
+        assert results[0.01]['rounds'] > results[0.0]['rounds']
+        assert results[0.01]['rounds'] < Config().ROUNDS
+        assert results[0.01]['dps_error'] <= 0.01 * results[0.01]['dps_crits'] + 0.01
+
+
+class TestDamageDistributions:
+    """Tests for the streaming damage summaries collected in the simulation loop."""
+
+    def test_round_and_hit_summaries(self):
+        """Test that every round and every hit is summarized, and the quantiles match the per-round damage."""
+        simulator = DamageSimulator('Spear', Config(), roll_source=BufferedRollSource(seed=1))
+        round_dmg = np.array([block['block_dmg'] for block in simulator.iter_rounds(block_size=1, max_rounds=3000)])
+        with patch('builtins.print'):
+            result = simulator.get_results(3000)
+
+        round_summary, hit_summary = result['round_damage_summary'], result['hit_damage_summary']
+        assert round_summary['count'] == 3000
+        assert hit_summary['count'] == simulator.stats.hits
+        assert round_summary['mean'] == pytest.approx(round_dmg.mean())
+        assert round_summary['p90'] == pytest.approx(np.quantile(round_dmg, 0.9), rel=0.02)
+        assert hit_summary['max'] <= round_summary['max']
+
+
+class TestIterRounds:
+    """Tests for the round by round generator of the simulation."""
+
+    def test_blocks(self):
+        """Test that blocks hold block_size rounds, and the last block the remaining rounds."""
+        simulator = DamageSimulator('Spear', Config(), roll_source=BufferedRollSource(seed=1))
+        blocks = list(simulator.iter_rounds(block_size=40, max_rounds=100))
+
+        assert [block['round_num'] for block in blocks] == [40, 80, 100]
+        assert [block['block_rounds'] for block in blocks] == [40, 40, 20]
+        assert sum(block['block_dmg'] for block in blocks) == simulator.total_dmg
+        assert sum(block['block_dmg_crit_imm'] for block in blocks) == simulator.total_dmg_crit_imm
+        assert simulator.num_rounds == 100
+
+    def test_running_estimates(self):
+        simulator = DamageSimulator('Spear', Config(), roll_source=BufferedRollSource(seed=1))
+        block = list(simulator.iter_rounds(block_size=50, max_rounds=500))[-1]
+
+        assert block['dps_crits'] == pytest.approx(simulator.total_dmg / 500 / 6)
+        assert block['dps_no_crits'] == pytest.approx(simulator.total_dmg_crit_imm / 500 / 6)
+        assert block['avg_dps_both'] == pytest.approx((block['dps_crits'] + block['dps_no_crits']) / 2)
+
+    def test_running_error(self):
+        """Test that the running error is the batch means error of the rounds simulated so far."""
+        simulator = DamageSimulator('Spear', Config(), roll_source=BufferedRollSource(seed=1))
+        blocks = list(simulator.iter_rounds(block_size=50, max_rounds=1000))
+        std_error, _ = simulator.dps_batch_means.get_error_estimates()
+
+        assert 0 < blocks[-1]['dps_error'] < blocks[0]['dps_error']
+        assert blocks[-1]['dps_error'] == pytest.approx(simulator.z * std_error)
+
+    def test_caller_stops(self):
+        """Test that an unbounded generator runs until the caller stops, and the results cover the rounds run."""
+        simulator = DamageSimulator('Spear', Config(), roll_source=BufferedRollSource(seed=1))
+        for block in islice(simulator.iter_rounds(block_size=25), 3):
+            pass
+
+        with patch('builtins.print'):
+            result = simulator.get_results(block['round_num'])
+        assert block['round_num'] == 75
+        assert result['rounds'] == 75
+        assert result['dps_crits'] == pytest.approx(block['dps_crits'], abs=0.01)
+
+    def test_simulate_dps_matches_generator(self):
+        """Test that simulate_dps and the generator, both built on simulate_round, give the same rounds for the same rolls."""
+        cfg = Config(ROUNDS=300, CHANGE_THRESHOLD=0)
+        simulator = DamageSimulator('Scythe', cfg, roll_source=BufferedRollSource(seed=3))
+        with patch('builtins.print'):
+            result = simulator.simulate_dps()
+        generator_sim = DamageSimulator('Scythe', cfg, roll_source=BufferedRollSource(seed=3))
+        list(generator_sim.iter_rounds(block_size=100, max_rounds=300))
+
+        assert result['dps_vs_damage'] == generator_sim.dps_vs_damage.to_dict()
+        assert generator_sim.total_dmg_crit_imm == simulator.total_dmg_crit_imm
+
+
+class TestSimulateDpsBlocks:
+    """Tests for the vectorized precision run, with the conditional Monte Carlo estimator."""
+
+    @pytest.mark.parametrize('weapon', ['Spear', 'Darts'])
+    def test_stops_at_requested_precision(self, weapon):
+        """Test that the conditional DPS reaches the requested precision in far fewer rounds, and agrees with exact."""
+        cfg = Config(TARGET_DPS_ERROR=0.3)
+        simulator = DamageSimulator(weapon, cfg)
+        with patch('builtins.print'):
+            result = simulator.simulate_dps_blocks(seed=1)
+        expected = AnalyticEngine(simulator).expected_dps()
+
+        assert result['rounds'] < cfg.ROUNDS / 2
+        assert result['rounds'] in simulator.get_look_rounds(cfg.ROUNDS)
+        assert result['dps_error'] <= 0.3
+        assert result['dps_crits'] == pytest.approx(expected['dps_crits'], abs=0.3)
+        assert result['dps_no_crits'] == pytest.approx(expected['dps_no_crits'], abs=0.3)
+
+    def test_minimum_rounds(self):
+        """Test that a zero-variance DPS (no effect with duration) still runs the minimum rounds for the distributions."""
+        simulator = DamageSimulator('Spear', Config(TARGET_DPS_ERROR=0.3))
+        with patch('builtins.print'):
+            result = simulator.simulate_dps_blocks(seed=1)
+
+        assert result['dps_error'] == pytest.approx(0.0, abs=1e-9)
+        assert result['rounds'] == simulator.MIN_BLOCK_ROUNDS
+        assert result['round_damage_summary']['count'] == simulator.MIN_BLOCK_ROUNDS
+
+    def test_looks(self):
+        """Test that the checks double from the minimum rounds, and each look is widened for the number of looks."""
+        simulator = DamageSimulator('Spear', Config())
+        assert simulator.get_look_rounds(15000) == [5000, 10000, 15000]
+        assert simulator.get_look_rounds(3000) == [3000]
+        assert simulator.get_sequential_z(1) == pytest.approx(2.576, abs=1e-3)
+        assert simulator.get_sequential_z(3) == pytest.approx(2.935, abs=1e-3)
+
+    def test_damage_rolled_for_distributions(self):
+        """Test that the distributions and breakdown come from the damage rolled, not from the conditional means."""
+        simulator = DamageSimulator('Spear', Config(TARGET_DPS_ERROR=0.3))
+        with patch('builtins.print'):
+            result = simulator.simulate_dps_blocks(seed=1)
+
+        assert result['round_damage_summary']['count'] == result['rounds']
+        assert result['round_damage_summary']['mean'] == pytest.approx(simulator.total_dmg / result['rounds'])
+        assert sum(result['damage_by_type'].values()) == simulator.total_dmg
+        assert simulator.stats.attempts_made == result['rounds'] * simulator.attack_sim.attacks_per_round
+
+    def test_progress_and_cancellation(self):
+        cfg = Config(TARGET_DPS_ERROR=0.001)
+        callback = Mock(side_effect=[None, SimulationCancelled])
+        simulator = DamageSimulator('Darts', cfg, progress_callback=callback)
+
+        with patch('builtins.print'), pytest.raises(SimulationCancelled):
+            simulator.simulate_dps_blocks()
+        assert callback.call_args_list == [((500, cfg.ROUNDS),), ((1000, cfg.ROUNDS),)]
+
+    def test_run_simulation_dispatch(self):
+        """Test that a requested precision or stratified rolls run the vectorized blocks, otherwise attack by attack."""
+        for target_error, stratified, method in ((0.0, False, 'simulate_dps'), (0.5, False, 'simulate_dps_blocks'),
+                                                 (0.0, True, 'simulate_dps_blocks')):
+            simulator = DamageSimulator('Spear', Config(TARGET_DPS_ERROR=target_error, STRATIFIED_ROLLS=stratified))
+            with patch.object(simulator, method, return_value={'rounds': 1}) as run:
+                assert simulator.run_simulation() == {'rounds': 1}
+            run.assert_called_once()
+        assert run.call_args.kwargs == {'conditional': False}
+
+    @pytest.mark.parametrize('weapon, mean_only', [('Spear', True), ('Darts', False)])
+    def test_mean_only_dispatch(self, weapon, mean_only):
+        """Test that MEAN_ONLY runs the aggregated blocks, except for weapons with legendary effect with duration."""
+        simulator = DamageSimulator(weapon, Config(MEAN_ONLY=True))
+        with patch.object(simulator, 'simulate_dps_aggregated', return_value={'rounds': 1}) as aggregated, \
+                patch.object(simulator, 'simulate_dps', return_value={'rounds': 2}):
+            assert simulator.run_simulation() == {'rounds': 1 if mean_only else 2}
+        assert aggregated.called == mean_only
+
+    def test_mean_only_results(self):
+        """Test that the aggregated run has the average DPS and statistics, without damage distributions."""
+        cfg = Config(MEAN_ONLY=True, ROUNDS=20000, REL_DPS_ERROR=1e-6)
+        callback = Mock()
+        simulator = DamageSimulator('Scimitar', cfg, progress_callback=callback)
+        with patch('builtins.print'):
+            result = simulator.simulate_dps_aggregated(seed=1)
+        expected = AnalyticEngine(DamageSimulator('Scimitar', cfg)).expected_dps()
+
+        assert result['rounds'] == 20000
+        assert callback.call_count == 20000 // simulator.precision_interval
+        assert result['dps_crits'] == pytest.approx(expected['dps_crits'], rel=0.02)
+        assert result['dps_no_crits'] == pytest.approx(expected['dps_no_crits'], rel=0.02)
+        assert result['dps_crits'] == pytest.approx(simulator.total_dmg / 20000 / 6, abs=0.01)
+        assert result['effective_rounds'] == pytest.approx(20000, rel=0.5)
+        assert 0 < result['dps_error'] < result['dps_crits'] * 0.05
+        assert result['round_damage_summary']['count'] == 0
+        assert result['damage_by_type'] == {}
+        assert result['dps_vs_damage']['x'][-1] == simulator.total_dmg
+        json.dumps(result)
+
+    @pytest.mark.parametrize('weapon, stratified', [('Spear', True), ('Darts', False)])
+    def test_stratified_rolls_config(self, weapon, stratified):
+        """Test that STRATIFIED_ROLLS runs stratified blocks, except for weapons with legendary effect with duration."""
+        cfg = Config(STRATIFIED_ROLLS=True)
+        simulator = DamageSimulator(weapon, cfg)
+        assert simulator.get_batch_engine(seed=1).stratified == stratified
+
+        with patch('builtins.print'):
+            result = simulator.run_simulation()
+        expected = AnalyticEngine(DamageSimulator(weapon, cfg)).expected_dps()
+
+        assert result['rounds'] % simulator.precision_interval == 0
+        assert result['dps_crits'] == pytest.approx(expected['dps_crits'], rel=0.03)
+        assert result['round_damage_summary']['mean'] == pytest.approx(simulator.total_dmg / result['rounds'])
@@ -0,0 +1,89 @@
+"""
+Unit tests for the DamageSketch class from simulator/damage_sketch.py
+
+This test suite covers:
+- Buffering and merging of the streamed values
+- Fixed-bin histogram counts
+- Quantile estimates, compared to the exact quantiles, and bounded memory
+- JSON-serializable summary
+"""
+
+import json
+import pytest
+import numpy as np
+
+from simulator.damage_sketch import DamageSketch
+
+
+@pytest.fixture
+def values():
+    rng = np.random.default_rng(1)
+    return np.round(rng.gamma(3, 100, size=50000))
+
+
+class TestDamageSketch:
+    """Tests for the streaming damage summary."""
+
+    def test_buffer_is_merged(self):
+        sketch = DamageSketch(buffer_size=10)
+        for value in range(25):
+            sketch.add(value)
+
+        assert len(sketch.buffer) == 5
+        assert sketch.count == 20
+        sketch.flush()
+        assert sketch.count == 25 and sketch.buffer == []
+
+    def test_histogram(self):
+        sketch = DamageSketch(bin_width=10)
+        sketch.add_many([0, 5, 9, 10, 35])
+        bin_edges, counts = sketch.histogram()
+
+        assert bin_edges == [0, 10, 20, 30]
+        assert counts == [3, 1, 0, 1]
+
+    def test_histogram_grows(self):
+        sketch = DamageSketch(bin_width=10, buffer_size=2)
+        sketch.add_many([1, 2])
+        sketch.add_many([55, 56])
+        assert sketch.histogram()[1] == [2, 0, 0, 0, 0, 2]
+
+    @pytest.mark.parametrize('q', [0.01, 0.5, 0.9, 0.99])
+    def test_quantiles(self, values, q):
+        """Test that the quantile estimates are within 1% of the value range of the exact quantiles."""
+        sketch = DamageSketch()
+        for value in values.tolist():
+            sketch.add(value)
+
+        assert sketch.quantile(q) == pytest.approx(np.quantile(values, q), abs=0.01 * values.max())
+
+    def test_bounded_memory(self, values):
+        """Test that the number of centroids is bounded by the compression, not the number of values."""
+        sketch = DamageSketch(compression=100)
+        sketch.add_many(values)
+        sketch.flush()
+
+        assert len(sketch.means) <= 100
+        assert sketch.weights.sum() == len(values)
+
+    def test_extremes_are_exact(self, values):
+        sketch = DamageSketch()
+        sketch.add_many(values)
+        assert sketch.quantile(0.0) == values.min()
+        assert sketch.quantile(1.0) == values.max()
+
+    def test_summary(self, values):
+        sketch = DamageSketch()
+        sketch.add_many(values)
+        summary = sketch.to_dict()
+
+        assert summary['count'] == len(values)
+        assert summary['mean'] == pytest.approx(values.mean())
+        assert summary['p50'] <= summary['p90'] <= summary['p99'] <= summary['max']
+        assert sum(summary['counts']) == len(values)
+        json.dumps(summary)
+
+    def test_empty_summary(self):
+        summary = DamageSketch().to_dict()
+        assert summary['count'] == 0
+        assert summary['p50'] is None and summary['mean'] is None
@@ -0,0 +1,162 @@
+"""
+Unit tests for the DamageTables class from simulator/damage_tables.py
+
+This test suite covers:
+- Strength damage halving for dual-wield offhand attacks
+- Critical hit multiplication, and damage excluded from it (massive, sneak, flame weapon)
+- Overwhelm and Devastating Critical bonus damage
+- Legendary "common" damage
+- Roll tables with damage entries merged per die size
+- Extra crit dice tables (shared crit dice mode)
+- Table caching and immutability of the collected damage dictionary
+"""
+
+import pytest
+from copy import deepcopy
+
+from simulator.damage_tables import DamageTables
+from simulator.damage_simulator import DamageSimulator
+from simulator.config import Config
+
+
+@pytest.fixture
+def cfg():
+    return Config()
+
+
+def build_tables(cfg, weapon='Scimitar'):
+    calculator = DamageSimulator(weapon, cfg)
+    return calculator.damage_tables
+
+
+class TestDamageTablesInitialization:
+    """Tests for DamageTables initialization."""
+
+    def test_no_str_index_without_dual_wield(self, cfg):
+        """Test that the STR damage index is only stored when dual-wielding."""
+        assert build_tables(cfg).str_idx is None
+
+    def test_str_index_with_dual_wield(self, cfg):
+        """Test that the STR damage index points to the STR damage entry."""
+        cfg.AB_PROG = '5APR Dual-Wield'
+        tables = build_tables(cfg)
+        assert tables.dmg_dict['physical'][tables.str_idx] == [0, 0, cfg.STR_MOD]
+
+
+class TestGetTables:
+    """Tests for building and caching the per-attack damage tables."""
+
+    def test_ordinary_hit(self, cfg):
+        """Test that an ordinary hit rolls each damage entry once, with on-hit fire as fire."""
+        tables = build_tables(cfg)
+        dmg_dict, dmg_dict_crit_imm = tables.get_tables(False, 1)
+        assert dmg_dict == dmg_dict_crit_imm
+        assert 'massive' not in dmg_dict
+        assert 'fire_fw' not in dmg_dict
+        assert dmg_dict['fire'] == [[1, 4, 10]]
+        assert dmg_dict['physical'] == tables.dmg_dict['physical']
+
+    def test_critical_hit_multiplication(self, cfg):
+        """Test that a critical hit multiplies the damage, except massive and flame weapon damage."""
+        tables = build_tables(cfg)
+        dmg_dict, dmg_dict_crit_imm = tables.get_tables(False, 2)
+        base_physical = tables.dmg_dict['physical']
+        massive = tables.dmg_dict['massive'][0]
+
+        assert len(dmg_dict['physical']) == 2 * len(base_physical) + 1
+        assert dmg_dict['physical'][-1] == massive
+        assert dmg_dict['fire'] == [[1, 4, 10]]
+        assert dmg_dict_crit_imm['physical'] == base_physical
+
+    def test_sneak_attack_not_multiplied(self, cfg):
+        """Test that only the highest sneak attack is added, and not multiplied on a critical hit."""
+        cfg.ADDITIONAL_DAMAGE['Sneak_Attack'][0] = True
+        tables = build_tables(cfg)
+        sneak = max(tables.dmg_dict['sneak'], key=lambda sublist: sublist[0])
+        dmg_dict, dmg_dict_crit_imm = tables.get_tables(False, 2)
+
+        assert dmg_dict['physical'].count(sneak) == 1
+        assert dmg_dict_crit_imm['physical'][-1] == sneak
+
+    def test_offhand_halves_strength(self, cfg):
+        """Test that offhand attacks halve (round down) the STR damage."""
+        cfg.AB_PROG = '5APR Dual-Wield'
+        tables = build_tables(cfg)
+        dmg_dict, _ = tables.get_tables(True, 1)
+        assert dmg_dict['physical'][tables.str_idx] == [0, 0, cfg.STR_MOD // 2]
+
+        dmg_dict, _ = tables.get_tables(False, 1)
+        assert dmg_dict['physical'][tables.str_idx] == [0, 0, cfg.STR_MOD]
+
+    def test_overwhelm_and_devastating_critical(self, cfg):
+        """Test that Overwhelm and Devastating Critical damage is added on a critical hit only."""
+        cfg.OVERWHELM_CRIT = True
+        cfg.DEV_CRIT = True
+        tables = build_tables(cfg)
+        dmg_dict, dmg_dict_crit_imm = tables.get_tables(False, 3)
+
+        assert [2, 6] in dmg_dict['physical']
+        assert dmg_dict['pure'] == [[0, 0, 20]]     # Scimitar is a medium weapon
+        assert [2, 6] not in dmg_dict_crit_imm['physical']
+        assert 'pure' not in dmg_dict_crit_imm
+
+    def test_legend_common_damage(self, cfg):
+        """Test that legendary common damage is added to its damage type, and cached separately."""
+        tables = build_tables(cfg)
+        legend_dmg_common = [0, 0, 'physical']
+        dmg_dict, _ = tables.get_tables(False, 1, legend_dmg_common)
+
+        assert dmg_dict['physical'][-1] == [0, 0]
+        assert legend_dmg_common == [0, 0, 'physical']
+        assert tables.get_tables(False, 1, legend_dmg_common) is tables.get_tables(False, 1, [0, 0, 'physical'])
+        assert tables.get_tables(False, 1) is not tables.get_tables(False, 1, legend_dmg_common)
+
+    def test_tables_are_cached(self, cfg):
+        """Test that the tables are compiled once per (offhand, crit multiplier)."""
+        tables = build_tables(cfg)
+        assert tables.get_tables(False, 2) is tables.get_tables(False, 2)
+        assert tables.get_tables(False, 1) is not tables.get_tables(False, 2)
+
+    def test_merge_dice(self):
+        """Test that damage entries are merged per die size, with the flat damage added to the first entry."""
+        merged = DamageTables.merge_dice({
+            'physical': [[7, 6], [7, 6], [2, 12], [0, 0, 21], [1, 6, 5]],
+            'pure': [[0, 0, 10]],
+        })
+        assert merged == {'physical': [[15, 6, 26], [2, 12, 0]], 'pure': [[0, 0, 10]]}
+
+    def test_roll_tables_match_tables(self, cfg):
+        """Test that the roll tables have the same dice and flat damage totals as the tables."""
+        tables = build_tables(cfg)
+        for crit_multiplier in (1, 2):
+            for dmg_dict, roll_dict in zip(tables.get_tables(False, crit_multiplier),
+                                           tables.get_roll_tables(False, crit_multiplier)):
+                assert dmg_dict.keys() == roll_dict.keys()
+                assert DamageTables.merge_dice(dmg_dict) == roll_dict
+                for dmg_type in dmg_dict:
+                    flat = sum(entry[2] if len(entry) > 2 else 0 for entry in dmg_dict[dmg_type])
+                    assert sum(entry[2] for entry in roll_dict[dmg_type]) == flat
+
+    def test_crit_extra_tables(self, cfg):
+        """Test that crit-immune dice + extra crit dice equal the crit-allowed dice (shared crit dice mode)."""
+        cfg.OVERWHELM_CRIT = True
+        cfg.ADDITIONAL_DAMAGE['Sneak_Attack'][0] = True
+        tables = build_tables(cfg)
+        dmg_dict, dmg_dict_crit_imm = tables.get_tables(False, 2)
+        dmg_extra = tables.get_crit_extra_tables(False, 2)
+
+        for dmg_type, dmg_list in dmg_dict.items():
+            combined = {dmg_type: list(dmg_dict_crit_imm.get(dmg_type, [])) + dmg_extra.get(dmg_type, [])}
+            assert DamageTables.merge_dice(combined) == DamageTables.merge_dice({dmg_type: dmg_list})
+        assert 'fire' not in dmg_extra     # Flame weapon damage is not multiplied
+        assert tables.get_crit_extra_tables(False, 2) is dmg_extra
+
+    def test_collected_damage_not_modified(self, cfg):
+        """Test that compiling the tables doesn't modify the collected damage dictionary."""
+        cfg.AB_PROG = '5APR Dual-Wield'
+        tables = build_tables(cfg)
+        dmg_dict_before = deepcopy(tables.dmg_dict)
+        for offhand in (False, True):
+            for crit_multiplier in (1, 2, 3):
+                tables.get_tables(offhand, crit_multiplier)
+        assert tables.dmg_dict == dmg_dict_before
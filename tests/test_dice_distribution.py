@@ -0,0 +1,152 @@
+"""
+Unit tests for the dice distribution helpers from simulator/dice_distribution.py
+
+This test suite covers:
+- Splitting damage entries into (dice, sides, flat)
+- Exact PMF of NdS+flat damage rolls (normalization, support, mean)
+- PMF caching (bounded, keyed by dice and sides only) and read-only arrays
+- Convolution of multiple damage entries
+- Average value of damage entries
+- Alias-method samplers (support, exact distribution, scalar vs. vectorized sampling, caching)
+"""
+
+import pytest
+import numpy as np
+
+from simulator.dice_distribution import split_dmg_entry, dice_sum_pmf, dice_pmf, entries_pmf, entry_mean, AliasSampler, get_alias_sampler
+
+
+class TestSplitDmgEntry:
+    """Tests for splitting damage entries."""
+
+    def test_entry_without_flat(self):
+        """Test that a [dice, sides] entry gets a flat damage of 0."""
+        assert split_dmg_entry([2, 6]) == (2, 6, 0)
+
+    def test_entry_with_flat(self):
+        """Test that a [dice, sides, flat] entry is split as is."""
+        assert split_dmg_entry([1, 8, 5]) == (1, 8, 5)
+
+
+class TestDicePmf:
+    """Tests for the exact distribution of a single damage roll."""
+
+    def test_single_die(self):
+        """Test that 1d6 is uniform on 1..6."""
+        pmf = dice_pmf(1, 6)
+        assert len(pmf) == 7
+        assert pmf[0] == 0.0
+        assert np.allclose(pmf[1:], 1 / 6)
+
+    def test_two_dice(self):
+        """Test the triangular distribution of 2d6."""
+        pmf = dice_pmf(2, 6)
+        assert pmf.sum() == pytest.approx(1.0)
+        assert pmf[7] == pytest.approx(6 / 36)
+        assert pmf[2] == pytest.approx(1 / 36)
+        assert pmf[12] == pytest.approx(1 / 36)
+
+    def test_flat_damage_shifts_support(self):
+        """Test that flat damage shifts the distribution."""
+        pmf = dice_pmf(1, 4, 10)
+        assert np.all(pmf[:11] == 0.0)
+        assert np.allclose(pmf[11:], 0.25)
+
+    def test_flat_only(self):
+        """Test that a [0, 0, flat] entry is a point mass."""
+        pmf = dice_pmf(0, 0, 21)
+        assert pmf[21] == 1.0
+        assert pmf.sum() == 1.0
+
+    def test_mean_matches_entry_mean(self):
+        """Test that the PMF mean equals the closed form average."""
+        pmf = dice_pmf(3, 8, 4)
+        assert np.dot(pmf, np.arange(len(pmf))) == pytest.approx(entry_mean([3, 8, 4]))
+
+    def test_pmf_is_cached_and_read_only(self):
+        """Test that PMFs are cached and can't be modified."""
+        assert dice_pmf(2, 6) is dice_pmf(2, 6)
+        with pytest.raises(ValueError):
+            dice_pmf(2, 6)[0] = 1.0
+        with pytest.raises(ValueError):
+            dice_pmf(2, 6, 5)[0] = 1.0
+
+    def test_flat_damage_not_cached(self):
+        """Test that flat damage doesn't add cache entries (flat totals are build specific)."""
+        dice_sum_pmf.cache_clear()
+        for flat_dmg in range(100):
+            dice_pmf(2, 6, flat_dmg)
+        assert dice_sum_pmf.cache_info().currsize == 1
+        assert dice_sum_pmf.cache_info().maxsize is not None
+
+
+class TestEntriesPmf:
+    """Tests for the distribution of summed damage entries."""
+
+    def test_sum_of_entries(self):
+        """Test that summing 1d6 and [0, 0, 3] shifts the 1d6 distribution."""
+        pmf = entries_pmf([[1, 6], [0, 0, 3]])
+        assert np.allclose(pmf[4:10], 1 / 6)
+        assert pmf.sum() == pytest.approx(1.0)
+
+    def test_empty_list(self):
+        """Test that no entries means 0 damage."""
+        pmf = entries_pmf([])
+        assert pmf[0] == 1.0
+
+
+class TestEntryMean:
+    """Tests for the average value of a damage entry."""
+
+    def test_dice_and_flat(self):
+        """Test the average of 2d6+5."""
+        assert entry_mean([2, 6, 5]) == 12.0
+
+    def test_flat_only(self):
+        """Test the average of a flat damage entry."""
+        assert entry_mean([0, 0, 7]) == 7
+
+
+class TestAliasSampler:
+    """Tests for the alias-method samplers of damage rolls."""
+
+    def test_support(self):
+        """Test that the sampler covers exactly the possible damage values."""
+        sampler = get_alias_sampler(7, 6)
+        assert sampler.offset == 7
+        assert sampler.size == 36
+        uniforms = np.linspace(0, 1, 10001)[:-1]
+        samples = sampler.sample_many(uniforms)
+        assert samples.min() >= 7
+        assert samples.max() <= 42
+
+    def test_exact_distribution(self):
+        """Test that evenly spaced uniform draws reproduce the exact distribution."""
+        pmf = dice_pmf(3, 4)
+        sampler = AliasSampler(pmf)
+        num_draws = 64 * 1000
+        uniforms = (np.arange(num_draws) + 0.5) / num_draws
+        counts = np.bincount(sampler.sample_many(uniforms), minlength=len(pmf))
+        assert np.allclose(counts / num_draws, pmf, atol=1e-3)
+
+    def test_scalar_matches_vectorized(self):
+        """Test that scalar and vectorized sampling agree."""
+        sampler = get_alias_sampler(20, 6)
+        uniforms = np.random.default_rng(0).random(1000)
+        assert [sampler.sample(u) for u in uniforms] == sampler.sample_many(uniforms).tolist()
+
+    def test_uniform_close_to_one(self):
+        """Test that a uniform draw close to 1 stays within the damage range."""
+        sampler = get_alias_sampler(2, 6)
+        assert 2 <= sampler.sample(np.nextafter(1.0, 0.0)) <= 12
+
+    def test_flat_only(self):
+        """Test that a flat damage entry (no dice) always samples 0, the flat damage is added by the caller."""
+        sampler = get_alias_sampler(0, 0)
+        assert sampler.sample(0.0) == 0
+        assert sampler.sample(0.99) == 0
+
+    def test_sampler_is_cached(self):
+        """Test that samplers are compiled once per damage entry."""
+        assert get_alias_sampler(7, 6) is get_alias_sampler(7, 6)
+        assert get_alias_sampler.cache_info().maxsize is not None
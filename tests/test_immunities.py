@@ -0,0 +1,103 @@
+"""
+Unit tests for the ImmunityTable class from simulator/immunities.py
+
+This test suite covers:
+- Damage type indices, including the fire_fw and physical aliases
+- Precomputed immunity vectors with legendary immunity factors
+- Scalar and vectorized floor\\min-1 immunity and vulnerability rules
+- Immunity reduction of damage dictionaries
+"""
+
+import pytest
+import numpy as np
+
+from simulator.immunities import ImmunityTable, DAMAGE_TYPE_ALIASES
+from simulator.config import Config
+
+
+@pytest.fixture
+def table():
+    return ImmunityTable(Config().TARGET_IMMUNITIES)
+
+
+class TestIndices:
+    """Tests for the damage type indices."""
+
+    def test_aliases_share_index(self, table):
+        """Test that the aliases map to the index of their damage type."""
+        for alias, dmg_type_name in DAMAGE_TYPE_ALIASES.items():
+            assert table.get_index(alias) == table.get_index(dmg_type_name)
+
+    def test_missing_damage_type(self, table):
+        """Test that an unknown damage type raises KeyError."""
+        with pytest.raises(KeyError):
+            table.get_index('unknown')
+
+    def test_missing_alias_target(self):
+        """Test that an alias of a damage type missing from the target immunities raises KeyError."""
+        table = ImmunityTable({'fire': 0.1})
+        with pytest.raises(KeyError):
+            table.get_index('slashing')
+
+
+class TestVectors:
+    """Tests for the precomputed immunity vectors."""
+
+    def test_base_vector(self, table):
+        immunities_list, immunities = table.get_vector()
+        assert immunities_list == list(Config().TARGET_IMMUNITIES.values())
+        np.testing.assert_array_equal(immunities, immunities_list)
+
+    def test_immunity_factors(self, table):
+        """Test that immunity factors (e.g., legendary Crushing Blow) are added to the target immunity."""
+        immunities_list, _ = table.get_vector({'physical': -0.05})
+        assert immunities_list[table.get_index('physical')] == 0.25 + -0.05
+        assert immunities_list[table.get_index('fire')] == 0.25
+
+    def test_vectors_are_cached(self, table):
+        assert table.get_vector({'physical': -0.05}) is table.get_vector({'physical': -0.05})
+        assert table.get_vector() is table.get_vector({})
+
+    def test_unknown_factor(self, table):
+        with pytest.raises(KeyError):
+            table.get_vector({'unknown': 0.1})
+
+    def test_get_immunity(self, table):
+        assert table.get_immunity('bludgeoning') == 0.25
+        assert table.get_immunity('fire_fw', {'fire': 0.1}) == pytest.approx(0.35)
+
+
+class TestRules:
+    """Tests for the immunity and vulnerability rules."""
+
+    @pytest.mark.parametrize('dmg_value, immunity, expected', [
+        (10, 0.25, 8),      # floor(2.5) = 2 reduced
+        (3, 0.25, 2),       # floor(0.75) = 0, at least 1 reduced
+        (0, 0.25, 0),       # Never below 0
+        (10, 1.0, 0),
+        (10, -0.1, 11),     # Vulnerability
+        (15, -0.1, 16),     # floor(1.5) = 1 added
+        (10, 0.0, 10),
+    ])
+    def test_scalar_rules(self, dmg_value, immunity, expected):
+        assert ImmunityTable.apply(dmg_value, immunity) == expected
+
+    @pytest.mark.parametrize('immunity', [0.25, 0.1, 0.0, -0.05, -0.5, 1.0])
+    def test_vectorized_matches_scalar(self, immunity):
+        dmg_values = np.arange(0, 80)
+        expected = [ImmunityTable.apply(int(v), immunity) for v in dmg_values]
+        np.testing.assert_array_equal(ImmunityTable.apply_array(dmg_values, immunity), expected)
+
+
+class TestReduce:
+    """Tests for the reduction of damage dictionaries."""
+
+    def test_reduce_in_place(self, table):
+        damage_sums = {'slashing': 10, 'fire_fw': 4, 'pure': 7}
+        result = table.reduce(damage_sums, {})
+        assert result is damage_sums
+        assert result == {'slashing': 8, 'fire_fw': 3, 'pure': 7}
+
+    def test_reduce_with_factors(self, table):
+        result = table.reduce({'physical': 40}, {'physical': -0.05})
+        assert result == {'physical': 32}   # 20% immunity, floor(8.0) reduced
@@ -0,0 +1,107 @@
+"""
+Unit tests for the LegendChain class from simulator/legend_chain.py
+
+This test suite covers:
+- Exact proc chance of the d100 legendary proc roll
+- Per-state hit and crit chances, matching the AttackSimulator theoretical chances
+- Stationary counter distributions (valid distributions, consistent over the round)
+- Steady-state uptime, compared to the batch scan of the effect windows
+- Theoretical legend proc rate (percentage and on-crit procs)
+"""
+
+import pytest
+import numpy as np
+
+from simulator.legend_chain import LegendChain
+from simulator.damage_simulator import DamageSimulator
+from simulator.config import Config
+
+
+def build_chain(weapon='Darts', target_ac=65):
+    calculator = DamageSimulator(weapon, Config(TARGET_AC=target_ac))
+    return LegendChain(calculator.attack_sim, calculator.legend_effect), calculator
+
+
+class TestOutcomeChances:
+    """Tests for the proc and per-state outcome chances."""
+
+    def test_proc_chance(self):
+        """Test that a 5% proc is exactly 5 out of 100 d100 rolls."""
+        chain, _ = build_chain('Darts')
+        assert chain.proc_chance == pytest.approx(0.05)
+
+    def test_inactive_chances_match_attack_simulator(self):
+        """Test that the inactive state chances are the AttackSimulator theoretical chances."""
+        chain, calculator = build_chain('Light Flail')
+        np.testing.assert_allclose(chain.inactive_chances[0], calculator.attack_sim.hit_chance_list)
+        np.testing.assert_allclose(chain.inactive_chances[1], calculator.attack_sim.crit_chance_list)
+
+    @pytest.mark.parametrize('weapon', ['Darts', 'Light Flail', 'Greatsword_Legion'])
+    def test_active_state_hits_more(self, weapon):
+        """Test that the AB bonus and Sunder raise the hit chance while active."""
+        chain, _ = build_chain(weapon)
+        assert np.all(chain.active_chances[0] >= chain.inactive_chances[0])
+        assert np.any(chain.active_chances[0] > chain.inactive_chances[0])
+
+    def test_club_stone_chances_unchanged(self):
+        """Test that effects without AB\\AC changes keep the same chances in both states."""
+        chain, _ = build_chain('Club_Stone')
+        np.testing.assert_allclose(chain.active_chances[0], chain.inactive_chances[0])
+
+
+class TestStationaryDistribution:
+    """Tests for the solved counter distributions."""
+
+    @pytest.mark.parametrize('weapon', ['Darts', 'Club_Stone', 'Heavy Flail'])
+    def test_valid_distributions(self, weapon):
+        """Test that each per-slot distribution sums to 1."""
+        chain, _ = build_chain(weapon)
+        assert chain.counter_dists.shape == (chain.attacks_per_round, chain.duration + 1)
+        np.testing.assert_allclose(chain.counter_dists.sum(axis=1), 1.0)
+
+    def test_round_is_stationary(self):
+        """Test that a full round of transitions maps the first attack distribution onto itself."""
+        chain, _ = build_chain('Darts')
+        dist = chain.counter_dists[0]
+        for attack_idx in range(chain.attacks_per_round):
+            dist = dist @ chain.transition_matrix(attack_idx)
+        np.testing.assert_allclose(dist, chain.counter_dists[0], atol=1e-12)
+
+    def test_no_duration_effect(self):
+        """Test that weapons without duration effects have zero uptime."""
+        for weapon in ('Scimitar', 'Longsword'):
+            chain, _ = build_chain(weapon)
+            assert chain.get_uptime() == 0.0
+            assert not chain.active_chances_per_attack.any()
+
+    @pytest.mark.parametrize('weapon', ['Darts', 'Club_Stone'])
+    def test_uptime_matches_scan(self, weapon):
+        """Test that the uptime agrees with the batch scan of the effect windows (within 1%)."""
+        chain, calculator = build_chain(weapon)
+        attacks_per_round, num_rounds = chain.attacks_per_round, 200000
+        num_attacks = attacks_per_round * num_rounds
+        rng = np.random.default_rng(5)
+        _, active, _ = calculator.legend_effect.scan_windows(
+            np.tile(np.arange(attacks_per_round), num_rounds), rng.integers(1, 21, num_attacks),
+            rng.integers(1, 21, num_attacks), rng.integers(1, 101, num_attacks))
+
+        assert active.mean() == pytest.approx(chain.get_uptime(), abs=0.01)
+
+
+class TestLegendProcRate:
+    """Tests for the theoretical legend proc rate."""
+
+    def test_percentage_proc(self):
+        """Test that percentage procs are rolled on every hit."""
+        chain, _ = build_chain('Darts')
+        assert chain.get_legend_proc_rate() == pytest.approx(0.05)
+
+    def test_on_crit_proc(self):
+        """Test that on-crit procs are the crits out of the hits."""
+        chain, calculator = build_chain('Longsword')
+        expected = calculator.attack_sim.get_crit_chance() / calculator.attack_sim.get_hit_chance()
+        assert chain.get_legend_proc_rate() == pytest.approx(expected)
+
+    def test_no_legend_property(self):
+        chain, _ = build_chain('Scimitar')
+        assert chain.get_legend_proc_rate() == 0.0
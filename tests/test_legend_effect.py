@@ -11,17 +11,20 @@ This test suite covers:
 - Club_Stone immunity reduction
 - Duration tracking and attacks remaining
 - Edge cases and boundary conditions
+- Legendary effect registry, resolved once per weapon
+- Batch scan of the legendary effect windows (scan_windows, get_active_windows)
 """
 
 import pytest
 import random
 from unittest.mock import Mock, patch, MagicMock
 from copy import deepcopy
+import numpy as np
 
-from simulator.legend_effect import LegendEffect
+from simulator.legend_effect import LegendEffect, LegendEffectSpec, LEGEND_EFFECTS, NO_LEGEND_EFFECT, get_legend_effect_spec
 from simulator.weapon import Weapon
 from simulator.config import Config
-from simulator.attack_simulator import AttackSimulator
+from simulator.attack_simulator import AttackSimulator, MISS, CRITICAL_HIT
 from simulator.stats_collector import StatsCollector
 
 
@@ -616,6 +619,158 @@ class TestLegendEffectEdgeCases:
         assert legend_effect.legend_attacks_left > 0
 
 
+class TestLegendEffectRegistry:
+    """Tests for the legendary effect registry."""
+
+    @pytest.mark.parametrize("weapon_name, effect_name", [
+        ("Darts", "perfect_strike"),
+        ("Light Flail", "sunder"),
+        ("Greatsword_Legion", "sunder"),
+        ("Club_Stone", "crushing_blow"),
+        ("Heavy Flail", "common_damage"),
+    ])
+    def test_weapon_effects(self, weapon_name, effect_name):
+        """Test that weapons resolve to the effect of their legendary entry."""
+        weapon = Weapon(weapon_name, Config())
+        assert get_legend_effect_spec(weapon) is LEGEND_EFFECTS[effect_name]
+
+    @pytest.mark.parametrize("weapon_name", ["Scimitar", "Longsword", "Kama", "Kukri_Inconseq"])
+    def test_no_modeled_effect(self, weapon_name):
+        """Test that weapons without a (modeled) duration effect resolve to the empty effect."""
+        weapon = Weapon(weapon_name, Config())
+        assert get_legend_effect_spec(weapon) == NO_LEGEND_EFFECT
+
+    def test_resolved_once(self):
+        """Test that the effect is stored on the LegendEffect, and drives the modifiers."""
+        cfg = Config()
+        weapon = Weapon("Darts", cfg)
+        legend_effect = LegendEffect(StatsCollector(), weapon, AttackSimulator(weapon, cfg))
+        legend_effect.effect = LegendEffectSpec(ab_bonus=3, ac_reduction=-1, immunity_factors={'fire': -0.1})
+        legend_effect.legend_attacks_left = 1
+
+        assert legend_effect.ab_bonus() == 3
+        assert legend_effect.ac_reduction() == -1
+        assert legend_effect.get_immunity_factors() == {'fire': -0.1}
+
+    def test_immunity_factors_are_copies(self):
+        """Test that the returned immunity factors can be modified without changing the registry."""
+        cfg = Config()
+        weapon = Weapon("Club_Stone", cfg)
+        legend_effect = LegendEffect(StatsCollector(), weapon, AttackSimulator(weapon, cfg))
+        legend_effect.get_immunity_factors()['physical'] = 1.0
+
+        assert LEGEND_EFFECTS['crushing_blow'].immunity_factors == {'physical': -0.05}
+
+
+def sequential_windows(legend_effect, attack_idxs, rolls, threat_rolls, proc_rolls):
+    """Attack by attack reference of scan_windows, same rules as get_legend_damage"""
+    proc = legend_effect.weapon.purple_props['legendary']['proc']
+    duration = legend_effect.attack_sim.attacks_per_round * legend_effect.legend_effect_duration
+    inactive_tables = legend_effect.attack_sim.get_outcome_tables(0, 0)[0]
+    active_tables = legend_effect.attack_sim.get_outcome_tables(legend_effect.effect.ab_bonus,
+                                                                legend_effect.effect.ac_reduction)[0]
+    attacks_left = legend_effect.legend_attacks_left
+    outcomes, active, procs = [], [], []
+    for attack_idx, roll, threat_roll, proc_roll in zip(attack_idxs, rolls, threat_rolls, proc_rolls):
+        is_active = attacks_left > 0
+        tables = active_tables if is_active else inactive_tables
+        outcome = tables[attack_idx, roll, threat_roll]
+        is_proc = outcome != MISS and proc_roll > 100 - (proc * 100)
+        if is_proc:
+            attacks_left = duration
+        elif outcome != MISS and attacks_left > 0:
+            attacks_left -= 1
+        outcomes.append(outcome)
+        active.append(is_active)
+        procs.append(is_proc)
+    return np.array(outcomes), np.array(active), np.array(procs), attacks_left
+
+
+def random_block(attacks_per_round, num_rounds, seed):
+    rng = np.random.default_rng(seed)
+    num_attacks = attacks_per_round * num_rounds
+    attack_idxs = np.tile(np.arange(attacks_per_round), num_rounds)
+    return (attack_idxs, rng.integers(1, 21, num_attacks), rng.integers(1, 21, num_attacks),
+            rng.integers(1, 101, num_attacks))
+
+
+class TestScanWindows:
+    """Tests for the batch scan of the legendary effect windows."""
+
+    def make_legend_effect(self, weapon_name, target_ac=65):
+        cfg = Config(TARGET_AC=target_ac)
+        weapon = Weapon(weapon_name, cfg)
+        attack_sim = AttackSimulator(weapon, cfg)
+        return LegendEffect(StatsCollector(), weapon, attack_sim)
+
+    @pytest.mark.parametrize("weapon_name", ["Darts", "Light Flail", "Greatsword_Legion", "Club_Stone", "Heavy Flail"])
+    @pytest.mark.parametrize("target_ac", [45, 65, 80])
+    def test_matches_sequential_reference(self, weapon_name, target_ac):
+        """Test that the batch scan gives the same outcomes, windows and procs as the attack by attack rules."""
+        legend_effect = self.make_legend_effect(weapon_name, target_ac)
+        block = random_block(legend_effect.attack_sim.attacks_per_round, 300, seed=target_ac)
+
+        expected_outcomes, expected_active, expected_procs, expected_left = sequential_windows(legend_effect, *block)
+        outcomes, active, procs = legend_effect.scan_windows(*block)
+
+        np.testing.assert_array_equal(outcomes, expected_outcomes)
+        np.testing.assert_array_equal(active, expected_active)
+        np.testing.assert_array_equal(procs, expected_procs)
+        assert legend_effect.legend_attacks_left == expected_left
+        assert legend_effect.stats.legend_procs == int(expected_procs.sum())
+
+    def test_state_carries_over_blocks(self):
+        """Test that legend_attacks_left carries over from one block to the next."""
+        legend_effect = self.make_legend_effect("Darts")
+        reference = self.make_legend_effect("Darts")
+        attacks_per_round = legend_effect.attack_sim.attacks_per_round
+
+        for seed in range(5):
+            block = random_block(attacks_per_round, 50, seed)
+            expected_outcomes, expected_active, _, expected_left = sequential_windows(reference, *block)
+            reference.legend_attacks_left = expected_left
+            outcomes, active, _ = legend_effect.scan_windows(*block)
+
+            np.testing.assert_array_equal(outcomes, expected_outcomes)
+            np.testing.assert_array_equal(active, expected_active)
+            assert legend_effect.legend_attacks_left == expected_left
+
+    def test_fallback_matches_fixed_point(self):
+        """Test that the segment by segment fallback gives the same results."""
+        legend_effect = self.make_legend_effect("Light Flail")
+        fallback = self.make_legend_effect("Light Flail")
+        block = random_block(legend_effect.attack_sim.attacks_per_round, 300, seed=3)
+
+        results = legend_effect.scan_windows(*block)
+        fallback_results = fallback.scan_windows(*block, max_iterations=0)
+
+        for result, fallback_result in zip(results, fallback_results):
+            np.testing.assert_array_equal(result, fallback_result)
+        assert legend_effect.legend_attacks_left == fallback.legend_attacks_left
+        assert legend_effect.stats.legend_procs == fallback.stats.legend_procs
+
+    def test_on_crit_proc(self):
+        """Test that on-crit legendary properties proc on every critical hit, without windows."""
+        legend_effect = self.make_legend_effect("Longsword")
+        block = random_block(legend_effect.attack_sim.attacks_per_round, 200, seed=1)
+
+        outcomes, active, procs = legend_effect.scan_windows(*block)
+
+        np.testing.assert_array_equal(procs, outcomes == CRITICAL_HIT)
+        assert not active.any()
+        assert legend_effect.stats.legend_procs == int(procs.sum())
+
+    def test_active_windows_counter(self):
+        """Test the window counter: reset on proc, decremented by the other hits."""
+        hits = np.array([1, 1, 0, 1, 1, 1, 1, 0], dtype=bool)
+        procs = np.array([0, 1, 0, 0, 0, 0, 0, 0], dtype=bool)
+
+        active, attacks_left = LegendEffect.get_active_windows(hits, procs, attacks_left=1, duration=3)
+
+        np.testing.assert_array_equal(active, [True, False, True, True, True, True, False, False])
+        assert attacks_left == 0
+
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
 
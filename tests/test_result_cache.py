@@ -0,0 +1,157 @@
+"""
+Unit tests for the ResultCache class from simulator/result_cache.py
+
+This test suite covers:
+- Cache keys (deterministic, independent of dict ordering, weapon and config dependent)
+- Storing and loading simulation results
+- Server-side copies of the calculations (results, config and time to kill per results ID)
+- Real job tracking (preemption of speculative jobs), heartbeats and expiry of jobs killed without ending
+"""
+
+import pytest
+import time
+import diskcache
+from dataclasses import asdict
+
+from simulator.result_cache import ResultCache
+from simulator.config import Config
+
+
+@pytest.fixture
+def result_cache(tmp_path):
+    with diskcache.Cache(str(tmp_path)) as cache:
+        yield ResultCache(cache)
+
+
+@pytest.fixture
+def user_cfg():
+    return asdict(Config())
+
+
+class TestMakeKey:
+    """Tests for the cache keys."""
+
+    def test_key_is_deterministic(self, user_cfg):
+        """Test that the same weapon and config give the same key, regardless of dict ordering."""
+        reversed_cfg = dict(reversed(list(user_cfg.items())))
+        assert ResultCache.make_key('Spear', user_cfg) == ResultCache.make_key('Spear', reversed_cfg)
+
+    def test_key_depends_on_weapon(self, user_cfg):
+        """Test that different weapons give different keys."""
+        assert ResultCache.make_key('Spear', user_cfg) != ResultCache.make_key('Scythe', user_cfg)
+
+    def test_key_depends_on_config(self, user_cfg):
+        """Test that a config change gives a different key."""
+        changed_cfg = dict(user_cfg, TARGET_AC=user_cfg['TARGET_AC'] + 1)
+        assert ResultCache.make_key('Spear', user_cfg) != ResultCache.make_key('Spear', changed_cfg)
+
+
+class TestStoreResults:
+    """Tests for storing and loading simulation results."""
+
+    def test_missing_results(self, result_cache, user_cfg):
+        """Test that missing results return None."""
+        assert result_cache.get('Spear', user_cfg) is None
+        assert not result_cache.contains('Spear', user_cfg)
+
+    def test_set_and_get(self, result_cache, user_cfg):
+        """Test that stored results are loaded for the same weapon and config only."""
+        results = {'avg_dps_both': 50.0, 'dps_vs_damage': {'x': [294, 600], 'y': [49.0, 50.0]}}
+        result_cache.set('Spear', user_cfg, results)
+
+        assert result_cache.contains('Spear', user_cfg)
+        assert result_cache.get('Spear', user_cfg) == results
+        assert result_cache.get('Scythe', user_cfg) is None
+
+
+class TestRuns:
+    """Tests for the server-side copies of the calculations."""
+
+    def test_missing_run(self, result_cache):
+        assert result_cache.get_run('unknown') is None
+        assert result_cache.get_run(None) is None
+        assert result_cache.get_run_results('unknown', 'Spear') == (None, None)
+
+    def test_set_and_get(self, result_cache, user_cfg):
+        """Test that a calculation is loaded with the config it was simulated with."""
+        results_dict = {'Spear': {'avg_dps_both': 50.0}, 'Scythe': {'avg_dps_both': 55.0}}
+        result_cache.set_run('abc', results_dict, user_cfg)
+
+        assert result_cache.get_run('abc') == {'results': results_dict, 'config': user_cfg, 'ttk': {}}
+        assert result_cache.get_run_results('abc', 'Scythe') == ({'avg_dps_both': 55.0}, user_cfg)
+        assert result_cache.get_run_results('abc', 'Kama') == (None, None)
+        assert result_cache.get_run_ttk('abc', 'Spear') is None
+
+    def test_time_to_kill(self, result_cache, user_cfg):
+        """Test that the time to kill results are stored with the calculation."""
+        ttk_dict = {'Spear': {'crits': {'mean_rounds': 20.0}, 'crit_imm': {'mean_rounds': 25.0}}}
+        result_cache.set_run('abc', {'Spear': {'avg_dps_both': 50.0}}, user_cfg, ttk_dict)
+
+        assert result_cache.get_run_ttk('abc', 'Spear') == ttk_dict['Spear']
+        assert result_cache.get_run_ttk('abc', 'Scythe') is None
+        assert result_cache.get_run_ttk('unknown', 'Spear') is None
+
+
+class TestRealJobs:
+    """Tests for the real job tracking."""
+
+    def test_no_real_job(self, result_cache):
+        """Test that no real job is running initially."""
+        assert not result_cache.real_job_running()
+
+    def test_begin_and_end(self, result_cache):
+        """Test that real jobs are running until all of them end."""
+        first_job = result_cache.begin_real_job()
+        second_job = result_cache.begin_real_job()
+        assert first_job != second_job
+        assert result_cache.real_job_running()
+
+        result_cache.end_real_job(first_job)
+        assert result_cache.real_job_running()
+
+        result_cache.end_real_job(second_job)
+        assert not result_cache.real_job_running()
+
+    def test_killed_job_expires(self, result_cache, monkeypatch):
+        """Test that a job that never calls end_real_job (killed on cancel) stops preempting after its TTL."""
+        now = time.time()
+        monkeypatch.setattr(time, 'time', lambda: now)
+        result_cache.begin_real_job()
+        assert result_cache.real_job_running()
+
+        monkeypatch.setattr(time, 'time', lambda: now + result_cache.job_ttl + 1)
+        assert not result_cache.real_job_running()
+
+    def test_killed_job_survives_restart(self, tmp_path, monkeypatch):
+        """Test that a job killed before a restart doesn't preempt the jobs of the new process."""
+        now = time.time()
+        monkeypatch.setattr(time, 'time', lambda: now)
+        with diskcache.Cache(str(tmp_path)) as cache:
+            ResultCache(cache).begin_real_job()
+
+        monkeypatch.setattr(time, 'time', lambda: now + 3600)
+        with diskcache.Cache(str(tmp_path)) as cache:
+            assert not ResultCache(cache).real_job_running()
+
+    def test_heartbeat_extends_job(self, result_cache, monkeypatch):
+        """Test that heartbeats keep a long job running past its initial TTL."""
+        now = time.time()
+        monkeypatch.setattr(time, 'time', lambda: now)
+        job_id = result_cache.begin_real_job()
+        for step in range(1, 5):
+            monkeypatch.setattr(time, 'time', lambda: now + step * result_cache.job_ttl / 2)
+            result_cache.heartbeat_real_job(job_id)
+            assert result_cache.real_job_running()
+
+        result_cache.end_real_job(job_id)
+        assert not result_cache.real_job_running()
+
+    def test_expired_jobs_are_dropped(self, result_cache, monkeypatch):
+        """Test that expired jobs are removed from the store when another job starts."""
+        now = time.time()
+        monkeypatch.setattr(time, 'time', lambda: now)
+        stale_job = result_cache.begin_real_job()
+
+        monkeypatch.setattr(time, 'time', lambda: now + result_cache.job_ttl + 1)
+        result_cache.begin_real_job()
+        assert stale_job not in result_cache.cache.get(ResultCache.REAL_JOBS_KEY)
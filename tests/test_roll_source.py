@@ -0,0 +1,128 @@
+"""
+Unit tests for the roll sources from simulator/roll_source.py
+
+This test suite covers:
+- Default RollSource (Python's random module, patchable in tests)
+- BufferedRollSource roll ranges and uniformity
+- Block refills and shared streams per die size
+- Alias sampling of damage rolls with many dice
+- Reproducibility with a seed
+- Integration with AttackSimulator, LegendEffect and DamageSimulator
+"""
+
+import pytest
+import random
+from collections import Counter
+from unittest.mock import patch
+
+from simulator.roll_source import RollSource, BufferedRollSource
+from simulator.attack_simulator import AttackSimulator
+from simulator.legend_effect import LegendEffect
+from simulator.damage_simulator import DamageSimulator
+from simulator.stats_collector import StatsCollector
+from simulator.weapon import Weapon
+from simulator.config import Config
+
+
+class TestRollSource:
+    """Tests for the default (Python's random module) roll source."""
+
+    def test_rolls_in_range(self):
+        """Test that all rolls are within the die range."""
+        roll_source = RollSource()
+        for _ in range(200):
+            assert 1 <= roll_source.d20() <= 20
+            assert 1 <= roll_source.d100() <= 100
+            assert 2 <= roll_source.roll_dice(2, 6) <= 12
+
+    def test_uses_random_randint(self):
+        """Test that rolls can be patched via random.randint."""
+        with patch('random.randint', return_value=7):
+            roll_source = RollSource()
+            assert roll_source.d20() == 7
+            assert roll_source.roll_dice(3, 8) == 21
+
+
+class TestBufferedRollSource:
+    """Tests for the buffered (bulk pre-generated) roll source."""
+
+    def test_rolls_in_range(self):
+        """Test that all rolls are within the die range, including across block refills."""
+        roll_source = BufferedRollSource(seed=1, block_size=64)
+        d20_rolls = [roll_source.d20() for _ in range(1000)]
+        d100_rolls = [roll_source.d100() for _ in range(1000)]
+
+        assert min(d20_rolls) == 1 and max(d20_rolls) == 20
+        assert min(d100_rolls) >= 1 and max(d100_rolls) <= 100
+        assert all(isinstance(roll, int) for roll in d20_rolls)
+
+    def test_d20_is_uniform(self):
+        """Test that the d20 rolls are (roughly) uniform."""
+        roll_source = BufferedRollSource(seed=2)
+        counts = Counter(roll_source.d20() for _ in range(40000))
+        assert len(counts) == 20
+        for count in counts.values():
+            assert count == pytest.approx(2000, rel=0.1)
+
+    def test_roll_dice_sum(self):
+        """Test that dice sums are within range and have the expected average."""
+        roll_source = BufferedRollSource(seed=3)
+        rolls = [roll_source.roll_dice(7, 6) for _ in range(5000)]
+        assert min(rolls) >= 7 and max(rolls) <= 42
+        assert sum(rolls) / len(rolls) == pytest.approx(24.5, rel=0.02)
+
+    def test_roll_dice_with_alias_sampler(self):
+        """Test that many dice are rolled with the alias sampler, including the flat damage."""
+        roll_source = BufferedRollSource(seed=3, alias_min_dice=4)
+        rolls = [roll_source.roll_dice(20, 6, 5) for _ in range(5000)]
+        assert min(rolls) >= 25 and max(rolls) <= 125
+        assert sum(rolls) / len(rolls) == pytest.approx(75.0, rel=0.01)
+        assert 6 not in roll_source._streams     # d6 rolls are not used for the alias sampler
+
+    def test_roll_dice_flat_damage(self):
+        """Test that flat damage is added to the dice rolls."""
+        roll_source = BufferedRollSource(seed=3)
+        assert 6 <= roll_source.roll_dice(1, 4, 5) <= 9
+
+    def test_streams_are_shared_per_die_size(self):
+        """Test that a single stream is created per die size."""
+        roll_source = BufferedRollSource(seed=4)
+        assert roll_source.get_stream(6) is roll_source.get_stream(6)
+        assert roll_source.get_stream(20) is roll_source._d20
+
+    def test_seed_is_reproducible(self):
+        """Test that the same seed yields the same rolls."""
+        rolls_1 = BufferedRollSource(seed=5, block_size=16)
+        rolls_2 = BufferedRollSource(seed=5, block_size=16)
+        assert [rolls_1.d20() for _ in range(100)] == [rolls_2.d20() for _ in range(100)]
+
+
+class TestRollSourceIntegration:
+    """Tests for the roll source dependency of the simulator classes."""
+
+    def test_default_sources(self):
+        """Test the default roll sources of the simulator classes."""
+        cfg = Config()
+        weapon = Weapon("Scimitar", cfg)
+        attack_sim = AttackSimulator(weapon, cfg)
+        legend_effect = LegendEffect(StatsCollector(), weapon, attack_sim)
+
+        assert type(attack_sim.roll_source) is RollSource
+        assert legend_effect.roll_source is attack_sim.roll_source
+        assert isinstance(DamageSimulator("Scimitar", cfg).roll_source, BufferedRollSource)
+
+    def test_roll_source_is_shared(self):
+        """Test that DamageSimulator passes its roll source to the attack simulator and legendary effect."""
+        roll_source = BufferedRollSource(seed=6)
+        simulator = DamageSimulator("Scimitar", Config(), roll_source=roll_source)
+        assert simulator.attack_sim.roll_source is roll_source
+        assert simulator.legend_effect.roll_source is roll_source
+
+    def test_simulation_is_reproducible(self):
+        """Test that seeded roll sources yield identical simulation results."""
+        cfg = Config(ROUNDS=50)
+        with patch('builtins.print'):
+            results_1 = DamageSimulator("Scimitar", cfg, roll_source=BufferedRollSource(seed=7)).simulate_dps()
+            results_2 = DamageSimulator("Scimitar", cfg, roll_source=BufferedRollSource(seed=7)).simulate_dps()
+        assert results_1['dps_vs_damage'] == results_2['dps_vs_damage']
+        assert results_1['summary'] == results_2['summary']
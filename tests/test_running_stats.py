@@ -0,0 +1,118 @@
+"""
+Unit tests for the BatchMeans and ThinnedSeries classes from simulator/running_stats.py
+
+This test suite covers:
+- Streaming batch means: bounded number of batches, mean and autocorrelation-aware error
+- Same batches added one by one or as arrays
+- Thinned (x, y) series: bounded, evenly spaced points and the latest point
+"""
+
+import json
+import math
+import pytest
+import numpy as np
+
+from simulator.running_stats import BatchMeans, ThinnedSeries
+
+
+class TestBatchMeans:
+    """Tests for the streaming batch means."""
+
+    def test_bounded_batches(self):
+        """Test that the batches stay between half and all of max_batches, and cover all the full batches."""
+        batch_means = BatchMeans(max_batches=16)
+        for value in range(1000):
+            batch_means.add(float(value))
+
+        assert 8 <= len(batch_means.batch_sums) < 16
+        assert batch_means.batch_rounds == 64
+        assert len(batch_means.batch_sums) * batch_means.batch_rounds + batch_means.partial_rounds == 1000
+        assert sum(batch_means.batch_sums) + batch_means.partial_sum == pytest.approx(sum(range(1000)))
+
+    def test_add_many_matches_add(self):
+        """Test that arrays of any size give the same batches as the values added one by one."""
+        values = np.random.default_rng(1).normal(50, 10, size=5000)
+        one_by_one, arrays = BatchMeans(max_batches=32), BatchMeans(max_batches=32)
+        for value in values:
+            one_by_one.add(value)
+        for chunk in np.array_split(values, [1, 7, 300, 301, 4000]):
+            arrays.add_many(chunk)
+
+        assert arrays.batch_rounds == one_by_one.batch_rounds
+        assert arrays.partial_rounds == one_by_one.partial_rounds
+        np.testing.assert_allclose(arrays.batch_sums, one_by_one.batch_sums)
+        assert arrays.mean == pytest.approx(values.mean())
+        assert arrays.variance == pytest.approx(values.var(ddof=1))
+
+    def test_independent_rounds(self):
+        """Test that independent rounds have about the naive error, and an effective sample size close to the rounds."""
+        batch_means = BatchMeans()
+        batch_means.add_many(np.random.default_rng(1).normal(50, 10, size=10000))
+        std_error, effective_rounds = batch_means.get_error_estimates()
+
+        assert std_error == pytest.approx(10 / 100, rel=0.3)
+        assert effective_rounds == pytest.approx(10000, rel=0.5)
+
+    def test_correlated_rounds(self):
+        """Test that rounds repeated 10 times (strongly correlated) have about a tenth of the effective sample size."""
+        values = np.repeat(np.random.default_rng(1).normal(50, 10, size=1000), 10)
+        batch_means = BatchMeans()
+        batch_means.add_many(values)
+        std_error, effective_rounds = batch_means.get_error_estimates()
+
+        assert std_error > 2 * values.std(ddof=1) / math.sqrt(len(values))
+        assert effective_rounds == pytest.approx(1000, rel=0.5)
+
+    def test_from_values(self):
+        """Test that a whole array gives the same batches as streamed values, and the iid error for few rounds."""
+        values = np.random.default_rng(1).normal(50, 10, size=3000)
+        streamed = BatchMeans()
+        streamed.add_many(values)
+        assert BatchMeans.from_values(values).batch_sums == streamed.batch_sums
+
+        assert BatchMeans.from_values([10.0]).get_error_estimates() == (0.0, 1.0)
+        assert BatchMeans.from_values([10.0, 20.0]).get_error_estimates()[0] == pytest.approx(5.0)
+
+    def test_empty(self):
+        batch_means = BatchMeans()
+        assert math.isnan(batch_means.mean)
+        assert batch_means.get_error_estimates()[1] == 0.0
+
+    def test_invalid_max_batches(self):
+        with pytest.raises(ValueError):
+            BatchMeans(max_batches=15)
+
+
+class TestThinnedSeries:
+    """Tests for the bounded (x, y) plot series."""
+
+    def test_bounded_and_evenly_spaced(self):
+        """Test that the kept points are the rounds multiple of the stride, at most max_points, plus the last one."""
+        series = ThinnedSeries(max_points=100)
+        for round_num in range(1, 1001):
+            series.add(round_num, round_num * 2.0)
+        result = series.to_dict()
+
+        assert 50 <= len(series.x_vals) <= 100
+        assert series.x_vals == list(range(series.stride, 1001, series.stride))
+        assert result['x'][-1] == 1000
+        assert result['y'] == [x * 2.0 for x in result['x']]
+        json.dumps(result)
+
+    def test_add_many_matches_add(self):
+        """Test that arrays of any size give the same series as the points added one by one."""
+        x_vals = np.cumsum(np.random.default_rng(1).integers(0, 100, size=3000))
+        y_vals = x_vals / np.arange(1, 3001)
+        one_by_one, arrays = ThinnedSeries(max_points=64), ThinnedSeries(max_points=64)
+        for x, y in zip(x_vals, y_vals):
+            one_by_one.add(x.item(), y.item())
+        for start, end in [(0, 5), (5, 6), (6, 1000), (1000, 3000)]:
+            arrays.add_many(x_vals[start:end], y_vals[start:end])
+
+        assert arrays.stride == one_by_one.stride
+        assert arrays.to_dict() == one_by_one.to_dict()
+
+    def test_short_series_kept(self):
+        series = ThinnedSeries()
+        series.add_many(np.array([60, 180, 360]), np.array([10.0, 15.0, 20.0]))
+        assert series.to_dict() == {'x': [60, 180, 360], 'y': [10.0, 15.0, 20.0]}
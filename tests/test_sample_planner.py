@@ -0,0 +1,71 @@
+"""
+Unit tests for the SamplePlanner class from simulator/sample_planner.py
+
+This test suite covers:
+- Rounds needed for the target DPS error (exact variance and pilot runs)
+- Limits of the planned rounds, and the z-score of the looks of the precision run
+- Predicted runtime of the plan
+"""
+
+import pytest
+
+from simulator.sample_planner import SamplePlanner
+from simulator.batch_engine import BatchEngine
+from simulator.damage_simulator import DamageSimulator
+from simulator.config import Config
+
+
+@pytest.fixture
+def cfg():
+    return Config()
+
+
+class TestSamplePlanner:
+    """Tests for the planned rounds per weapon."""
+
+    def test_invalid_target_raises(self, cfg):
+        with pytest.raises(ValueError):
+            SamplePlanner(cfg)     # TARGET_DPS_ERROR is 0 by default
+
+    def test_exact_and_pilot(self, cfg):
+        """Test that weapons without duration effects use the exact variance, the others a pilot run."""
+        planner = SamplePlanner(cfg, target_error=0.5, seed=1)
+        assert planner.get_round_std('Spear')[1] is True
+        assert planner.get_round_std('Darts')[1] is False
+
+    def test_rounds_scale_with_target(self):
+        """Test that halving the target error needs four times the rounds."""
+        cfg = Config(ROUNDS=10 ** 6)
+        round_std, _ = SamplePlanner(cfg, target_error=0.5).get_round_std('Spear')
+        rounds_1 = SamplePlanner(cfg, target_error=0.5).get_rounds(round_std)
+        rounds_2 = SamplePlanner(cfg, target_error=0.25).get_rounds(round_std)
+        assert rounds_2 == pytest.approx(4 * rounds_1, abs=4)
+
+    def test_rounds_limits(self, cfg):
+        planner = SamplePlanner(cfg, target_error=0.001)
+        assert planner.get_rounds(20.0) == cfg.ROUNDS
+        assert SamplePlanner(cfg, target_error=1000).get_rounds(20.0) == DamageSimulator.MIN_BLOCK_ROUNDS
+
+    def test_z_of_the_looks(self, cfg):
+        """Test that the plan uses the widened z-score of the looks of the precision run."""
+        num_looks = len(DamageSimulator.get_look_rounds(cfg.ROUNDS))
+        assert SamplePlanner(cfg, target_error=0.5).z == DamageSimulator.get_sequential_z(num_looks)
+        assert SamplePlanner(cfg, target_error=0.5).z > 2.576
+
+    @pytest.mark.parametrize('weapon', ['Spear', 'Club_Stone'])
+    def test_planned_precision_is_reached(self, weapon):
+        """Test that a run of the planned rounds has about the requested DPS error."""
+        cfg = Config(ROUNDS=10 ** 6)
+        planner = SamplePlanner(cfg, target_error=0.5, seed=1)
+        plan = planner.plan([weapon])[weapon]
+        results = BatchEngine(DamageSimulator(weapon, cfg), seed=3).simulate(plan['rounds'] * 10, block_rounds=100)
+        dps_error = planner.z * results['dps_std_error'] * (10 ** 0.5)   # Error of a run of the planned rounds
+
+        assert plan['rounds'] > DamageSimulator.MIN_BLOCK_ROUNDS
+        assert plan['dps_error'] == pytest.approx(0.5, abs=0.01)
+        assert dps_error == pytest.approx(0.5, rel=0.2)
+
+    def test_runtime(self, cfg):
+        plan = SamplePlanner(cfg, target_error=0.5, timing_rounds=50).plan(['Spear', 'Scythe'])
+        assert all(weapon_plan['seconds'] > 0 for weapon_plan in plan.values())
+        assert SamplePlanner.get_runtime(plan) == pytest.approx(plan['Spear']['seconds'] + plan['Scythe']['seconds'])
@@ -0,0 +1,62 @@
+"""
+Unit tests for the StatWeights class from simulator/stat_weights.py
+
+This test suite covers:
+- Perturbed configs (stats +1, additional damage sources toggled)
+- Exact stat weights from the AnalyticEngine
+"""
+
+import pytest
+
+from simulator.stat_weights import StatWeights, STAT_STEPS
+from simulator.config import Config
+
+
+@pytest.fixture
+def cfg():
+    return Config()
+
+
+class TestPerturbations:
+    """Tests for the perturbed configs."""
+
+    def test_stats_and_sources(self, cfg):
+        """Test that every stat is raised by its step, and every damage source is toggled, the base is unchanged."""
+        configs = StatWeights('Spear', cfg).perturbations()
+
+        assert set(configs.keys()) == set(STAT_STEPS) | set(cfg.ADDITIONAL_DAMAGE)
+        assert configs['AB'].AB == cfg.AB + 1
+        assert configs['TARGET_AC'].TARGET_AC == cfg.TARGET_AC + 1
+        assert configs['Flame_Weapon'].ADDITIONAL_DAMAGE['Flame_Weapon'][0] is False
+        assert configs['Bard_Song'].ADDITIONAL_DAMAGE['Bard_Song'][0] is True
+        assert cfg.ADDITIONAL_DAMAGE['Bard_Song'][0] is False
+
+    def test_sign(self, cfg):
+        weights = StatWeights('Spear', cfg)
+        assert weights.sign('AB') == 1
+        assert weights.sign('Bard_Song') == 1
+        assert weights.sign('Flame_Weapon') == -1     # Enabled, the weight is the DPS it adds
+
+
+class TestAnalyticWeights:
+    """Tests for the exact stat weights."""
+
+    def test_signs(self, cfg):
+        """Test that AB and damage help, target AC hurts, and sources that don't apply are worth nothing."""
+        weights = StatWeights('Spear', cfg).analytic_weights()
+
+        assert weights['AB'] > 0
+        assert weights['STR_MOD'] > 0
+        assert weights['TARGET_AC'] < 0
+        assert weights['Flame_Weapon'] > 0
+        assert weights['Divine_Wrath'] > weights['Bard_Song'] > 0
+        assert weights['Tenacious_Blow'] == 0   # Double-sided weapons only
+
+    def test_capped_ab(self, cfg):
+        """Test that +1 AB is worth nothing when the attack bonus is capped (Scythe +10 enhancement)."""
+        assert StatWeights('Scythe', cfg).analytic_weights()['AB'] == 0
+
+    def test_str_matches_flat_damage(self, cfg):
+        """Test that +1 STR modifier is worth the same as +1 flat physical damage (one-handed)."""
+        weights = StatWeights('Spear', cfg).analytic_weights()
+        assert weights['STR_MOD'] == pytest.approx(weights['ENHANCEMENT_SET_BONUS'], abs=0.01)
@@ -0,0 +1,165 @@
+"""
+Unit tests for the TimeToKill class from simulator/time_to_kill.py
+
+This test suite covers:
+- Exact survival curve (dynamic programming), compared to hand computed and replicated fights
+- Replicated fights for weapons with legendary effect with duration, one block per fight
+- Mean and quantiles of the rounds to kill
+- Fight length sized from the expected length, truncated curves without mean
+- Input validation and JSON-serializable results
+"""
+
+import json
+import pytest
+import numpy as np
+
+from simulator.time_to_kill import TimeToKill
+from simulator.batch_engine import BatchEngine
+from simulator.config import Config
+
+
+@pytest.fixture
+def cfg():
+    return Config()
+
+
+class TestQuantiles:
+    """Tests for the quantiles of the survival curve."""
+
+    def test_get_quantile(self):
+        survival = np.array([1.0, 0.8, 0.3, 0.05, 0.0])
+        assert TimeToKill.get_quantile(survival, 0.1) == 1
+        assert TimeToKill.get_quantile(survival, 0.5) == 2
+        assert TimeToKill.get_quantile(survival, 0.95) == 3
+        assert TimeToKill.get_quantile(survival, 0.99) == 4
+
+    def test_quantile_beyond_curve(self):
+        assert TimeToKill.get_quantile(np.array([1.0, 0.5]), 0.9) is None
+
+    def test_convolve_matches_numpy(self):
+        rng = np.random.default_rng(0)
+        a, b = rng.random(500), rng.random(300)
+        np.testing.assert_allclose(TimeToKill.convolve(a, b), np.convolve(a, b), atol=1e-9)
+
+
+class TestExactSurvival:
+    """Tests for the dynamic programming over the damage per round distribution."""
+
+    def test_single_round_kill(self, cfg):
+        """Test that P(N > 1) is the chance that a single round deals less than the target HP."""
+        ttk = TimeToKill('Scimitar', cfg, target_hp=300)
+        survival = ttk.exact_survival()
+        round_pmf = ttk.analytic_engine.round_pmf()
+
+        assert survival[0] == 1.0
+        assert survival[1] == pytest.approx(round_pmf[:300].sum())
+        assert np.all(np.diff(survival) <= 0)
+
+    @pytest.mark.parametrize('crit_imm', [False, True])
+    def test_matches_replicated_fights(self, cfg, crit_imm):
+        """Test that the exact mean rounds to kill agrees with the replicated fights."""
+        ttk = TimeToKill('Scimitar', cfg, target_hp=3000, crit_imm=crit_imm, replications=5000, seed=3)
+        exact = ttk.exact_survival()
+        simulated = ttk.simulated_survival()
+
+        assert exact.sum() == pytest.approx(simulated.sum(), rel=0.02)
+        assert TimeToKill.get_quantile(exact, 0.5) == pytest.approx(TimeToKill.get_quantile(simulated, 0.5), abs=1)
+
+    def test_mean_close_to_hp_over_damage(self, cfg):
+        """Test that a long fight lasts about target HP / damage per round (renewal theory)."""
+        ttk = TimeToKill('Longsword', cfg, target_hp=50000)
+        dpr = ttk.analytic_engine.expected_dps()['dps_crits'] * 6
+        assert ttk.exact_survival().sum() == pytest.approx(50000 / dpr, rel=0.01)
+
+    def test_max_rounds(self, cfg):
+        survival = TimeToKill('Scimitar', cfg, target_hp=50000, max_rounds=10).exact_survival()
+        assert len(survival) == 11
+        assert survival[-1] == pytest.approx(1.0)
+
+    def test_skip_ahead_matches_round_by_round(self, cfg):
+        """Test that skipping the rounds that cannot kill gives the same curve as convolving every round."""
+        ttk = TimeToKill('Longsword', cfg, target_hp=50000)
+        assert ttk.get_skip_rounds(ttk.analytic_engine.round_pmf()) > 100
+        skipped = ttk.exact_survival()
+        ttk.get_skip_rounds = lambda round_pmf: 0
+        np.testing.assert_allclose(skipped, ttk.exact_survival(), atol=1e-7)
+
+    def test_duration_effect_raises(self, cfg):
+        with pytest.raises(ValueError):
+            TimeToKill('Darts', cfg).exact_survival()
+
+
+class TestRun:
+    """Tests for the time to kill results."""
+
+    def test_exact_results(self, cfg):
+        results = TimeToKill('Scimitar', cfg).run()
+
+        assert results['exact'] is True
+        assert results['truncated'] is False
+        assert results['target_hp'] == cfg.DAMAGE_LIMIT
+        assert results['mean_seconds'] == pytest.approx(results['mean_rounds'] * 6, abs=0.1)
+        assert results['p10'] <= results['p50'] <= results['p90'] <= results['p99']
+        json.dumps(results)
+
+    def test_duration_effect_replicated(self, cfg):
+        results = TimeToKill('Darts', cfg, target_hp=3000, replications=500, seed=1).run()
+
+        assert results['exact'] is False
+        assert results['survival'][0] == 1.0
+        assert results['survival'][-1] == 0.0
+        assert results['p50'] is not None
+        json.dumps(results)
+
+    def test_fights_start_without_effect(self, cfg, monkeypatch):
+        """Test that each fight is its own block of rounds, starting without legendary effect active."""
+        states = []
+        simulate_block = BatchEngine.simulate_block
+
+        def recording_block(engine, num_rounds):
+            states.append(engine.legend_effect.legend_attacks_left)
+            return simulate_block(engine, num_rounds)
+
+        monkeypatch.setattr(BatchEngine, 'simulate_block', recording_block)
+        TimeToKill('Darts', cfg, target_hp=3000, replications=200, seed=1).simulated_survival()
+        assert len(states) >= 200
+        assert states.count(0) >= 200
+
+    def test_replications_are_reproducible(self, cfg):
+        first = TimeToKill('Darts', cfg, target_hp=3000, replications=200, seed=5).run()
+        second = TimeToKill('Darts', cfg, target_hp=3000, replications=200, seed=5).run()
+        assert first == second
+
+    def test_run_both(self, cfg):
+        """Test that both targets are computed, the crit immune target takes longer to kill."""
+        results = TimeToKill.run_both('Scimitar', cfg, target_hp=3000)
+
+        assert results['crits'] == TimeToKill('Scimitar', cfg, target_hp=3000).run()
+        assert results['crit_imm']['mean_rounds'] > results['crits']['mean_rounds']
+        json.dumps(results)
+
+    def test_max_rounds_sized_from_target_hp(self, cfg):
+        """Test that a long fight is not cut at a fixed number of rounds (2M HP lasts ~6000 rounds with a Spear)."""
+        ttk = TimeToKill('Spear', cfg, target_hp=2_000_000)
+        dpr = ttk.analytic_engine.expected_dps()['dps_crits'] * 6
+        assert ttk.max_rounds > 2_000_000 / dpr
+
+        results = ttk.run()
+        assert results['truncated'] is False
+        assert results['mean_rounds'] == pytest.approx(2_000_000 / dpr, rel=0.01)
+        assert results['p50'] is not None
+
+    @pytest.mark.parametrize('weapon', ['Scimitar', 'Darts'])
+    def test_truncated_has_no_mean(self, cfg, weapon):
+        """Test that a curve cut before the target is dead is flagged, without a mean that only reports the cut."""
+        results = TimeToKill(weapon, cfg, target_hp=50000, max_rounds=10, replications=100, seed=1).run()
+
+        assert results['truncated'] is True
+        assert results['mean_rounds'] is None
+        assert results['mean_seconds'] is None
+        assert results['p50'] is None
+        json.dumps(results)
+
+    def test_invalid_target_hp(self, cfg):
+        with pytest.raises(ValueError):
+            TimeToKill('Scimitar', cfg, target_hp=0)
@@ -0,0 +1,125 @@
+"""
+Unit tests for the WeaponRace class from simulator/weapon_race.py
+
+This test suite covers:
+- Elimination of clearly inferior weapons, and the rounds saved
+- Results of all weapons, in the DamageSimulator format
+- Confidence intervals of the average DPS
+- Importance sampled legendary procs for the DPS estimate of weapons with rare procs
+- Stratified rolls (STRATIFIED_ROLLS) for the weapons that support them
+- Maximum rounds (ROUNDS) and requested DPS precision (TARGET_DPS_ERROR) per weapon
+"""
+
+import json
+import pytest
+
+from simulator.weapon_race import WeaponRace
+from simulator.analytic_engine import AnalyticEngine
+from simulator.damage_simulator import DamageSimulator
+from simulator.config import Config
+
+
+@pytest.fixture
+def cfg():
+    return Config(ROUNDS=6000)
+
+
+class TestWeaponRace:
+    """Tests for the racing of the weapons."""
+
+    def test_inferior_weapon_eliminated(self, cfg):
+        """Test that a clearly worse weapon is eliminated early, and the winner runs all rounds."""
+        race = WeaponRace(['Scythe', 'Darts'], cfg, seed=1)
+        race.run()
+
+        assert race.eliminated == ['Darts']
+        assert race.active == ['Scythe']
+        assert race.rounds_done('Darts') < cfg.ROUNDS
+        assert race.rounds_done('Scythe') == cfg.ROUNDS
+        assert race.total_rounds() < 2 * cfg.ROUNDS
+
+    def test_close_weapons_run_all_rounds(self, cfg):
+        """Test that close contenders are not eliminated, both run all rounds."""
+        race = WeaponRace(['Greatsword_Desert', 'Greatsword_Legion'], cfg, seed=1)
+        race.run()
+
+        assert race.eliminated == []
+        assert race.total_rounds() == 2 * cfg.ROUNDS
+
+    def test_results_format(self, cfg):
+        """Test that all weapons get results with the DamageSimulator keys, that can be stored as JSON."""
+        weapons = ['Scythe', 'Darts', 'Club_Stone']
+        results = WeaponRace(weapons, cfg, seed=1).run()
+
+        assert set(results.keys()) == set(weapons)
+        for weapon, weapon_results in results.items():
+            assert weapon_results['rounds'] > 0
+            assert len(weapon_results['dps_vs_damage']['x']) == len(weapon_results['dps_vs_damage']['y'])
+            assert weapon_results['dps_vs_damage']['y'][-1] == pytest.approx(weapon_results['dps_crits'], abs=0.01)
+            assert sum(weapon_results['damage_by_type'].values()) > 0
+        json.dumps(results)
+
+    def test_winner_matches_analytic_engine(self, cfg):
+        """Test that the winner's DPS agrees with the exact expected DPS (within 2%)."""
+        results = WeaponRace(['Scythe', 'Darts'], cfg, seed=1).run()
+        expected = AnalyticEngine(DamageSimulator('Scythe', cfg)).expected_dps()
+
+        assert results['Scythe']['avg_dps_both'] == pytest.approx(expected['avg_dps_both'], rel=0.02)
+
+    def test_progress_callback(self, cfg):
+        calls = []
+        WeaponRace(['Scythe', 'Darts'], cfg, seed=1).run(lambda *args: calls.append(args))
+
+        assert calls[-1][1:] == (cfg.ROUNDS, cfg.ROUNDS)
+        assert calls[-1][0] == ['Scythe']
+
+    def test_proc_sampling_estimate(self, cfg):
+        """Test that weapons with rare procs race on the importance sampled DPS, with the rolled damage kept."""
+        race = WeaponRace(['Dagger_FW', 'Scimitar'], cfg, seed=1)
+        results = race.run()
+        expected = AnalyticEngine(DamageSimulator('Dagger_FW', cfg)).expected_dps()
+        calculator = race.calculators['Dagger_FW']
+
+        assert race.engines['Dagger_FW'].supports_proc_sampling()
+        assert results['Dagger_FW']['dps_crits'] == pytest.approx(expected['dps_crits'], rel=0.02)
+        assert results['Dagger_FW']['round_damage_summary']['mean'] == pytest.approx(
+            calculator.total_dmg / race.rounds_done('Dagger_FW'))
+        assert sum(results['Dagger_FW']['damage_by_type'].values()) == calculator.total_dmg
+
+    def test_stratified_rolls(self):
+        """Test that STRATIFIED_ROLLS races with stratified engines, except for weapons with legendary effect with duration."""
+        race = WeaponRace(['Spear', 'Darts'], Config(ROUNDS=6000, STRATIFIED_ROLLS=True), seed=1)
+        assert race.engines['Spear'].stratified
+        assert not race.engines['Darts'].stratified
+
+        results = race.run()
+        expected = AnalyticEngine(DamageSimulator('Spear', Config())).expected_dps()
+        assert results['Spear']['dps_crits'] == pytest.approx(expected['dps_crits'], rel=0.03)
+
+    def test_rounds_cap_respected(self):
+        """Test that ROUNDS below two increments is not raised, the increments are shortened instead."""
+        race = WeaponRace(['Scythe', 'Darts'], Config(ROUNDS=600), seed=1)
+        race.run()
+
+        assert race.step_rounds == 300
+        assert max(race.rounds_done(weapon) for weapon in race.calculators) == 600
+
+    def test_target_precision_stops_weapons(self):
+        """Test that weapons stop once their DPS reaches the requested precision, and stay ranked."""
+        cfg = Config(ROUNDS=100000, TARGET_DPS_ERROR=0.5)
+        race = WeaponRace(['Greatsword_Desert', 'Greatsword_Legion'], cfg, seed=1)
+        results = race.run()
+
+        assert sorted(race.finished) == ['Greatsword_Desert', 'Greatsword_Legion']
+        for weapon, weapon_results in results.items():
+            assert race.rounds_done(weapon) < cfg.ROUNDS
+            assert weapon_results['dps_error'] <= 0.5
+
+    def test_interval(self, cfg):
+        race = WeaponRace(['Scythe'], cfg, step_rounds=500, seed=1)
+        race.advance('Scythe')
+        race.advance('Scythe')
+        dps, dps_error = race.get_interval('Scythe')
+
+        assert dps > 0
+        assert 0 < dps_error < dps * 0.1
@@ -57,7 +57,7 @@ WEAPON_PROPERTIES = {
 PURPLE_WEAPONS = {
     # MELEE TWO-HANDED WEAPONS:
     'Halberd': {'enhancement': 7, 'sneak': [2, 6], 'bludgeoning': [2, 12], 'massive': [0, 0, 200], 'legendary': {'proc': 0.05, 'fire': [1, 50], 'pure': [1, 50]}}, # Ahrim's Sacrifice, hold on hit, 43
-    'Heavy Flail': {'enhancement': 7, 'slashing': [2, 12], 'negative': [2, 6], 'divine': [2, 6], 'magical': [2, 6], 'legendary': {'proc': 0.05, 'physical': [0, 0, 5]}}, # [0, 2.5, 'physical']], # None
+    'Heavy Flail': {'enhancement': 7, 'slashing': [2, 12], 'negative': [2, 6], 'divine': [2, 6], 'magical': [2, 6], 'legendary': {'proc': 0.05, 'physical': [0, 0, 5], 'effect': 'common_damage'}}, # [0, 2.5, 'physical']], # None
     'Greataxe': {'enhancement': 7, 'bludgeoning': [2, 12], 'divine': [2, 8], 'fire': [2, 12], 'vs_race_undead': {'enhancement': 12, 'pure': [2, 12]}}, # immune level drain
     'Greatsword_Desert': {'enhancement': 7, 'piercing': [2, 12], 'divine': [2, 8], 'fire': [2, 8], 'massive': [2, 12], 'pure': [1, 6]},  # Pure vs. Evil
     'Greatsword_Legion': {'enhancement': 7, 'piercing': [2, 12], 'divine': [2, 8], 'cold': [2, 8], 'massive': [2, 12], 'legendary': {'proc': 0.05, 'effect': 'sunder'}},  # Sunder effect (-2 AC for 2 rounds)